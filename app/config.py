@@ -20,6 +20,23 @@ class Settings(BaseSettings):
     # Database
     DATABASE_URL: str = "sqlite:///./data/crm.db"
     
+    # Database - Connection Pool (server databases such as PostgreSQL)
+    DB_POOL_SIZE: int = 5  # Persistent connections per worker process
+    DB_MAX_OVERFLOW: int = 10  # Extra connections allowed under load
+    DB_POOL_TIMEOUT: int = 30  # seconds to wait for a free connection
+    DB_POOL_RECYCLE: int = 1800  # seconds before a connection is replaced
+    DB_POOL_PRE_PING: bool = True  # Test connections before use (drops dead ones)
+    DB_STATEMENT_TIMEOUT_MS: int = 30000  # PostgreSQL statement_timeout (0 = none)
+    DB_LOCK_TIMEOUT_MS: int = 10000  # PostgreSQL lock_timeout (0 = none)
+    DB_IDLE_IN_TRANSACTION_TIMEOUT_MS: int = 60000  # PostgreSQL idle_in_transaction_session_timeout (0 = none)
+    
+    # Database - SQLite Pragmas
+    SQLITE_JOURNAL_MODE: str = "WAL"  # WAL lets readers run alongside a writer
+    SQLITE_SYNCHRONOUS: str = "NORMAL"  # Safe with WAL, far fewer fsyncs than FULL
+    SQLITE_BUSY_TIMEOUT_MS: int = 5000  # Wait for locks instead of failing with "database is locked"
+    SQLITE_CACHE_SIZE_KB: int = 65536  # Page cache per connection
+    SQLITE_MMAP_SIZE: int = 268435456  # bytes of the database file memory-mapped (0 = off)
+    
     # Security
     SECRET_KEY: str = "your-secret-key-change-in-production"
     ALGORITHM: str = "HS256"
@@ -48,11 +65,101 @@ class Settings(BaseSettings):
     WORKER_TIMEOUT: int = 120  # seconds
     KEEP_ALIVE: int = 5  # seconds
     
-    # Background Tasks Configuration
+    # Background Tasks Configuration (durable job queue)
     BACKGROUND_TASK_ENABLED: bool = True
-    TASK_QUEUE_SIZE: int = 100
-    TASK_RETRY_COUNT: int = 3
-    TASK_RETRY_DELAY: int = 60  # seconds
+    TASK_RETRY_COUNT: int = 3  # attempts before a job is dead-lettered
+    TASK_RETRY_DELAY: int = 60  # seconds; first retry backoff, doubled per attempt
+    JOB_BACKOFF_MAX_SECONDS: int = 3600  # cap of the retry backoff
+    JOB_WORKER_EMBEDDED: bool = True  # also run a worker pool inside each API process
+    JOB_WORKER_CONCURRENCY: int = 4  # jobs run in parallel per worker pool
+    JOB_POLL_INTERVAL: float = 1.0  # seconds between claims when the queue is idle
+    JOB_LEASE_SECONDS: int = 300  # a running job is reclaimed if its worker stops heartbeating this long
+    JOB_TENANT_CONCURRENCY: int = 2  # running jobs per company across all workers (0 = unlimited)
+    JOB_RETENTION_HOURS: int = 24  # completed jobs kept for progress and stats
+    JOB_DEAD_RETENTION_DAYS: int = 30  # dead-lettered jobs kept for inspection
+    
+    # Bulk Duplicate Scan
+    DEDUP_SCAN_WORKERS: int = 0  # Scoring processes (0 = CPU count)
+    DEDUP_SCAN_WINDOW: int = 20  # Sorted-neighborhood window size
+    DEDUP_SCAN_CHUNK_SIZE: int = 5000  # Candidate pairs per worker batch
+    DEDUP_SCAN_PARALLEL_MIN_LEADS: int = 5000  # Below this, score pairs in-process
+    
+    # Unique ID Sequences
+    ID_SEQUENCE_BLOCK_SIZE: int = 1  # IDs reserved per worker at a time (1 = allocate in the insert transaction)
+    
+    # Permission Cache
+    PERMISSION_CACHE_TTL: int = 60  # seconds; also bounds staleness across worker processes
+    
+    # User Cache (get_current_user)
+    USER_CACHE_SIZE: int = 1024  # max cached users (and, separately, decoded tokens)
+    USER_CACHE_TTL: int = 60  # seconds; also bounds staleness across worker processes
+
+    # Bulk Lead Scoring
+    LEAD_FEATURE_CHUNK_SIZE: int = 5000  # Leads per feature frame (bounds memory of bulk scoring)
+    
+    # Incremental Rescoring (dirty lead/customer queue)
+    RESCORING_ENABLED: bool = True
+    RESCORING_DEBOUNCE_SECONDS: int = 2  # quiet period after the last write before rescoring
+    RESCORING_MAX_DELAY_SECONDS: int = 30  # rescore even under continuous writes after this long
+    RESCORING_POLL_INTERVAL: float = 1.0  # seconds between worker polls
+    RESCORING_BATCH_SIZE: int = 500  # marks rescored per run
+    
+    # Periodic Job Scheduler (cron expressions, UTC)
+    SCHEDULER_ENABLED: bool = True
+    SCHEDULER_TICK_SECONDS: float = 15.0  # seconds between due-job checks
+    SCHEDULER_LEASE_SECONDS: int = 60  # another process takes over if the leader stops renewing this long
+    SCHEDULE_EMAIL_REMINDER: str = "* * * * *"  # due email sequence emails (rate limits are per minute)
+    SCHEDULE_LOG_CLEANUP: str = "30 3 * * *"
+    SCHEDULE_LEAD_SCORES: str = "0 2 * * *"  # nightly lead score recalculation
+    SCHEDULE_HEALTH_SCORES: str = "30 2 * * *"  # nightly customer health recalculation
+    SCHEDULE_DATA_BACKUP: str = "0 1 * * *"
+    BACKUP_ENABLED: bool = True  # SQLite only
+    BACKUP_DIR: str = "./data/backups"
+    BACKUP_KEEP: int = 7  # most recent backups kept
+    
+    # Buffered Log / Audit Writer (group commit)
+    LOG_BUFFER_ENABLED: bool = True  # off = every entry is written synchronously
+    LOG_BUFFER_CAPACITY: int = 10000  # buffered entries per table; the oldest are dropped beyond this
+    LOG_FLUSH_BATCH_SIZE: int = 500  # flush as soon as this many entries are waiting (and rows per INSERT)
+    LOG_FLUSH_INTERVAL_MS: int = 200  # flush at least this often
+    
+    # Retention and Archival (logs, audit trail)
+    LOG_RETENTION_DAYS: int = 90  # logs older than this are archived and deleted
+    AUDIT_RETENTION_DAYS: int = 1095  # audit trail entries older than this are archived and deleted
+    RETENTION_BATCH_SIZE: int = 5000  # rows deleted per transaction
+    RETENTION_BATCH_PAUSE_MS: int = 50  # pause between batches so API writers get the write lock
+    ARCHIVE_ENABLED: bool = True  # write expired rows to compressed JSONL segments before deleting
+    ARCHIVE_DIR: str = "./data/archive"  # <table>/<YYYY-MM>/ segment directories
+    ARCHIVE_RETENTION_MONTHS: int = 0  # archived months kept (0 = forever)
+    
+    # Report Exports
+    REPORT_EXPORT_CHUNK_SIZE: int = 2000  # rows fetched per round trip while streaming (yield_per)
+    REPORT_EXPORT_SPOOL_BYTES: int = 8 * 1024 * 1024  # XLSX kept in memory up to this size, then on disk
+    REPORT_EXPORT_DIR: str = "./data/exports"  # export files of download tokens
+    REPORT_DOWNLOAD_TTL_SECONDS: int = 3600  # download tokens expire after this long
+    
+    # Report Execution (result cache and asynchronous runs)
+    REPORT_CACHE_MAX_ENTRIES: int = 256  # cached JSON results per process
+    REPORT_CACHE_MAX_BYTES: int = 64 * 1024 * 1024  # total encoded size of cached results per process
+    REPORT_RUN_PAGE_SIZE: int = 1000  # rows per stored page of an asynchronous run
+    REPORT_RUN_RETENTION_HOURS: int = 24  # asynchronous run results are deleted after this long
+    
+    # Lead Imports
+    IMPORT_DIR: str = "./data/imports"  # uploaded import files
+    LEAD_IMPORT_CHUNK_SIZE: int = 2000  # rows validated and inserted per transaction (one checkpoint each)
+    LEAD_IMPORT_MAX_ISSUES: int = 1000  # rejected rows kept on an import for review
+    
+    # Email Delivery (SMTP connection pool and sequence email dispatcher)
+    EMAIL_POOL_SIZE: int = 4  # SMTP connections kept open (and messages sent in parallel)
+    EMAIL_CONNECTION_MAX_MESSAGES: int = 100  # a connection is replaced after sending this many messages
+    EMAIL_CONNECTION_IDLE_SECONDS: int = 60  # idle connections older than this are closed instead of reused
+    EMAIL_SMTP_TIMEOUT: float = 30.0  # seconds per SMTP command
+    EMAIL_DISPATCH_BATCH_SIZE: int = 200  # due emails claimed per batch
+    EMAIL_CLAIM_TIMEOUT_SECONDS: int = 600  # claimed emails not sent after this long are released
+    EMAIL_RETRY_DELAY_SECONDS: int = 300  # first retry of a deferred (4xx) email, doubled per attempt
+    EMAIL_MAX_SEND_ATTEMPTS: int = 5  # deferred emails are marked failed after this many attempts
+    EMAIL_DOMAIN_RATE_PER_MINUTE: int = 60  # messages per recipient domain
+    EMAIL_PROVIDER_RATE_PER_MINUTE: int = 300  # messages per mailbox provider (all of its domains)
     
     # Rate Limiting
     RATE_LIMIT_ENABLED: bool = True
@@ -73,6 +180,7 @@ class Settings(BaseSettings):
     SMTP_USER: Optional[str] = None
     SMTP_PASSWORD: Optional[str] = None
     SMTP_FROM_EMAIL: str = "noreply@crmsaas.com"
+    SMTP_USE_TLS: bool = True  # STARTTLS after connecting
     
     # WhatsApp Configuration
     WHATSAPP_API_URL: Optional[str] = None
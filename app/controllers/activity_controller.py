@@ -10,14 +10,26 @@ from app.models.activity import Activity
 from app.models.user import User
 from app.schemas.activity import ActivityCreate, ActivityUpdate
 from app.services import audit_service
+from app.services.rescoring_service import RescoringService
 from app.utils.unique_id import generate_activity_id
+from app.utils.relation_loader import RelationLoader
 
 
 class ActivityController:
     """Activity management business logic"""
     
+    # Sortable fields for list endpoints
+    SORT_FIELDS = {
+        "activity_date": Activity.activity_date,
+        "id": Activity.id,
+        "activity_type": Activity.activity_type,
+    }
+    DEFAULT_SORT = [Activity.activity_date.desc(), Activity.id.desc()]
+    # Keyset (cursor) pagination columns: (timestamp, tiebreaker)
+    CURSOR_COLUMNS = (Activity.activity_date, Activity.id)
+    
     @staticmethod
-    def get_activities(
+    def get_activities_query(
         company_id: int,
         current_user: User,
         db: Session,
@@ -26,8 +38,8 @@ class ActivityController:
         lead_id: Optional[int] = None,
         deal_id: Optional[int] = None,
         user_id: Optional[int] = None
-    ) -> List[Activity]:
-        """Get all activities in company"""
+    ):
+        """Build filtered (unordered) activities query for company"""
         query = db.query(Activity).filter(Activity.company_id == company_id)
         
         if activity_type:
@@ -45,7 +57,24 @@ class ActivityController:
         if user_id:
             query = query.filter(Activity.user_id == user_id)
         
-        activities = query.order_by(Activity.activity_date.desc()).all()
+        return query
+    
+    @staticmethod
+    def get_activities(
+        company_id: int,
+        current_user: User,
+        db: Session,
+        activity_type: Optional[str] = None,
+        customer_id: Optional[int] = None,
+        lead_id: Optional[int] = None,
+        deal_id: Optional[int] = None,
+        user_id: Optional[int] = None
+    ) -> List[Activity]:
+        """Get all activities in company"""
+        query = ActivityController.get_activities_query(
+            company_id, current_user, db, activity_type, customer_id, lead_id, deal_id, user_id
+        )
+        activities = query.order_by(*ActivityController.DEFAULT_SORT).all()
         return activities
     
     @staticmethod
@@ -68,56 +97,13 @@ class ActivityController:
         # Generate unique ID (v2.1.0 feature)
         new_activity.unique_id = generate_activity_id(company_id, db=db)
         
+        # Rescore the linked lead and customer in the background (debounced)
+        RescoringService.mark_leads(db, company_id, [new_activity.lead_id])
+        RescoringService.mark_customers(db, company_id, [new_activity.customer_id])
+        
         db.commit()
         db.refresh(new_activity)
         
-        # Auto-update customer health score if activity is linked to customer
-        if new_activity.customer_id:
-            from app.utils.health_score import HealthScoreCalculator
-            HealthScoreCalculator.update_health_score(
-                new_activity.customer_id,
-                company_id,
-                db,
-                force_update=True
-            )
-        
-        # Auto-increment lead score if activity is linked to lead
-        if new_activity.lead_id:
-            from app.utils.lead_scoring import LeadScoringAlgorithm
-            
-            # Determine increment based on activity type and outcome
-            increment = 0
-            reason = f"{new_activity.activity_type} activity"
-            
-            if new_activity.activity_type == "email":
-                if "opened" in (new_activity.description or "").lower():
-                    increment = 5
-                    reason = "Email opened"
-                elif "clicked" in (new_activity.description or "").lower():
-                    increment = 10
-                    reason = "Email clicked"
-                else:
-                    increment = 3
-            elif new_activity.activity_type == "call":
-                increment = 5
-                if new_activity.outcome == "positive":
-                    increment += 3
-            elif new_activity.activity_type == "meeting":
-                increment = 10
-                if new_activity.outcome == "positive":
-                    increment += 5
-            elif new_activity.outcome == "positive":
-                increment = 5
-            
-            if increment > 0:
-                LeadScoringAlgorithm.increment_lead_score(
-                    new_activity.lead_id,
-                    company_id,
-                    increment,
-                    db,
-                    reason=reason
-                )
-        
         # Log audit trail
         try:
             audit_service.log_create(
@@ -141,7 +127,7 @@ class ActivityController:
         db: Session
     ) -> Activity:
         """Get activity by ID"""
-        activity = db.query(Activity).filter(
+        activity = db.query(Activity).options(*RelationLoader.options(Activity)).filter(
             Activity.id == activity_id,
             Activity.company_id == company_id
         ).first()
@@ -165,7 +151,8 @@ class ActivityController:
         """Update activity"""
         activity = ActivityController.get_activity(activity_id, company_id, current_user, db)
         
-        # Store old customer_id before update
+        # Store old lead/customer before update
+        old_lead_id = activity.lead_id
         old_customer_id = activity.customer_id
         
         # Store old values for audit
@@ -177,27 +164,13 @@ class ActivityController:
         for key, value in update_data.items():
             setattr(activity, key, value)
         
+        # Rescore old and new lead/customer in the background (debounced)
+        RescoringService.mark_leads(db, company_id, [activity.lead_id, old_lead_id])
+        RescoringService.mark_customers(db, company_id, [activity.customer_id, old_customer_id])
+        
         db.commit()
         db.refresh(activity)
         
-        # Auto-update health score for both old and new customer (if changed)
-        if activity.customer_id or old_customer_id:
-            from app.utils.health_score import HealthScoreCalculator
-            if activity.customer_id:
-                HealthScoreCalculator.update_health_score(
-                    activity.customer_id,
-                    company_id,
-                    db,
-                    force_update=True
-                )
-            if old_customer_id and old_customer_id != activity.customer_id:
-                HealthScoreCalculator.update_health_score(
-                    old_customer_id,
-                    company_id,
-                    db,
-                    force_update=True
-                )
-        
         # Log audit trail
         try:
             audit_service.log_update(
@@ -233,8 +206,9 @@ class ActivityController:
                 detail="Activity not found"
             )
         
-        # Store customer_id before deletion
-        customer_id = activity.customer_id
+        # Rescore the linked lead and customer in the background (debounced)
+        RescoringService.mark_leads(db, company_id, [activity.lead_id])
+        RescoringService.mark_customers(db, company_id, [activity.customer_id])
         
         db.delete(activity)
         db.commit()
@@ -251,16 +225,6 @@ class ActivityController:
             )
         except Exception:
             pass
-        
-        # Auto-update customer health score after deletion
-        if customer_id:
-            from app.utils.health_score import HealthScoreCalculator
-            HealthScoreCalculator.update_health_score(
-                customer_id,
-                company_id,
-                db,
-                force_update=True
-            )
     
     @staticmethod
     def get_timeline(
@@ -284,6 +248,8 @@ class ActivityController:
         if deal_id:
             query = query.filter(Activity.deal_id == deal_id)
         
-        activities = query.order_by(Activity.activity_date.desc()).limit(limit).all()
+        activities = query.options(*RelationLoader.options(Activity)).order_by(
+            Activity.activity_date.desc()
+        ).limit(limit).all()
         return activities
 
@@ -9,7 +9,8 @@ from datetime import datetime, timedelta
 from app.models.user import User
 from app.models.password_reset import PasswordResetToken
 from app.schemas.auth import UserRegister, UserLogin
-from app.utils.security import get_password_hash, verify_password, create_access_token
+from app.utils.security import get_password_hash, verify_password, create_access_token, token_version
+from app.utils.user_cache import UserCache
 from app.config import settings
 from app.services import log_service, audit_service
 
@@ -152,7 +153,8 @@ class AuthController:
         token_data = {
             "user_id": user.id,
             "email": user.email,
-            "role": user.role
+            "role": user.role,
+            "tv": token_version(user.password_hash)
         }
         access_token = create_access_token(token_data)
         
@@ -187,6 +189,7 @@ class AuthController:
         # Hash new password
         user.password_hash = get_password_hash(new_password)
         db.commit()
+        UserCache.invalidate_user(user.id)
     
     @staticmethod
     def create_password_reset_token(email: str, db: Session) -> dict:
@@ -359,6 +362,7 @@ class AuthController:
         reset_token.used_at = datetime.utcnow()
         
         db.commit()
+        UserCache.invalidate_user(user.id)
         
         # Log the password reset
         try:
@@ -10,16 +10,27 @@ from app.models.company import Company
 from app.models.user import User
 from app.models.user_company import UserCompany
 from app.schemas.company import CompanyCreate, CompanyUpdate
+from app.utils.permission_cache import PermissionCache
 from app.services import audit_service
 
 
 class CompanyController:
     """Company management business logic"""
     
+    # Sortable fields for list endpoints
+    SORT_FIELDS = {
+        "id": Company.id,
+        "name": Company.name,
+        "email": Company.email,
+        "status": Company.status,
+        "created_at": Company.created_at,
+    }
+    DEFAULT_SORT = [Company.id.asc()]
+    
     @staticmethod
-    def get_user_companies(user: User, db: Session, search: Optional[str] = None) -> List[Company]:
+    def get_user_companies_query(user: User, db: Session, search: Optional[str] = None):
         """
-        Get all companies user has access to
+        Build (unordered) query of companies user has access to
         
         Args:
             user: Current user
@@ -27,7 +38,7 @@ class CompanyController:
             search: Search query
             
         Returns:
-            List of companies
+            SQLAlchemy query
         """
         # Super admin can access all companies
         if user.role == "super_admin":
@@ -40,7 +51,13 @@ class CompanyController:
                 (Company.name.contains(search)) | (Company.email.contains(search))
             )
         
-        companies = query.all()
+        return query
+    
+    @staticmethod
+    def get_user_companies(user: User, db: Session, search: Optional[str] = None) -> List[Company]:
+        """Get all companies user has access to"""
+        query = CompanyController.get_user_companies_query(user, db, search)
+        companies = query.order_by(*CompanyController.DEFAULT_SORT).all()
         return companies
     
     @staticmethod
@@ -82,6 +99,7 @@ class CompanyController:
         db.add(user_company)
         
         db.commit()
+        PermissionCache.invalidate_membership(user_id=user.id, company_id=new_company.id)
         db.refresh(new_company)
         
         # Log audit trail
@@ -233,6 +251,9 @@ class CompanyController:
         db.delete(company)
         db.commit()
         
+        # Memberships and company-specific grants were removed with the company
+        PermissionCache.invalidate()
+        
         # Log audit trail
         try:
             audit_service.log_delete(
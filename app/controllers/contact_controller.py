@@ -13,21 +13,36 @@ from app.models.user_company import UserCompany
 from app.schemas.contact import ContactCreate, ContactUpdate
 from app.services import audit_service
 from app.utils.unique_id import generate_contact_id
+from app.utils.search_index import SearchIndex
+from app.utils.relation_loader import RelationLoader
 
 
 class ContactController:
     """Contact management business logic"""
     
+    # Sortable fields for list endpoints
+    SORT_FIELDS = {
+        "created_at": Contact.created_at,
+        "id": Contact.id,
+        "name": Contact.name,
+        "email": Contact.email,
+    }
+    DEFAULT_SORT = [
+        Contact.is_primary_contact.desc(),
+        Contact.created_at.desc(),
+        Contact.id.desc()
+    ]
+    
     @staticmethod
-    def get_contacts(
+    def get_contacts_query(
         company_id: int,
         account_id: Optional[int],
         current_user: User,
         db: Session,
         search: Optional[str] = None
-    ) -> List[Contact]:
+    ):
         """
-        Get all contacts in company (optionally filtered by account)
+        Build filtered (unordered) contacts query for company
         
         Args:
             company_id: Company ID
@@ -37,7 +52,7 @@ class ContactController:
             search: Search query
             
         Returns:
-            List of contacts
+            SQLAlchemy query
         """
         # Check user has access to company
         user_company = db.query(UserCompany).filter(
@@ -57,17 +72,26 @@ class ContactController:
             query = query.filter(Contact.account_id == account_id)
         
         if search:
-            query = query.filter(
-                (Contact.name.contains(search)) |
-                (Contact.email.contains(search)) |
-                (Contact.phone.contains(search)) |
-                (Contact.job_title.contains(search))
+            query = SearchIndex.apply(
+                query, Contact, search, db,
+                like_columns=[Contact.name, Contact.email, Contact.phone, Contact.job_title]
             )
         
-        contacts = query.order_by(
-            Contact.is_primary_contact.desc(),
-            Contact.created_at.desc()
-        ).all()
+        return query
+    
+    @staticmethod
+    def get_contacts(
+        company_id: int,
+        account_id: Optional[int],
+        current_user: User,
+        db: Session,
+        search: Optional[str] = None
+    ) -> List[Contact]:
+        """Get all contacts in company (optionally filtered by account)"""
+        query = ContactController.get_contacts_query(
+            company_id, account_id, current_user, db, search
+        )
+        contacts = query.order_by(*ContactController.DEFAULT_SORT).all()
         return contacts
     
     @staticmethod
@@ -190,7 +214,7 @@ class ContactController:
                 detail="You don't have access to this company"
             )
         
-        contact = db.query(Contact).filter(
+        contact = db.query(Contact).options(*RelationLoader.options(Contact)).filter(
             Contact.id == contact_id,
             Contact.company_id == company_id
         ).first()
@@ -14,14 +14,28 @@ from app.utils.helpers import generate_customer_code
 from app.utils.unique_id import generate_account_id
 from app.utils.health_score import HealthScoreCalculator
 from app.utils.lifecycle_stage import LifecycleStageAutomation
+from app.utils.search_index import SearchIndex
 from app.services import audit_service, log_service
 
 
 class CustomerController:
     """Customer management business logic"""
     
+    # Sortable fields for list endpoints
+    SORT_FIELDS = {
+        "created_at": Customer.created_at,
+        "id": Customer.id,
+        "name": Customer.name,
+        "status": Customer.status,
+        "email": Customer.email,
+        "customer_type": Customer.customer_type,
+        "health_score": Customer.health_score,
+        "lifecycle_stage": Customer.lifecycle_stage,
+    }
+    DEFAULT_SORT = [Customer.created_at.desc(), Customer.id.desc()]
+    
     @staticmethod
-    def get_customers(
+    def get_customers_query(
         company_id: int,
         current_user: User,
         db: Session,
@@ -29,9 +43,9 @@ class CustomerController:
         status: Optional[str] = None,
         customer_type: Optional[str] = None,
         assigned_to: Optional[int] = None
-    ) -> List[Customer]:
+    ):
         """
-        Get all customers in company
+        Build filtered (unordered) customers query for company
         
         Args:
             company_id: Company ID
@@ -43,15 +57,14 @@ class CustomerController:
             assigned_to: Filter by assigned user
             
         Returns:
-            List of customers
+            SQLAlchemy query
         """
         query = db.query(Customer).filter(Customer.company_id == company_id)
         
         if search:
-            query = query.filter(
-                (Customer.name.contains(search)) |
-                (Customer.email.contains(search)) |
-                (Customer.phone.contains(search))
+            query = SearchIndex.apply(
+                query, Customer, search, db,
+                like_columns=[Customer.name, Customer.email, Customer.phone]
             )
         
         if status:
@@ -63,7 +76,23 @@ class CustomerController:
         if assigned_to:
             query = query.filter(Customer.assigned_to == assigned_to)
         
-        customers = query.order_by(Customer.created_at.desc()).all()
+        return query
+    
+    @staticmethod
+    def get_customers(
+        company_id: int,
+        current_user: User,
+        db: Session,
+        search: Optional[str] = None,
+        status: Optional[str] = None,
+        customer_type: Optional[str] = None,
+        assigned_to: Optional[int] = None
+    ) -> List[Customer]:
+        """Get all customers in company"""
+        query = CustomerController.get_customers_query(
+            company_id, current_user, db, search, status, customer_type, assigned_to
+        )
+        customers = query.order_by(*CustomerController.DEFAULT_SORT).all()
         return customers
     
     @staticmethod
@@ -12,13 +12,25 @@ from app.models.user_company import UserCompany
 from app.schemas.deal import DealCreate, DealUpdate
 from app.services import audit_service
 from app.utils.unique_id import generate_opportunity_id
+from app.utils.relation_loader import RelationLoader
 
 
 class DealController:
     """Deal management business logic"""
     
+    # Sortable fields for list endpoints
+    SORT_FIELDS = {
+        "created_at": Deal.created_at,
+        "id": Deal.id,
+        "stage": Deal.stage,
+        "status": Deal.status,
+        "deal_value": Deal.deal_value,
+        "expected_close_date": Deal.expected_close_date,
+    }
+    DEFAULT_SORT = [Deal.created_at.desc(), Deal.id.desc()]
+    
     @staticmethod
-    def get_deals(
+    def get_deals_query(
         company_id: int,
         current_user: User,
         db: Session,
@@ -26,8 +38,8 @@ class DealController:
         stage: Optional[str] = None,
         status: Optional[str] = None,
         assigned_to: Optional[int] = None
-    ) -> List[Deal]:
-        """Get all deals in company"""
+    ):
+        """Build filtered (unordered) deals query for company"""
         query = db.query(Deal).filter(Deal.company_id == company_id)
         
         if search:
@@ -42,7 +54,23 @@ class DealController:
         if assigned_to:
             query = query.filter(Deal.assigned_to == assigned_to)
         
-        deals = query.order_by(Deal.created_at.desc()).all()
+        return query
+    
+    @staticmethod
+    def get_deals(
+        company_id: int,
+        current_user: User,
+        db: Session,
+        search: Optional[str] = None,
+        stage: Optional[str] = None,
+        status: Optional[str] = None,
+        assigned_to: Optional[int] = None
+    ) -> List[Deal]:
+        """Get all deals in company"""
+        query = DealController.get_deals_query(
+            company_id, current_user, db, search, stage, status, assigned_to
+        )
+        deals = query.order_by(*DealController.DEFAULT_SORT).all()
         return deals
     
     @staticmethod
@@ -113,7 +141,7 @@ class DealController:
         db: Session
     ) -> Deal:
         """Get deal by ID"""
-        deal = db.query(Deal).filter(
+        deal = db.query(Deal).options(*RelationLoader.options(Deal)).filter(
             Deal.id == deal_id,
             Deal.company_id == company_id
         ).first()
@@ -273,36 +301,15 @@ class DealController:
     
     @staticmethod
     def get_deal_stats(company_id: int, db: Session) -> dict:
-        """Get deal statistics and pipeline"""
-        from sqlalchemy import func
-        
-        total = db.query(func.count(Deal.id)).filter(
-            Deal.company_id == company_id
-        ).scalar()
+        """Get deal statistics and pipeline (from the materialized pipeline summary)"""
+        from app.services.pipeline_service import PipelineService, PIPELINE_STAGES
         
-        total_value = db.query(func.sum(Deal.deal_value)).filter(
-            Deal.company_id == company_id,
-            Deal.status == "open"
-        ).scalar()
-        
-        by_stage = {}
-        stages = ["prospect", "qualified", "proposal", "negotiation", "closed_won", "closed_lost"]
-        for s in stages:
-            count = db.query(func.count(Deal.id)).filter(
-                Deal.company_id == company_id,
-                Deal.stage == s
-            ).scalar()
-            by_stage[s] = count or 0
-        
-        won = db.query(func.count(Deal.id)).filter(
-            Deal.company_id == company_id,
-            Deal.status == "won"
-        ).scalar()
+        by_stage_totals = PipelineService.stage_totals(company_id, db)
+        by_status = PipelineService.status_totals(company_id, db)
         
         return {
-            "total_deals": total or 0,
-            "total_pipeline_value": float(total_value) if total_value else 0,
-            "by_stage": by_stage,
-            "deals_won": won or 0
+            "total_deals": sum(t["count"] for t in by_stage_totals.values()),
+            "total_pipeline_value": by_status.get("open", {}).get("total_value", 0),
+            "by_stage": {stage: by_stage_totals[stage]["count"] for stage in PIPELINE_STAGES},
+            "deals_won": by_status.get("won", {}).get("count", 0)
         }
-
@@ -11,18 +11,31 @@ from app.models.user import User
 from app.models.user_company import UserCompany
 from app.schemas.lead import LeadCreate, LeadUpdate
 from app.utils.lead_scoring import LeadScoringAlgorithm
-from app.utils.duplicate_detection import DuplicateDetectionEngine
+from app.utils.duplicate_detection import DuplicateDetectionEngine, DuplicateCandidateIndex
 from app.utils.assignment_rules import AssignmentRulesEngine, AssignmentRuleType
 from app.utils.nurturing_automation import NurturingAutomation
 from app.services import audit_service, log_service
+from app.services.rescoring_service import RescoringService
 from app.utils.unique_id import generate_lead_id
+from app.utils.search_index import SearchIndex
 
 
 class LeadController:
     """Lead management business logic"""
     
+    # Sortable fields for list endpoints (mapped to indexed columns)
+    SORT_FIELDS = {
+        "created_at": Lead.created_at,
+        "id": Lead.id,
+        "status": Lead.status,
+        "email": Lead.email,
+    }
+    DEFAULT_SORT = [Lead.created_at.desc(), Lead.id.desc()]
+    # Keyset (cursor) pagination columns: (timestamp, tiebreaker)
+    CURSOR_COLUMNS = (Lead.created_at, Lead.id)
+    
     @staticmethod
-    def get_leads(
+    def get_leads_query(
         company_id: int,
         current_user: User,
         db: Session,
@@ -30,15 +43,14 @@ class LeadController:
         status: Optional[str] = None,
         priority: Optional[str] = None,
         assigned_to: Optional[int] = None
-    ) -> List[Lead]:
-        """Get all leads in company"""
+    ):
+        """Build filtered (unordered) leads query for company"""
         query = db.query(Lead).filter(Lead.company_id == company_id)
         
         if search:
-            query = query.filter(
-                (Lead.lead_name.contains(search)) |
-                (Lead.email.contains(search)) |
-                (Lead.phone.contains(search))
+            query = SearchIndex.apply(
+                query, Lead, search, db,
+                like_columns=[Lead.lead_name, Lead.email, Lead.phone]
             )
         
         if status:
@@ -50,7 +62,23 @@ class LeadController:
         if assigned_to:
             query = query.filter(Lead.assigned_to == assigned_to)
         
-        leads = query.order_by(Lead.created_at.desc()).all()
+        return query
+    
+    @staticmethod
+    def get_leads(
+        company_id: int,
+        current_user: User,
+        db: Session,
+        search: Optional[str] = None,
+        status: Optional[str] = None,
+        priority: Optional[str] = None,
+        assigned_to: Optional[int] = None
+    ) -> List[Lead]:
+        """Get all leads in company"""
+        query = LeadController.get_leads_query(
+            company_id, current_user, db, search, status, priority, assigned_to
+        )
+        leads = query.order_by(*LeadController.DEFAULT_SORT).all()
         return leads
     
     @staticmethod
@@ -138,6 +166,9 @@ class LeadController:
         # Calculate initial lead score
         new_lead.lead_score = LeadScoringAlgorithm.calculate_lead_score(new_lead, db)
         
+        # Keep duplicate-candidate index current
+        DuplicateCandidateIndex.index_lead(new_lead, db)
+        
         db.commit()
         db.refresh(new_lead)
         
@@ -238,10 +269,13 @@ class LeadController:
         for key, value in update_data.items():
             setattr(lead, key, value)
         
-        # Recalculate lead score if qualification fields changed or score not explicitly set
-        score_fields = ['budget_range', 'authority_level', 'timeline', 'interest_product', 'priority', 'source']
-        if any(field in update_data for field in score_fields) or 'lead_score' not in update_data:
-            lead.lead_score = LeadScoringAlgorithm.calculate_lead_score(lead, db)
+        # Rescore in the background (debounced) if fields read by the scoring rules changed
+        if any(field in update_data for field in LeadScoringAlgorithm.SCORE_INPUT_FIELDS):
+            RescoringService.mark_leads(db, company_id, [lead.id])
+        
+        # Keep duplicate-candidate index current
+        if any(field in update_data for field in duplicate_check_fields):
+            DuplicateCandidateIndex.index_lead(lead, db)
         
         db.commit()
         db.refresh(lead)
@@ -301,6 +335,7 @@ class LeadController:
             )
         
         lead_name = lead.lead_name
+        DuplicateCandidateIndex.remove_lead(lead.id, db)
         db.delete(lead)
         db.commit()
         
@@ -12,13 +12,24 @@ from app.models.user import User
 from app.schemas.task import TaskCreate, TaskUpdate
 from app.services import audit_service
 from app.utils.unique_id import generate_task_id
+from app.utils.relation_loader import RelationLoader
 
 
 class TaskController:
     """Task management business logic"""
     
+    # Sortable fields for list endpoints
+    SORT_FIELDS = {
+        "due_date": Task.due_date,
+        "id": Task.id,
+        "created_at": Task.created_at,
+        "priority": Task.priority,
+        "status": Task.status,
+    }
+    DEFAULT_SORT = [Task.due_date.asc().nullslast(), Task.id.asc()]
+    
     @staticmethod
-    def get_tasks(
+    def get_tasks_query(
         company_id: int,
         current_user: User,
         db: Session,
@@ -27,8 +38,8 @@ class TaskController:
         priority: Optional[str] = None,
         assigned_to: Optional[int] = None,
         task_type: Optional[str] = None
-    ) -> List[Task]:
-        """Get all tasks in company"""
+    ):
+        """Build filtered (unordered) tasks query for company"""
         query = db.query(Task).filter(Task.company_id == company_id)
         
         if search:
@@ -49,7 +60,24 @@ class TaskController:
         if task_type:
             query = query.filter(Task.task_type == task_type)
         
-        tasks = query.order_by(Task.due_date.asc().nullslast()).all()
+        return query
+    
+    @staticmethod
+    def get_tasks(
+        company_id: int,
+        current_user: User,
+        db: Session,
+        search: Optional[str] = None,
+        status: Optional[str] = None,
+        priority: Optional[str] = None,
+        assigned_to: Optional[int] = None,
+        task_type: Optional[str] = None
+    ) -> List[Task]:
+        """Get all tasks in company"""
+        query = TaskController.get_tasks_query(
+            company_id, current_user, db, search, status, priority, assigned_to, task_type
+        )
+        tasks = query.order_by(*TaskController.DEFAULT_SORT).all()
         return tasks
     
     @staticmethod
@@ -98,7 +126,7 @@ class TaskController:
         db: Session
     ) -> Task:
         """Get task by ID"""
-        task = db.query(Task).filter(
+        task = db.query(Task).options(*RelationLoader.options(Task)).filter(
             Task.id == task_id,
             Task.company_id == company_id
         ).first()
@@ -10,22 +10,34 @@ from app.models.user import User
 from app.models.user_company import UserCompany
 from app.schemas.user import UserCreate, UserUpdate, UserRoleUpdate
 from app.utils.security import get_password_hash
+from app.utils.permission_cache import PermissionCache
+from app.utils.user_cache import UserCache
 from app.services import audit_service, log_service
 
 
 class UserController:
     """User management business logic"""
     
+    # Sortable fields for list endpoints
+    SORT_FIELDS = {
+        "id": User.id,
+        "email": User.email,
+        "first_name": User.first_name,
+        "last_name": User.last_name,
+        "created_at": User.created_at,
+    }
+    DEFAULT_SORT = [User.id.asc()]
+    
     @staticmethod
-    def get_company_users(
+    def get_company_users_query(
         company_id: int,
         current_user: User,
         db: Session,
         search: Optional[str] = None,
         role: Optional[str] = None
-    ) -> List[User]:
+    ):
         """
-        Get all users in a company
+        Build (unordered) query of users in a company
         
         Args:
             company_id: Company ID
@@ -35,7 +47,7 @@ class UserController:
             role: Filter by role
             
         Returns:
-            List of users
+            SQLAlchemy query
         """
         query = db.query(User).join(UserCompany).filter(UserCompany.company_id == company_id)
         
@@ -49,7 +61,21 @@ class UserController:
         if role:
             query = query.filter(UserCompany.role == role)
         
-        users = query.all()
+        return query
+    
+    @staticmethod
+    def get_company_users(
+        company_id: int,
+        current_user: User,
+        db: Session,
+        search: Optional[str] = None,
+        role: Optional[str] = None
+    ) -> List[User]:
+        """Get all users in a company"""
+        query = UserController.get_company_users_query(
+            company_id, current_user, db, search, role
+        )
+        users = query.order_by(*UserController.DEFAULT_SORT).all()
         return users
     
     @staticmethod
@@ -121,6 +147,7 @@ class UserController:
         db.add(user_company_assoc)
         
         db.commit()
+        PermissionCache.invalidate_membership(user_id=new_user.id, company_id=company_id)
         db.refresh(new_user)
         
         # Log audit trail
@@ -223,6 +250,7 @@ class UserController:
             setattr(user, key, value)
         
         db.commit()
+        UserCache.invalidate_user(user.id)
         db.refresh(user)
         
         # Log audit trail for update
@@ -289,6 +317,7 @@ class UserController:
         
         target_user_company.role = role_data.role
         db.commit()
+        PermissionCache.invalidate_membership(user_id=user_id, company_id=company_id)
     
     @staticmethod
     def delete_user(user_id: int, company_id: int, current_user: User, db: Session):
@@ -331,6 +360,8 @@ class UserController:
         
         db.delete(target_user_company)
         db.commit()
+        PermissionCache.invalidate_membership(user_id=user_id, company_id=company_id)
+        UserCache.invalidate_user(user_id)
         
         # Log audit trail for delete
         try:
@@ -1,18 +1,179 @@
 """
 Database Configuration and Session Management
-SQLite with SQLAlchemy
+SQLite (default) or PostgreSQL with SQLAlchemy
 """
 
-from sqlalchemy import create_engine
+import threading
+from typing import Any, Dict
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine, make_url
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from app.config import settings
 
+
+class PoolMetrics:
+    """Connection pool counters of an engine, updated from pool events"""
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.connects = 0
+        self.checkouts = 0
+        self.checkins = 0
+        self.invalidations = 0
+        self.peak_checked_out = 0
+        self.checked_out = 0
+    
+    def attach(self, engine: Engine):
+        """Listen to the engine's pool events"""
+        @event.listens_for(engine, "connect")
+        def on_connect(dbapi_connection, connection_record):
+            with self._lock:
+                self.connects += 1
+        
+        @event.listens_for(engine, "checkout")
+        def on_checkout(dbapi_connection, connection_record, connection_proxy):
+            with self._lock:
+                self.checkouts += 1
+                self.checked_out += 1
+                self.peak_checked_out = max(self.peak_checked_out, self.checked_out)
+        
+        @event.listens_for(engine, "checkin")
+        def on_checkin(dbapi_connection, connection_record):
+            with self._lock:
+                self.checkins += 1
+                self.checked_out = max(self.checked_out - 1, 0)
+        
+        @event.listens_for(engine, "invalidate")
+        def on_invalidate(dbapi_connection, connection_record, exception):
+            with self._lock:
+                self.invalidations += 1
+    
+    def snapshot(self, engine: Engine) -> Dict[str, Any]:
+        """Current pool state and counters"""
+        pool = engine.pool
+        data = {
+            "dialect": engine.dialect.name,
+            "pool_class": type(pool).__name__,
+            "checked_out": self.checked_out,
+            "peak_checked_out": self.peak_checked_out,
+            "connects": self.connects,
+            "checkouts": self.checkouts,
+            "checkins": self.checkins,
+            "invalidations": self.invalidations,
+        }
+        
+        # QueuePool sizing (not available on SingletonThreadPool/StaticPool)
+        if hasattr(pool, "size") and hasattr(pool, "overflow"):
+            data.update({
+                "pool_size": pool.size(),
+                "idle": pool.checkedin(),
+                "overflow": pool.overflow(),
+                "max_overflow": getattr(pool, "_max_overflow", None),
+                "status": pool.status(),
+            })
+        
+        return data
+
+
+def _sqlite_pragmas(in_memory: bool):
+    """PRAGMA statements run on every new SQLite connection"""
+    pragmas = [
+        f"PRAGMA busy_timeout = {int(settings.SQLITE_BUSY_TIMEOUT_MS)}",
+        f"PRAGMA cache_size = -{int(settings.SQLITE_CACHE_SIZE_KB)}",
+    ]
+    
+    # WAL and mmap need a database file
+    if not in_memory:
+        pragmas += [
+            f"PRAGMA journal_mode = {settings.SQLITE_JOURNAL_MODE}",
+            f"PRAGMA synchronous = {settings.SQLITE_SYNCHRONOUS}",
+            f"PRAGMA mmap_size = {int(settings.SQLITE_MMAP_SIZE)}",
+        ]
+    
+    return pragmas
+
+
+def create_db_engine(database_url: str) -> Engine:
+    """
+    Create a database engine configured from Settings
+    
+    SQLite: WAL journal, synchronous=NORMAL, page cache, mmap and a busy
+    timeout, so concurrent workers wait for the write lock instead of failing
+    with "database is locked".
+    PostgreSQL (and other server databases): QueuePool sizing, pre-ping and
+    server-side statement/lock/idle-transaction timeouts.
+    
+    Args:
+        database_url: SQLAlchemy database URL
+        
+    Returns:
+        Engine with pool metrics attached (engine.pool_metrics)
+    """
+    url = make_url(database_url)
+    backend = url.get_backend_name()
+    
+    if backend == "sqlite":
+        in_memory = url.database in (None, "", ":memory:")
+        kwargs: Dict[str, Any] = {
+            "connect_args": {
+                "check_same_thread": False,  # Connections are shared across threads by the pool
+                "timeout": settings.SQLITE_BUSY_TIMEOUT_MS / 1000,
+            }
+        }
+        if not in_memory:
+            kwargs.update(
+                pool_size=settings.DB_POOL_SIZE,
+                max_overflow=settings.DB_MAX_OVERFLOW,
+                pool_timeout=settings.DB_POOL_TIMEOUT,
+            )
+        
+        new_engine = create_engine(database_url, **kwargs)
+        pragmas = _sqlite_pragmas(in_memory)
+        
+        @event.listens_for(new_engine, "connect")
+        def set_sqlite_pragmas(dbapi_connection, connection_record):
+            cursor = dbapi_connection.cursor()
+            try:
+                for pragma in pragmas:
+                    cursor.execute(pragma)
+            finally:
+                cursor.close()
+    else:
+        connect_args: Dict[str, Any] = {}
+        
+        if backend == "postgresql":
+            options = []
+            if settings.DB_STATEMENT_TIMEOUT_MS:
+                options.append(f"-c statement_timeout={int(settings.DB_STATEMENT_TIMEOUT_MS)}")
+            if settings.DB_LOCK_TIMEOUT_MS:
+                options.append(f"-c lock_timeout={int(settings.DB_LOCK_TIMEOUT_MS)}")
+            if settings.DB_IDLE_IN_TRANSACTION_TIMEOUT_MS:
+                options.append(
+                    f"-c idle_in_transaction_session_timeout={int(settings.DB_IDLE_IN_TRANSACTION_TIMEOUT_MS)}"
+                )
+            if options:
+                connect_args["options"] = " ".join(options)
+            connect_args["application_name"] = settings.APP_NAME
+        
+        new_engine = create_engine(
+            database_url,
+            pool_size=settings.DB_POOL_SIZE,
+            max_overflow=settings.DB_MAX_OVERFLOW,
+            pool_timeout=settings.DB_POOL_TIMEOUT,
+            pool_recycle=settings.DB_POOL_RECYCLE,
+            pool_pre_ping=settings.DB_POOL_PRE_PING,
+            connect_args=connect_args,
+        )
+    
+    new_engine.pool_metrics = PoolMetrics()
+    new_engine.pool_metrics.attach(new_engine)
+    
+    return new_engine
+
+
 # Create database engine
-engine = create_engine(
-    settings.DATABASE_URL,
-    connect_args={"check_same_thread": False}  # Needed for SQLite
-)
+engine = create_db_engine(settings.DATABASE_URL)
 
 # Create session factory
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
@@ -21,6 +182,18 @@ SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
 
+def ensure_indexes():
+    """
+    Create indexes declared on models that are missing in the database
+    
+    create_all() only creates missing tables, so indexes added to existing
+    tables (e.g. composite list-ordering indexes) are created here.
+    """
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=engine, checkfirst=True)
+
+
 # Dependency to get DB session
 def get_db():
     """
@@ -33,3 +206,8 @@ def get_db():
     finally:
         db.close()
 
+
+
+def get_pool_stats() -> Dict[str, Any]:
+    """Connection pool metrics of the application engine"""
+    return engine.pool_metrics.snapshot(engine)
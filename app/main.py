@@ -10,7 +10,16 @@ from fastapi.staticfiles import StaticFiles
 import os
 from starlette.middleware.base import BaseHTTPMiddleware
 from app.config import settings
-from app.database import engine, Base
+from app.database import engine, Base, ensure_indexes
+from app.utils.search_index import SearchIndex
+from app.services.pipeline_service import PipelineService
+from app.services.deal_analytics_service import DealAnalyticsService
+from app.services.rescoring_service import RescoringService, RescoringWorker
+from app.services.scheduler_service import Scheduler
+from app.services.email_delivery_service import EmailDeliveryService
+from app.services.audit_service import audit_writer
+from app.services.log_service import log_writer, setup_log_rollup
+from app.utils.job_queue import JobQueue, start_embedded_worker, stop_embedded_worker
 from app.routes import auth, company, user, customer, contact, lead, deal, task, activity, email_sequence, permission, audit, logs, admin, reports, data_management, nurturing, qualification
 import logging
 import time
@@ -24,6 +33,11 @@ logger = logging.getLogger(__name__)
 
 # Create database tables
 Base.metadata.create_all(bind=engine)
+ensure_indexes()
+SearchIndex.setup(engine)
+PipelineService.setup(engine)
+DealAnalyticsService.setup(engine)
+setup_log_rollup(engine)
 
 # Initialize FastAPI app
 app = FastAPI(
@@ -133,18 +147,62 @@ async def health_check():
     }
 
 
+# Background workers
+@app.on_event("startup")
+async def start_background_workers():
+    """Start the log/audit writers, the embedded job worker pool, the rescoring worker and the periodic job scheduler"""
+    log_writer.start()
+    audit_writer.start()
+    start_embedded_worker()
+    RescoringWorker.start()
+    Scheduler.start()
+
+
+@app.on_event("shutdown")
+async def stop_background_workers():
+    """Stop the background workers"""
+    Scheduler.stop()
+    RescoringWorker.stop()
+    stop_embedded_worker()
+    EmailDeliveryService.close()
+    # Last: flush entries logged while the other workers shut down
+    audit_writer.stop()
+    log_writer.stop()
+
+
 # Background Tasks Status endpoint
 @app.get("/api/system/background-tasks")
 async def get_background_tasks_status():
-    """Get background tasks queue status"""
-    from app.utils.background_tasks import task_manager
+    """Get cluster-wide job queue status (all API and worker processes)"""
+    from app.database import SessionLocal
+    db = SessionLocal()
+    try:
+        data = {
+            **JobQueue.stats(db),
+            "rescoring": RescoringService.get_status(db),
+            "log_writer": {"logs": log_writer.stats(), "audit_trails": audit_writer.stats()},
+        }
+    finally:
+        db.close()
     return {
         "success": True,
-        "data": task_manager.get_status(),
+        "data": data,
         "message": "Background tasks status"
     }
 
 
+# Database Pool Status endpoint
+@app.get("/api/system/database")
+async def get_database_status():
+    """Get database connection pool metrics"""
+    from app.database import get_pool_stats
+    return {
+        "success": True,
+        "data": get_pool_stats(),
+        "message": "Database pool status"
+    }
+
+
 # System Info endpoint
 @app.get("/api/system/info")
 async def get_system_info():
@@ -0,0 +1,44 @@
+"""
+Migration Script: Add the send_attempts column to email_sequence_emails
+Counts the deliveries the SMTP server deferred (4xx), so the email
+dispatcher can back off and mark an email failed after
+EMAIL_MAX_SEND_ATTEMPTS attempts
+
+Run this script once after upgrading an existing database; create_all()
+only creates missing tables
+"""
+
+import sys
+import os
+from sqlalchemy import inspect, text
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.database import engine
+
+
+def add_email_send_attempts():
+    """Add email_sequence_emails.send_attempts if it is missing"""
+    
+    print("Adding email_sequence_emails.send_attempts...")
+    
+    columns = {column["name"] for column in inspect(engine).get_columns("email_sequence_emails")}
+    if "send_attempts" in columns:
+        print("  Column already exists")
+        return
+    
+    try:
+        with engine.begin() as conn:
+            conn.execute(text(
+                "ALTER TABLE email_sequence_emails ADD COLUMN send_attempts INTEGER NOT NULL DEFAULT 0"
+            ))
+        print("\nMigration completed!")
+        
+    except Exception as e:
+        print(f"Error during migration: {str(e)}")
+        raise
+
+
+if __name__ == "__main__":
+    add_email_send_attempts()
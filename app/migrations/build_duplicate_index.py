@@ -0,0 +1,54 @@
+"""
+Migration Script: Build the duplicate-candidate index for existing leads
+Populates lead_duplicate_keys used by DuplicateDetectionEngine.check_duplicate
+
+Run this script once after upgrading; new, updated and deleted leads keep
+the index current afterwards
+"""
+
+import sys
+import os
+from sqlalchemy import text
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.database import engine, get_db, Base
+from app.models.lead_duplicate_key import LeadDuplicateKey
+from app.utils.duplicate_detection import DuplicateCandidateIndex
+
+
+def build_duplicate_index():
+    """Rebuild duplicate-candidate keys for every company"""
+    
+    print("Building duplicate-candidate index for existing leads...")
+    
+    # Make sure the table exists before the app has been started once
+    Base.metadata.create_all(bind=engine, tables=[LeadDuplicateKey.__table__])
+    
+    db = next(get_db())
+    
+    try:
+        companies = db.execute(text("SELECT id FROM companies ORDER BY id")).fetchall()
+        
+        total_keys = 0
+        
+        for company in companies:
+            company_id = company[0]
+            written = DuplicateCandidateIndex.rebuild(company_id, db)
+            total_keys += written
+            print(f"  Company {company_id}: {written} keys")
+        
+        print("\nIndex build completed!")
+        print(f"Total keys written: {total_keys}")
+        
+    except Exception as e:
+        print(f"Error during index build: {str(e)}")
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    build_duplicate_index()
@@ -0,0 +1,45 @@
+"""
+Migration Script: Rebuild the deal rollup tables
+Recomputes deal_pipeline_summaries (deal totals by stage and status) and
+deal_monthly_rollups (deal totals by calendar month) from the deals table
+
+Both are kept current by mapper events on every deal change made through
+the ORM; run this script to repair them after deals were changed with raw
+SQL or removed by database-level cascades
+"""
+
+import sys
+import os
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.database import engine, Base
+from app.models import Deal, DealPipelineSummary, DealMonthlyRollup
+from app.services.pipeline_service import PipelineService
+from app.services.deal_analytics_service import DealAnalyticsService
+
+
+def rebuild_deal_rollups():
+    """Recompute the deal rollups for all companies"""
+    
+    print("Rebuilding deal rollups...")
+    
+    # Make sure the tables exist before the app has been started once
+    Base.metadata.create_all(bind=engine)
+    
+    try:
+        with engine.begin() as conn:
+            PipelineService.rebuild(conn)
+            print("  Pipeline summary rebuilt")
+            DealAnalyticsService.rebuild(conn)
+            print("  Monthly rollup rebuilt")
+        print("\nDeal rollups rebuild completed!")
+        
+    except Exception as e:
+        print(f"Error during deal rollups rebuild: {str(e)}")
+        raise
+
+
+if __name__ == "__main__":
+    rebuild_deal_rollups()
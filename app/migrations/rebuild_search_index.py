@@ -0,0 +1,40 @@
+"""
+Migration Script: Rebuild the full-text search index
+Creates the search structures used by SearchIndex (FTS5 tables and sync
+triggers on SQLite, GIN indexes on PostgreSQL) and repopulates them
+
+The application creates and backfills the index on startup; run this
+script to repair it, e.g. after rows were changed with triggers disabled
+"""
+
+import sys
+import os
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.database import engine, Base
+from app.models import Lead, Contact, Customer
+from app.utils.search_index import SearchIndex
+
+
+def rebuild_search_index():
+    """Create (if missing) and repopulate the search index"""
+    
+    print(f"Rebuilding search index ({engine.dialect.name})...")
+    
+    # Make sure the base tables exist before the app has been started once
+    Base.metadata.create_all(bind=engine)
+    
+    try:
+        SearchIndex.setup(engine)
+        SearchIndex.rebuild(engine)
+        print("\nSearch index rebuild completed!")
+        
+    except Exception as e:
+        print(f"Error during search index rebuild: {str(e)}")
+        raise
+
+
+if __name__ == "__main__":
+    rebuild_search_index()
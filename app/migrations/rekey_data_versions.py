@@ -0,0 +1,50 @@
+"""
+Migration Script: Key data versions by table and company
+Recreates data_versions with the (table_name, company_id) primary key used
+by app/utils/data_versions.py
+
+Versions restart from zero, so the stored asynchronous report runs (whose
+reuse is keyed by the old versions) are deleted with the table. Run this
+script once after upgrading, with the application stopped
+"""
+
+import sys
+import os
+from sqlalchemy import inspect
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.database import engine, Base
+from app.models.data_version import DataVersion
+from app.models.report_run import ReportRun, ReportRunPage
+
+
+def rekey_data_versions():
+    """Recreate data_versions keyed by (table_name, company_id)"""
+    
+    print("Keying data versions by table and company...")
+    
+    inspector = inspect(engine)
+    if "data_versions" in inspector.get_table_names():
+        primary_key = inspector.get_pk_constraint("data_versions")["constrained_columns"]
+        if "company_id" in primary_key:
+            print("  data_versions is already keyed by company")
+            return
+    
+    try:
+        with engine.begin() as conn:
+            DataVersion.__table__.drop(bind=conn, checkfirst=True)
+            Base.metadata.create_all(bind=conn, tables=[DataVersion.__table__, ReportRun.__table__, ReportRunPage.__table__])
+            conn.execute(ReportRunPage.__table__.delete())
+            deleted = conn.execute(ReportRun.__table__.delete()).rowcount
+        print(f"  data_versions recreated, {deleted} report runs deleted")
+        print("\nMigration completed!")
+        
+    except Exception as e:
+        print(f"Error during migration: {str(e)}")
+        raise
+
+
+if __name__ == "__main__":
+    rekey_data_versions()
@@ -8,14 +8,25 @@ from app.models.user_company import UserCompany
 from app.models.customer import Customer
 from app.models.contact import Contact
 from app.models.lead import Lead
+from app.models.lead_duplicate_key import LeadDuplicateKey
+from app.models.lead_import import LeadImport
 from app.models.deal import Deal
+from app.models.deal_pipeline_summary import DealPipelineSummary
+from app.models.deal_monthly_rollup import DealMonthlyRollup
 from app.models.task import Task
 from app.models.activity import Activity
 from app.models.log import Log
+from app.models.log_hourly_rollup import LogHourlyRollup
 from app.models.audit_trail import AuditTrail
 from app.models.permission import Permission, RolePermission
 from app.models.report import Report
+from app.models.report_run import ReportRun, ReportRunPage
 from app.models.password_reset import PasswordResetToken
+from app.models.id_sequence import IdSequence
+from app.models.score_dirty_mark import ScoreDirtyMark
+from app.models.job import Job
+from app.models.scheduled_job import ScheduledJob, SchedulerLease
+from app.models.data_version import DataVersion
 
 __all__ = [
     "Company",
@@ -24,14 +35,27 @@ __all__ = [
     "Customer",
     "Contact",
     "Lead",
+    "LeadDuplicateKey",
+    "LeadImport",
     "Deal",
+    "DealPipelineSummary",
+    "DealMonthlyRollup",
     "Task",
     "Activity",
     "Log",
+    "LogHourlyRollup",
     "AuditTrail",
     "Permission",
     "RolePermission",
     "Report",
-    "PasswordResetToken"
+    "ReportRun",
+    "ReportRunPage",
+    "PasswordResetToken",
+    "IdSequence",
+    "ScoreDirtyMark",
+    "Job",
+    "ScheduledJob",
+    "SchedulerLease",
+    "DataVersion"
 ]
 
@@ -2,7 +2,7 @@
 Activity Model - Activity Logging and History
 """
 
-from sqlalchemy import Column, Integer, String, DateTime, Text, ForeignKey
+from sqlalchemy import Column, Integer, String, DateTime, Text, ForeignKey, Index
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from app.database import Base
@@ -44,6 +44,11 @@ class Activity(Base):
     activity_date = Column(DateTime, nullable=False, index=True)  # When activity occurred
     created_at = Column(DateTime, default=func.now(), nullable=False)
     
+    # Indexes (company-scoped list ordering)
+    __table_args__ = (
+        Index("ix_activities_company_activity_date", "company_id", "activity_date"),
+    )
+    
     # Relationships
     company = relationship("Company")
     customer = relationship("Customer")
@@ -2,7 +2,7 @@
 Contact Model - Multi-Person Model (1 Account : N Contacts)
 """
 
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Boolean
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Boolean, Index
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from app.database import Base
@@ -44,6 +44,11 @@ class Contact(Base):
     created_at = Column(DateTime, default=func.now(), nullable=False)
     updated_at = Column(DateTime, default=func.now(), onupdate=func.now(), nullable=False)
     
+    # Indexes (company-scoped list ordering)
+    __table_args__ = (
+        Index("ix_contacts_company_created_at", "company_id", "created_at"),
+    )
+    
     # Relationships
     company = relationship("Company")
     account = relationship("Customer", foreign_keys=[account_id])
@@ -2,7 +2,7 @@
 Customer Model
 """
 
-from sqlalchemy import Column, Integer, String, DateTime, Text, ForeignKey, Numeric, JSON, Boolean
+from sqlalchemy import Column, Integer, String, DateTime, Text, ForeignKey, Numeric, JSON, Boolean, Index
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from app.database import Base
@@ -74,6 +74,11 @@ class Customer(Base):
     created_at = Column(DateTime, default=func.now(), nullable=False)
     updated_at = Column(DateTime, default=func.now(), onupdate=func.now(), nullable=False)
     
+    # Indexes (company-scoped list ordering)
+    __table_args__ = (
+        Index("ix_customers_company_created_at", "company_id", "created_at"),
+    )
+    
     # Relationships
     company = relationship("Company", back_populates="customers")
     creator = relationship("User", foreign_keys=[created_by], back_populates="customers_created")
@@ -0,0 +1,30 @@
+"""
+Data Version Model
+Per-table, per-company change counters used to validate cached query results (see app/utils/data_versions.py)
+"""
+
+from sqlalchemy import Column, Integer, String, DateTime
+from sqlalchemy.sql import func
+from app.database import Base
+
+# company_id of the counter bumped by writes not attributed to one company
+ALL_COMPANIES = 0
+
+
+class DataVersion(Base):
+    """Change counter of one table and company: bumped in every transaction that writes them"""
+    
+    __tablename__ = "data_versions"
+    
+    # Primary Key
+    table_name = Column(String(100), primary_key=True)
+    company_id = Column(Integer, primary_key=True, default=ALL_COMPANIES)  # ALL_COMPANIES: writes of any company
+    
+    # Counter
+    version = Column(Integer, default=0, nullable=False)
+    
+    # Timestamps
+    updated_at = Column(DateTime, default=func.now(), onupdate=func.now(), nullable=False)
+    
+    def __repr__(self):
+        return f"<DataVersion {self.table_name}/{self.company_id} v{self.version}>"
@@ -2,7 +2,7 @@
 Deal Model - Sales Pipeline Deal Tracking
 """
 
-from sqlalchemy import Column, Integer, String, DateTime, Text, ForeignKey, Numeric, Date
+from sqlalchemy import Column, Integer, String, DateTime, Text, ForeignKey, Numeric, Date, Index
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from app.database import Base
@@ -56,6 +56,11 @@ class Deal(Base):
     created_at = Column(DateTime, default=func.now(), nullable=False)
     updated_at = Column(DateTime, default=func.now(), onupdate=func.now(), nullable=False)
     
+    # Indexes (company-scoped list ordering)
+    __table_args__ = (
+        Index("ix_deals_company_created_at", "company_id", "created_at"),
+    )
+    
     # Relationships
     company = relationship("Company")
     customer = relationship("Customer", foreign_keys=[customer_id])
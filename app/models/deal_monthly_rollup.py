@@ -0,0 +1,31 @@
+"""
+Deal Monthly Rollup Model
+Materialized per-company deal totals by calendar month
+"""
+
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Numeric
+from sqlalchemy.sql import func
+from app.database import Base
+
+
+class DealMonthlyRollup(Base):
+    """Deal count and value totals for one (company, month, kind, category)"""
+    
+    __tablename__ = "deal_monthly_rollups"
+    
+    # Composite Primary Key
+    company_id = Column(Integer, ForeignKey("companies.id", ondelete="CASCADE"), primary_key=True)
+    month = Column(String(7), primary_key=True)  # YYYY-MM ("" = open deals without expected close date)
+    kind = Column(String(20), primary_key=True)  # created, won, lost, open
+    category = Column(String(50), primary_key=True, default="")  # forecast category of open deals, "" otherwise
+    
+    # Totals (kept current by DealAnalyticsService on every deal insert/update/delete)
+    deal_count = Column(Integer, default=0, nullable=False)
+    total_value = Column(Numeric(18, 2), default=0, nullable=False)
+    weighted_value = Column(Numeric(20, 4), default=0, nullable=False)  # sum(deal_value * probability / 100)
+    
+    # Timestamps
+    updated_at = Column(DateTime, default=func.now(), onupdate=func.now(), nullable=False)
+    
+    def __repr__(self):
+        return f"<DealMonthlyRollup C{self.company_id} {self.month} {self.kind}/{self.category} count={self.deal_count}>"
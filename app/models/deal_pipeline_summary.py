@@ -0,0 +1,30 @@
+"""
+Deal Pipeline Summary Model
+Materialized per-company deal totals by stage and status
+"""
+
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Numeric
+from sqlalchemy.sql import func
+from app.database import Base
+
+
+class DealPipelineSummary(Base):
+    """Deal count and value totals for one (company, stage, status)"""
+    
+    __tablename__ = "deal_pipeline_summaries"
+    
+    # Composite Primary Key
+    company_id = Column(Integer, ForeignKey("companies.id", ondelete="CASCADE"), primary_key=True)
+    stage = Column(String(50), primary_key=True)
+    status = Column(String(50), primary_key=True)
+    
+    # Totals (kept current by PipelineService on every deal insert/update/delete)
+    deal_count = Column(Integer, default=0, nullable=False)
+    total_value = Column(Numeric(18, 2), default=0, nullable=False)
+    weighted_value = Column(Numeric(20, 4), default=0, nullable=False)  # sum(deal_value * probability / 100)
+    
+    # Timestamps
+    updated_at = Column(DateTime, default=func.now(), onupdate=func.now(), nullable=False)
+    
+    def __repr__(self):
+        return f"<DealPipelineSummary C{self.company_id} {self.stage}/{self.status} count={self.deal_count}>"
@@ -90,6 +90,7 @@ class EmailSequenceEmail(Base):
     
     # Status
     status = Column(String(50), default="pending", nullable=False, index=True)  # pending, sent, opened, clicked, bounced, failed
+    send_attempts = Column(Integer, default=0, nullable=False)  # deliveries the SMTP server deferred (4xx)
     
     # Tracking
     opened_at = Column(DateTime, nullable=True)
@@ -120,6 +121,7 @@ class EmailSequenceEmail(Base):
             "scheduled_send_date": self.scheduled_send_date.isoformat() if self.scheduled_send_date else None,
             "actual_send_date": self.actual_send_date.isoformat() if self.actual_send_date else None,
             "status": self.status,
+            "send_attempts": self.send_attempts,
             "opened_at": self.opened_at.isoformat() if self.opened_at else None,
             "clicked_at": self.clicked_at.isoformat() if self.clicked_at else None,
             "open_count": self.open_count,
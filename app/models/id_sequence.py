@@ -0,0 +1,27 @@
+"""
+ID Sequence Model
+Per-company counters for human-readable unique IDs (LEAD-C1-03-01-2026-00001)
+"""
+
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey
+from sqlalchemy.sql import func
+from app.database import Base
+
+
+class IdSequence(Base):
+    """Last allocated sequence number for one (prefix, company)"""
+    
+    __tablename__ = "id_sequences"
+    
+    # Composite Primary Key
+    prefix = Column(String(20), primary_key=True)  # LEAD, ACC, CON, OPP, TASK, ACT, RPT
+    company_id = Column(Integer, ForeignKey("companies.id", ondelete="CASCADE"), primary_key=True)
+    
+    # Counter
+    last_value = Column(Integer, default=0, nullable=False)
+    
+    # Timestamps
+    updated_at = Column(DateTime, default=func.now(), onupdate=func.now(), nullable=False)
+    
+    def __repr__(self):
+        return f"<IdSequence {self.prefix}-C{self.company_id} last={self.last_value}>"
@@ -0,0 +1,53 @@
+"""
+Job Model
+Durable background job queue (see app/utils/job_queue.py)
+"""
+
+from sqlalchemy import Column, Integer, String, DateTime, Text, ForeignKey, JSON, Index
+from sqlalchemy.sql import func
+from app.database import Base
+
+
+class Job(Base):
+    """A queued, running or finished background job"""
+    
+    __tablename__ = "jobs"
+    
+    # Primary Key
+    id = Column(Integer, primary_key=True, index=True, autoincrement=True)
+    
+    # Job Definition
+    queue = Column(String(50), default="default", nullable=False)
+    name = Column(String(100), nullable=False, index=True)  # Registered handler name
+    payload = Column(JSON, nullable=True)  # Handler keyword arguments
+    company_id = Column(Integer, ForeignKey("companies.id", ondelete="CASCADE"), nullable=True, index=True)  # Tenant (concurrency cap)
+    priority = Column(Integer, default=0, nullable=False)  # Higher runs first
+    
+    # State: queued, running, completed, dead (dead-lettered after max_attempts)
+    status = Column(String(20), default="queued", nullable=False)
+    attempts = Column(Integer, default=0, nullable=False)
+    max_attempts = Column(Integer, default=3, nullable=False)
+    run_at = Column(DateTime, nullable=False)  # Not claimed before this time (retry backoff, scheduling)
+    
+    # Lease: a running job whose lease expired (worker died) is claimed again
+    locked_by = Column(String(100), nullable=True)
+    locked_until = Column(DateTime, nullable=True)
+    
+    # Outcome
+    progress = Column(JSON, nullable=True)  # Handler-reported progress
+    result = Column(JSON, nullable=True)
+    last_error = Column(Text, nullable=True)
+    
+    # Timestamps
+    created_at = Column(DateTime, default=func.now(), nullable=False)
+    started_at = Column(DateTime, nullable=True)  # Start of the latest attempt
+    completed_at = Column(DateTime, nullable=True)
+    
+    # Indexes (claim scan: ready jobs by priority; stats: finished jobs by time)
+    __table_args__ = (
+        Index("ix_jobs_status_run_at", "status", "run_at"),
+        Index("ix_jobs_status_completed_at", "status", "completed_at"),
+    )
+    
+    def __repr__(self):
+        return f"<Job {self.id} {self.name} {self.status}>"
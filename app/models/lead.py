@@ -3,7 +3,7 @@ Lead Model - Enterprise Lead Management
 Enhanced with attribution, scoring, and qualification fields
 """
 
-from sqlalchemy import Column, Integer, String, DateTime, Text, ForeignKey, Numeric, Boolean, Enum
+from sqlalchemy import Column, Integer, String, DateTime, Text, ForeignKey, Numeric, Boolean, Enum, Index
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from app.database import Base
@@ -109,6 +109,11 @@ class Lead(Base):
     updated_at = Column(DateTime, default=func.now(), onupdate=func.now(), nullable=False)
     converted_at = Column(DateTime, nullable=True)
     
+    # Indexes (company-scoped list ordering)
+    __table_args__ = (
+        Index("ix_leads_company_created_at", "company_id", "created_at"),
+    )
+    
     # Relationships
     company = relationship("Company")
     customer = relationship("Customer", foreign_keys=[customer_id])
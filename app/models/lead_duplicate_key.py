@@ -0,0 +1,32 @@
+"""
+Lead Duplicate Key Model
+Blocking keys used to find duplicate-lead candidates without scanning the company
+"""
+
+from sqlalchemy import Column, Integer, String, ForeignKey, Index
+from app.database import Base
+
+
+class LeadDuplicateKey(Base):
+    """One blocking key (normalized email, phone digits, company trigram, ...) of a lead"""
+
+    __tablename__ = "lead_duplicate_keys"
+
+    # Primary Key
+    id = Column(Integer, primary_key=True, autoincrement=True)
+
+    # Foreign Keys
+    company_id = Column(Integer, ForeignKey("companies.id", ondelete="CASCADE"), nullable=False)
+    lead_id = Column(Integer, ForeignKey("leads.id", ondelete="CASCADE"), nullable=False, index=True)
+
+    # Key
+    key_type = Column(String(20), nullable=False)  # email, phone, phone_long, company_gram, company_len
+    key_value = Column(String(255), nullable=False)
+
+    __table_args__ = (
+        # Candidate lookups always filter on all three columns
+        Index("ix_lead_duplicate_keys_lookup", "company_id", "key_type", "key_value"),
+    )
+
+    def __repr__(self):
+        return f"<LeadDuplicateKey lead_id={self.lead_id} {self.key_type}={self.key_value}>"
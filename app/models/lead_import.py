@@ -0,0 +1,53 @@
+"""
+Lead Import Model
+Streaming lead imports with their checkpoint and progress (see app/services/lead_import_service.py)
+"""
+
+from sqlalchemy import Column, Integer, String, DateTime, Text, ForeignKey, JSON, Boolean
+from sqlalchemy.sql import func
+from app.database import Base
+
+
+class LeadImport(Base):
+    """One uploaded lead file and the progress of its import"""
+    
+    __tablename__ = "lead_imports"
+    
+    # Primary Key
+    id = Column(Integer, primary_key=True, index=True, autoincrement=True)
+    
+    # Foreign Keys
+    company_id = Column(Integer, ForeignKey("companies.id", ondelete="CASCADE"), nullable=False, index=True)
+    created_by = Column(Integer, ForeignKey("users.id", ondelete="SET NULL"), nullable=True)
+    
+    # Source File
+    filename = Column(String(255), nullable=True)  # Name of the uploaded file
+    file_path = Column(String(500), nullable=False)  # Stored copy under IMPORT_DIR
+    file_format = Column(String(20), nullable=False)  # csv, ndjson
+    file_size = Column(Integer, nullable=True)
+    total_rows = Column(Integer, nullable=True)  # Data lines counted on upload (estimate if CSV fields span lines)
+    skip_duplicates = Column(Boolean, default=True, nullable=False)
+    
+    # State: queued, running, completed, failed
+    status = Column(String(20), default="queued", nullable=False)
+    job_id = Column(Integer, nullable=True)  # Job queue row of the latest attempt
+    
+    # Checkpoint: data rows consumed, committed with the leads they produced
+    rows_processed = Column(Integer, default=0, nullable=False)
+    
+    # Progress
+    imported = Column(Integer, default=0, nullable=False)
+    duplicates = Column(Integer, default=0, nullable=False)
+    invalid = Column(Integer, default=0, nullable=False)
+    quality_grades = Column(JSON, nullable=True)  # Data quality grade -> imported leads
+    issues = Column(JSON, nullable=True)  # First LEAD_IMPORT_MAX_ISSUES rejected rows: {row, reason, lead_id}
+    last_error = Column(Text, nullable=True)
+    
+    # Timestamps
+    created_at = Column(DateTime, default=func.now(), nullable=False)
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
+    updated_at = Column(DateTime, default=func.now(), onupdate=func.now(), nullable=False)
+    
+    def __repr__(self):
+        return f"<LeadImport {self.id} company={self.company_id} {self.status}>"
@@ -0,0 +1,30 @@
+"""
+Log Hourly Rollup Model
+Materialized log counts per hour for the log dashboards
+"""
+
+from sqlalchemy import Column, Integer, String, DateTime
+from sqlalchemy.sql import func
+from app.database import Base
+
+
+class LogHourlyRollup(Base):
+    """Number of logs written in one hour with one (level, category, action, status)"""
+    
+    __tablename__ = "log_hourly_rollups"
+    
+    # Composite Primary Key
+    hour = Column(DateTime, primary_key=True)  # Log timestamp truncated to the hour (UTC)
+    level = Column(String(20), primary_key=True)
+    category = Column(String(50), primary_key=True)
+    action = Column(String(100), primary_key=True)
+    status = Column(String(20), primary_key=True)
+    
+    # Count (kept current by the log writer in the transaction that inserts the logs)
+    log_count = Column(Integer, default=0, nullable=False)
+    
+    # Timestamps
+    updated_at = Column(DateTime, default=func.now(), onupdate=func.now(), nullable=False)
+    
+    def __repr__(self):
+        return f"<LogHourlyRollup {self.hour} {self.level}/{self.category}/{self.action}/{self.status} count={self.log_count}>"
@@ -0,0 +1,65 @@
+"""
+Report Run Models
+Asynchronous report executions and their paged results (see app/services/report_execution_service.py)
+"""
+
+from sqlalchemy import Column, Integer, String, DateTime, Text, ForeignKey, JSON, Boolean, Index
+from sqlalchemy.sql import func
+from app.database import Base
+
+
+class ReportRun(Base):
+    """One asynchronous execution of a report"""
+    
+    __tablename__ = "report_runs"
+    
+    # Primary Key
+    id = Column(Integer, primary_key=True, index=True, autoincrement=True)
+    
+    # Run Definition
+    report_id = Column(Integer, ForeignKey("reports.id", ondelete="CASCADE"), nullable=False, index=True)
+    company_id = Column(Integer, ForeignKey("companies.id", ondelete="CASCADE"), nullable=True, index=True)
+    requested_by = Column(Integer, ForeignKey("users.id", ondelete="SET NULL"), nullable=True)
+    filters = Column(JSON, nullable=True)
+    cache_key = Column(String(64), nullable=False)  # Definition + data versions when the run was requested
+    
+    # State: queued, running, succeeded, failed
+    status = Column(String(20), default="queued", nullable=False)
+    job_id = Column(Integer, nullable=True)  # Job queue row executing the run
+    cached = Column(Boolean, default=False, nullable=False)  # Result reused from an earlier run
+    source_run_id = Column(Integer, nullable=True)  # Run whose pages hold the result (cached runs)
+    
+    # Outcome
+    row_count = Column(Integer, nullable=True)
+    page_count = Column(Integer, nullable=True)
+    duration_ms = Column(Integer, nullable=True)
+    error = Column(Text, nullable=True)
+    
+    # Timestamps
+    created_at = Column(DateTime, default=func.now(), nullable=False)
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
+    
+    # Indexes (result reuse: latest succeeded run of a cache key)
+    __table_args__ = (
+        Index("ix_report_runs_cache_key_status", "cache_key", "status"),
+    )
+    
+    def __repr__(self):
+        return f"<ReportRun {self.id} report={self.report_id} {self.status}>"
+
+
+class ReportRunPage(Base):
+    """One page of the rows of a report run"""
+    
+    __tablename__ = "report_run_pages"
+    
+    # Composite Primary Key
+    run_id = Column(Integer, ForeignKey("report_runs.id", ondelete="CASCADE"), primary_key=True)
+    page = Column(Integer, primary_key=True)  # 1-based
+    
+    # Rows (list of row dictionaries)
+    rows = Column(JSON, nullable=False)
+    
+    def __repr__(self):
+        return f"<ReportRunPage run={self.run_id} page={self.page}>"
@@ -0,0 +1,58 @@
+"""
+Scheduled Job Models
+Periodic job state and the scheduler leader lease (see app/services/scheduler_service.py)
+"""
+
+from sqlalchemy import Column, Integer, String, DateTime, Text, Boolean
+from sqlalchemy.sql import func
+from app.database import Base
+
+
+class ScheduledJob(Base):
+    """Schedule and run history of one periodic job"""
+    
+    __tablename__ = "scheduled_jobs"
+    
+    # Primary Key (job ID of the scheduler registry, e.g. "log_cleanup")
+    id = Column(String(100), primary_key=True)
+    
+    # Schedule
+    schedule = Column(String(100), nullable=False)  # Cron expression (UTC)
+    enabled = Column(Boolean, default=True, nullable=False)
+    next_run_at = Column(DateTime, nullable=True, index=True)
+    
+    # Latest run (last_status: queued, running, succeeded, failed, skipped)
+    last_run_at = Column(DateTime, nullable=True)  # Start of the latest run
+    last_finished_at = Column(DateTime, nullable=True)
+    last_duration_ms = Column(Integer, nullable=True)
+    last_status = Column(String(20), nullable=True)
+    last_error = Column(Text, nullable=True)
+    last_result = Column(Text, nullable=True)  # Short summary of the run
+    last_job_id = Column(Integer, nullable=True)  # Job queue row of the latest run
+    
+    # Counters
+    run_count = Column(Integer, default=0, nullable=False)
+    failure_count = Column(Integer, default=0, nullable=False)
+    
+    # Timestamps
+    updated_at = Column(DateTime, default=func.now(), onupdate=func.now(), nullable=False)
+    
+    def __repr__(self):
+        return f"<ScheduledJob {self.id} {self.schedule}>"
+
+
+class SchedulerLease(Base):
+    """Leader lease: only the holder of an unexpired lease fires scheduled jobs"""
+    
+    __tablename__ = "scheduler_leases"
+    
+    # Primary Key (lease name)
+    name = Column(String(50), primary_key=True)
+    
+    # Holder
+    holder = Column(String(100), nullable=False)  # host:pid:suffix of the leader process
+    acquired_at = Column(DateTime, nullable=False)
+    expires_at = Column(DateTime, nullable=False)
+    
+    def __repr__(self):
+        return f"<SchedulerLease {self.name} {self.holder}>"
@@ -0,0 +1,32 @@
+"""
+Score Dirty Mark Model
+Records whose scores must be recomputed (incremental rescoring queue)
+"""
+
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Index
+from app.database import Base
+
+
+class ScoreDirtyMark(Base):
+    """A lead or customer whose score inputs changed since it was last scored"""
+    
+    __tablename__ = "score_dirty_marks"
+    
+    # Composite Primary Key (one mark per record: repeated writes coalesce)
+    entity_type = Column(String(20), primary_key=True)  # lead, customer
+    entity_id = Column(Integer, primary_key=True)
+    
+    # Foreign Key
+    company_id = Column(Integer, ForeignKey("companies.id", ondelete="CASCADE"), nullable=False, index=True)
+    
+    # Debounce window: first_marked_at bounds the delay, last_marked_at restarts the quiet period
+    first_marked_at = Column(DateTime, nullable=False)
+    last_marked_at = Column(DateTime, nullable=False)
+    
+    # Indexes (consumer scans marks whose quiet period has elapsed)
+    __table_args__ = (
+        Index("ix_score_dirty_marks_last_marked_at", "last_marked_at"),
+    )
+    
+    def __repr__(self):
+        return f"<ScoreDirtyMark {self.entity_type} {self.entity_id} C{self.company_id}>"
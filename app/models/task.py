@@ -2,7 +2,7 @@
 Task Model - Task Management
 """
 
-from sqlalchemy import Column, Integer, String, DateTime, Text, ForeignKey
+from sqlalchemy import Column, Integer, String, DateTime, Text, ForeignKey, Index
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from app.database import Base
@@ -48,6 +48,11 @@ class Task(Base):
     created_at = Column(DateTime, default=func.now(), nullable=False)
     updated_at = Column(DateTime, default=func.now(), onupdate=func.now(), nullable=False)
     
+    # Indexes (company-scoped list ordering)
+    __table_args__ = (
+        Index("ix_tasks_company_due_date", "company_id", "due_date"),
+    )
+    
     # Relationships
     company = relationship("Company")
     customer = relationship("Customer")
@@ -9,7 +9,8 @@ from app.database import get_db
 from app.schemas.activity import ActivityCreate, ActivityUpdate
 from app.controllers.activity_controller import ActivityController
 from app.utils.dependencies import get_current_active_user
-from app.utils.helpers import success_response
+from app.utils.relation_loader import RelationLoader
+from app.utils.helpers import success_response, paginate, keyset_paginate
 from app.utils.permissions import has_permission
 from app.models.user import User
 
@@ -26,34 +27,44 @@ async def get_activities(
     user_id: Optional[int] = Query(None, description="Filter by user"),
     page: int = Query(1, ge=1, description="Page number"),
     per_page: int = Query(10, ge=1, le=100, description="Items per page"),
+    sort: Optional[str] = Query(None, description="Sort fields, comma-separated, prefix - for descending (e.g. -activity_date)"),
+    cursor: Optional[str] = Query(None, description="Keyset pagination cursor (pass empty for first page, then next_cursor)"),
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
     """Get all activities in company"""
     try:
-        activities = ActivityController.get_activities(
+        query = ActivityController.get_activities_query(
             company_id, current_user, db, activity_type, customer_id, lead_id, deal_id, user_id
         )
+        query = RelationLoader.apply(query)
         
-        # Pagination
-        start = (page - 1) * per_page
-        end = start + per_page
-        paginated_activities = activities[start:end]
-        
-        total = len(activities)
-        pages = (total + per_page - 1) // per_page
+        if cursor is not None:
+            # Keyset mode: newest first, constant cost per page
+            if sort:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="sort is not supported with cursor pagination"
+                )
+            paginated_activities, pagination = keyset_paginate(
+                query, *ActivityController.CURSOR_COLUMNS, cursor=cursor, per_page=per_page
+            )
+        else:
+            paginated_activities, pagination = paginate(
+                query, page, per_page,
+                sort=sort,
+                sort_fields=ActivityController.SORT_FIELDS,
+                default_sort=ActivityController.DEFAULT_SORT
+            )
         
         return {
             "success": True,
-            "data": [activity.to_dict(include_relations=True) for activity in paginated_activities],
-            "pagination": {
-                "page": page,
-                "per_page": per_page,
-                "total": total,
-                "pages": pages
-            },
+            "data": RelationLoader.serialize(paginated_activities, db),
+            "pagination": pagination,
             "message": "Activities fetched successfully"
         }
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -86,7 +97,7 @@ async def create_activity(
     try:
         activity = ActivityController.create_activity(company_id, activity_data, current_user, db)
         return success_response(
-            data=activity.to_dict(include_relations=True),
+            data=RelationLoader.serialize_one(activity, db),
             message="Activity logged successfully"
         )
     except HTTPException as e:
@@ -116,7 +127,7 @@ async def get_timeline(
             company_id, current_user, db, customer_id, lead_id, deal_id, limit
         )
         return success_response(
-            data=[activity.to_dict(include_relations=True) for activity in activities],
+            data=RelationLoader.serialize(activities, db),
             message="Activity timeline fetched successfully"
         )
     except Exception as e:
@@ -137,7 +148,7 @@ async def get_activity(
     try:
         activity = ActivityController.get_activity(activity_id, company_id, current_user, db)
         return success_response(
-            data=activity.to_dict(include_relations=True),
+            data=RelationLoader.serialize_one(activity, db),
             message="Activity details fetched successfully"
         )
     except HTTPException as e:
@@ -178,7 +189,7 @@ async def update_activity(
             activity_id, company_id, activity_data, current_user, db
         )
         return success_response(
-            data=activity.to_dict(include_relations=True),
+            data=RelationLoader.serialize_one(activity, db),
             message="Activity updated successfully"
         )
     except HTTPException as e:
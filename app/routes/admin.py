@@ -17,6 +17,7 @@ from app.schemas.admin import (
 )
 from app.config.email_config import get_email_config, is_email_configured
 from app.services.email_service import send_email, initialize_email_service
+from app.services.scheduler_service import SCHEDULED_JOBS, SchedulerService
 from app.utils.dependencies import get_current_active_user
 from app.utils.permissions import require_admin, require_super_admin
 from app.utils.helpers import success_response
@@ -276,37 +277,13 @@ async def get_background_jobs(
     
     Requires: Admin role
     """
-    # Placeholder - would integrate with actual job scheduler (APScheduler, Celery, etc.)
-    jobs = [
-        BackgroundJobInfo(
-            id="email_reminder",
-            name="Email Reminders",
-            status="scheduled",
-            last_run=None,
-            next_run=None,
-            description="Send reminder emails for upcoming tasks and follow-ups"
-        ),
-        BackgroundJobInfo(
-            id="log_cleanup",
-            name="Log Cleanup",
-            status="scheduled",
-            last_run=None,
-            next_run=None,
-            description="Clean up old log entries"
-        ),
-        BackgroundJobInfo(
-            id="data_backup",
-            name="Data Backup",
-            status="not_configured",
-            last_run=None,
-            next_run=None,
-            description="Automated database backup"
-        )
-    ]
+    jobs = [BackgroundJobInfo(**job) for job in SchedulerService.list_jobs(db)]
+    leader = SchedulerService.get_leader(db)
     
     return BackgroundJobsResponse(
         jobs=jobs,
-        total=len(jobs)
+        total=len(jobs),
+        scheduler_leader=leader["holder"] if leader else None
     )
 
 
@@ -319,18 +296,19 @@ async def run_background_job(
     """
     Manually trigger a background job
     
+    The run is queued on the job queue and executed by a job worker.
+    
     Requires: Super Admin role
     """
-    # Placeholder - would integrate with actual job scheduler
-    valid_jobs = ["email_reminder", "log_cleanup", "data_backup"]
-    
-    if job_id not in valid_jobs:
+    if job_id not in SCHEDULED_JOBS:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Job '{job_id}' not found"
         )
     
+    queue_job_id = SchedulerService.trigger(db, job_id)
+    
     return success_response(
-        data={"job_id": job_id, "status": "triggered"},
+        data={"job_id": job_id, "status": "queued", "queue_job_id": queue_job_id},
         message=f"Job '{job_id}' has been triggered"
     )
@@ -32,14 +32,41 @@ async def get_audit_trails(
     start_date: Optional[datetime] = Query(None, description="Filter from date"),
     end_date: Optional[datetime] = Query(None, description="Filter to date"),
     search: Optional[str] = Query(None, description="Search in message, email, resource"),
+    cursor: Optional[str] = Query(None, description="Keyset pagination cursor (pass empty for first page, then next_cursor)"),
     current_user: User = Depends(require_admin),
     db: Session = Depends(get_db)
 ):
     """
     Get audit trails with filtering and pagination
     
+    Pass `cursor` (empty for the first page) to page by (timestamp, id)
+    instead of offset; the response then carries `next_cursor` and no total.
+    
     Requires: Admin role
     """
+    if cursor is not None:
+        audit_trails, next_cursor = audit_service.get_audit_trails_page(
+            db=db,
+            cursor=cursor,
+            limit=per_page,
+            user_id=user_id,
+            user_email=user_email,
+            action=action,
+            resource_type=resource_type,
+            resource_id=resource_id,
+            status=status,
+            start_date=start_date,
+            end_date=end_date,
+            search=search
+        )
+        
+        return AuditTrailListResponse(
+            audit_trails=[AuditTrailResponse.model_validate(at) for at in audit_trails],
+            total=None,
+            per_page=per_page,
+            next_cursor=next_cursor
+        )
+    
     skip = (page - 1) * per_page
     
     audit_trails, total = audit_service.get_audit_trails(
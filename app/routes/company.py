@@ -21,6 +21,7 @@ async def get_companies(
     search: Optional[str] = Query(None, description="Search in company name/email"),
     page: int = Query(1, ge=1, description="Page number"),
     per_page: int = Query(10, ge=1, le=500, description="Items per page"),
+    sort: Optional[str] = Query(None, description="Sort fields, comma-separated, prefix - for descending (e.g. name)"),
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
@@ -30,32 +31,30 @@ async def get_companies(
     Query Parameters:
     - **search**: Search in company name or email
     - **page**: Page number (default: 1)
-    - **per_page**: Items per page (default: 10, max: 100)
+    - **per_page**: Items per page (default: 10, max: 500)
+    - **sort**: Sort fields (name, email, status, created_at), prefix - for descending
     
     Requires: JWT token
     """
     try:
-        companies = CompanyController.get_user_companies(current_user, db, search)
+        query = CompanyController.get_user_companies_query(current_user, db, search)
         
-        # Simple pagination (manual)
-        start = (page - 1) * per_page
-        end = start + per_page
-        paginated_companies = companies[start:end]
-        
-        total = len(companies)
-        pages = (total + per_page - 1) // per_page
+        paginated_companies, pagination = paginate(
+            query, page, per_page,
+            sort=sort,
+            sort_fields=CompanyController.SORT_FIELDS,
+            default_sort=CompanyController.DEFAULT_SORT,
+            max_per_page=500
+        )
         
         return {
             "success": True,
             "data": [company.to_dict() for company in paginated_companies],
-            "pagination": {
-                "page": page,
-                "per_page": per_page,
-                "total": total,
-                "pages": pages
-            },
+            "pagination": pagination,
             "message": "Companies fetched successfully"
         }
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -205,7 +204,7 @@ async def select_company(
     Requires: JWT token, Access to company
     """
     try:
-        from app.utils.security import create_access_token
+        from app.utils.security import create_access_token, token_version
         
         # Verify access to company
         company = CompanyController.get_company(company_id, current_user, db)
@@ -215,7 +214,8 @@ async def select_company(
             "user_id": current_user.id,
             "email": current_user.email,
             "role": current_user.role,
-            "company_id": company_id
+            "company_id": company_id,
+            "tv": token_version(current_user.password_hash)
         }
         new_token = create_access_token(token_data)
         
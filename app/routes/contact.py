@@ -9,7 +9,8 @@ from app.database import get_db
 from app.schemas.contact import ContactCreate, ContactUpdate, ContactResponse
 from app.controllers.contact_controller import ContactController
 from app.utils.dependencies import get_current_active_user
-from app.utils.helpers import success_response
+from app.utils.relation_loader import RelationLoader
+from app.utils.helpers import success_response, paginate
 from app.models.user import User
 
 router = APIRouter()
@@ -22,6 +23,7 @@ async def get_contacts(
     search: Optional[str] = Query(None, description="Search in name/email/phone/job_title"),
     page: int = Query(1, ge=1, description="Page number"),
     per_page: int = Query(10, ge=1, le=100, description="Items per page"),
+    sort: Optional[str] = Query(None, description="Sort fields, comma-separated, prefix - for descending (e.g. -created_at)"),
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
@@ -29,29 +31,26 @@ async def get_contacts(
     Get all contacts in company
     """
     try:
-        contacts = ContactController.get_contacts(
+        query = ContactController.get_contacts_query(
             company_id=company_id,
             account_id=account_id,
             current_user=current_user,
             db=db,
             search=search
         )
+        query = RelationLoader.apply(query)
         
-        # Pagination
-        total = len(contacts)
-        start = (page - 1) * per_page
-        end = start + per_page
-        paginated_contacts = contacts[start:end]
+        paginated_contacts, pagination = paginate(
+            query, page, per_page,
+            sort=sort,
+            sort_fields=ContactController.SORT_FIELDS,
+            default_sort=ContactController.DEFAULT_SORT
+        )
         
         return {
             "success": True,
-            "data": [contact.to_dict(include_relations=True) for contact in paginated_contacts],
-            "pagination": {
-                "page": page,
-                "per_page": per_page,
-                "total": total,
-                "pages": (total + per_page - 1) // per_page if total > 0 else 1
-            },
+            "data": RelationLoader.serialize(paginated_contacts, db),
+            "pagination": pagination,
             "message": f"Retrieved {len(paginated_contacts)} contacts"
         }
     except HTTPException:
@@ -82,7 +81,7 @@ async def create_contact(
         )
         
         return success_response(
-            data=contact.to_dict(include_relations=True),
+            data=RelationLoader.serialize_one(contact, db),
             message="Contact created successfully"
         )
     except HTTPException:
@@ -113,7 +112,7 @@ async def get_contact(
         )
         
         return success_response(
-            data=contact.to_dict(include_relations=True),
+            data=RelationLoader.serialize_one(contact, db),
             message="Contact retrieved successfully"
         )
     except HTTPException:
@@ -146,7 +145,7 @@ async def update_contact(
         )
         
         return success_response(
-            data=contact.to_dict(include_relations=True),
+            data=RelationLoader.serialize_one(contact, db),
             message="Contact updated successfully"
         )
     except HTTPException:
@@ -9,7 +9,8 @@ from app.database import get_db
 from app.schemas.customer import CustomerCreate, CustomerUpdate
 from app.controllers.customer_controller import CustomerController
 from app.utils.dependencies import get_current_active_user
-from app.utils.helpers import success_response
+from app.utils.relation_loader import RelationLoader
+from app.utils.helpers import success_response, paginate
 from app.utils.permissions import check_company_admin, has_permission, check_permission
 from app.models.user import User
 
@@ -25,6 +26,7 @@ async def get_customers(
     assigned_to: Optional[int] = Query(None, description="Filter by assigned user"),
     page: int = Query(1, ge=1, description="Page number"),
     per_page: int = Query(10, ge=1, le=100, description="Items per page"),
+    sort: Optional[str] = Query(None, description="Sort fields, comma-separated, prefix - for descending (e.g. -created_at)"),
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
@@ -41,33 +43,31 @@ async def get_customers(
     - **assigned_to**: Filter by assigned user ID
     - **page**: Page number
     - **per_page**: Items per page
+    - **sort**: Sort fields (created_at, name, status, email, customer_type, health_score, lifecycle_stage), prefix - for descending
     
     Requires: JWT token
     """
     try:
-        customers = CustomerController.get_customers(
+        query = CustomerController.get_customers_query(
             company_id, current_user, db, search, status, customer_type, assigned_to
         )
+        query = RelationLoader.apply(query)
         
-        # Simple pagination
-        start = (page - 1) * per_page
-        end = start + per_page
-        paginated_customers = customers[start:end]
-        
-        total = len(customers)
-        pages = (total + per_page - 1) // per_page
+        paginated_customers, pagination = paginate(
+            query, page, per_page,
+            sort=sort,
+            sort_fields=CustomerController.SORT_FIELDS,
+            default_sort=CustomerController.DEFAULT_SORT
+        )
         
         return {
             "success": True,
-            "data": [customer.to_dict(include_relations=True) for customer in paginated_customers],
-            "pagination": {
-                "page": page,
-                "per_page": per_page,
-                "total": total,
-                "pages": pages
-            },
+            "data": RelationLoader.serialize(paginated_customers, db),
+            "pagination": pagination,
             "message": "Customers fetched successfully"
         }
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -103,7 +103,7 @@ async def create_customer(
     try:
         customer = CustomerController.create_customer(company_id, customer_data, current_user, db)
         return success_response(
-            data=customer.to_dict(include_relations=True),
+            data=RelationLoader.serialize_one(customer, db),
             message="Customer created successfully"
         )
     except HTTPException as e:
@@ -134,7 +134,7 @@ async def get_customer(
     try:
         customer = CustomerController.get_customer(customer_id, company_id, current_user, db)
         return success_response(
-            data=customer.to_dict(include_relations=True),
+            data=RelationLoader.serialize_one(customer, db),
             message="Customer details fetched successfully"
         )
     except HTTPException as e:
@@ -190,7 +190,7 @@ async def update_customer(
             customer_id, company_id, customer_data, current_user, db
         )
         return success_response(
-            data=customer.to_dict(include_relations=True),
+            data=RelationLoader.serialize_one(customer, db),
             message="Customer updated successfully"
         )
     except HTTPException as e:
@@ -388,6 +388,132 @@ async def calculate_quality_score(
         )
 
 
+# Lead Import Endpoints
+
+def _check_company_access(company_id: int, current_user: User, db: Session):
+    from app.models.user_company import UserCompany
+    
+    user_company = db.query(UserCompany).filter(
+        UserCompany.user_id == current_user.id,
+        UserCompany.company_id == company_id
+    ).first()
+    
+    if not user_company and current_user.role != "super_admin":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Access denied"
+        )
+
+
+def _get_lead_import(company_id: int, import_id: int, db: Session):
+    from app.models.lead_import import LeadImport
+    
+    lead_import = db.query(LeadImport).filter(
+        LeadImport.id == import_id,
+        LeadImport.company_id == company_id
+    ).first()
+    
+    if not lead_import:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Lead import not found"
+        )
+    return lead_import
+
+
+@router.post("/{company_id}/data-ingestion/lead-imports", status_code=status.HTTP_202_ACCEPTED)
+async def start_lead_import(
+    company_id: int = Path(..., description="Company ID"),
+    file: UploadFile = File(..., description="CSV (header row) or NDJSON file of leads"),
+    file_format: Optional[str] = Query(None, description="csv or ndjson (default: from the file extension)"),
+    skip_duplicates: bool = Query(True, description="Skip rows duplicating existing leads or earlier rows"),
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Upload a lead file and import it in the background
+    
+    Progress is read from GET /data-ingestion/lead-imports/{import_id}.
+    """
+    from fastapi.concurrency import run_in_threadpool
+    from app.services.lead_import_service import LeadImportService
+    
+    _check_company_access(company_id, current_user, db)
+    
+    try:
+        lead_import = await run_in_threadpool(
+            LeadImportService.create, db, company_id, current_user.id,
+            file.file, file.filename, file_format, skip_duplicates
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    
+    return success_response(
+        data=LeadImportService.get_status(lead_import),
+        message="Lead import queued"
+    )
+
+
+@router.get("/{company_id}/data-ingestion/lead-imports/{import_id}")
+async def get_lead_import(
+    company_id: int = Path(..., description="Company ID"),
+    import_id: int = Path(..., description="Lead import ID"),
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Get the progress of a lead import
+    """
+    from app.services.lead_import_service import LeadImportService
+    
+    _check_company_access(company_id, current_user, db)
+    lead_import = _get_lead_import(company_id, import_id, db)
+    
+    return success_response(
+        data=LeadImportService.get_status(lead_import),
+        message="Lead import status"
+    )
+
+
+@router.post("/{company_id}/data-ingestion/lead-imports/{import_id}/resume")
+async def resume_lead_import(
+    company_id: int = Path(..., description="Company ID"),
+    import_id: int = Path(..., description="Lead import ID"),
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Resume a failed lead import from its last checkpoint
+    
+    Only once its job has used all its attempts; 409 while it is still
+    queued for a retry or running.
+    """
+    from app.services.lead_import_service import LeadImportService
+    
+    _check_company_access(company_id, current_user, db)
+    lead_import = _get_lead_import(company_id, import_id, db)
+    
+    if lead_import.status != "failed":
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Only failed imports can be resumed (status: {lead_import.status})"
+        )
+    
+    if not LeadImportService.resume(db, lead_import):
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="The import job is still queued or running (failed attempts are retried automatically)"
+        )
+    
+    return success_response(
+        data=LeadImportService.get_status(lead_import),
+        message="Lead import resumed"
+    )
+
+
 # Real-time Validation Endpoints
 
 @router.post("/{company_id}/validation/check-duplicate")
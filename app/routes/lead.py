@@ -9,7 +9,8 @@ from app.database import get_db
 from app.schemas.lead import LeadCreate, LeadUpdate
 from app.controllers.lead_controller import LeadController
 from app.utils.dependencies import get_current_active_user
-from app.utils.helpers import success_response
+from app.utils.relation_loader import RelationLoader
+from app.utils.helpers import success_response, paginate, keyset_paginate
 from app.utils.permissions import has_permission
 from app.models.user import User
 
@@ -25,34 +26,44 @@ async def get_leads(
     assigned_to: Optional[int] = Query(None, description="Filter by assigned user"),
     page: int = Query(1, ge=1, description="Page number"),
     per_page: int = Query(10, ge=1, le=100, description="Items per page"),
+    sort: Optional[str] = Query(None, description="Sort fields, comma-separated, prefix - for descending (e.g. -created_at)"),
+    cursor: Optional[str] = Query(None, description="Keyset pagination cursor (pass empty for first page, then next_cursor)"),
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
     """Get all leads in company"""
     try:
-        leads = LeadController.get_leads(
+        query = LeadController.get_leads_query(
             company_id, current_user, db, search, lead_status, priority, assigned_to
         )
+        query = RelationLoader.apply(query)
         
-        # Pagination
-        start = (page - 1) * per_page
-        end = start + per_page
-        paginated_leads = leads[start:end]
-        
-        total = len(leads)
-        pages = (total + per_page - 1) // per_page
+        if cursor is not None:
+            # Keyset mode: newest first, constant cost per page
+            if sort:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="sort is not supported with cursor pagination"
+                )
+            paginated_leads, pagination = keyset_paginate(
+                query, *LeadController.CURSOR_COLUMNS, cursor=cursor, per_page=per_page
+            )
+        else:
+            paginated_leads, pagination = paginate(
+                query, page, per_page,
+                sort=sort,
+                sort_fields=LeadController.SORT_FIELDS,
+                default_sort=LeadController.DEFAULT_SORT
+            )
         
         return {
             "success": True,
-            "data": [lead.to_dict(include_relations=True) for lead in paginated_leads],
-            "pagination": {
-                "page": page,
-                "per_page": per_page,
-                "total": total,
-                "pages": pages
-            },
+            "data": RelationLoader.serialize(paginated_leads, db),
+            "pagination": pagination,
             "message": "Leads fetched successfully"
         }
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -103,7 +114,7 @@ async def create_lead(
             company_id, lead_data, current_user, db, skip_duplicate_check=skip_duplicate_check
         )
         return success_response(
-            data=lead.to_dict(include_relations=True),
+            data=RelationLoader.serialize_one(lead, db),
             message="Lead created successfully"
         )
     except HTTPException as e:
@@ -132,7 +143,7 @@ async def get_lead(
     try:
         lead = LeadController.get_lead(lead_id, company_id, current_user, db)
         return success_response(
-            data=lead.to_dict(include_relations=True),
+            data=RelationLoader.serialize_one(lead, db),
             message="Lead details fetched successfully"
         )
     except HTTPException as e:
@@ -171,7 +182,7 @@ async def update_lead(
     try:
         lead = LeadController.update_lead(lead_id, company_id, lead_data, current_user, db)
         return success_response(
-            data=lead.to_dict(include_relations=True),
+            data=RelationLoader.serialize_one(lead, db),
             message="Lead updated successfully"
         )
     except HTTPException as e:
@@ -426,6 +437,7 @@ async def check_duplicate(
 async def detect_duplicates(
     company_id: int = Path(..., description="Company ID"),
     auto_mark: bool = Query(False, description="Automatically mark duplicates"),
+    background: bool = Query(False, description="Run as background job and return its ID"),
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
@@ -437,6 +449,7 @@ async def detect_duplicates(
     
     Query Parameters:
     - **auto_mark**: Automatically mark duplicates (requires admin role)
+    - **background**: Run as background job; poll detect-duplicates/{job_id} for progress
     
     Requires: JWT token, Admin/Manager role for auto_mark
     """
@@ -458,6 +471,16 @@ async def detect_duplicates(
                     detail="Insufficient permissions for auto-marking duplicates"
                 )
         
+        if background:
+            from app.utils.duplicate_scan import scan_jobs
+            
+            job = scan_jobs.create(company_id, auto_mark)
+            
+            return success_response(
+                data=job,
+                message="Duplicate detection started"
+            )
+        
         result = DuplicateDetectionEngine.detect_and_mark_duplicates(
             company_id, db, auto_mark=auto_mark
         )
@@ -475,6 +498,37 @@ async def detect_duplicates(
         )
 
 
+@router.get("/{company_id}/leads/detect-duplicates/{job_id}")
+async def get_duplicate_detection_job(
+    company_id: int = Path(..., description="Company ID"),
+    job_id: str = Path(..., description="Duplicate detection job ID"),
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Get progress and result of a background duplicate detection job
+    
+    Path Parameters:
+    - **company_id**: Company ID
+    - **job_id**: Job ID returned by detect-duplicates?background=true
+    
+    Requires: JWT token
+    """
+    from app.utils.duplicate_scan import scan_jobs
+    
+    job = scan_jobs.get(job_id, company_id)
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Duplicate detection job not found"
+        )
+    
+    return success_response(
+        data=job,
+        message=f"Duplicate detection {job['status']}"
+    )
+
+
 @router.post("/{company_id}/leads/{lead_id}/mark-duplicate")
 async def mark_duplicate(
     company_id: int = Path(..., description="Company ID"),
@@ -751,7 +805,7 @@ async def create_followup_task(
             )
         
         return success_response(
-            data=task.to_dict(include_relations=True),
+            data=RelationLoader.serialize_one(task, db),
             message="Follow-up task created successfully"
         )
     except HTTPException as e:
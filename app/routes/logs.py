@@ -29,14 +29,38 @@ async def get_logs(
     start_date: Optional[datetime] = Query(None, description="Filter from date"),
     end_date: Optional[datetime] = Query(None, description="Filter to date"),
     search: Optional[str] = Query(None, description="Search in message, action, email"),
+    cursor: Optional[str] = Query(None, description="Keyset pagination cursor (pass empty for first page, then next_cursor)"),
     current_user: User = Depends(require_admin),
     db: Session = Depends(get_db)
 ):
     """
     Get system logs with filtering and pagination
     
+    Pass `cursor` (empty for the first page) to page by (timestamp, id)
+    instead of offset; the response then carries `next_cursor` and no total.
+    
     Requires: Admin role
     """
+    if cursor is not None:
+        logs, next_cursor = log_service.get_logs_page(
+            db=db,
+            cursor=cursor,
+            limit=per_page,
+            level=level,
+            category=category,
+            user_id=user_id,
+            start_date=start_date,
+            end_date=end_date,
+            search=search
+        )
+        
+        return LogListResponse(
+            logs=[LogResponse.model_validate(log) for log in logs],
+            total=None,
+            per_page=per_page,
+            next_cursor=next_cursor
+        )
+    
     skip = (page - 1) * per_page
     
     logs = log_service.get_logs(
@@ -16,6 +16,7 @@ from app.controllers.permission_controller import PermissionController
 from app.utils.dependencies import get_current_active_user
 from app.utils.helpers import success_response
 from app.utils.permissions import require_admin, has_permission
+from app.utils.permission_cache import PermissionCache
 from app.models.user import User
 
 router = APIRouter()
@@ -90,6 +91,7 @@ async def create_permission(
     """
     try:
         permission = PermissionController.create_permission(permission_data, db)
+        PermissionCache.invalidate()
         return PermissionResponse.model_validate(permission)
     except HTTPException as e:
         raise e
@@ -117,6 +119,7 @@ async def update_permission(
     """
     try:
         permission = PermissionController.update_permission(permission_id, permission_data, db)
+        PermissionCache.invalidate()
         return PermissionResponse.model_validate(permission)
     except HTTPException as e:
         raise e
@@ -143,6 +146,7 @@ async def delete_permission(
     """
     try:
         PermissionController.delete_permission(permission_id, db)
+        PermissionCache.invalidate()
         return success_response(
             data={},
             message="Permission deleted successfully"
@@ -201,6 +205,7 @@ async def create_role_permission(
     """
     try:
         role_permission = PermissionController.create_role_permission(role_permission_data, db)
+        PermissionCache.invalidate()
         return RolePermissionResponse.model_validate(role_permission)
     except HTTPException as e:
         raise e
@@ -230,6 +235,7 @@ async def update_role_permission(
         role_permission = PermissionController.update_role_permission(
             role_permission_id, role_permission_data, db
         )
+        PermissionCache.invalidate()
         return RolePermissionResponse.model_validate(role_permission)
     except HTTPException as e:
         raise e
@@ -253,6 +259,7 @@ async def bulk_update_role_permissions(
     """
     try:
         updated_permissions = PermissionController.bulk_update_role_permissions(bulk_data, db)
+        PermissionCache.invalidate()
         return success_response(
             data=[RolePermissionResponse.model_validate(rp).model_dump() for rp in updated_permissions],
             message=f"Updated {len(updated_permissions)} role permissions"
@@ -280,6 +287,7 @@ async def delete_role_permission(
     """
     try:
         PermissionController.delete_role_permission(role_permission_id, db)
+        PermissionCache.invalidate()
         return success_response(
             data={},
             message="Role permission deleted successfully"
@@ -355,6 +363,7 @@ async def copy_permissions_to_company(
     """
     try:
         copied_count = PermissionController.copy_global_to_company(company_id, db)
+        PermissionCache.invalidate()
         return success_response(
             data={"copied_count": copied_count},
             message=f"Successfully copied {copied_count} permissions to company {company_id}"
@@ -2,6 +2,8 @@
 Reports Management Routes
 """
 from fastapi import APIRouter, Depends, HTTPException, status, Query, Path
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import FileResponse, StreamingResponse
 from sqlalchemy.orm import Session
 from sqlalchemy import func
 from typing import Optional, List
@@ -9,19 +11,17 @@ from datetime import datetime
 from app.database import get_db
 from app.schemas.report import (
     ReportCreate, ReportUpdate, ReportResponse, ReportListResponse,
-    ReportRunRequest, ReportRunResponse,
+    ReportRunRequest, ReportRunResponse, ReportRunResultResponse,
     ReportTypeInfo, ReportTypesResponse
 )
 from app.models.report import Report
+from app.models.report_run import ReportRun
 from app.models.user import User
-from app.models.customer import Customer
-from app.models.lead import Lead
-from app.models.deal import Deal
-from app.models.task import Task
-from app.models.activity import Activity
 from app.utils.dependencies import get_current_active_user
 from app.utils.permissions import require_admin, require_manager
 from app.utils.helpers import success_response
+from app.services.report_execution_service import ReportExecutionService
+from app.services.report_export_service import EXPORT_FORMATS, ReportExportService
 
 router = APIRouter()
 
@@ -204,6 +204,12 @@ async def run_report(
     """
     Execute a report and get results
     
+    format json returns the rows in the response; csv, ndjson and xlsx
+    stream the export as the response body (delivery "stream") or write it
+    to a file downloaded from download_url (delivery "file"). JSON results
+    are cached until the report's data changes; mode "async" queues the run
+    and returns a run_id whose rows are read from GET /reports/runs/{run_id}.
+    
     Requires: Manager role or higher
     """
     report = db.query(Report).filter(Report.id == report_id).first()
@@ -222,51 +228,66 @@ async def run_report(
                 detail="Access denied to this report"
             )
     
-    # Execute report based on type
-    data = []
-    row_count = 0
+    export_format = (run_request.format or "json").lower()
+    if export_format != "json":
+        try:
+            ReportExportService.check_format(export_format)
+        except ValueError as e:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=str(e)
+            )
+    
+    if run_request.mode == "async" and export_format != "json":
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Asynchronous runs return JSON pages; use delivery=file for exports"
+        )
+    
+    # Stream the export as the response body (chunked, constant memory)
+    if export_format != "json" and run_request.delivery != "file":
+        ReportExecutionService.mark_run(report, db)
+        return StreamingResponse(
+            ReportExportService.stream(report.id, export_format, run_request.filters),
+            media_type=EXPORT_FORMATS[export_format][0],
+            headers={
+                "Content-Disposition": f'attachment; filename="{ReportExportService.filename(report, export_format)}"'
+            }
+        )
     
     try:
-        if report.report_type == "sales":
-            # Sales report - deals summary
-            query = db.query(Deal)
-            if report.company_id:
-                query = query.filter(Deal.company_id == report.company_id)
-            deals = query.all()
-            data = [{"id": d.id, "name": d.name, "value": d.value, "stage": d.stage} for d in deals]
-            row_count = len(data)
-            
-        elif report.report_type == "leads":
-            # Leads report
-            query = db.query(Lead)
-            if report.company_id:
-                query = query.filter(Lead.company_id == report.company_id)
-            leads = query.all()
-            data = [{"id": l.id, "name": f"{l.first_name} {l.last_name}", "status": l.status, "source": l.source} for l in leads]
-            row_count = len(data)
-            
-        elif report.report_type == "activities":
-            # Activities report
-            query = db.query(Activity)
-            if report.company_id:
-                query = query.filter(Activity.company_id == report.company_id)
-            activities = query.limit(1000).all()
-            data = [{"id": a.id, "type": a.activity_type, "subject": a.subject} for a in activities]
-            row_count = len(data)
-            
-        elif report.report_type == "customers":
-            # Customers report
-            query = db.query(Customer)
-            if report.company_id:
-                query = query.filter(Customer.company_id == report.company_id)
-            customers = query.all()
-            data = [{"id": c.id, "name": c.name, "email": c.email, "status": c.status} for c in customers]
-            row_count = len(data)
-            
-        else:
-            # Custom report - return empty for now
-            data = []
-            row_count = 0
+        if run_request.mode == "async":
+            # Rows are read page by page from GET /reports/runs/{run_id}
+            run = await run_in_threadpool(
+                ReportExecutionService.submit, report, db, run_request.filters, current_user.id
+            )
+            return ReportRunResponse(
+                report_id=report.id,
+                report_name=report.name,
+                executed_at=datetime.utcnow(),
+                row_count=run.row_count,
+                cached=run.cached,
+                run_id=run.id,
+                status=run.status
+            )
+    
+        if export_format == "json":
+            result = await run_in_threadpool(ReportExecutionService.execute, report, db, run_request.filters)
+            return ReportRunResponse(
+                report_id=report.id,
+                report_name=report.name,
+                executed_at=datetime.utcnow(),
+                row_count=len(result["rows"]),
+                data=result["rows"],
+                cached=result["cached"],
+                duration_ms=result["duration_ms"]
+            )
+        
+        # Export file served by GET /reports/downloads/{token}
+        export = await run_in_threadpool(
+            ReportExportService.write_file, report, export_format, run_request.filters, current_user.id
+        )
+        ReportExecutionService.mark_run(report, db)
             
     except Exception as e:
         raise HTTPException(
@@ -274,20 +295,102 @@ async def run_report(
             detail=f"Error executing report: {str(e)}"
         )
     
-    # Update last run
-    report.last_run = datetime.utcnow()
-    db.commit()
-    
     return ReportRunResponse(
         report_id=report.id,
         report_name=report.name,
         executed_at=datetime.utcnow(),
-        row_count=row_count,
-        data=data if run_request.format == "json" else None,
-        download_url=None  # Would generate download URL for csv/pdf
+        download_url=f"/api/reports/downloads/{export['token']}"
+    )
+
+
+@router.get("/reports/runs/{run_id}", response_model=ReportRunResultResponse)
+async def get_report_run(
+    run_id: int = Path(..., description="Report run ID"),
+    page: int = Query(1, ge=1, description="Page of rows (REPORT_RUN_PAGE_SIZE rows each)"),
+    current_user: User = Depends(require_manager),
+    db: Session = Depends(get_db)
+):
+    """
+    Get the status of an asynchronous report run and one page of its rows
+    
+    Requires: Manager role or higher
+    """
+    run = db.query(ReportRun).filter(ReportRun.id == run_id).first()
+    
+    if not run:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Report run not found or expired"
+        )
+    
+    # Check access
+    if current_user.role not in ["super_admin", "admin"] and run.requested_by != current_user.id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Access denied to this report run"
+        )
+    
+    data = None
+    if run.status == "succeeded":
+        data = ReportExecutionService.get_page(db, run, page)
+        if data is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Page {page} not found (the run has {run.page_count} pages)"
+            )
+    
+    return ReportRunResultResponse(
+        run_id=run.id,
+        report_id=run.report_id,
+        status=run.status,
+        cached=run.cached,
+        row_count=run.row_count,
+        page=page,
+        page_count=run.page_count,
+        data=data,
+        duration_ms=run.duration_ms,
+        error=run.error,
+        created_at=run.created_at,
+        finished_at=run.finished_at
     )
 
 
+@router.get("/reports/execution/stats")
+async def get_report_execution_stats(
+    current_user: User = Depends(require_admin),
+    db: Session = Depends(get_db)
+):
+    """
+    Get report result cache hit rates and run durations
+    
+    Requires: Admin role
+    """
+    return success_response(
+        data=ReportExecutionService.stats(db),
+        message="Report execution statistics"
+    )
+
+
+@router.get("/reports/downloads/{token}")
+async def download_report_export(
+    token: str = Path(..., description="Download token from a report run")
+):
+    """
+    Download an exported report file
+    
+    The token in the URL is the credential; it expires after
+    REPORT_DOWNLOAD_TTL_SECONDS.
+    """
+    export = ReportExportService.resolve_token(token)
+    if export is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Download not found or expired"
+        )
+    
+    return FileResponse(export["path"], media_type=export["media_type"], filename=export["filename"])
+
+
 @router.get("/reports/types/list", response_model=ReportTypesResponse)
 async def get_report_types(
     current_user: User = Depends(require_manager),
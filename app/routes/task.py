@@ -9,7 +9,8 @@ from app.database import get_db
 from app.schemas.task import TaskCreate, TaskUpdate
 from app.controllers.task_controller import TaskController
 from app.utils.dependencies import get_current_active_user
-from app.utils.helpers import success_response
+from app.utils.relation_loader import RelationLoader
+from app.utils.helpers import success_response, paginate
 from app.utils.permissions import has_permission
 from app.models.user import User
 
@@ -26,34 +27,32 @@ async def get_tasks(
     assigned_to: Optional[int] = Query(None, description="Filter by assigned user"),
     page: int = Query(1, ge=1, description="Page number"),
     per_page: int = Query(10, ge=1, le=100, description="Items per page"),
+    sort: Optional[str] = Query(None, description="Sort fields, comma-separated, prefix - for descending (e.g. due_date)"),
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
     """Get all tasks in company"""
     try:
-        tasks = TaskController.get_tasks(
+        query = TaskController.get_tasks_query(
             company_id, current_user, db, search, status, priority, assigned_to, task_type
         )
+        query = RelationLoader.apply(query)
         
-        # Pagination
-        start = (page - 1) * per_page
-        end = start + per_page
-        paginated_tasks = tasks[start:end]
-        
-        total = len(tasks)
-        pages = (total + per_page - 1) // per_page
+        paginated_tasks, pagination = paginate(
+            query, page, per_page,
+            sort=sort,
+            sort_fields=TaskController.SORT_FIELDS,
+            default_sort=TaskController.DEFAULT_SORT
+        )
         
         return {
             "success": True,
-            "data": [task.to_dict(include_relations=True) for task in paginated_tasks],
-            "pagination": {
-                "page": page,
-                "per_page": per_page,
-                "total": total,
-                "pages": pages
-            },
+            "data": RelationLoader.serialize(paginated_tasks, db),
+            "pagination": pagination,
             "message": "Tasks fetched successfully"
         }
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -86,7 +85,7 @@ async def create_task(
     try:
         task = TaskController.create_task(company_id, task_data, current_user, db)
         return success_response(
-            data=task.to_dict(include_relations=True),
+            data=RelationLoader.serialize_one(task, db),
             message="Task created successfully"
         )
     except HTTPException as e:
@@ -326,7 +325,7 @@ async def get_task(
     try:
         task = TaskController.get_task(task_id, company_id, current_user, db)
         return success_response(
-            data=task.to_dict(include_relations=True),
+            data=RelationLoader.serialize_one(task, db),
             message="Task details fetched successfully"
         )
     except HTTPException as e:
@@ -365,7 +364,7 @@ async def update_task(
     try:
         task = TaskController.update_task(task_id, company_id, task_data, current_user, db)
         return success_response(
-            data=task.to_dict(include_relations=True),
+            data=RelationLoader.serialize_one(task, db),
             message="Task updated successfully"
         )
     except HTTPException as e:
@@ -388,7 +387,7 @@ async def complete_task(
     try:
         task = TaskController.complete_task(task_id, company_id, current_user, db)
         return success_response(
-            data=task.to_dict(include_relations=True),
+            data=RelationLoader.serialize_one(task, db),
             message="Task marked as completed"
         )
     except HTTPException as e:
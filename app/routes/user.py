@@ -9,7 +9,7 @@ from app.database import get_db
 from app.schemas.user import UserCreate, UserUpdate, UserRoleUpdate
 from app.controllers.user_controller import UserController
 from app.utils.dependencies import get_current_active_user
-from app.utils.helpers import success_response
+from app.utils.helpers import success_response, paginate
 from app.utils.permissions import check_company_admin, require_admin
 from app.models.user import User
 
@@ -23,6 +23,7 @@ async def get_users(
     role: Optional[str] = Query(None, description="Filter by role"),
     page: int = Query(1, ge=1, description="Page number"),
     per_page: int = Query(10, ge=1, le=100, description="Items per page"),
+    sort: Optional[str] = Query(None, description="Sort fields, comma-separated, prefix - for descending (e.g. email)"),
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
@@ -37,31 +38,28 @@ async def get_users(
     - **role**: Filter by role
     - **page**: Page number
     - **per_page**: Items per page
+    - **sort**: Sort fields (email, first_name, last_name, created_at), prefix - for descending
     
     Requires: JWT token
     """
     try:
-        users = UserController.get_company_users(company_id, current_user, db, search, role)
+        query = UserController.get_company_users_query(company_id, current_user, db, search, role)
         
-        # Simple pagination
-        start = (page - 1) * per_page
-        end = start + per_page
-        paginated_users = users[start:end]
-        
-        total = len(users)
-        pages = (total + per_page - 1) // per_page
+        paginated_users, pagination = paginate(
+            query, page, per_page,
+            sort=sort,
+            sort_fields=UserController.SORT_FIELDS,
+            default_sort=UserController.DEFAULT_SORT
+        )
         
         return {
             "success": True,
             "data": [user.to_dict() for user in paginated_users],
-            "pagination": {
-                "page": page,
-                "per_page": per_page,
-                "total": total,
-                "pages": pages
-            },
+            "pagination": pagination,
             "message": "Users fetched successfully"
         }
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -100,9 +100,17 @@ class BackgroundJobInfo(BaseModel):
     last_run: Optional[datetime] = None
     next_run: Optional[datetime] = None
     description: Optional[str] = None
+    schedule: Optional[str] = None  # Cron expression (UTC)
+    last_status: Optional[str] = None  # queued, running, succeeded, failed, skipped
+    last_duration_ms: Optional[int] = None
+    last_error: Optional[str] = None
+    last_result: Optional[str] = None
+    run_count: int = 0
+    failure_count: int = 0
 
 
 class BackgroundJobsResponse(BaseModel):
     """Background jobs list response"""
     jobs: List[BackgroundJobInfo]
     total: int
+    scheduler_leader: Optional[str] = None  # Process currently firing scheduled jobs
@@ -38,9 +38,10 @@ class AuditTrailResponse(BaseModel):
 class AuditTrailListResponse(BaseModel):
     """Audit trail list response"""
     audit_trails: List[AuditTrailResponse]
-    total: int
+    total: Optional[int] = None  # Not counted in cursor mode
     page: int = 1
     per_page: int = 50
+    next_cursor: Optional[str] = None
 
 
 class ResourceHistoryResponse(BaseModel):
@@ -44,9 +44,10 @@ class LogResponse(BaseModel):
 class LogListResponse(BaseModel):
     """Log list response"""
     logs: List[LogResponse]
-    total: int
+    total: Optional[int] = None  # Not counted in cursor mode
     page: int = 1
     per_page: int = 50
+    next_cursor: Optional[str] = None
 
 
 class LogStatisticsResponse(BaseModel):
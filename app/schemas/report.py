@@ -66,7 +66,9 @@ class ReportListResponse(BaseModel):
 class ReportRunRequest(BaseModel):
     """Report run request schema"""
     filters: Optional[Dict[str, Any]] = Field(None, description="Runtime filters")
-    format: str = Field("json", description="Output format: json, csv, pdf")
+    format: str = Field("json", description="Output format: json, csv, ndjson, xlsx")
+    delivery: str = Field("stream", description="Exports: stream (response body) or file (download_url)")
+    mode: str = Field("sync", description="JSON: sync (rows in the response) or async (run_id, rows fetched by page)")
 
 
 class ReportRunResponse(BaseModel):
@@ -74,9 +76,29 @@ class ReportRunResponse(BaseModel):
     report_id: int
     report_name: str
     executed_at: datetime
-    row_count: int
+    row_count: Optional[int] = None
     data: Optional[List[Dict[str, Any]]] = None
     download_url: Optional[str] = None
+    cached: bool = False
+    duration_ms: Optional[int] = None
+    run_id: Optional[int] = None
+    status: Optional[str] = None
+
+
+class ReportRunResultResponse(BaseModel):
+    """Asynchronous report run status and one page of its rows"""
+    run_id: int
+    report_id: int
+    status: str
+    cached: bool
+    row_count: Optional[int] = None
+    page: int
+    page_count: Optional[int] = None
+    data: Optional[List[Dict[str, Any]]] = None
+    duration_ms: Optional[int] = None
+    error: Optional[str] = None
+    created_at: datetime
+    finished_at: Optional[datetime] = None
 
 
 class ReportTypeInfo(BaseModel):
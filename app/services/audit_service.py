@@ -8,6 +8,8 @@ from typing import Optional, Dict, Any, List
 from datetime import datetime, date
 from decimal import Decimal
 from app.models.audit_trail import AuditTrail
+from app.utils.buffered_writer import BufferedWriter
+from app.utils.helpers import keyset_paginate
 import json
 
 
@@ -42,6 +44,17 @@ def serialize_dict(data: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
     return result
 
 
+# Actions written synchronously instead of through the buffer
+SYNC_ACTIONS = {
+    "LOGIN", "LOGOUT", "LOGIN_FAILED",
+    "PASSWORD_CHANGE", "PASSWORD_RESET",
+    "PERMISSION_CHANGE", "ROLE_CHANGE",
+}
+
+# Group-commit sink of the audit_trails table (started with the application)
+audit_writer = BufferedWriter(AuditTrail.__table__, "audit_trails")
+
+
 def create_audit_trail(
     db: Session,
     user_id: Optional[int] = None,
@@ -55,37 +68,42 @@ def create_audit_trail(
     user_agent: Optional[str] = None,
     status: str = "SUCCESS",
     message: Optional[str] = None,
-    details: Optional[Dict[str, Any]] = None
+    details: Optional[Dict[str, Any]] = None,
+    sync: Optional[bool] = None
 ) -> AuditTrail:
     """
     Create a new audit trail entry
+    
+    The entry goes through audit_writer on its own connection: the caller's
+    session is not used or committed. Security actions (SYNC_ACTIONS) and
+    failed actions (or sync=True) are written before returning, others on
+    the next flush. Returns the (unsaved) AuditTrail object.
     """
     # Serialize values to handle Decimal and other non-JSON types
     serialized_old = serialize_dict(old_values)
     serialized_new = serialize_dict(new_values)
     serialized_details = serialize_dict(details)
     
-    audit_entry = AuditTrail(
-        user_id=user_id,
-        user_email=user_email,
-        action=action.upper(),
-        resource_type=resource_type,
-        resource_id=resource_id,
-        old_values=serialized_old,
-        new_values=serialized_new,
-        ip_address=ip_address,
-        user_agent=user_agent,
-        status=status.upper(),
-        message=message,
-        details=serialized_details,
-        timestamp=datetime.utcnow()
-    )
-    
-    db.add(audit_entry)
-    db.commit()
-    db.refresh(audit_entry)
+    row = {
+        "user_id": user_id,
+        "user_email": user_email,
+        "action": action.upper(),
+        "resource_type": resource_type,
+        "resource_id": resource_id,
+        "old_values": serialized_old,
+        "new_values": serialized_new,
+        "ip_address": ip_address,
+        "user_agent": user_agent,
+        "status": status.upper(),
+        "message": message,
+        "details": serialized_details,
+        "timestamp": datetime.utcnow(),
+    }
     
-    return audit_entry
+    if sync is None:
+        sync = row["action"] in SYNC_ACTIONS or row["status"] == "FAILED"
+    audit_writer.write(row, sync=sync)
+    return AuditTrail(**row)
 
 
 def log_create(
@@ -233,10 +251,8 @@ def log_custom_event(
     )
 
 
-def get_audit_trails(
+def build_audit_trails_query(
     db: Session,
-    skip: int = 0,
-    limit: int = 100,
     user_id: Optional[int] = None,
     user_email: Optional[str] = None,
     action: Optional[str] = None,
@@ -246,10 +262,9 @@ def get_audit_trails(
     start_date: Optional[datetime] = None,
     end_date: Optional[datetime] = None,
     search: Optional[str] = None
-) -> tuple[List[AuditTrail], int]:
+):
     """
-    Get audit trails with filtering and pagination
-    Returns: (list of audit trails, total count)
+    Build filtered (unordered) audit trails query
     """
     query = db.query(AuditTrail)
     
@@ -288,6 +303,32 @@ def get_audit_trails(
             )
         )
     
+    return query
+
+
+def get_audit_trails(
+    db: Session,
+    skip: int = 0,
+    limit: int = 100,
+    user_id: Optional[int] = None,
+    user_email: Optional[str] = None,
+    action: Optional[str] = None,
+    resource_type: Optional[str] = None,
+    resource_id: Optional[int] = None,
+    status: Optional[str] = None,
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    search: Optional[str] = None
+) -> tuple[List[AuditTrail], int]:
+    """
+    Get audit trails with filtering and pagination
+    Returns: (list of audit trails, total count)
+    """
+    query = build_audit_trails_query(
+        db, user_id, user_email, action, resource_type, resource_id,
+        status, start_date, end_date, search
+    )
+    
     # Get total count before pagination
     total_count = query.count()
     
@@ -297,6 +338,34 @@ def get_audit_trails(
     return audit_trails, total_count
 
 
+def get_audit_trails_page(
+    db: Session,
+    cursor: Optional[str] = None,
+    limit: int = 100,
+    user_id: Optional[int] = None,
+    user_email: Optional[str] = None,
+    action: Optional[str] = None,
+    resource_type: Optional[str] = None,
+    resource_id: Optional[int] = None,
+    status: Optional[str] = None,
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    search: Optional[str] = None
+) -> tuple[List[AuditTrail], Optional[str]]:
+    """
+    Get audit trails with filtering using keyset (cursor) pagination
+    Returns: (list of audit trails, next cursor or None)
+    """
+    query = build_audit_trails_query(
+        db, user_id, user_email, action, resource_type, resource_id,
+        status, start_date, end_date, search
+    )
+    audit_trails, pagination = keyset_paginate(
+        query, AuditTrail.timestamp, AuditTrail.id, cursor=cursor, per_page=limit
+    )
+    return audit_trails, pagination["next_cursor"]
+
+
 def get_resource_history(
     db: Session,
     resource_type: str,
@@ -7,6 +7,7 @@ from datetime import datetime
 from sqlalchemy.orm import Session
 from sqlalchemy import func, and_
 from typing import Optional, Dict, List
+from app.config import settings
 from app.models.lead import Lead
 from app.models.customer import Customer
 
@@ -24,6 +25,9 @@ class DataGovernanceService:
         "require_source_attribution": True,
         "require_consent_for_marketing": True,
         "data_retention_days": 365 * 3,  # 3 years
+        "log_retention_days": settings.LOG_RETENTION_DAYS,  # System logs (applied by RetentionService)
+        "audit_retention_days": settings.AUDIT_RETENTION_DAYS,  # Audit trail (applied by RetentionService)
+        "archive_before_purge": settings.ARCHIVE_ENABLED,  # Archive expired log/audit rows before deleting
         "allow_duplicate_emails": False,
         "allow_duplicate_phones": False
     }
@@ -198,6 +202,21 @@ class DataGovernanceService:
             ]
         }
     
+    @staticmethod
+    def get_system_retention_policies() -> Dict[str, Dict]:
+        """
+        Retention policy of the system tables (logs, audit trail)
+        
+        Returns:
+            {table: {"retention_days", "archive"}}
+        """
+        policies = DataGovernanceService.DEFAULT_POLICIES
+        archive = policies.get("archive_before_purge", True)
+        return {
+            "logs": {"retention_days": policies.get("log_retention_days"), "archive": archive},
+            "audit_trails": {"retention_days": policies.get("audit_retention_days"), "archive": archive},
+        }
+    
     @staticmethod
     def get_data_retention_report(company_id: int, db: Session) -> Dict:
         """
@@ -232,6 +251,19 @@ class DataGovernanceService:
             Lead.updated_at < stale_cutoff
         ).scalar() or 0
         
+        # System tables (not company-scoped): expired rows awaiting the retention job
+        from app.services.retention_service import RETENTION_TABLES, RetentionService
+        system_records = {}
+        for name, policy in DataGovernanceService.get_system_retention_policies().items():
+            table = RETENTION_TABLES[name]
+            cutoff = datetime.utcnow() - timedelta(days=policy["retention_days"])
+            system_records[name] = {
+                **policy,
+                "cutoff": cutoff.isoformat(),
+                "expired_records": db.query(func.count(table.c.id)).filter(table.c.timestamp < cutoff).scalar() or 0,
+                "archived_months": RetentionService.archived_months(name),
+            }
+        
         return {
             "company_id": company_id,
             "retention_policy_days": retention_days,
@@ -242,6 +274,7 @@ class DataGovernanceService:
             "stale_records": {
                 "leads": stale_leads
             },
+            "system_records": system_records,
             "recommendations": [
                 f"Review {stale_leads} stale leads for conversion or disqualification" if stale_leads > 0 else None,
                 f"Consider archiving {old_leads} old lead records" if old_leads > 0 else None
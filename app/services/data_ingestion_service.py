@@ -7,9 +7,9 @@ from datetime import datetime
 from sqlalchemy.orm import Session
 from sqlalchemy import and_
 from typing import Optional, Dict, List, Any
-from app.models.lead import Lead
 from app.models.customer import Customer
 from app.models.contact import Contact
+from app.config import settings
 
 
 class DataIngestionService:
@@ -19,6 +19,12 @@ class DataIngestionService:
     VALID_UTM_SOURCES = ["google", "facebook", "linkedin", "twitter", "email", "direct", "referral", "organic"]
     VALID_UTM_MEDIUMS = ["cpc", "organic", "social", "email", "referral", "display", "affiliate"]
     
+    # Enrichment
+    HIGH_PRIORITY_SOURCES = {"referral", "partner", "website"}
+    MEDIUM_PRIORITY_SOURCES = {"google", "linkedin", "facebook"}
+    FREE_EMAIL_DOMAINS = {"gmail.com", "yahoo.com", "hotmail.com", "outlook.com"}
+    PHONE_COUNTRY_PREFIXES = (("+91", "India"), ("91", "India"), ("+1", "USA"), ("+44", "UK"))
+    
     @staticmethod
     def validate_utm_parameters(data: Dict) -> Dict:
         """
@@ -141,37 +147,56 @@ class DataIngestionService:
         Returns:
             Enriched lead data
         """
-        enriched = lead_data.copy()
+        return DataIngestionService.enrich_leads([lead_data])[0]
         
-        # Auto-detect country from phone
-        phone = lead_data.get("phone", "")
-        if phone:
-            if phone.startswith("+91") or phone.startswith("91"):
-                enriched["country"] = enriched.get("country") or "India"
-            elif phone.startswith("+1"):
-                enriched["country"] = enriched.get("country") or "USA"
-            elif phone.startswith("+44"):
-                enriched["country"] = enriched.get("country") or "UK"
+    @staticmethod
+    def enrich_leads(leads_data: List[Dict]) -> List[Dict]:
+        """
+        Enrich many leads in one pass (the rules of enrich_lead_data)
         
-        # Auto-set priority based on source
-        source = lead_data.get("source", "").lower()
-        if not enriched.get("priority"):
-            if source in ["referral", "partner", "website"]:
-                enriched["priority"] = "high"
-            elif source in ["google", "linkedin", "facebook"]:
-                enriched["priority"] = "medium"
-            else:
-                enriched["priority"] = "low"
+        Args:
+            leads_data: Lead data dictionaries
+            
+        Returns:
+            Enriched copies, in the same order
+        """
+        high_sources = DataIngestionService.HIGH_PRIORITY_SOURCES
+        medium_sources = DataIngestionService.MEDIUM_PRIORITY_SOURCES
+        free_domains = DataIngestionService.FREE_EMAIL_DOMAINS
+        phone_countries = DataIngestionService.PHONE_COUNTRY_PREFIXES
         
-        # Extract company domain from email
-        email = lead_data.get("email", "")
-        if email and "@" in email:
-            domain = email.split("@")[1].lower()
-            # Skip common email providers
-            if domain not in ["gmail.com", "yahoo.com", "hotmail.com", "outlook.com"]:
-                enriched["company_domain"] = domain
+        enriched_leads = []
+        for lead_data in leads_data:
+            enriched = lead_data.copy()
+            
+            # Auto-detect country from phone
+            phone = lead_data.get("phone")
+            if phone and not enriched.get("country"):
+                enriched["country"] = next(
+                    (country for prefix, country in phone_countries if phone.startswith(prefix)),
+                    enriched.get("country")
+                )
+            
+            # Auto-set priority based on source
+            if not enriched.get("priority"):
+                source = (lead_data.get("source") or "").lower()
+                if source in high_sources:
+                    enriched["priority"] = "high"
+                elif source in medium_sources:
+                    enriched["priority"] = "medium"
+                else:
+                    enriched["priority"] = "low"
+            
+            # Extract company domain from email, skipping common email providers
+            email = lead_data.get("email")
+            if email and "@" in email:
+                domain = email.split("@")[1].lower()
+                if domain not in free_domains:
+                    enriched["company_domain"] = domain
+            
+            enriched_leads.append(enriched)
         
-        return enriched
+        return enriched_leads
     
     @staticmethod
     def batch_import_leads(
@@ -184,6 +209,9 @@ class DataIngestionService:
         """
         Batch import multiple leads
         
+        Runs the chunked import engine of LeadImportService over an
+        in-memory list (files are imported with LeadImportService.create).
+        
         Args:
             leads_data: List of lead data dictionaries
             company_id: Company ID
@@ -194,71 +222,29 @@ class DataIngestionService:
         Returns:
             Import results
         """
-        from app.utils.duplicate_detection import DuplicateDetection
+        from app.services.lead_import_service import LeadDedupIndex, LeadImporter
         
-        results = {
-            "total": len(leads_data),
-            "imported": 0,
-            "skipped": 0,
-            "errors": [],
-            "duplicates": []
-        }
-        
-        for idx, lead_data in enumerate(leads_data):
-            try:
-                # Check for duplicates
-                if skip_duplicates:
-                    duplicates = DuplicateDetection.find_duplicates(
-                        email=lead_data.get("email"),
-                        phone=lead_data.get("phone"),
-                        company_name=lead_data.get("company_name"),
-                        company_id=company_id,
-                        db=db
-                    )
-                    
-                    if duplicates.get("has_duplicates"):
-                        results["skipped"] += 1
-                        results["duplicates"].append({
-                            "row": idx + 1,
-                            "data": lead_data,
-                            "duplicate_ids": [d["id"] for d in duplicates.get("duplicates", [])]
-                        })
-                        continue
-                
-                # Enrich data
-                enriched_data = DataIngestionService.enrich_lead_data(lead_data, db)
-                
-                # Create lead
-                lead = Lead(
-                    company_id=company_id,
-                    lead_name=enriched_data.get("lead_name") or f"{enriched_data.get('first_name', '')} {enriched_data.get('last_name', '')}".strip(),
-                    first_name=enriched_data.get("first_name"),
-                    last_name=enriched_data.get("last_name"),
-                    email=enriched_data.get("email"),
-                    phone=enriched_data.get("phone"),
-                    company_name=enriched_data.get("company_name"),
-                    source=enriched_data.get("source"),
-                    campaign=enriched_data.get("campaign"),
-                    medium=enriched_data.get("medium"),
-                    priority=enriched_data.get("priority", "medium"),
-                    country=enriched_data.get("country"),
-                    status="new",
-                    created_by=user_id
-                )
-                
-                db.add(lead)
-                results["imported"] += 1
-                
-            except Exception as e:
-                results["errors"].append({
-                    "row": idx + 1,
-                    "error": str(e),
-                    "data": lead_data
-                })
+        importer = LeadImporter(
+            company_id,
+            user_id,
+            skip_duplicates,
+            LeadDedupIndex.build(company_id, db) if skip_duplicates else None
+        )
         
+        # Chunks of validated rows, bulk inserted with one unique ID block each
+        rows = list(enumerate(leads_data, start=1))
+        chunk_size = settings.LEAD_IMPORT_CHUNK_SIZE
+        for offset in range(0, len(rows), chunk_size):
+            importer.process_chunk(db, rows[offset:offset + chunk_size])
         db.commit()
         
-        return results
+        return {
+            "total": len(leads_data),
+            "imported": importer.counts["imported"],
+            "skipped": importer.counts["duplicates"],
+            "errors": [issue for issue in importer.issues if "duplicate_of_lead_id" not in issue and "duplicate_of_row" not in issue],
+            "duplicates": [issue for issue in importer.issues if "duplicate_of_lead_id" in issue or "duplicate_of_row" in issue]
+        }
     
     @staticmethod
     def calculate_data_quality_score(data: Dict) -> Dict:
@@ -0,0 +1,357 @@
+"""
+Deal Analytics Service
+Time-bucketed deal analytics (sales forecast and trend analysis)
+
+Deals are rolled up per company and calendar month in deal_monthly_rollups:
+- created: deals by month of created_at
+- won / lost: closed deals by month of actual_close_date
+- open: open deals by month of expected_close_date and forecast category
+
+The rollup is built with GROUP BY month queries and then kept current
+incrementally by mapper events whenever a deal is inserted, updated or
+deleted through the ORM, so forecast and trend read a handful of rollup rows
+instead of scanning deals. Deals of deleted customers are deleted through the
+ORM too (see pipeline_service), not by ON DELETE CASCADE.
+"""
+
+import logging
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy import event, text
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.orm import Session, attributes
+from app.models.deal import Deal
+from app.models.deal_monthly_rollup import DealMonthlyRollup
+from app.utils.rollup import increment_row, track_previous_values
+
+logger = logging.getLogger(__name__)
+
+
+FORECAST_CATEGORIES = ["best_case", "commit", "most_likely", "worst_case"]
+DEFAULT_FORECAST_CATEGORY = "most_likely"
+
+# Month bucket of open deals without an expected close date
+NO_MONTH = ""
+
+
+def month_key(value) -> str:
+    """YYYY-MM bucket of a date/datetime (NO_MONTH for None)"""
+    if value is None:
+        return NO_MONTH
+    return value.strftime("%Y-%m")
+
+
+def add_months(month_start: date, count: int) -> date:
+    """First day of the month count months after month_start (count may be negative)"""
+    index = month_start.year * 12 + (month_start.month - 1) + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def _month_sql(dialect: str, column: str) -> str:
+    """SQL expression for the YYYY-MM bucket of a date/datetime column"""
+    if dialect == "postgresql":
+        return f"to_char({column}, 'YYYY-MM')"
+    if dialect == "sqlite":
+        return f"strftime('%Y-%m', {column})"
+    return f"substr(cast({column} as varchar(32)), 1, 7)"
+
+
+def _contributions(deal: Deal, previous: bool = False, inserted: bool = False) -> List[Tuple[Tuple, Tuple[int, Decimal, Decimal]]]:
+    """
+    Rollup rows a deal counts towards
+    
+    Args:
+        deal: Deal object
+        previous: Use the values loaded from the database (before this flush)
+        inserted: Called from the insert flush of the deal
+        
+    Returns:
+        List of ((company_id, month, kind, category), (count, value, weighted_value))
+    """
+    def read(name):
+        if previous:
+            history = attributes.get_history(deal, name)
+            if history.deleted:
+                return history.deleted[0]
+        return getattr(deal, name)
+    
+    company_id = read("company_id")
+    if company_id is None:
+        return []
+    
+    raw_value = read("deal_value")
+    value = raw_value if isinstance(raw_value, Decimal) else Decimal(str(raw_value or 0))
+    weighted = value * (read("probability") or 0) / 100
+    amounts = (1, value, weighted)
+    
+    # created_at is a server default: inside the insert flush it is only
+    # known on backends that return it (SQLite, PostgreSQL)
+    if inserted and "created_at" in attributes.instance_state(deal).unloaded:
+        created_at = None
+    else:
+        created_at = read("created_at")
+    
+    rows = [((company_id, month_key(created_at or datetime.utcnow()), "created", ""), amounts)]
+    
+    deal_status = read("status") or "open"
+    if deal_status in ("won", "lost"):
+        close_date = read("actual_close_date")
+        if close_date is not None:
+            rows.append(((company_id, month_key(close_date), deal_status, ""), amounts))
+    elif deal_status == "open":
+        category = read("forecast_category") or DEFAULT_FORECAST_CATEGORY
+        rows.append(((company_id, month_key(read("expected_close_date")), "open", category), amounts))
+    
+    return rows
+
+
+class DealAnalyticsService:
+    """Deal forecast and trend analytics from the monthly rollup"""
+    
+    @staticmethod
+    def _rows(company_id: int, kinds: List[str], db: Session, since_month: Optional[str] = None):
+        """Rollup rows of a company (one query)"""
+        query = db.query(DealMonthlyRollup).filter(
+            DealMonthlyRollup.company_id == company_id,
+            DealMonthlyRollup.kind.in_(kinds),
+            DealMonthlyRollup.deal_count > 0
+        )
+        if since_month is not None:
+            # Open deals count regardless of month (NO_MONTH included)
+            query = query.filter(
+                (DealMonthlyRollup.kind == "open") | (DealMonthlyRollup.month >= since_month)
+            )
+        return query.all()
+    
+    @staticmethod
+    def get_forecast(company_id: int, db: Session, months: int = 3) -> Dict:
+        """
+        Sales forecast based on the open pipeline and the historical win rate
+        
+        Args:
+            company_id: Company ID
+            db: Database session
+            months: Number of months to project (starting with the current month)
+            
+        Returns:
+            Forecast data
+        """
+        today = datetime.utcnow().date()
+        current_month = today.replace(day=1)
+        
+        # Win rate over the last 6 months, in whole calendar months
+        history_start = month_key(today - timedelta(days=180))
+        rows = DealAnalyticsService._rows(company_id, ["open", "won", "lost"], db, since_month=history_start)
+        
+        total_pipeline = 0.0
+        weighted_pipeline = 0.0
+        by_category = {category: 0 for category in FORECAST_CATEGORIES}
+        by_month: Dict[str, Dict] = {}
+        historical_won = 0
+        historical_lost = 0
+        
+        for row in rows:
+            if row.kind == "open":
+                value = float(row.total_value or 0)
+                weighted = float(row.weighted_value or 0)
+                total_pipeline += value
+                weighted_pipeline += weighted
+                if row.category in by_category:
+                    by_category[row.category] += value
+                
+                bucket = by_month.setdefault(row.month, {"deal_count": 0, "total_value": 0.0, "weighted_value": 0.0})
+                bucket["deal_count"] += row.deal_count
+                bucket["total_value"] += value
+                bucket["weighted_value"] += weighted
+            elif row.kind == "won":
+                historical_won += row.deal_count
+            elif row.kind == "lost":
+                historical_lost += row.deal_count
+        
+        monthly_projections = []
+        for i in range(months):
+            month_start = add_months(current_month, i)
+            bucket = by_month.get(month_key(month_start), {"deal_count": 0, "total_value": 0, "weighted_value": 0})
+            monthly_projections.append({
+                "month": month_start.strftime("%B %Y"),
+                "deal_count": bucket["deal_count"],
+                "total_value": bucket["total_value"],
+                "weighted_value": round(bucket["weighted_value"], 2),
+                "projected_value": round(bucket["weighted_value"], 2)
+            })
+        
+        closed = historical_won + historical_lost
+        win_rate = (historical_won / closed * 100) if closed > 0 else 0
+        
+        return {
+            "total_pipeline": total_pipeline,
+            "weighted_pipeline": round(weighted_pipeline, 2),
+            "by_category": by_category,
+            "monthly_projections": monthly_projections,
+            "win_rate": round(win_rate, 2)
+        }
+    
+    @staticmethod
+    def get_trends(company_id: int, db: Session, months: int = 6) -> Dict:
+        """
+        Monthly won/lost/new deal trends
+        
+        Args:
+            company_id: Company ID
+            db: Database session
+            months: Number of calendar months (ending with the current month)
+            
+        Returns:
+            Trend data
+        """
+        current_month = datetime.utcnow().date().replace(day=1)
+        first_month = add_months(current_month, -(months - 1))
+        rows = DealAnalyticsService._rows(
+            company_id, ["won", "lost", "created"], db, since_month=month_key(first_month)
+        )
+        
+        buckets: Dict[Tuple[str, str], DealMonthlyRollup] = {(row.month, row.kind): row for row in rows}
+        
+        monthly_trends = []
+        for i in range(months):
+            month_start = add_months(first_month, i)
+            key = month_key(month_start)
+            won = buckets.get((key, "won"))
+            lost = buckets.get((key, "lost"))
+            created = buckets.get((key, "created"))
+            
+            won_count = won.deal_count if won else 0
+            won_value = float(won.total_value or 0) if won else 0.0
+            monthly_trends.append({
+                "month": month_start.strftime("%B %Y"),
+                "won_count": won_count,
+                "won_value": won_value,
+                "lost_count": lost.deal_count if lost else 0,
+                "new_deals": created.deal_count if created else 0,
+                "avg_deal_size": round(won_value / won_count, 2) if won_count else 0
+            })
+        
+        # Month-over-month revenue growth
+        if len(monthly_trends) >= 2:
+            current = monthly_trends[-1]
+            prev = monthly_trends[-2]
+            growth_rate = ((current["won_value"] - prev["won_value"]) / prev["won_value"] * 100) if prev["won_value"] > 0 else 0
+        else:
+            growth_rate = 0
+        
+        total_won = sum(m["won_count"] for m in monthly_trends)
+        total_lost = sum(m["lost_count"] for m in monthly_trends)
+        
+        return {
+            "monthly_trends": monthly_trends,
+            "growth_rate": round(growth_rate, 2),
+            "total_won": sum(m["won_value"] for m in monthly_trends),
+            "deals_won": total_won,
+            "win_rate": round((total_won / (total_won + total_lost) * 100), 2) if (total_won + total_lost) > 0 else 0
+        }
+    
+    @staticmethod
+    def apply_delta(connection: Connection, key: Tuple, amounts: Tuple[int, Decimal, Decimal], sign: int):
+        """Add (sign=1) or remove (sign=-1) one deal's amounts from a rollup row"""
+        company_id, month, kind, category = key
+        count, value, weighted = amounts
+        increment_row(
+            connection,
+            DealMonthlyRollup.__table__,
+            {"company_id": company_id, "month": month, "kind": kind, "category": category},
+            {"deal_count": count * sign, "total_value": value * sign, "weighted_value": weighted * sign}
+        )
+    
+    @staticmethod
+    def rebuild(connection: Connection, company_id: Optional[int] = None):
+        """
+        Recompute rollup rows from the deals table (one GROUP BY month per kind)
+        
+        Args:
+            connection: Database connection (inside a transaction)
+            company_id: Company to rebuild, None for all companies
+        """
+        dialect = connection.dialect.name
+        where = "company_id = :company_id" if company_id is not None else "1 = 1"
+        params = {"company_id": company_id, "now": datetime.utcnow()}
+        insert = (
+            "INSERT INTO deal_monthly_rollups "
+            "(company_id, month, kind, category, deal_count, total_value, weighted_value, updated_at) "
+        )
+        totals = (
+            "count(*), coalesce(sum(deal_value), 0), "
+            "coalesce(sum(deal_value * coalesce(probability, 0) / 100.0), 0), :now"
+        )
+        
+        connection.execute(text(f"DELETE FROM deal_monthly_rollups WHERE {where}"), params)
+        
+        created_month = _month_sql(dialect, "created_at")
+        connection.execute(text(
+            f"{insert} SELECT company_id, {created_month}, 'created', '', {totals} "
+            f"FROM deals WHERE {where} GROUP BY company_id, {created_month}"
+        ), params)
+        
+        close_month = _month_sql(dialect, "actual_close_date")
+        connection.execute(text(
+            f"{insert} SELECT company_id, {close_month}, status, '', {totals} "
+            f"FROM deals WHERE {where} AND status IN ('won', 'lost') AND actual_close_date IS NOT NULL "
+            f"GROUP BY company_id, {close_month}, status"
+        ), params)
+        
+        expected_month = f"coalesce({_month_sql(dialect, 'expected_close_date')}, '')"
+        category = f"coalesce(forecast_category, '{DEFAULT_FORECAST_CATEGORY}')"
+        connection.execute(text(
+            f"{insert} SELECT company_id, {expected_month}, 'open', {category}, {totals} "
+            f"FROM deals WHERE {where} AND coalesce(status, 'open') = 'open' "
+            f"GROUP BY company_id, {expected_month}, {category}"
+        ), params)
+    
+    @staticmethod
+    def setup(engine: Engine):
+        """
+        Populate the rollup if it is empty but deals exist
+        
+        Called on application startup after create_all(), so deals created
+        before the rollup table existed are counted.
+        """
+        with engine.begin() as conn:
+            has_rollup = conn.execute(text("SELECT 1 FROM deal_monthly_rollups LIMIT 1")).first()
+            has_deals = conn.execute(text("SELECT 1 FROM deals LIMIT 1")).first()
+            if has_deals and not has_rollup:
+                logger.info("Building deal monthly rollup")
+                DealAnalyticsService.rebuild(conn)
+
+
+# ============================================
+# Incremental maintenance (mapper events)
+# ============================================
+
+track_previous_values(Deal, (
+    "company_id", "deal_value", "probability", "created_at", "status",
+    "actual_close_date", "forecast_category", "expected_close_date",
+))
+
+
+@event.listens_for(Deal, "after_insert")
+def _deal_inserted(mapper, connection, target):
+    for key, amounts in _contributions(target, inserted=True):
+        DealAnalyticsService.apply_delta(connection, key, amounts, 1)
+
+
+@event.listens_for(Deal, "after_update")
+def _deal_updated(mapper, connection, target):
+    old = _contributions(target, previous=True)
+    new = _contributions(target)
+    if old == new:
+        return
+    for key, amounts in old:
+        DealAnalyticsService.apply_delta(connection, key, amounts, -1)
+    for key, amounts in new:
+        DealAnalyticsService.apply_delta(connection, key, amounts, 1)
+
+
+@event.listens_for(Deal, "after_delete")
+def _deal_deleted(mapper, connection, target):
+    for key, amounts in _contributions(target, previous=True):
+        DealAnalyticsService.apply_delta(connection, key, amounts, -1)
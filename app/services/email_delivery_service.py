@@ -0,0 +1,542 @@
+"""
+Email Delivery Service
+Pooled SMTP delivery and the dispatcher of email sequence emails
+
+- Connection pool: up to EMAIL_POOL_SIZE persistent SMTP connections
+  (STARTTLS and login done once per connection) are reused across
+  messages. A connection is replaced after EMAIL_CONNECTION_MAX_MESSAGES
+  messages, or when it sat idle longer than EMAIL_CONNECTION_IDLE_SECONDS;
+  a reused connection the server has dropped is retried once on a fresh one.
+- Dispatcher: due pending EmailSequenceEmail rows are read in batches of
+  EMAIL_DISPATCH_BATCH_SIZE, claimed (status "sending", so concurrent
+  dispatchers never send the same email twice), sent in parallel over the
+  pool, and their outcomes written back per batch. Claims not resolved
+  within EMAIL_CLAIM_TIMEOUT_SECONDS (a crashed dispatcher) are released.
+- Retries: an email the server defers (4xx reply or recipient refusal) is
+  rescheduled EMAIL_RETRY_DELAY_SECONDS later, doubled per attempt, and
+  marked failed after EMAIL_MAX_SEND_ATTEMPTS attempts. Emails left over
+  when the server is unreachable stay pending without using an attempt.
+- Rate limits: token buckets per recipient domain and per mailbox provider
+  (all domains of one provider share a bucket). Emails over a limit are
+  left pending for a later run.
+- Templates: the Jinja templates of app/templates/emails are compiled once
+  per process and never re-checked on disk.
+"""
+
+import logging
+import smtplib
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+from typing import Any, Dict, List, Optional, Tuple
+from jinja2 import Environment, FileSystemLoader
+from sqlalchemy import tuple_, update
+from sqlalchemy.orm import Session
+from app.config import settings
+from app.config.email_config import email_config
+from app.models.email_sequence import EmailSequenceEmail
+from app.models.lead import Lead
+
+logger = logging.getLogger(__name__)
+
+
+# Domain -> mailbox provider (domains of one provider share its rate limit)
+PROVIDER_DOMAINS = {
+    "gmail.com": "google",
+    "googlemail.com": "google",
+    "outlook.com": "microsoft",
+    "hotmail.com": "microsoft",
+    "live.com": "microsoft",
+    "msn.com": "microsoft",
+    "yahoo.com": "yahoo",
+    "yahoo.co.in": "yahoo",
+    "ymail.com": "yahoo",
+    "rocketmail.com": "yahoo",
+    "icloud.com": "apple",
+    "me.com": "apple",
+    "mac.com": "apple",
+    "zoho.com": "zoho",
+    "zohomail.in": "zoho",
+    "rediffmail.com": "rediff",
+}
+
+SEQUENCE_TEMPLATE = "sequence_email.html"
+
+
+class SMTPConnectionPool:
+    """Thread-safe pool of persistent connections to one SMTP server"""
+    
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        user: Optional[str] = None,
+        password: Optional[str] = None,
+        use_tls: bool = True,
+        size: int = 4,
+        timeout: float = 30.0
+    ):
+        self.config = (host, port, user, password, use_tls)
+        self.size = size
+        self.timeout = timeout
+        self._slots = threading.BoundedSemaphore(size)
+        self._lock = threading.Lock()
+        self._idle: List[list] = []  # [SMTP, last used (monotonic), messages sent]
+        self._closed = False
+        self.connections_opened = 0
+        self.messages_sent = 0
+        self.reconnects = 0
+    
+    def _connect(self) -> list:
+        host, port, user, password, use_tls = self.config
+        server = smtplib.SMTP(host, port, timeout=self.timeout)
+        try:
+            if use_tls:
+                server.starttls()
+            if user and password:
+                server.login(user, password)
+        except Exception:
+            SMTPConnectionPool._quit(server)
+            raise
+        with self._lock:
+            self.connections_opened += 1
+        return [server, time.monotonic(), 0]
+    
+    @staticmethod
+    def _quit(server: smtplib.SMTP):
+        try:
+            server.quit()
+        except Exception:
+            server.close()
+    
+    def _take(self) -> list:
+        """Most recently used idle connection, or a new one"""
+        expired = []
+        connection = None
+        now = time.monotonic()
+        with self._lock:
+            while self._idle:
+                candidate = self._idle.pop()
+                if now - candidate[1] <= settings.EMAIL_CONNECTION_IDLE_SECONDS:
+                    connection = candidate
+                    break
+                expired.append(candidate)
+        for candidate in expired:
+            SMTPConnectionPool._quit(candidate[0])
+        return connection or self._connect()
+    
+    def _give_back(self, connection: list, reusable: bool):
+        if reusable and connection[2] < settings.EMAIL_CONNECTION_MAX_MESSAGES:
+            connection[1] = time.monotonic()
+            with self._lock:
+                if not self._closed:
+                    self._idle.append(connection)
+                    return
+        SMTPConnectionPool._quit(connection[0])
+    
+    def send(self, message: MIMEMultipart, from_email: str, to_email: str):
+        """
+        Send one message on a pooled connection
+        
+        Blocks while all EMAIL_POOL_SIZE connections are busy.
+        
+        Raises:
+            smtplib.SMTPException or OSError if the message was not accepted
+        """
+        with self._slots:
+            connection = self._take()
+            reusable = False
+            try:
+                try:
+                    connection[0].send_message(message, from_email, [to_email])
+                except smtplib.SMTPServerDisconnected:
+                    if connection[2] == 0:
+                        raise
+                    # The server dropped a reused connection: retry once on a fresh one
+                    SMTPConnectionPool._quit(connection[0])
+                    connection = self._connect()
+                    with self._lock:
+                        self.reconnects += 1
+                    connection[0].send_message(message, from_email, [to_email])
+                connection[2] += 1
+                reusable = True
+                with self._lock:
+                    self.messages_sent += 1
+            except (smtplib.SMTPRecipientsRefused, smtplib.SMTPSenderRefused, smtplib.SMTPDataError):
+                # Refused message: the session was reset and stays usable
+                reusable = True
+                raise
+            finally:
+                self._give_back(connection, reusable)
+    
+    def close(self):
+        """Close the idle connections and stop pooling"""
+        with self._lock:
+            self._closed = True
+            idle, self._idle = self._idle, []
+        for connection in idle:
+            SMTPConnectionPool._quit(connection[0])
+    
+    def stats(self) -> Dict[str, Any]:
+        """Pool statistics"""
+        with self._lock:
+            return {
+                "size": self.size,
+                "idle": len(self._idle),
+                "connections_opened": self.connections_opened,
+                "messages_sent": self.messages_sent,
+                "reconnects": self.reconnects
+            }
+
+
+class RateLimiter:
+    """Token buckets per key, refilled continuously (burst = one minute's allowance)"""
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._buckets: Dict[str, List[float]] = {}  # key -> [tokens, refilled at (monotonic)]
+    
+    def acquire(self, limits: List[Tuple[str, int]]) -> bool:
+        """
+        Take one token from every bucket, or none if any bucket is empty
+        
+        Args:
+            limits: (key, allowance per minute) pairs (0 = unlimited)
+            
+        Returns:
+            True if the tokens were taken
+        """
+        now = time.monotonic()
+        with self._lock:
+            buckets = []
+            for key, per_minute in limits:
+                if per_minute <= 0:
+                    continue
+                bucket = self._buckets.setdefault(key, [float(per_minute), now])
+                bucket[0] = min(float(per_minute), bucket[0] + (now - bucket[1]) * per_minute / 60)
+                bucket[1] = now
+                if bucket[0] < 1:
+                    return False
+                buckets.append(bucket)
+            for bucket in buckets:
+                bucket[0] -= 1
+            return True
+    
+    def reset(self):
+        """Refill every bucket"""
+        with self._lock:
+            self._buckets.clear()
+
+
+class EmailTemplates:
+    """Email templates of app/templates/emails, compiled once per process"""
+    
+    _lock = threading.Lock()
+    _environment: Optional[Environment] = None
+    
+    @classmethod
+    def environment(cls) -> Environment:
+        """Shared Jinja environment with every template already compiled"""
+        with cls._lock:
+            if cls._environment is None:
+                environment = Environment(
+                    loader=FileSystemLoader(email_config.resolved_templates_path),
+                    autoescape=True,
+                    auto_reload=False
+                )
+                for name in environment.list_templates(extensions=["html", "txt"]):
+                    environment.get_template(name)
+                cls._environment = environment
+            return cls._environment
+    
+    @classmethod
+    def render(cls, template_name: str, **data) -> str:
+        """Render a template"""
+        return cls.environment().get_template(template_name).render(**data)
+
+
+class EmailDeliveryService:
+    """SMTP delivery over the connection pool and sequence email dispatch"""
+    
+    limiter = RateLimiter()
+    
+    _pool_lock = threading.Lock()
+    _pool: Optional[SMTPConnectionPool] = None
+    
+    @classmethod
+    def pool(cls) -> SMTPConnectionPool:
+        """Connection pool for the current SMTP settings"""
+        config = (
+            settings.SMTP_HOST, settings.SMTP_PORT, settings.SMTP_USER,
+            settings.SMTP_PASSWORD, settings.SMTP_USE_TLS
+        )
+        with cls._pool_lock:
+            if cls._pool is None or cls._pool.config != config or cls._pool.size != settings.EMAIL_POOL_SIZE:
+                if cls._pool is not None:
+                    cls._pool.close()
+                cls._pool = SMTPConnectionPool(
+                    *config,
+                    size=settings.EMAIL_POOL_SIZE,
+                    timeout=settings.EMAIL_SMTP_TIMEOUT
+                )
+            return cls._pool
+    
+    @classmethod
+    def close(cls):
+        """Close the pooled connections"""
+        with cls._pool_lock:
+            if cls._pool is not None:
+                cls._pool.close()
+                cls._pool = None
+    
+    @staticmethod
+    def build_message(to_email: str, subject: str, body: str, html_body: Optional[str] = None) -> MIMEMultipart:
+        """Plain text message, with an HTML alternative if given"""
+        message = MIMEMultipart("alternative")
+        message["Subject"] = subject
+        message["From"] = settings.SMTP_FROM_EMAIL
+        message["To"] = to_email
+        message.attach(MIMEText(body, "plain"))
+        if html_body:
+            message.attach(MIMEText(html_body, "html"))
+        return message
+    
+    @staticmethod
+    def send(to_email: str, subject: str, body: str, html_body: Optional[str] = None):
+        """Send one email over a pooled connection (raises on failure)"""
+        message = EmailDeliveryService.build_message(to_email, subject, body, html_body)
+        EmailDeliveryService.pool().send(message, settings.SMTP_FROM_EMAIL, to_email)
+    
+    @staticmethod
+    def rate_limits(to_email: str) -> List[Tuple[str, int]]:
+        """Rate limit buckets a recipient counts against"""
+        domain = to_email.rsplit("@", 1)[-1].strip().lower()
+        limits = [(f"domain:{domain}", settings.EMAIL_DOMAIN_RATE_PER_MINUTE)]
+        provider = PROVIDER_DOMAINS.get(domain)
+        if provider:
+            limits.append((f"provider:{provider}", settings.EMAIL_PROVIDER_RATE_PER_MINUTE))
+        return limits
+    
+    @staticmethod
+    def render_sequence_email(subject: str, body_text: Optional[str], body_html: Optional[str]) -> Optional[str]:
+        """HTML part of a sequence email (its own HTML, else the sequence template)"""
+        if body_html:
+            return body_html
+        paragraphs = [part.strip() for part in (body_text or "").split("\n\n") if part.strip()]
+        return EmailTemplates.render(SEQUENCE_TEMPLATE, subject=subject, paragraphs=paragraphs)
+    
+    # ============================================
+    # Sequence email dispatch
+    # ============================================
+    
+    @staticmethod
+    def release_stale_claims(db: Session) -> int:
+        """Return emails claimed longer than EMAIL_CLAIM_TIMEOUT_SECONDS ago to pending"""
+        cutoff = datetime.utcnow() - timedelta(seconds=settings.EMAIL_CLAIM_TIMEOUT_SECONDS)
+        released = db.execute(
+            update(EmailSequenceEmail)
+            .where(EmailSequenceEmail.status == "sending", EmailSequenceEmail.updated_at < cutoff)
+            .values(status="pending")
+        ).rowcount
+        db.commit()
+        if released:
+            logger.warning(f"Released {released} email(s) claimed by a dispatcher that did not finish")
+        return released
+    
+    @staticmethod
+    def _set_status(db: Session, ids: List[int], status: str, from_status: str, **values) -> int:
+        """Move emails from one status to another (only those still in from_status)"""
+        if not ids:
+            return 0
+        return db.execute(
+            update(EmailSequenceEmail)
+            .where(EmailSequenceEmail.id.in_(ids), EmailSequenceEmail.status == from_status)
+            .values(status=status, **values)
+        ).rowcount
+    
+    @staticmethod
+    def _claim(db: Session, ids: List[int]) -> List[int]:
+        """
+        Claim pending emails; returns the IDs this dispatcher now owns
+        
+        updated_at is set to the UTC claim time here (the column default is
+        the database server's clock), release_stale_claims compares it
+        against utcnow().
+        """
+        claimed = []
+        for email_id in ids:
+            if EmailDeliveryService._set_status(db, [email_id], "sending", "pending", updated_at=datetime.utcnow()):
+                claimed.append(email_id)
+        db.commit()
+        return claimed
+    
+    @staticmethod
+    def _reschedule(db: Session, rows: List[Any], now: datetime) -> Tuple[int, int]:
+        """
+        Count an attempt for emails the server deferred
+        
+        Emails with attempts left go back to pending, scheduled
+        EMAIL_RETRY_DELAY_SECONDS * 2^(attempts - 1) later; the others are
+        marked failed.
+        
+        Returns:
+            (rescheduled, failed) counts
+        """
+        by_attempts: Dict[int, List[int]] = {}
+        for row in rows:
+            by_attempts.setdefault(row.send_attempts + 1, []).append(row.id)
+        
+        rescheduled = failed = 0
+        for attempts, ids in by_attempts.items():
+            if attempts >= settings.EMAIL_MAX_SEND_ATTEMPTS:
+                failed += EmailDeliveryService._set_status(db, ids, "failed", "sending", send_attempts=attempts)
+                continue
+            delay = settings.EMAIL_RETRY_DELAY_SECONDS * 2 ** (attempts - 1)
+            rescheduled += EmailDeliveryService._set_status(
+                db, ids, "pending", "sending",
+                send_attempts=attempts, scheduled_send_date=now + timedelta(seconds=delay)
+            )
+        if failed:
+            logger.warning(f"{failed} email(s) failed after {settings.EMAIL_MAX_SEND_ATTEMPTS} deferred attempts")
+        return rescheduled, failed
+    
+    @staticmethod
+    def _deliver(row, abort: threading.Event) -> Tuple[str, Optional[str]]:
+        """
+        Send one claimed email
+        
+        Returns:
+            (status, error): sent, bounced (recipient refused), failed
+            (other permanent rejection), retry (deferred by the server,
+            retried with backoff) or pending (not attempted, server unreachable)
+        """
+        if abort.is_set():
+            return "pending", None
+        
+        try:
+            html_body = EmailDeliveryService.render_sequence_email(row.subject, row.body_text, row.body_html)
+            EmailDeliveryService.send(row.to_email, row.subject, row.body_text or "", html_body)
+            return "sent", None
+        except smtplib.SMTPRecipientsRefused as e:
+            code = min(code for code, _ in e.recipients.values())
+            return ("bounced" if code >= 500 else "retry"), str(e)
+        except (smtplib.SMTPConnectError, smtplib.SMTPHeloError, smtplib.SMTPAuthenticationError) as e:
+            # Connection refused by the server or wrong credentials: nothing can be sent
+            abort.set()
+            return "pending", str(e)
+        except smtplib.SMTPResponseException as e:
+            if e.smtp_code >= 500:
+                return "failed", str(e)
+            return "retry", str(e)
+        except (smtplib.SMTPException, OSError) as e:
+            # Server unreachable: stop this run, the remaining emails stay pending
+            abort.set()
+            return "pending", str(e)
+    
+    @staticmethod
+    def dispatch(db: Session, limit: int = 500) -> Dict[str, Any]:
+        """
+        Send due pending sequence emails
+        
+        Emails are taken in scheduled order. An email over its domain or
+        provider rate limit stays pending for a later run; an email whose
+        lead has no address is marked failed; an email the server defers
+        (4xx) is rescheduled with backoff until EMAIL_MAX_SEND_ATTEMPTS.
+        Without SMTP configuration nothing is sent and the emails stay pending.
+        
+        Args:
+            db: Database session
+            limit: Maximum number of due emails examined in this run
+            
+        Returns:
+            Dictionary with dispatch statistics
+        """
+        if not settings.SMTP_HOST:
+            return {"skipped": "SMTP not configured", "sent": 0, "failed": 0}
+        
+        started = time.perf_counter()
+        stats = {
+            "due": 0, "sent": 0, "failed": 0, "bounced": 0, "deferred": 0, "retry": 0,
+            "released": EmailDeliveryService.release_stale_claims(db)
+        }
+        abort = threading.Event()
+        errors: List[str] = []
+        cursor = None
+        
+        with ThreadPoolExecutor(max_workers=settings.EMAIL_POOL_SIZE, thread_name_prefix="email-dispatch") as executor:
+            while stats["due"] < limit and not abort.is_set():
+                query = db.query(
+                    EmailSequenceEmail.id, EmailSequenceEmail.scheduled_send_date,
+                    EmailSequenceEmail.subject, EmailSequenceEmail.body_text,
+                    EmailSequenceEmail.body_html, EmailSequenceEmail.send_attempts,
+                    Lead.email.label("to_email")
+                ).join(Lead, Lead.id == EmailSequenceEmail.lead_id).filter(
+                    EmailSequenceEmail.status == "pending",
+                    EmailSequenceEmail.scheduled_send_date <= datetime.utcnow()
+                )
+                if cursor is not None:
+                    query = query.filter(
+                        tuple_(EmailSequenceEmail.scheduled_send_date, EmailSequenceEmail.id) > tuple_(*cursor)
+                    )
+                rows = query.order_by(
+                    EmailSequenceEmail.scheduled_send_date, EmailSequenceEmail.id
+                ).limit(min(settings.EMAIL_DISPATCH_BATCH_SIZE, limit - stats["due"])).all()
+                if not rows:
+                    break
+                
+                cursor = (rows[-1].scheduled_send_date, rows[-1].id)
+                stats["due"] += len(rows)
+                
+                no_address = [row.id for row in rows if not row.to_email]
+                sendable = []
+                for row in rows:
+                    if not row.to_email:
+                        continue
+                    if EmailDeliveryService.limiter.acquire(EmailDeliveryService.rate_limits(row.to_email)):
+                        sendable.append(row)
+                    else:
+                        stats["deferred"] += 1
+                
+                stats["failed"] += EmailDeliveryService._set_status(db, no_address, "failed", "pending")
+                claimed = set(EmailDeliveryService._claim(db, [row.id for row in sendable]))
+                
+                outcomes: Dict[str, List[int]] = {"sent": [], "bounced": [], "failed": [], "retry": [], "pending": []}
+                deferred: List[Any] = []
+                rows_claimed = [row for row in sendable if row.id in claimed]
+                for row, (status, error) in zip(
+                    rows_claimed,
+                    executor.map(lambda row: EmailDeliveryService._deliver(row, abort), rows_claimed)
+                ):
+                    outcomes[status].append(row.id)
+                    if status == "retry":
+                        deferred.append(row)
+                    if error and len(errors) < 10:
+                        errors.append(f"{row.to_email}: {error}")
+                
+                now = datetime.utcnow()
+                stats["sent"] += EmailDeliveryService._set_status(db, outcomes["sent"], "sent", "sending", actual_send_date=now)
+                stats["bounced"] += EmailDeliveryService._set_status(db, outcomes["bounced"], "bounced", "sending")
+                stats["failed"] += EmailDeliveryService._set_status(db, outcomes["failed"], "failed", "sending")
+                stats["retry"] += EmailDeliveryService._set_status(db, outcomes["pending"], "pending", "sending")
+                retried, exhausted = EmailDeliveryService._reschedule(db, deferred, now)
+                stats["retry"] += retried
+                stats["failed"] += exhausted
+                db.commit()
+        
+        stats["seconds"] = round(time.perf_counter() - started, 3)
+        if errors:
+            stats["errors"] = errors
+        if abort.is_set():
+            logger.error(f"Email dispatch stopped, SMTP server unavailable: {errors[-1] if errors else ''}")
+        logger.info(f"Email dispatch: {stats}")
+        return stats
+    
+    @staticmethod
+    def stats() -> Dict[str, Any]:
+        """Connection pool statistics (empty before the first send)"""
+        with EmailDeliveryService._pool_lock:
+            pool = EmailDeliveryService._pool
+        return pool.stats() if pool is not None else {}
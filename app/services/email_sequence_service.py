@@ -10,6 +10,7 @@ from typing import Optional, Dict, List
 from app.models.lead import Lead
 from app.models.email_sequence import EmailSequence
 from app.models.activity import Activity
+from app.services.rescoring_service import RescoringService
 
 
 class EmailSequenceService:
@@ -195,6 +196,9 @@ class EmailSequenceService:
             activity_date=datetime.utcnow()
         )
         db.add(activity)
+        
+        # Reconcile the incremented score with the full scoring rules in the background
+        RescoringService.mark_leads(db, company_id, [lead_id])
         db.commit()
         
         return {
@@ -1,17 +1,14 @@
 import logging
 from typing import Optional, Dict, Any
 from fastapi_mail import FastMail, MessageSchema, ConnectionConfig
-from jinja2 import Environment, FileSystemLoader
 from app.config.email_config import get_email_config, is_email_configured
+from app.services.email_delivery_service import EmailTemplates
 
 logger = logging.getLogger(__name__)
 
 # Setup Jinja2 environment for email templates
 from app.config.email_config import email_config
-env = Environment(
-    loader=FileSystemLoader(email_config.email_templates_path),
-    autoescape=True
-)
+env = EmailTemplates.environment()
 
 # FastMail configuration - only create if email is configured
 fast_mail = None
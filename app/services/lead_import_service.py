@@ -0,0 +1,684 @@
+"""
+Lead Import Service
+Streaming, chunked import of lead files (CSV, NDJSON)
+
+- The uploaded file is stored under IMPORT_DIR and read back as a stream
+  of rows, so a file of any size is imported in constant memory.
+- Rows are processed in chunks of LEAD_IMPORT_CHUNK_SIZE: validation,
+  enrichment (DataIngestionService.enrich_leads), data quality grading and
+  lead scoring run over the whole chunk, then the chunk is written with one
+  bulk INSERT of leads and one of their duplicate-candidate keys, with a
+  single unique ID block (generate_unique_ids).
+- Duplicates are found in memory: LeadDedupIndex holds the blocking keys of
+  the company's leads (loaded once per import) plus every row accepted so
+  far, so duplicates within the file are caught too. Matching uses the
+  rules of DuplicateDetectionEngine.check_duplicate.
+- Each chunk commits together with the import's checkpoint (rows consumed
+  and counters), so a failed or interrupted import resumes after the last
+  committed chunk without importing a row twice.
+- Imports run as "lead_import" jobs on the durable job queue; progress is
+  read from the lead_imports row. A job takes its import with a conditional
+  UPDATE and only if it is the import's current job (lead_imports.job_id),
+  so two jobs never import the same file concurrently.
+"""
+
+import csv
+import itertools
+import json
+import logging
+import os
+import re
+import time
+import uuid
+from collections import Counter
+from datetime import datetime
+from functools import lru_cache
+from decimal import Decimal, InvalidOperation
+from types import SimpleNamespace
+from typing import Any, BinaryIO, Dict, Iterable, Iterator, List, Optional, Tuple
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from app.config import settings
+from app.database import SessionLocal
+from app.models.job import Job
+from app.models.lead import Lead
+from app.models.lead_duplicate_key import LeadDuplicateKey
+from app.models.lead_import import LeadImport
+from app.services.data_ingestion_service import DataIngestionService
+from app.utils.data_versions import mark_written
+from app.utils.duplicate_detection import DuplicateCandidateIndex, DuplicateDetectionEngine
+from app.utils.job_queue import JobContext, JobQueue, job_handler
+from app.utils.lead_scoring import LeadScoringAlgorithm
+from app.utils.unique_id import generate_unique_ids
+
+logger = logging.getLogger(__name__)
+
+
+FILE_FORMATS = ("csv", "ndjson")
+
+# Lead text columns accepted from import files
+IMPORT_FIELDS = (
+    "lead_name", "first_name", "last_name", "company_name", "email", "phone", "country",
+    "source", "campaign", "medium", "term", "priority", "interest_product", "budget_range",
+    "authority_level", "timeline", "industry", "notes",
+)
+
+FIELD_LENGTHS = {
+    field: Lead.__table__.c[field].type.length
+    for field in IMPORT_FIELDS
+    if getattr(Lead.__table__.c[field].type, "length", None)
+}
+
+EMAIL_PATTERN = re.compile(r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$')
+
+PRIORITIES = {"low", "medium", "high"}
+
+
+class LeadDedupIndex:
+    """
+    In-memory duplicate-candidate index of one company's leads
+    
+    Same blocking keys as DuplicateCandidateIndex (email, phone digits,
+    company grams), so a lookup compares a row only with leads that
+    check_duplicate could match, but company grams are bigrams filtered per
+    pair of name lengths: a lead of length lb needs at least t(la, lb)
+    shared bigrams (the bound of gram_thresholds, without taking the
+    minimum over all lengths), and only the (grams - t + 1) rarest bigrams
+    of the row are probed, since a lead sharing t grams must share one of
+    them. Bigrams keep t high enough that the common suffixes of company
+    names ("pvt ltd") are never probed. Pairs that pass are then bounded by
+    their shared characters (what quick_ratio measures, never below ratio)
+    before the full comparison. Company matches only count between leads
+    that both have an email, so only those are indexed by company.
+    """
+    
+    GRAM_SIZE = 2
+    
+    def __init__(self):
+        # Entry: [lead_id or None, row number or None, normalized fields, company grams, company characters]
+        self._entries: List[list] = []
+        self._keys: Dict[Tuple[str, str], List[int]] = {}  # email / phone / phone_long -> positions
+        self._grams: Dict[Tuple[str, int], List[int]] = {}  # (company gram, name length) -> positions
+        self._lengths: Dict[int, List[int]] = {}  # name length -> positions (pairs with no gram bound)
+    
+    @classmethod
+    def build(cls, company_id: int, db: Session) -> "LeadDedupIndex":
+        """Index every non-duplicate lead of a company (one streamed query)"""
+        index = cls()
+        rows = db.query(Lead.id, Lead.email, Lead.phone, Lead.company_name).filter(
+            Lead.company_id == company_id,
+            Lead.is_duplicate == False
+        ).yield_per(settings.LEAD_IMPORT_CHUNK_SIZE)
+        for lead_id, email, phone, company_name in rows:
+            index.add(email, phone, company_name, lead_id=lead_id)
+        return index
+    
+    def __len__(self):
+        return len(self._entries)
+    
+    @staticmethod
+    @lru_cache(maxsize=512)
+    def length_thresholds(length: int) -> Tuple[Tuple[int, int], ...]:
+        """
+        (other length, shared bigrams needed) for every name length that
+        can reach COMPANY_SIMILARITY_THRESHOLD with a name of this length
+        """
+        size = LeadDedupIndex.GRAM_SIZE
+        threshold = DuplicateDetectionEngine.COMPANY_SIMILARITY_THRESHOLD
+        pairs = []
+        for other in range(1, int(length * (2 / threshold - 1)) + 2):
+            total = length + other
+            min_matched = -(-int(round(threshold * 100)) * total // 200)
+            if min_matched > min(length, other):
+                continue
+            pairs.append((other, min_matched - (size - 1) * (total - 2 * min_matched + 1)))
+        return tuple(pairs)
+    
+    @staticmethod
+    def grams(name: str, size: int) -> List[str]:
+        """Grams of a name numbered by occurrence ("ab#1", "ab#2"), so shared grams count the multiset overlap"""
+        seen: Dict[str, int] = {}
+        grams = []
+        for i in range(len(name) - size + 1):
+            gram = name[i:i + size]
+            seen[gram] = seen.get(gram, 0) + 1
+            grams.append(f"{gram}#{seen[gram]}")
+        return grams
+    
+    def add(
+        self,
+        email: Optional[str],
+        phone: Optional[str],
+        company_name: Optional[str],
+        lead_id: Optional[int] = None,
+        row: Optional[int] = None
+    ) -> list:
+        """
+        Index a lead, or an accepted import row not inserted yet (row number)
+        
+        Returns:
+            The index entry (its lead ID can be set once known)
+        """
+        position = len(self._entries)
+        fields = DuplicateDetectionEngine.normalized_fields(email, phone, company_name)
+        has_email, email_norm, has_phone, phone_norm, has_company, company_norm = fields
+        
+        indexed = bool(email_norm and company_norm)
+        grams = LeadDedupIndex.grams(company_norm, LeadDedupIndex.GRAM_SIZE) if indexed else []
+        characters = frozenset(LeadDedupIndex.grams(company_norm, 1)) if indexed else None
+        entry = [lead_id, row, fields, frozenset(grams), characters]
+        self._entries.append(entry)
+        
+        if email_norm:
+            self._keys.setdefault(("email", email_norm), []).append(position)
+        if phone_norm:
+            self._keys.setdefault(("phone", phone_norm), []).append(position)
+            if len(phone_norm) >= DuplicateCandidateIndex.LONG_PHONE_DIGITS:
+                self._keys.setdefault(("phone_long", ""), []).append(position)
+        if indexed:
+            length = len(company_norm)
+            self._lengths.setdefault(length, []).append(position)
+            for gram in grams:
+                self._grams.setdefault((gram, length), []).append(position)
+        return entry
+    
+    def find(self, email: Optional[str], phone: Optional[str], company_name: Optional[str]) -> Optional[Tuple[list, str]]:
+        """
+        First indexed lead the input duplicates
+        
+        Returns:
+            (entry, match_reason) or None
+        """
+        email_norm = DuplicateDetectionEngine.normalize_email(email)
+        phone_norm = DuplicateDetectionEngine.normalize_phone(phone)
+        company_norm = DuplicateDetectionEngine.normalize_string(company_name)
+        
+        keyed = set()
+        if email_norm:
+            keyed.update(self._keys.get(("email", email_norm), ()))
+        if phone_norm:
+            keyed.update(self._keys.get(("phone", phone_norm), ()))
+            if len(phone_norm) >= DuplicateCandidateIndex.LONG_PHONE_DIGITS:
+                keyed.update(self._keys.get(("phone_long", ""), ()))
+        candidates = set(keyed)
+        
+        # A company-only match counts just when both leads have an email
+        if email_norm and company_norm:
+            grams = LeadDedupIndex.grams(company_norm, LeadDedupIndex.GRAM_SIZE)
+            gram_set = frozenset(grams)
+            characters = frozenset(LeadDedupIndex.grams(company_norm, 1))
+            threshold = DuplicateDetectionEngine.COMPANY_SIMILARITY_THRESHOLD
+            for other, min_shared in LeadDedupIndex.length_thresholds(len(company_norm)):
+                if min_shared > len(grams):
+                    continue
+                if min_shared <= 0:
+                    hits = dict.fromkeys(self._lengths.get(other, ()), 0)
+                else:
+                    # Probing one gram more than the prefix filter needs means
+                    # a lead must appear in two postings, which few do by chance
+                    postings = sorted((self._grams.get((gram, other), ()) for gram in grams), key=len)
+                    probed = min(len(grams), len(grams) - min_shared + 2)
+                    hits = Counter(itertools.chain.from_iterable(postings[:probed]))
+                    needed = min_shared - (len(grams) - probed)
+                    hits = {position: count for position, count in hits.items() if count >= needed}
+                min_characters = threshold * (len(company_norm) + other) / 2
+                for position in hits:
+                    entry = self._entries[position]
+                    if min_shared > 0 and len(gram_set & entry[3]) < min_shared:
+                        continue
+                    if len(characters & entry[4]) >= min_characters:
+                        candidates.add(position)
+        
+        for position in sorted(candidates):
+            entry = self._entries[position]
+            match = DuplicateDetectionEngine.match_normalized(email_norm, phone_norm, company_norm, entry[2])
+            if match:
+                return entry, match[0]
+        return None
+
+
+class LeadImporter:
+    """Chunked import of a stream of lead rows for one company"""
+    
+    def __init__(
+        self,
+        company_id: int,
+        user_id: Optional[int],
+        skip_duplicates: bool = True,
+        index: Optional[LeadDedupIndex] = None
+    ):
+        self.company_id = company_id
+        self.user_id = user_id
+        self.skip_duplicates = skip_duplicates
+        self.index = index if index is not None else LeadDedupIndex()
+        self.counts = {"rows_processed": 0, "imported": 0, "duplicates": 0, "invalid": 0}
+        self.quality_grades: Dict[str, int] = {}
+        self.issues: List[Dict[str, Any]] = []
+    
+    def _issue(self, row: int, reason: str, counter: str = "invalid", **details):
+        self.counts[counter] += 1
+        if len(self.issues) < settings.LEAD_IMPORT_MAX_ISSUES:
+            self.issues.append({"row": row, "reason": reason, **details})
+    
+    def _validate(self, row: int, raw: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Normalized lead values of a row, or None (issue recorded) if invalid"""
+        if "__error__" in raw:
+            self._issue(row, raw["__error__"])
+            return None
+        
+        values: Dict[str, Any] = {}
+        for field in IMPORT_FIELDS:
+            value = raw.get(field)
+            if value is not None and not isinstance(value, str):
+                value = str(value)
+            value = value.strip() if value else None
+            values[field] = value or None
+        
+        if not values["lead_name"]:
+            full_name = " ".join(part for part in (values["first_name"], values["last_name"]) if part)
+            values["lead_name"] = full_name or values["company_name"]
+        if not (values["lead_name"] or values["email"] or values["phone"]):
+            self._issue(row, "Row has no name, email or phone")
+            return None
+        
+        if values["email"]:
+            values["email"] = values["email"].lower()
+            if not EMAIL_PATTERN.match(values["email"]):
+                self._issue(row, f"Invalid email: {values['email']}")
+                return None
+        
+        if values["priority"]:
+            values["priority"] = values["priority"].lower()
+            if values["priority"] not in PRIORITIES:
+                values["priority"] = None
+        
+        for field, length in FIELD_LENGTHS.items():
+            if values[field] and len(values[field]) > length:
+                self._issue(row, f"{field} longer than {length} characters")
+                return None
+        
+        estimated_value = raw.get("estimated_value")
+        values["estimated_value"] = None
+        if estimated_value not in (None, ""):
+            try:
+                values["estimated_value"] = Decimal(str(estimated_value).replace(",", ""))
+            except InvalidOperation:
+                self._issue(row, f"Invalid estimated_value: {estimated_value}")
+                return None
+        
+        return values
+    
+    def process_chunk(self, db: Session, rows: List[Tuple[int, Dict[str, Any]]]) -> int:
+        """
+        Validate, enrich, deduplicate and insert one chunk (caller commits)
+        
+        Args:
+            db: Database session of the chunk's transaction
+            rows: (row number, raw row) pairs
+            
+        Returns:
+            Number of leads inserted
+        """
+        numbers: List[int] = []
+        valid: List[Dict[str, Any]] = []
+        for row, raw in rows:
+            values = self._validate(row, raw)
+            if values is not None:
+                numbers.append(row)
+                valid.append(values)
+        self.counts["rows_processed"] += len(rows)
+        
+        accepted: List[Dict[str, Any]] = []
+        entries: List[list] = []
+        for row, values in zip(numbers, DataIngestionService.enrich_leads(valid)):
+            if self.skip_duplicates:
+                duplicate = self.index.find(values["email"], values["phone"], values["company_name"])
+                if duplicate is not None:
+                    entry, match_reason = duplicate
+                    if entry[0] is not None:
+                        self._issue(row, f"Duplicate ({match_reason})", "duplicates", duplicate_of_lead_id=entry[0])
+                    else:
+                        self._issue(row, f"Duplicate ({match_reason})", "duplicates", duplicate_of_row=entry[1])
+                    continue
+                entries.append(self.index.add(values["email"], values["phone"], values["company_name"], row=row))
+            accepted.append(values)
+        
+        if not accepted:
+            return 0
+        
+        unique_ids = generate_unique_ids("lead", self.company_id, len(accepted), db=db)
+        lead_rows = []
+        for values, unique_id in zip(accepted, unique_ids):
+            grade = DataIngestionService.calculate_data_quality_score(values)["grade"]
+            self.quality_grades[grade] = self.quality_grades.get(grade, 0) + 1
+            
+            lead = {field: values.get(field) for field in IMPORT_FIELDS}
+            lead.update(
+                company_id=self.company_id,
+                unique_id=unique_id,
+                estimated_value=values["estimated_value"],
+                status="new",
+                is_duplicate=False,
+                created_by=self.user_id,
+                lead_score=LeadImporter._initial_score(lead)
+            )
+            lead_rows.append(lead)
+        
+        table = Lead.__table__
+        inserted = db.execute(table.insert().returning(table.c.id, table.c.unique_id), lead_rows).all()
+        ids = {unique_id: lead_id for lead_id, unique_id in inserted}
+        
+        key_rows = []
+        for position, lead in enumerate(lead_rows):
+            lead_id = ids[lead["unique_id"]]
+            if entries:
+                entries[position][0] = lead_id
+            for key_type, key_value in DuplicateCandidateIndex.build_keys(lead["email"], lead["phone"], lead["company_name"]):
+                key_rows.append({
+                    "company_id": self.company_id,
+                    "lead_id": lead_id,
+                    "key_type": key_type,
+                    "key_value": key_value
+                })
+        if key_rows:
+            db.execute(LeadDuplicateKey.__table__.insert(), key_rows)
+        mark_written(db, table.name, self.company_id)
+        
+        self.counts["imported"] += len(lead_rows)
+        return len(lead_rows)
+    
+    @staticmethod
+    def _initial_score(lead: Dict[str, Any]) -> int:
+        """Lead score of a new lead (no engagement yet): the static factors of calculate_lead_score"""
+        features = SimpleNamespace(**{column: lead.get(column) for column in LeadScoringAlgorithm.FEATURE_COLUMNS})
+        score = (
+            LeadScoringAlgorithm._calculate_source_score(features)
+            + LeadScoringAlgorithm._calculate_bant_score(features)
+            + LeadScoringAlgorithm._calculate_completeness_score(features)
+            + LeadScoringAlgorithm._calculate_authority_score(features)
+        )
+        return max(LeadScoringAlgorithm.MIN_SCORE, min(score, LeadScoringAlgorithm.MAX_SCORE))
+
+
+def _chunks(rows: Iterable[Tuple[int, Dict[str, Any]]], size: int) -> Iterator[List[Tuple[int, Dict[str, Any]]]]:
+    iterator = iter(rows)
+    while True:
+        chunk = list(itertools.islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+class LeadImportService:
+    """Lead file uploads, import jobs and progress"""
+    
+    @staticmethod
+    def read_rows(path: str, file_format: str, start_row: int = 0) -> Iterator[Tuple[int, Dict[str, Any]]]:
+        """
+        Stream the data rows of an import file
+        
+        Args:
+            path: File path
+            file_format: csv (header row first) or ndjson (one JSON object per line)
+            start_row: Data rows to skip (resume from a checkpoint)
+            
+        Yields:
+            (row number, row dictionary); rows that cannot be parsed carry "__error__"
+        """
+        with open(path, newline="", encoding="utf-8-sig", errors="replace") as source:
+            if file_format == "csv":
+                reader = csv.DictReader(source)
+                if reader.fieldnames:
+                    reader.fieldnames = [
+                        "_".join((name or "").strip().lower().split()) for name in reader.fieldnames
+                    ]
+                rows: Iterator[Dict[str, Any]] = reader
+            else:
+                rows = (LeadImportService._parse_json_line(line) for line in source if line.strip())
+            
+            for number, row in enumerate(itertools.islice(rows, start_row, None), start=start_row + 1):
+                yield number, row
+    
+    @staticmethod
+    def _parse_json_line(line: str) -> Dict[str, Any]:
+        try:
+            row = json.loads(line)
+        except ValueError:
+            return {"__error__": "Invalid JSON"}
+        return row if isinstance(row, dict) else {"__error__": "Row is not a JSON object"}
+    
+    @staticmethod
+    def create(
+        db: Session,
+        company_id: int,
+        user_id: int,
+        upload: BinaryIO,
+        filename: Optional[str],
+        file_format: Optional[str] = None,
+        skip_duplicates: bool = True
+    ) -> LeadImport:
+        """
+        Store an uploaded file and queue its import
+        
+        Args:
+            db: Database session
+            company_id: Company the leads are imported into
+            user_id: Importing user
+            upload: Uploaded file object (read in chunks)
+            filename: Original file name
+            file_format: csv or ndjson (default: from the file extension)
+            skip_duplicates: Skip rows duplicating existing leads or earlier rows
+            
+        Returns:
+            Queued LeadImport
+            
+        Raises:
+            ValueError: If the format is not supported
+        """
+        if not file_format:
+            extension = os.path.splitext(filename or "")[1].lower().lstrip(".")
+            file_format = {"jsonl": "ndjson", "json": "ndjson"}.get(extension, extension)
+        if file_format not in FILE_FORMATS:
+            raise ValueError(f"Unsupported import format '{file_format}' (use {', '.join(FILE_FORMATS)})")
+        
+        directory = os.path.join(settings.IMPORT_DIR, str(company_id))
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"{uuid.uuid4().hex}.{file_format}")
+        
+        size = 0
+        lines = 0
+        last = b"\n"
+        with open(path, "wb") as output:
+            while True:
+                chunk = upload.read(1024 * 1024)
+                if not chunk:
+                    break
+                output.write(chunk)
+                size += len(chunk)
+                lines += chunk.count(b"\n")
+                last = chunk[-1:]
+        if last != b"\n":
+            lines += 1
+        
+        lead_import = LeadImport(
+            company_id=company_id,
+            created_by=user_id,
+            filename=filename,
+            file_path=path,
+            file_format=file_format,
+            file_size=size,
+            total_rows=max(lines - 1, 0) if file_format == "csv" else lines,
+            skip_duplicates=skip_duplicates,
+            status="queued"
+        )
+        db.add(lead_import)
+        db.flush()
+        LeadImportService.enqueue(db, lead_import)
+        db.commit()
+        return lead_import
+    
+    @staticmethod
+    def enqueue(db: Session, lead_import: LeadImport):
+        """Queue (or requeue) the import job of an import (caller commits)"""
+        lead_import.status = "queued"
+        lead_import.last_error = None
+        lead_import.job_id = JobQueue.enqueue(
+            "lead_import",
+            {"import_id": lead_import.id},
+            company_id=lead_import.company_id,
+            queue="imports",
+            db=db
+        )
+    
+    @staticmethod
+    def resume(db: Session, lead_import: LeadImport) -> bool:
+        """
+        Queue a failed import again from its checkpoint (commits)
+        
+        A failed attempt is retried by the job queue on its own, so the
+        import's job is requeued only once it is dead-lettered (a new job is
+        queued if it was pruned).
+        
+        Args:
+            db: Database session
+            lead_import: Failed import
+            
+        Returns:
+            False if the import's job is still queued or running
+        """
+        job = db.query(Job).filter(Job.id == lead_import.job_id).first() if lead_import.job_id else None
+        if job is not None and job.status in ("queued", "running"):
+            return False
+        
+        if job is not None and job.status == "dead":
+            lead_import.status = "queued"
+            lead_import.last_error = None
+            JobQueue.requeue(db, job.id)
+        else:
+            LeadImportService.enqueue(db, lead_import)
+        db.commit()
+        return True
+    
+    @staticmethod
+    def run(import_id: int, job_id: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Import a file from its last checkpoint
+        
+        Args:
+            import_id: LeadImport ID
+            job_id: Job running the import (None = direct call)
+            
+        Returns:
+            Import counters
+        """
+        db = SessionLocal()
+        try:
+            # Take the import before reading any row: a job only if the import
+            # is still assigned to it (a reclaimed job finds it "running"),
+            # a direct call only if no job is running it
+            owned = LeadImport.job_id == job_id if job_id is not None else LeadImport.status != "running"
+            taken = db.query(LeadImport).filter(
+                LeadImport.id == import_id,
+                LeadImport.status != "completed",
+                owned
+            ).update({
+                LeadImport.status: "running",
+                LeadImport.started_at: func.coalesce(LeadImport.started_at, datetime.utcnow()),
+                LeadImport.last_error: None,
+            }, synchronize_session=False)
+            db.commit()
+            if not taken:
+                return {"skipped": "import deleted, completed or taken by another job"}
+            
+            lead_import = db.query(LeadImport).filter(LeadImport.id == import_id).first()
+            
+            start = time.monotonic()
+            importer = LeadImporter(
+                lead_import.company_id,
+                lead_import.created_by,
+                lead_import.skip_duplicates,
+                LeadDedupIndex.build(lead_import.company_id, db) if lead_import.skip_duplicates else None
+            )
+            # Counters continue from the checkpoint
+            importer.counts = {
+                "rows_processed": lead_import.rows_processed,
+                "imported": lead_import.imported,
+                "duplicates": lead_import.duplicates,
+                "invalid": lead_import.invalid,
+            }
+            importer.quality_grades = dict(lead_import.quality_grades or {})
+            importer.issues = list(lead_import.issues or [])
+            
+            try:
+                rows = LeadImportService.read_rows(lead_import.file_path, lead_import.file_format, lead_import.rows_processed)
+                for chunk in _chunks(rows, settings.LEAD_IMPORT_CHUNK_SIZE):
+                    importer.process_chunk(db, chunk)
+                    LeadImportService._checkpoint(lead_import, importer)
+                    db.commit()
+            except Exception as e:
+                db.rollback()
+                lead_import.status = "failed"
+                lead_import.last_error = str(e)
+                db.commit()
+                logger.error(f"Lead import {import_id} failed after {lead_import.rows_processed} rows: {str(e)}")
+                raise
+            
+            lead_import.status = "completed"
+            lead_import.finished_at = datetime.utcnow()
+            db.commit()
+            
+            elapsed = time.monotonic() - start
+            logger.info(f"Lead import {import_id}: {importer.counts} in {elapsed:.1f}s")
+            return {**importer.counts, "seconds": round(elapsed, 3)}
+        finally:
+            db.close()
+    
+    @staticmethod
+    def _checkpoint(lead_import: LeadImport, importer: LeadImporter):
+        """Copy importer progress to the import row (committed with the chunk)"""
+        for field, value in importer.counts.items():
+            setattr(lead_import, field, value)
+        lead_import.quality_grades = dict(importer.quality_grades)
+        lead_import.issues = list(importer.issues)
+    
+    @staticmethod
+    def get_status(lead_import: LeadImport) -> Dict[str, Any]:
+        """
+        Progress of an import
+        
+        Returns:
+            Dictionary with state, counters, progress percentage and throughput
+        """
+        end = lead_import.finished_at or datetime.utcnow()
+        elapsed = (end - lead_import.started_at).total_seconds() if lead_import.started_at else None
+        total = lead_import.total_rows
+        
+        return {
+            "id": lead_import.id,
+            "company_id": lead_import.company_id,
+            "filename": lead_import.filename,
+            "file_format": lead_import.file_format,
+            "file_size": lead_import.file_size,
+            "status": lead_import.status,
+            "skip_duplicates": lead_import.skip_duplicates,
+            "total_rows": total,
+            "rows_processed": lead_import.rows_processed,
+            "progress_percent": round(min(lead_import.rows_processed / total, 1) * 100, 1) if total else None,
+            "imported": lead_import.imported,
+            "duplicates": lead_import.duplicates,
+            "invalid": lead_import.invalid,
+            "quality_grades": lead_import.quality_grades or {},
+            "issues": lead_import.issues or [],
+            "rows_per_second": round(lead_import.rows_processed / elapsed, 1) if elapsed else None,
+            "last_error": lead_import.last_error,
+            "job_id": lead_import.job_id,
+            "created_at": lead_import.created_at.isoformat() if lead_import.created_at else None,
+            "started_at": lead_import.started_at.isoformat() if lead_import.started_at else None,
+            "finished_at": lead_import.finished_at.isoformat() if lead_import.finished_at else None
+        }
+
+
+@job_handler("lead_import")
+def run_lead_import(import_id: int, context: Optional[JobContext] = None):
+    """Job handler: import a lead file from its last checkpoint"""
+    return LeadImportService.run(import_id, job_id=context.job_id if context else None)
@@ -2,11 +2,120 @@
 Logging Service
 Handles all logging operations
 """
+import logging
+from collections import Counter
 from sqlalchemy.orm import Session
-from sqlalchemy import desc, and_, or_
+from sqlalchemy import desc, and_, or_, case, func, select, text, true
+from sqlalchemy.engine import Connection, Engine
 from datetime import datetime, timedelta
-from typing import Optional, Dict, List
+from typing import Any, Optional, Dict, List, Tuple
 from app.models.log import Log
+from app.models.log_hourly_rollup import LogHourlyRollup
+from app.utils.buffered_writer import BufferedWriter
+from app.utils.helpers import keyset_paginate
+from app.utils.rollup import increment_row
+
+logger = logging.getLogger(__name__)
+
+
+# ============================================
+# Hourly rollup (log_hourly_rollups)
+# ============================================
+
+ROLLUP_KEY = ("level", "category", "action", "status")
+
+# get_log_statistics() metrics: name -> column filters
+LOG_STATISTICS = {
+    "total_logs": {},
+    "error_count": {"level": "ERROR"},
+    "warning_count": {"level": "WARNING"},
+    "info_count": {"level": "INFO"},
+    "auth_logs": {"category": "Auth"},
+    "email_logs": {"category": "Email"},
+    "failed_logins": {"category": "Auth", "action": "Login Failed"},
+    "failed_emails": {"category": "Email", "status": "Failed"},
+}
+
+
+def _hour(timestamp: datetime) -> datetime:
+    """Start of the hour of a timestamp"""
+    return timestamp.replace(minute=0, second=0, microsecond=0)
+
+
+def _rollup_counts(rows) -> Counter:
+    """Log count per rollup key (hour, level, category, action, status)"""
+    counts = Counter()
+    for row in rows:
+        counts[(_hour(row["timestamp"]),) + tuple(row[column] or "" for column in ROLLUP_KEY)] += 1
+    return counts
+
+
+def roll_up_logs(connection: Connection, rows: List[Dict[str, Any]], sign: int = 1):
+    """
+    Add written logs to the hourly rollup (sign=-1: remove deleted logs)
+    
+    Run by log_writer in the transaction that inserts the logs, and by the
+    retention engine in the transaction that deletes them, so the rollup
+    always matches the logs table.
+    """
+    table = LogHourlyRollup.__table__
+    for key, count in sorted(_rollup_counts(rows).items()):
+        increment_row(connection, table, dict(zip(("hour",) + ROLLUP_KEY, key)), {"log_count": count * sign})
+
+
+def rebuild_log_rollup(connection: Connection):
+    """
+    Recompute the hourly rollup from the logs table
+    
+    Args:
+        connection: Database connection (inside a transaction)
+    """
+    table = LogHourlyRollup.__table__
+    logs = Log.__table__
+    
+    result = connection.execution_options(stream_results=True, yield_per=10000).execute(
+        select(logs.c.timestamp, *(logs.c[column] for column in ROLLUP_KEY))
+    )
+    counts = _rollup_counts(row._mapping for row in result)
+    
+    now = datetime.utcnow()
+    connection.execute(table.delete())
+    if counts:
+        connection.execute(table.insert(), [
+            {**dict(zip(("hour",) + ROLLUP_KEY, key)), "log_count": count, "updated_at": now}
+            for key, count in counts.items()
+        ])
+
+
+def setup_log_rollup(engine: Engine):
+    """
+    Populate the hourly rollup if it is empty but logs exist
+    
+    Called on application startup after create_all(), so logs written
+    before the rollup table existed are counted.
+    """
+    with engine.begin() as conn:
+        has_rollup = conn.execute(text("SELECT 1 FROM log_hourly_rollups LIMIT 1")).first()
+        has_logs = conn.execute(text("SELECT 1 FROM logs LIMIT 1")).first()
+        if has_logs and not has_rollup:
+            logger.info("Building log hourly rollup")
+            rebuild_log_rollup(conn)
+
+
+def _statistic_columns(model, weight) -> list:
+    """One conditional sum per LOG_STATISTICS metric"""
+    columns = []
+    for filters in LOG_STATISTICS.values():
+        condition = and_(*(getattr(model, column) == value for column, value in filters.items())) if filters else true()
+        columns.append(func.coalesce(func.sum(case((condition, weight), else_=0)), 0))
+    return columns
+
+
+# Categories written synchronously instead of through the buffer
+SYNC_CATEGORIES = {"AUTH", "SECURITY"}
+
+# Group-commit sink of the logs table (started with the application)
+log_writer = BufferedWriter(Log.__table__, "logs", on_write=roll_up_logs)
 
 
 def create_log(
@@ -19,43 +128,47 @@ def create_log(
     user_email: Optional[str] = None,
     ip_address: Optional[str] = None,
     details: Optional[Dict] = None,
-    status: str = "Success"
+    status: str = "Success",
+    sync: Optional[bool] = None
 ) -> Log:
     """
     Create a new log entry
+    
+    The entry goes through log_writer on its own connection: the caller's
+    session is not used or committed. Auth and security entries (or
+    sync=True) are written before returning, others on the next flush.
+    Returns the (unsaved) Log object.
     """
-    log = Log(
-        level=level,
-        category=category,
-        action=action,
-        message=message,
-        user_id=user_id,
-        user_email=user_email,
-        ip_address=ip_address,
-        details=details,
-        status=status,
-        timestamp=datetime.utcnow()
-    )
+    row = {
+        "level": level,
+        "category": category,
+        "action": action,
+        "message": message,
+        "user_id": user_id,
+        "user_email": user_email,
+        "ip_address": ip_address,
+        "details": details,
+        "status": status,
+        "timestamp": datetime.utcnow(),
+    }
     
-    db.add(log)
-    db.commit()
-    db.refresh(log)
-    return log
+    if sync is None:
+        sync = (category or "").upper() in SYNC_CATEGORIES
+    log_writer.write(row, sync=sync)
+    return Log(**row)
 
 
-def get_logs(
+def build_logs_query(
     db: Session,
-    skip: int = 0,
-    limit: int = 100,
     level: Optional[str] = None,
     category: Optional[str] = None,
     user_id: Optional[int] = None,
     start_date: Optional[datetime] = None,
     end_date: Optional[datetime] = None,
     search: Optional[str] = None
-) -> List[Log]:
+):
     """
-    Get logs with filters
+    Build filtered (unordered) logs query
     """
     query = db.query(Log)
     
@@ -86,6 +199,25 @@ def get_logs(
             )
         )
     
+    return query
+
+
+def get_logs(
+    db: Session,
+    skip: int = 0,
+    limit: int = 100,
+    level: Optional[str] = None,
+    category: Optional[str] = None,
+    user_id: Optional[int] = None,
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    search: Optional[str] = None
+) -> List[Log]:
+    """
+    Get logs with filters
+    """
+    query = build_logs_query(db, level, category, user_id, start_date, end_date, search)
+    
     # Order by timestamp descending (newest first)
     query = query.order_by(desc(Log.timestamp))
     
@@ -93,6 +225,26 @@ def get_logs(
     return query.offset(skip).limit(limit).all()
 
 
+def get_logs_page(
+    db: Session,
+    cursor: Optional[str] = None,
+    limit: int = 100,
+    level: Optional[str] = None,
+    category: Optional[str] = None,
+    user_id: Optional[int] = None,
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    search: Optional[str] = None
+) -> Tuple[List[Log], Optional[str]]:
+    """
+    Get logs with filters using keyset (cursor) pagination
+    Returns: (list of logs, next cursor or None)
+    """
+    query = build_logs_query(db, level, category, user_id, start_date, end_date, search)
+    logs, pagination = keyset_paginate(query, Log.timestamp, Log.id, cursor=cursor, per_page=limit)
+    return logs, pagination["next_cursor"]
+
+
 def get_logs_count(
     db: Session,
     level: Optional[str] = None,
@@ -105,109 +257,60 @@ def get_logs_count(
     """
     Get total count of logs matching filters
     """
-    query = db.query(Log)
-    
-    # Apply same filters as get_logs
-    if level:
-        query = query.filter(Log.level == level)
-    
-    if category:
-        query = query.filter(Log.category == category)
-    
-    if user_id:
-        query = query.filter(Log.user_id == user_id)
-    
-    if start_date:
-        query = query.filter(Log.timestamp >= start_date)
-    
-    if end_date:
-        query = query.filter(Log.timestamp <= end_date)
-    
-    if search:
-        search_pattern = f"%{search}%"
-        query = query.filter(
-            or_(
-                Log.message.ilike(search_pattern),
-                Log.action.ilike(search_pattern),
-                Log.user_email.ilike(search_pattern),
-                Log.ip_address.ilike(search_pattern)
-            )
-        )
-    
+    query = build_logs_query(db, level, category, user_id, start_date, end_date, search)
     return query.count()
 
 
 def get_log_statistics(db: Session, days: int = 7) -> Dict:
     """
     Get log statistics for dashboard
+    
+    Whole hours of the window are summed from the hourly rollup in one
+    query; only the partial first hour is counted from the logs table.
     """
     start_date = datetime.utcnow() - timedelta(days=days)
+    first_full_hour = _hour(start_date)
+    if first_full_hour < start_date:
+        first_full_hour += timedelta(hours=1)
     
-    # Total logs
-    total_logs = db.query(Log).filter(Log.timestamp >= start_date).count()
-    
-    # Logs by level
-    error_count = db.query(Log).filter(
-        and_(Log.timestamp >= start_date, Log.level == "ERROR")
-    ).count()
-    
-    warning_count = db.query(Log).filter(
-        and_(Log.timestamp >= start_date, Log.level == "WARNING")
-    ).count()
-    
-    info_count = db.query(Log).filter(
-        and_(Log.timestamp >= start_date, Log.level == "INFO")
-    ).count()
-    
-    # Logs by category
-    auth_logs = db.query(Log).filter(
-        and_(Log.timestamp >= start_date, Log.category == "Auth")
-    ).count()
-    
-    email_logs = db.query(Log).filter(
-        and_(Log.timestamp >= start_date, Log.category == "Email")
-    ).count()
+    totals = db.query(*_statistic_columns(LogHourlyRollup, LogHourlyRollup.log_count)).filter(
+        LogHourlyRollup.hour >= first_full_hour
+    ).one()
     
-    failed_logins = db.query(Log).filter(
-        and_(
+    partial = [0] * len(LOG_STATISTICS)
+    if first_full_hour > start_date:
+        partial = db.query(*_statistic_columns(Log, 1)).filter(
             Log.timestamp >= start_date,
-            Log.category == "Auth",
-            Log.action == "Login Failed"
-        )
-    ).count()
-    
-    failed_emails = db.query(Log).filter(
-        and_(
-            Log.timestamp >= start_date,
-            Log.category == "Email",
-            Log.status == "Failed"
-        )
-    ).count()
+            Log.timestamp < first_full_hour
+        ).one()
     
-    return {
-        "total_logs": total_logs,
-        "error_count": error_count,
-        "warning_count": warning_count,
-        "info_count": info_count,
-        "auth_logs": auth_logs,
-        "email_logs": email_logs,
-        "failed_logins": failed_logins,
-        "failed_emails": failed_emails,
-        "period_days": days
+    stats = {
+        name: int(total or 0) + int(extra or 0)
+        for name, total, extra in zip(LOG_STATISTICS, totals, partial)
     }
+    stats["period_days"] = days
+    return stats
 
 
 def cleanup_old_logs(db: Session, days: int = 90) -> int:
     """
     Delete logs older than specified days
     Returns count of deleted logs
-    """
-    cutoff_date = datetime.utcnow() - timedelta(days=days)
     
-    deleted_count = db.query(Log).filter(Log.timestamp < cutoff_date).delete()
-    db.commit()
+    Runs the retention engine: expired logs are archived (if enabled by
+    the retention policy) and deleted in short batches, not in one
+    statement holding the write lock.
+    """
+    from app.services.data_governance_service import DataGovernanceService
+    from app.services.retention_service import RetentionService
     
-    return deleted_count
+    policy = DataGovernanceService.get_system_retention_policies()["logs"]
+    stats = RetentionService.purge(
+        "logs",
+        datetime.utcnow() - timedelta(days=days),
+        archive=policy.get("archive", True)
+    )
+    return stats["deleted"]
 
 
 def get_recent_logs(db: Session, limit: int = 50) -> List[Log]:
@@ -0,0 +1,314 @@
+"""
+Pipeline Service
+Deal pipeline aggregates for the pipeline dashboards
+
+- stage_metrics(): every per-stage metric in one GROUP BY stage query with
+  conditional aggregates (instead of one count/sum query per stage)
+- Materialized summary: deal count, value and weighted value per
+  (company, stage, status) in deal_pipeline_summaries, kept current
+  incrementally by mapper events whenever a deal is inserted, updated or
+  deleted through the ORM, so dashboard totals are read in constant time
+- Deleting a customer (or a company, which deletes its customers) deletes
+  the customer's deals through the ORM in the same flush, instead of
+  leaving them to ON DELETE CASCADE, which fires no mapper events
+"""
+
+import logging
+from datetime import datetime
+from decimal import Decimal
+from typing import Dict, Optional, Tuple
+from sqlalchemy import Float, case, event, func, or_, text, type_coerce
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.orm import Session, attributes
+from app.models.customer import Customer
+from app.models.deal import Deal
+from app.models.deal_pipeline_summary import DealPipelineSummary
+from app.utils.rollup import increment_row, track_previous_values
+
+logger = logging.getLogger(__name__)
+
+
+PIPELINE_STAGES = ["prospect", "qualified", "proposal", "negotiation", "closed_won", "closed_lost"]
+OPEN_STAGES = ["prospect", "qualified", "proposal", "negotiation"]
+
+ZERO = Decimal("0")
+
+
+def _decimal(value) -> Decimal:
+    """Deal value as Decimal (None counts as 0)"""
+    if value is None:
+        return ZERO
+    if isinstance(value, Decimal):
+        return value
+    return Decimal(str(value))
+
+
+def _contribution(deal: Deal, previous: bool = False) -> Optional[Tuple[int, str, str, Decimal, Decimal]]:
+    """
+    Summary key and value contribution of a deal
+    
+    Args:
+        deal: Deal object
+        previous: Use the values loaded from the database (before this flush)
+        
+    Returns:
+        (company_id, stage, status, value, weighted_value) or None
+    """
+    def read(name):
+        if previous:
+            history = attributes.get_history(deal, name)
+            if history.deleted:
+                return history.deleted[0]
+        return getattr(deal, name)
+    
+    company_id = read("company_id")
+    if company_id is None:
+        return None
+    
+    value = _decimal(read("deal_value"))
+    probability = read("probability") or 0
+    return (
+        company_id,
+        read("stage") or "prospect",
+        read("status") or "open",
+        value,
+        value * probability / 100
+    )
+
+
+class PipelineService:
+    """Deal pipeline aggregation service"""
+    
+    @staticmethod
+    def stage_metrics(company_id: int, db: Session, since: Optional[datetime] = None) -> Dict[str, Dict]:
+        """
+        Compute every per-stage metric in one GROUP BY stage query
+        
+        Args:
+            company_id: Company ID
+            db: Database session
+            since: Start of the analysis period (period metrics are 0 without it)
+            
+        Returns:
+            Metrics per stage (all PIPELINE_STAGES present, plus any other
+            stage found in the data)
+        """
+        def count_if(condition):
+            return func.coalesce(func.sum(case((condition, 1), else_=0)), 0)
+        
+        def sum_if(condition, expression):
+            return func.coalesce(func.sum(case((condition, expression), else_=0)), 0)
+        
+        columns = [
+            Deal.stage,
+            func.count(Deal.id),
+            func.coalesce(func.sum(Deal.deal_value), 0),
+            # Float result type: the Numeric(15, 2) of deal_value would round the weighted sum
+            type_coerce(func.coalesce(func.sum(Deal.deal_value * Deal.probability / 100.0), 0), Float),
+            count_if(Deal.status == "won"),
+            sum_if(Deal.status == "won", Deal.deal_value),
+            count_if((Deal.status == "won") & Deal.deal_value.isnot(None)),
+        ]
+        
+        if since is not None:
+            since_date = since.date() if isinstance(since, datetime) else since
+            columns += [
+                count_if((Deal.status == "won") & (Deal.actual_close_date >= since_date)),
+                count_if((Deal.status == "lost") & (Deal.actual_close_date >= since_date)),
+                count_if(Deal.created_at >= since),
+            ]
+        
+        rows = db.query(*columns).filter(Deal.company_id == company_id).group_by(Deal.stage).all()
+        
+        metrics = {stage: PipelineService._empty_metrics() for stage in PIPELINE_STAGES}
+        for row in rows:
+            data = PipelineService._empty_metrics()
+            data.update({
+                "count": int(row[1] or 0),
+                "total_value": float(row[2] or 0),
+                "weighted_value": float(row[3] or 0),
+                "won_count": int(row[4] or 0),
+                "won_value": float(row[5] or 0),
+                "won_valued_count": int(row[6] or 0),
+            })
+            if since is not None:
+                data.update({
+                    "won_in_period": int(row[7] or 0),
+                    "lost_in_period": int(row[8] or 0),
+                    "created_in_period": int(row[9] or 0),
+                })
+            metrics[row[0]] = data
+        
+        return metrics
+    
+    @staticmethod
+    def _empty_metrics() -> Dict:
+        """Metrics of a stage without deals"""
+        return {
+            "count": 0,
+            "total_value": 0.0,
+            "weighted_value": 0.0,
+            "won_count": 0,
+            "won_value": 0.0,
+            "won_valued_count": 0,
+            "won_in_period": 0,
+            "lost_in_period": 0,
+            "created_in_period": 0,
+        }
+    
+    @staticmethod
+    def get_summary(company_id: int, db: Session) -> Dict[str, Dict[str, Dict]]:
+        """
+        Materialized pipeline totals of a company (no scan of the deals table)
+        
+        Args:
+            company_id: Company ID
+            db: Database session
+            
+        Returns:
+            {stage: {status: {"count", "total_value", "weighted_value"}}}
+        """
+        rows = db.query(DealPipelineSummary).filter(
+            DealPipelineSummary.company_id == company_id,
+            DealPipelineSummary.deal_count > 0
+        ).all()
+        
+        summary: Dict[str, Dict[str, Dict]] = {stage: {} for stage in PIPELINE_STAGES}
+        for row in rows:
+            summary.setdefault(row.stage, {})[row.status] = {
+                "count": row.deal_count,
+                "total_value": float(row.total_value or 0),
+                "weighted_value": float(row.weighted_value or 0),
+            }
+        
+        return summary
+    
+    @staticmethod
+    def stage_totals(company_id: int, db: Session) -> Dict[str, Dict]:
+        """Materialized count/value/weighted value per stage (all statuses)"""
+        totals = {}
+        for stage, statuses in PipelineService.get_summary(company_id, db).items():
+            totals[stage] = {
+                "count": sum(s["count"] for s in statuses.values()),
+                "total_value": sum(s["total_value"] for s in statuses.values()),
+                "weighted_value": sum(s["weighted_value"] for s in statuses.values()),
+            }
+        return totals
+    
+    @staticmethod
+    def status_totals(company_id: int, db: Session) -> Dict[str, Dict]:
+        """Materialized count/value per status (all stages)"""
+        totals: Dict[str, Dict] = {}
+        for statuses in PipelineService.get_summary(company_id, db).values():
+            for deal_status, data in statuses.items():
+                entry = totals.setdefault(deal_status, {"count": 0, "total_value": 0.0})
+                entry["count"] += data["count"]
+                entry["total_value"] += data["total_value"]
+        return totals
+    
+    @staticmethod
+    def apply_delta(
+        connection: Connection,
+        company_id: int,
+        stage: str,
+        deal_status: str,
+        count: int,
+        value: Decimal,
+        weighted: Decimal
+    ):
+        """Add a delta to one summary row, creating the row if needed"""
+        increment_row(
+            connection,
+            DealPipelineSummary.__table__,
+            {"company_id": company_id, "stage": stage, "status": deal_status},
+            {"deal_count": count, "total_value": value, "weighted_value": weighted}
+        )
+    
+    @staticmethod
+    def rebuild(connection: Connection, company_id: Optional[int] = None):
+        """
+        Recompute summary rows from the deals table
+        
+        Args:
+            connection: Database connection (inside a transaction)
+            company_id: Company to rebuild, None for all companies
+        """
+        where = "WHERE company_id = :company_id" if company_id is not None else ""
+        params = {"company_id": company_id, "now": datetime.utcnow()}
+        
+        connection.execute(text(f"DELETE FROM deal_pipeline_summaries {where}"), params)
+        connection.execute(text(
+            "INSERT INTO deal_pipeline_summaries "
+            "(company_id, stage, status, deal_count, total_value, weighted_value, updated_at) "
+            "SELECT company_id, coalesce(stage, 'prospect'), coalesce(status, 'open'), count(*), "
+            "coalesce(sum(deal_value), 0), "
+            "coalesce(sum(deal_value * coalesce(probability, 0) / 100.0), 0), :now "
+            f"FROM deals {where} "
+            "GROUP BY company_id, coalesce(stage, 'prospect'), coalesce(status, 'open')"
+        ), params)
+    
+    @staticmethod
+    def setup(engine: Engine):
+        """
+        Populate the summary table if it is empty but deals exist
+        
+        Called on application startup after create_all(), so deals created
+        before the summary table existed are counted.
+        """
+        with engine.begin() as conn:
+            has_summary = conn.execute(text("SELECT 1 FROM deal_pipeline_summaries LIMIT 1")).first()
+            has_deals = conn.execute(text("SELECT 1 FROM deals LIMIT 1")).first()
+            if has_deals and not has_summary:
+                logger.info("Building deal pipeline summary")
+                PipelineService.rebuild(conn)
+
+
+# ============================================
+# Incremental maintenance (mapper events)
+# ============================================
+
+def _apply(connection: Connection, contribution, sign: int):
+    """Add (sign=1) or remove (sign=-1) a deal's contribution"""
+    if contribution is None:
+        return
+    company_id, stage, deal_status, value, weighted = contribution
+    PipelineService.apply_delta(connection, company_id, stage, deal_status, sign, value * sign, weighted * sign)
+
+
+track_previous_values(Deal, ("company_id", "stage", "status", "deal_value", "probability"))
+
+
+@event.listens_for(Deal, "after_insert")
+def _deal_inserted(mapper, connection, target):
+    _apply(connection, _contribution(target), 1)
+
+
+@event.listens_for(Deal, "after_update")
+def _deal_updated(mapper, connection, target):
+    old = _contribution(target, previous=True)
+    new = _contribution(target)
+    if old == new:
+        return
+    _apply(connection, old, -1)
+    _apply(connection, new, 1)
+
+
+@event.listens_for(Deal, "after_delete")
+def _deal_deleted(mapper, connection, target):
+    _apply(connection, _contribution(target, previous=True), -1)
+
+
+@event.listens_for(Session, "before_flush")
+def _customers_deleted(session, flush_context, instances):
+    """Delete the deals of deleted customers (as customer or account) with the customers"""
+    customer_ids = [
+        instance.id for instance in session.deleted
+        if isinstance(instance, Customer) and instance.id is not None
+    ]
+    if not customer_ids:
+        return
+    deals = session.query(Deal).filter(
+        or_(Deal.customer_id.in_(customer_ids), Deal.account_id.in_(customer_ids))
+    )
+    for deal in deals:
+        session.delete(deal)
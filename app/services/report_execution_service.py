@@ -0,0 +1,448 @@
+"""
+Report Execution Service
+Cached and asynchronous execution of reports
+
+- Result cache: JSON results are cached in-process under a key made of the
+  report definition (type, company, configuration, filters) and the
+  company's data versions of the tables the report reads
+  (app/utils/data_versions.py). Any committed write of the company to those
+  tables changes the key, so an entry is never served stale; entries are
+  evicted least recently used beyond REPORT_CACHE_MAX_ENTRIES entries or
+  REPORT_CACHE_MAX_BYTES of results.
+- Asynchronous runs: submit() records a report run and enqueues a
+  "report_run" job, returning the run id at once. The job stores the rows
+  in pages of REPORT_RUN_PAGE_SIZE (report_run_pages), read back page by
+  page. A run whose key matches an earlier successful run reuses its pages
+  without running the query. Runs expire after REPORT_RUN_RETENTION_HOURS.
+- Every execution updates Report.last_run, and run durations and cache hit
+  rates are recorded for stats().
+"""
+
+import hashlib
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from app.config import settings
+from app.database import SessionLocal
+from app.models.report import Report
+from app.models.report_run import ReportRun, ReportRunPage
+from app.services.report_export_service import REPORT_DEFINITIONS, ReportExportService, json_default
+from app.utils.data_versions import get_versions
+from app.utils.job_queue import JobQueue, job_handler
+
+logger = logging.getLogger(__name__)
+
+
+class ReportResultCache:
+    """Thread-safe LRU cache of report results, bounded by entries and bytes"""
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, Tuple[int, List[Dict[str, Any]]]]" = OrderedDict()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+    
+    def get(self, key: str) -> Optional[List[Dict[str, Any]]]:
+        """Cached rows for key, or None"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+    
+    def set(self, key: str, rows: List[Dict[str, Any]], size: int):
+        """Store rows (size = encoded bytes), evicting the least recently used"""
+        if size > settings.REPORT_CACHE_MAX_BYTES:
+            return
+        
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= previous[0]
+            self._entries[key] = (size, rows)
+            self._bytes += size
+            while (
+                len(self._entries) > settings.REPORT_CACHE_MAX_ENTRIES
+                or self._bytes > settings.REPORT_CACHE_MAX_BYTES
+            ):
+                evicted_size, _ = self._entries.popitem(last=False)[1]
+                self._bytes -= evicted_size
+                self.evictions += 1
+    
+    def clear(self):
+        """Drop everything"""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+    
+    def stats(self) -> Dict[str, Any]:
+        """Cache statistics"""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_entries": settings.REPORT_CACHE_MAX_ENTRIES,
+                "max_bytes": settings.REPORT_CACHE_MAX_BYTES,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / total, 4) if total else 0.0
+            }
+
+
+class ReportExecutionService:
+    """Report executor: result cache, asynchronous runs and run metrics"""
+    
+    cache = ReportResultCache()
+    
+    _metrics_lock = threading.Lock()
+    _metrics: Dict[str, Dict[str, Any]] = {}
+    
+    # ============================================
+    # Cache keys and metrics
+    # ============================================
+    
+    @staticmethod
+    def tables(report: Report) -> List[str]:
+        """Tables read by a report"""
+        definition = REPORT_DEFINITIONS.get(report.report_type)
+        return [definition["model"].__tablename__] if definition else []
+    
+    @staticmethod
+    def cache_key(
+        report: Report,
+        filters: Optional[Dict[str, Any]],
+        versions: Dict[str, int],
+        scope: str
+    ) -> str:
+        """
+        Cache key of a report result
+        
+        Args:
+            report: Report definition
+            filters: Runtime filters
+            versions: Data versions of the report's tables (read before the data)
+            scope: "inline" (JSON response, row limit applies) or "full" (async runs)
+            
+        Returns:
+            SHA-256 hex digest
+        """
+        definition = {
+            "scope": scope,
+            "type": report.report_type,
+            "company_id": report.company_id,
+            "config": report.config,
+            "filters": filters or {},
+            "versions": versions,
+        }
+        encoded = json.dumps(definition, sort_keys=True, default=json_default)
+        return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+    
+    @classmethod
+    def _record(cls, report_type: str, duration_ms: int, cached: bool):
+        with cls._metrics_lock:
+            metrics = cls._metrics.setdefault(report_type, {
+                "runs": 0,
+                "cache_hits": 0,
+                "executions": 0,
+                "total_ms": 0,
+                "max_ms": 0,
+                "last_ms": None,
+            })
+            metrics["runs"] += 1
+            if cached:
+                metrics["cache_hits"] += 1
+                return
+            metrics["executions"] += 1
+            metrics["total_ms"] += duration_ms
+            metrics["max_ms"] = max(metrics["max_ms"], duration_ms)
+            metrics["last_ms"] = duration_ms
+    
+    @staticmethod
+    def mark_run(report: Report, db: Session):
+        """Set Report.last_run to now"""
+        report.last_run = datetime.utcnow()
+        db.commit()
+    
+    # ============================================
+    # Synchronous execution (JSON)
+    # ============================================
+    
+    @classmethod
+    def execute(cls, report: Report, db: Session, filters: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        Rows of a report for a JSON response, from the cache when the data is unchanged
+        
+        Args:
+            report: Report definition
+            db: Database session
+            filters: Runtime filters
+            
+        Returns:
+            {"rows", "cached", "duration_ms"}
+        """
+        start = time.monotonic()
+        versions = get_versions(db, cls.tables(report), report.company_id)
+        key = cls.cache_key(report, filters, versions, "inline")
+        
+        rows = cls.cache.get(key)
+        cached = rows is not None
+        if not cached:
+            rows = ReportExportService.inline_rows(report, db, filters)
+            size = len(json.dumps(rows, default=json_default))
+            cls.cache.set(key, rows, size)
+        
+        duration_ms = int((time.monotonic() - start) * 1000)
+        cls._record(report.report_type, duration_ms, cached)
+        cls.mark_run(report, db)
+        return {"rows": rows, "cached": cached, "duration_ms": duration_ms}
+    
+    # ============================================
+    # Asynchronous runs
+    # ============================================
+    
+    @classmethod
+    def submit(
+        cls,
+        report: Report,
+        db: Session,
+        filters: Optional[Dict[str, Any]] = None,
+        user_id: Optional[int] = None
+    ) -> ReportRun:
+        """
+        Start an asynchronous run of a report
+        
+        Reuses the pages of the latest successful run with the same cache key
+        (same definition, unchanged data); otherwise enqueues a report_run job.
+        
+        Args:
+            report: Report definition
+            db: Database session
+            filters: Runtime filters
+            user_id: Requesting user
+            
+        Returns:
+            ReportRun (succeeded if reused, else queued)
+        """
+        cls.purge_expired(db)
+        
+        versions = get_versions(db, cls.tables(report), report.company_id)
+        key = cls.cache_key(report, filters, versions, "full")
+        run = ReportRun(
+            report_id=report.id,
+            company_id=report.company_id,
+            requested_by=user_id,
+            filters=filters,
+            cache_key=key
+        )
+        
+        source = db.query(ReportRun).filter(
+            ReportRun.cache_key == key,
+            ReportRun.status == "succeeded",
+            ReportRun.cached == False
+        ).order_by(ReportRun.id.desc()).first()
+        
+        if source is not None:
+            now = datetime.utcnow()
+            run.status = "succeeded"
+            run.cached = True
+            run.source_run_id = source.id
+            run.row_count = source.row_count
+            run.page_count = source.page_count
+            run.duration_ms = 0
+            run.started_at = now
+            run.finished_at = now
+            db.add(run)
+            cls._record(report.report_type, 0, True)
+            cls.mark_run(report, db)
+            return run
+        
+        db.add(run)
+        db.flush()
+        run.job_id = JobQueue.enqueue(
+            "report_run",
+            {"run_id": run.id},
+            company_id=report.company_id,
+            queue="reports",
+            db=db
+        )
+        db.commit()
+        return run
+    
+    @classmethod
+    def run(cls, run_id: int) -> Dict[str, Any]:
+        """
+        Execute a queued run, writing its rows page by page
+        
+        Args:
+            run_id: Report run ID
+            
+        Returns:
+            Dictionary with row and page counts
+        """
+        from app.database import engine
+        
+        db = SessionLocal()
+        reader = SessionLocal()
+        try:
+            run = db.query(ReportRun).filter(ReportRun.id == run_id).first()
+            report = db.query(Report).filter(Report.id == run.report_id).first() if run else None
+            if run is None or report is None:
+                return {"skipped": "run or report deleted"}
+            
+            start = time.monotonic()
+            run.status = "running"
+            run.started_at = datetime.utcnow()
+            run.error = None
+            db.query(ReportRunPage).filter(ReportRunPage.run_id == run_id).delete(synchronize_session=False)
+            db.commit()
+            
+            # Rows are read on their own session: page writes commit as they go
+            fields = ReportExportService.fields(report.report_type)
+            page_rows: List[Dict[str, Any]] = []
+            row_count = 0
+            page_count = 0
+            try:
+                for row in ReportExportService.iter_rows(report, reader, run.filters):
+                    page_rows.append(dict(zip(fields, row)))
+                    if len(page_rows) >= settings.REPORT_RUN_PAGE_SIZE:
+                        page_count += 1
+                        cls._write_page(engine, run_id, page_count, page_rows)
+                        row_count += len(page_rows)
+                        page_rows = []
+                if page_rows or not page_count:
+                    page_count += 1
+                    cls._write_page(engine, run_id, page_count, page_rows)
+                    row_count += len(page_rows)
+            except Exception as e:
+                db.rollback()
+                run.status = "failed"
+                run.error = str(e)
+                run.finished_at = datetime.utcnow()
+                db.commit()
+                raise
+            
+            duration_ms = int((time.monotonic() - start) * 1000)
+            run.status = "succeeded"
+            run.row_count = row_count
+            run.page_count = page_count
+            run.duration_ms = duration_ms
+            run.finished_at = datetime.utcnow()
+            cls._record(report.report_type, duration_ms, False)
+            cls.mark_run(report, db)
+            return {"run_id": run_id, "rows": row_count, "pages": page_count}
+        finally:
+            reader.close()
+            db.close()
+    
+    @staticmethod
+    def _write_page(engine, run_id: int, page: int, rows: List[Dict[str, Any]]):
+        # JSON round trip: dates and decimals become strings and numbers
+        rows = json.loads(json.dumps(rows, default=json_default))
+        with engine.begin() as connection:
+            connection.execute(ReportRunPage.__table__.insert().values(run_id=run_id, page=page, rows=rows))
+    
+    @staticmethod
+    def get_page(db: Session, run: ReportRun, page: int) -> Optional[List[Dict[str, Any]]]:
+        """
+        Rows of one page of a succeeded run
+        
+        Args:
+            db: Database session
+            run: Report run
+            page: Page number (1-based)
+            
+        Returns:
+            List of row dictionaries, or None if the page does not exist
+        """
+        stored = db.query(ReportRunPage).filter(
+            ReportRunPage.run_id == (run.source_run_id or run.id),
+            ReportRunPage.page == page
+        ).first()
+        return stored.rows if stored else None
+    
+    @staticmethod
+    def purge_expired(db: Session) -> int:
+        """
+        Delete runs older than REPORT_RUN_RETENTION_HOURS with their pages
+        (and reused runs pointing at them)
+        
+        Returns:
+            Number of runs deleted
+        """
+        cutoff = datetime.utcnow() - timedelta(hours=settings.REPORT_RUN_RETENTION_HOURS)
+        expired = db.query(ReportRun.id).filter(ReportRun.created_at < cutoff)
+        expired_ids = [row.id for row in expired]
+        if not expired_ids:
+            return 0
+        
+        db.query(ReportRunPage).filter(ReportRunPage.run_id.in_(expired_ids)).delete(synchronize_session=False)
+        deleted = db.query(ReportRun).filter(
+            ReportRun.id.in_(expired_ids) | ReportRun.source_run_id.in_(expired_ids)
+        ).delete(synchronize_session=False)
+        db.commit()
+        return deleted
+    
+    # ============================================
+    # Metrics
+    # ============================================
+    
+    @classmethod
+    def stats(cls, db: Session) -> Dict[str, Any]:
+        """
+        Result cache and execution statistics
+        
+        Returns:
+            cache: this process's result cache; executions: this process's
+            runs per report type; async_runs: asynchronous runs of the
+            retention window (all processes)
+        """
+        with cls._metrics_lock:
+            executions = {}
+            for report_type, metrics in cls._metrics.items():
+                executions[report_type] = {
+                    **metrics,
+                    "avg_ms": round(metrics["total_ms"] / metrics["executions"], 1) if metrics["executions"] else None,
+                    "cache_hit_rate": round(metrics["cache_hits"] / metrics["runs"], 4) if metrics["runs"] else 0.0
+                }
+        
+        by_status = dict(
+            db.query(ReportRun.status, func.count(ReportRun.id)).group_by(ReportRun.status).all()
+        )
+        durations = db.query(
+            func.count(ReportRun.id),
+            func.avg(ReportRun.duration_ms),
+            func.max(ReportRun.duration_ms)
+        ).filter(ReportRun.status == "succeeded", ReportRun.cached == False).one()
+        reused = db.query(func.count(ReportRun.id)).filter(ReportRun.cached == True).scalar()
+        
+        return {
+            "cache": cls.cache.stats(),
+            "executions": executions,
+            "async_runs": {
+                "by_status": by_status,
+                "executed": durations[0],
+                "reused": reused,
+                "avg_duration_ms": round(float(durations[1]), 1) if durations[1] is not None else None,
+                "max_duration_ms": durations[2],
+            }
+        }
+
+
+@job_handler("report_run")
+def run_report_job(run_id: int):
+    """Job handler: execute an asynchronous report run"""
+    return ReportExecutionService.run(run_id)
@@ -0,0 +1,352 @@
+"""
+Report Export Service
+Streaming execution and export of reports (JSON, CSV, NDJSON, XLSX)
+
+- Rows are read with column-only selects and yield_per, so the database
+  driver streams them (server-side cursor on PostgreSQL) and no ORM objects
+  are built: memory stays constant whatever the number of rows.
+- Encoders turn the row stream into chunks of bytes for a StreamingResponse
+  (chunked transfer encoding, the body is never held in memory), or write
+  them to an export file served later with a download token.
+- XLSX uses an openpyxl write-only workbook (optional dependency) spooled
+  to a temporary file, since the zip container cannot be streamed.
+"""
+
+import csv
+import io
+import json
+import logging
+import os
+import secrets
+import tempfile
+import time
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+from app.config import settings
+from app.database import SessionLocal
+from app.models.activity import Activity
+from app.models.customer import Customer
+from app.models.deal import Deal
+from app.models.lead import Lead
+from app.models.report import Report
+
+logger = logging.getLogger(__name__)
+
+
+def _full_name(first_name: Optional[str], last_name: Optional[str]) -> str:
+    return " ".join(part for part in (first_name, last_name) if part)
+
+
+# Report type -> model, selected columns, output fields and row builder
+REPORT_DEFINITIONS: Dict[str, Dict[str, Any]] = {
+    "sales": {
+        "model": Deal,
+        "columns": [Deal.id, Deal.deal_name, Deal.deal_value, Deal.stage],
+        "fields": ["id", "name", "value", "stage"],
+        "filters": {"stage": Deal.stage, "status": Deal.status},
+    },
+    "leads": {
+        "model": Lead,
+        "columns": [Lead.id, Lead.first_name, Lead.last_name, Lead.status, Lead.source],
+        "fields": ["id", "name", "status", "source"],
+        "row": lambda r: (r[0], _full_name(r[1], r[2]), r[3], r[4]),
+        "filters": {"status": Lead.status, "source": Lead.source},
+    },
+    "activities": {
+        "model": Activity,
+        "columns": [Activity.id, Activity.activity_type, Activity.title],
+        "fields": ["id", "type", "subject"],
+        "filters": {"type": Activity.activity_type},
+        "inline_limit": 1000,  # JSON responses (rows are returned in the body)
+    },
+    "customers": {
+        "model": Customer,
+        "columns": [Customer.id, Customer.name, Customer.email, Customer.status],
+        "fields": ["id", "name", "email", "status"],
+        "filters": {"status": Customer.status},
+    },
+}
+
+EXPORT_FORMATS = {
+    "csv": ("text/csv; charset=utf-8", "csv"),
+    "ndjson": ("application/x-ndjson", "ndjson"),
+    "xlsx": ("application/vnd.openxmlformats-officedocument.spreadsheetml.sheet", "xlsx"),
+}
+
+# Encoded bytes buffered before a chunk is yielded
+CHUNK_BYTES = 64 * 1024
+
+
+def json_default(value: Any):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    return str(value)
+
+
+class ReportExportService:
+    """Report row streaming and export encoders"""
+    
+    @staticmethod
+    def fields(report_type: str) -> List[str]:
+        """Output fields of a report type (empty for custom reports)"""
+        definition = REPORT_DEFINITIONS.get(report_type)
+        return list(definition["fields"]) if definition else []
+    
+    @staticmethod
+    def iter_rows(
+        report: Report,
+        db,
+        filters: Optional[Dict[str, Any]] = None,
+        limit: Optional[int] = None
+    ) -> Iterator[Tuple]:
+        """
+        Rows of a report, streamed in chunks of REPORT_EXPORT_CHUNK_SIZE
+        
+        Args:
+            report: Report definition
+            db: Database session (must stay open while iterating)
+            filters: Runtime filters {field: value} (unknown fields are ignored)
+            limit: Maximum number of rows
+            
+        Yields:
+            One tuple per row, in fields() order
+        """
+        definition = REPORT_DEFINITIONS.get(report.report_type)
+        if definition is None:
+            # Custom reports have no built-in query
+            return
+        
+        model = definition["model"]
+        query = db.query(*definition["columns"])
+        if report.company_id:
+            query = query.filter(model.company_id == report.company_id)
+        for field, value in (filters or {}).items():
+            column = definition.get("filters", {}).get(field)
+            if column is not None and value is not None:
+                query = query.filter(column.in_(value) if isinstance(value, list) else column == value)
+        query = query.order_by(model.id)
+        if limit:
+            query = query.limit(limit)
+        
+        build = definition.get("row")
+        for row in query.execution_options(yield_per=settings.REPORT_EXPORT_CHUNK_SIZE):
+            yield build(row) if build else tuple(row)
+    
+    @staticmethod
+    def inline_rows(report: Report, db, filters: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        """Rows of a report as dictionaries, for JSON responses"""
+        definition = REPORT_DEFINITIONS.get(report.report_type) or {}
+        fields = ReportExportService.fields(report.report_type)
+        return [
+            dict(zip(fields, row))
+            for row in ReportExportService.iter_rows(report, db, filters, definition.get("inline_limit"))
+        ]
+    
+    # ============================================
+    # Encoders
+    # ============================================
+    
+    @staticmethod
+    def encode_csv(fields: List[str], rows: Iterator[Tuple]) -> Iterator[bytes]:
+        """CSV (header row first) in chunks of about CHUNK_BYTES"""
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(fields)
+        for row in rows:
+            writer.writerow(row)
+            if buffer.tell() >= CHUNK_BYTES:
+                yield buffer.getvalue().encode("utf-8")
+                buffer.seek(0)
+                buffer.truncate()
+        yield buffer.getvalue().encode("utf-8")
+    
+    @staticmethod
+    def encode_ndjson(fields: List[str], rows: Iterator[Tuple]) -> Iterator[bytes]:
+        """One JSON object per line in chunks of about CHUNK_BYTES"""
+        lines: List[str] = []
+        size = 0
+        for row in rows:
+            line = json.dumps(dict(zip(fields, row)), default=json_default)
+            lines.append(line)
+            size += len(line) + 1
+            if size >= CHUNK_BYTES:
+                yield ("\n".join(lines) + "\n").encode("utf-8")
+                lines, size = [], 0
+        if lines:
+            yield ("\n".join(lines) + "\n").encode("utf-8")
+    
+    @staticmethod
+    def encode_xlsx(fields: List[str], rows: Iterator[Tuple], sheet_title: str = "Report") -> Iterator[bytes]:
+        """XLSX from a write-only workbook, spooled to a temporary file then read back in chunks"""
+        from openpyxl import Workbook
+        
+        workbook = Workbook(write_only=True)
+        sheet = workbook.create_sheet(title=sheet_title[:31] or "Report")
+        sheet.append(fields)
+        for row in rows:
+            sheet.append([float(value) if isinstance(value, Decimal) else value for value in row])
+        
+        with tempfile.SpooledTemporaryFile(max_size=settings.REPORT_EXPORT_SPOOL_BYTES) as spool:
+            workbook.save(spool)
+            spool.seek(0)
+            while True:
+                chunk = spool.read(CHUNK_BYTES)
+                if not chunk:
+                    break
+                yield chunk
+    
+    @staticmethod
+    def encoder(export_format: str) -> Callable[..., Iterator[bytes]]:
+        """Encoder function of an export format"""
+        return {
+            "csv": ReportExportService.encode_csv,
+            "ndjson": ReportExportService.encode_ndjson,
+            "xlsx": ReportExportService.encode_xlsx,
+        }[export_format]
+    
+    @staticmethod
+    def check_format(export_format: str):
+        """Raise ValueError if a format is unknown or its dependency is missing"""
+        if export_format not in EXPORT_FORMATS:
+            raise ValueError(f"Unsupported export format '{export_format}' (use json, {', '.join(EXPORT_FORMATS)})")
+        if export_format == "xlsx":
+            try:
+                import openpyxl  # noqa: F401
+            except ImportError:
+                raise ValueError("XLSX export requires the openpyxl package")
+    
+    @staticmethod
+    def stream(report_id: int, export_format: str, filters: Optional[Dict[str, Any]] = None) -> Iterator[bytes]:
+        """
+        Encoded export of a report
+        
+        Runs on its own session: a StreamingResponse body is consumed after
+        the request's session has been closed.
+        
+        Args:
+            report_id: Report ID
+            export_format: csv, ndjson or xlsx
+            filters: Runtime filters
+            
+        Yields:
+            Chunks of the encoded export
+        """
+        db = SessionLocal()
+        try:
+            report = db.query(Report).filter(Report.id == report_id).one()
+            rows = ReportExportService.iter_rows(report, db, filters)
+            encode = ReportExportService.encoder(export_format)
+            if export_format == "xlsx":
+                yield from encode(ReportExportService.fields(report.report_type), rows, report.name)
+            else:
+                yield from encode(ReportExportService.fields(report.report_type), rows)
+        finally:
+            db.close()
+    
+    @staticmethod
+    def filename(report: Report, export_format: str) -> str:
+        """Download file name of an export"""
+        safe_name = "".join(c if c.isalnum() or c in "-_" else "_" for c in report.name).strip("_") or "report"
+        return f"{safe_name}-{datetime.utcnow().strftime('%Y%m%d-%H%M%S')}.{EXPORT_FORMATS[export_format][1]}"
+    
+    # ============================================
+    # Export files and download tokens
+    # ============================================
+    
+    @staticmethod
+    def write_file(
+        report: Report,
+        export_format: str,
+        filters: Optional[Dict[str, Any]] = None,
+        user_id: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """
+        Write an export to REPORT_EXPORT_DIR and issue a download token
+        
+        Args:
+            report: Report definition
+            export_format: csv, ndjson or xlsx
+            filters: Runtime filters
+            user_id: User the export was made for
+            
+        Returns:
+            {"token", "filename", "size_bytes", "expires_at"}
+        """
+        ReportExportService.purge_expired()
+        os.makedirs(settings.REPORT_EXPORT_DIR, exist_ok=True)
+        
+        token = secrets.token_urlsafe(32)
+        path = os.path.join(settings.REPORT_EXPORT_DIR, f"{token}.data")
+        with open(path + ".tmp", "wb") as output:
+            for chunk in ReportExportService.stream(report.id, export_format, filters):
+                output.write(chunk)
+        os.replace(path + ".tmp", path)
+        
+        expires_at = time.time() + settings.REPORT_DOWNLOAD_TTL_SECONDS
+        meta = {
+            "report_id": report.id,
+            "user_id": user_id,
+            "filename": ReportExportService.filename(report, export_format),
+            "media_type": EXPORT_FORMATS[export_format][0],
+            "expires_at": expires_at,
+        }
+        with open(os.path.join(settings.REPORT_EXPORT_DIR, f"{token}.json"), "w") as meta_file:
+            json.dump(meta, meta_file)
+        
+        return {
+            "token": token,
+            "filename": meta["filename"],
+            "size_bytes": os.path.getsize(path),
+            "expires_at": datetime.utcfromtimestamp(expires_at),
+        }
+    
+    @staticmethod
+    def resolve_token(token: str) -> Optional[Dict[str, Any]]:
+        """
+        Export file of a download token
+        
+        Returns:
+            Metadata plus "path", or None if unknown or expired
+        """
+        if not token or not all(c.isalnum() or c in "-_" for c in token):
+            return None
+        
+        meta_path = os.path.join(settings.REPORT_EXPORT_DIR, f"{token}.json")
+        data_path = os.path.join(settings.REPORT_EXPORT_DIR, f"{token}.data")
+        try:
+            with open(meta_path) as meta_file:
+                meta = json.load(meta_file)
+        except (OSError, ValueError):
+            return None
+        
+        if meta["expires_at"] < time.time() or not os.path.exists(data_path):
+            return None
+        return {**meta, "path": data_path}
+    
+    @staticmethod
+    def purge_expired() -> int:
+        """Delete expired export files; returns the number removed"""
+        directory = settings.REPORT_EXPORT_DIR
+        if not os.path.isdir(directory):
+            return 0
+        
+        removed = 0
+        now = time.time()
+        for name in os.listdir(directory):
+            if not name.endswith(".json"):
+                continue
+            meta_path = os.path.join(directory, name)
+            try:
+                with open(meta_path) as meta_file:
+                    expired = json.load(meta_file)["expires_at"] < now
+            except (OSError, ValueError, KeyError):
+                expired = True
+            if expired:
+                for path in (meta_path, meta_path[:-len(".json")] + ".data"):
+                    if os.path.exists(path):
+                        os.remove(path)
+                removed += 1
+        return removed
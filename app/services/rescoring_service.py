@@ -0,0 +1,247 @@
+"""
+Rescoring Service
+Event-driven incremental rescoring of lead scores and customer health scores
+
+- Writes that change score inputs (activities, lead fields, email engagement)
+  mark the lead / customer dirty in score_dirty_marks, inside the writer's
+  own transaction. One row per record: repeated writes coalesce into a
+  single mark.
+- A background worker polls for marks whose quiet period
+  (RESCORING_DEBOUNCE_SECONDS) has elapsed, or that have waited longer than
+  RESCORING_MAX_DELAY_SECONDS under continuous writes, and rescores just
+  those records with the set-based batch scorers (LeadScoringAlgorithm,
+  HealthScoreCalculator).
+- A mark is removed only if it was not marked again while being processed,
+  so a write racing with the worker is never lost.
+
+Risk scores (RiskScoringService) are computed on read and not stored, so
+they need no rescoring.
+"""
+
+import logging
+import threading
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, Optional
+from sqlalchemy import and_, delete, func, or_
+from sqlalchemy.orm import Session
+from app.config import settings
+from app.database import SessionLocal
+from app.models.score_dirty_mark import ScoreDirtyMark
+
+logger = logging.getLogger(__name__)
+
+
+LEAD = "lead"
+CUSTOMER = "customer"
+
+
+class RescoringService:
+    """Dirty-record queue and incremental rescoring"""
+    
+    # Worker statistics (per process)
+    _stats = {
+        "runs": 0,
+        "leads_rescored": 0,
+        "customers_rescored": 0,
+        "scores_changed": 0,
+        "errors": 0,
+        "last_run_at": None,
+        "last_error": None,
+    }
+    _stats_lock = threading.Lock()
+    
+    @staticmethod
+    def mark_leads(db: Session, company_id: int, lead_ids: Iterable[Optional[int]]):
+        """Mark leads dirty (committed with the caller's transaction)"""
+        RescoringService._mark(db, LEAD, company_id, lead_ids)
+    
+    @staticmethod
+    def mark_customers(db: Session, company_id: int, customer_ids: Iterable[Optional[int]]):
+        """Mark customers dirty (committed with the caller's transaction)"""
+        RescoringService._mark(db, CUSTOMER, company_id, customer_ids)
+    
+    @staticmethod
+    def _mark(db: Session, entity_type: str, company_id: int, entity_ids: Iterable[Optional[int]]):
+        """Insert marks, or restart the quiet period of existing ones"""
+        if not settings.RESCORING_ENABLED:
+            return
+        
+        now = datetime.utcnow()
+        table = ScoreDirtyMark.__table__
+        dialect = db.get_bind().dialect.name
+        
+        for entity_id in sorted({entity_id for entity_id in entity_ids if entity_id}):
+            values = {
+                "entity_type": entity_type,
+                "entity_id": entity_id,
+                "company_id": company_id,
+                "first_marked_at": now,
+                "last_marked_at": now,
+            }
+            
+            if dialect in ("sqlite", "postgresql"):
+                if dialect == "sqlite":
+                    from sqlalchemy.dialects.sqlite import insert
+                else:
+                    from sqlalchemy.dialects.postgresql import insert
+                
+                db.execute(insert(table).values(**values).on_conflict_do_update(
+                    index_elements=[table.c.entity_type, table.c.entity_id],
+                    set_={"last_marked_at": now}
+                ))
+                continue
+            
+            updated = db.execute(table.update().where(
+                table.c.entity_type == entity_type,
+                table.c.entity_id == entity_id
+            ).values(last_marked_at=now)).rowcount
+            if not updated:
+                db.execute(table.insert().values(**values))
+    
+    @staticmethod
+    def process_due(db: Session, now: Optional[datetime] = None, debounce: bool = True) -> Dict:
+        """
+        Rescore the records whose marks are due, then drop those marks
+        
+        Args:
+            db: Database session
+            now: Reference time (default: current UTC time)
+            debounce: Only take marks whose quiet period or max delay has elapsed
+            
+        Returns:
+            Dictionary with rescoring statistics
+        """
+        from app.utils.health_score import HealthScoreCalculator
+        from app.utils.lead_scoring import LeadScoringAlgorithm
+        
+        now = now or datetime.utcnow()
+        query = db.query(
+            ScoreDirtyMark.entity_type,
+            ScoreDirtyMark.entity_id,
+            ScoreDirtyMark.company_id,
+            ScoreDirtyMark.last_marked_at
+        )
+        if debounce:
+            query = query.filter(or_(
+                ScoreDirtyMark.last_marked_at <= now - timedelta(seconds=settings.RESCORING_DEBOUNCE_SECONDS),
+                ScoreDirtyMark.first_marked_at <= now - timedelta(seconds=settings.RESCORING_MAX_DELAY_SECONDS)
+            ))
+        marks = query.order_by(ScoreDirtyMark.first_marked_at).limit(settings.RESCORING_BATCH_SIZE).all()
+        
+        result = {"leads": 0, "customers": 0, "changed": 0, "errors": 0}
+        if not marks:
+            return result
+        
+        groups = defaultdict(list)
+        for mark in marks:
+            groups[(mark.company_id, mark.entity_type)].append(mark)
+        
+        done = []
+        for (company_id, entity_type), group in groups.items():
+            ids = [mark.entity_id for mark in group]
+            try:
+                if entity_type == LEAD:
+                    stats = LeadScoringAlgorithm.batch_update_lead_scores(company_id, db, ids)
+                    result["leads"] += len(ids)
+                else:
+                    stats = HealthScoreCalculator.batch_update_health_scores(company_id, db, ids)
+                    result["customers"] += len(ids)
+                result["changed"] += stats["updated"]
+                done.extend(group)
+            except Exception as e:
+                # Marks stay queued and are retried on the next run
+                db.rollback()
+                result["errors"] += 1
+                result["last_error"] = str(e)
+                logger.error(f"Rescoring {entity_type}s of company {company_id} failed: {str(e)}")
+        
+        # Drop processed marks, unless they were marked again meanwhile
+        for mark in done:
+            db.execute(delete(ScoreDirtyMark).where(and_(
+                ScoreDirtyMark.entity_type == mark.entity_type,
+                ScoreDirtyMark.entity_id == mark.entity_id,
+                ScoreDirtyMark.last_marked_at == mark.last_marked_at
+            )))
+        db.commit()
+        
+        RescoringService._record(result)
+        return result
+    
+    @staticmethod
+    def _record(result: Dict):
+        """Add a run's result to the worker statistics"""
+        with RescoringService._stats_lock:
+            stats = RescoringService._stats
+            stats["runs"] += 1
+            stats["leads_rescored"] += result["leads"]
+            stats["customers_rescored"] += result["customers"]
+            stats["scores_changed"] += result["changed"]
+            stats["errors"] += result["errors"]
+            stats["last_run_at"] = datetime.utcnow().isoformat()
+            if result.get("last_error"):
+                stats["last_error"] = result["last_error"]
+    
+    @staticmethod
+    def get_status(db: Session) -> Dict:
+        """Queue depth and worker statistics"""
+        with RescoringService._stats_lock:
+            stats = dict(RescoringService._stats)
+        
+        pending = dict(db.query(ScoreDirtyMark.entity_type, func.count()).group_by(ScoreDirtyMark.entity_type).all())
+        
+        return {
+            "enabled": settings.RESCORING_ENABLED,
+            "worker_running": RescoringWorker.is_running(),
+            "pending": {LEAD: pending.get(LEAD, 0), CUSTOMER: pending.get(CUSTOMER, 0)},
+            "debounce_seconds": settings.RESCORING_DEBOUNCE_SECONDS,
+            "max_delay_seconds": settings.RESCORING_MAX_DELAY_SECONDS,
+            **stats
+        }
+
+
+class RescoringWorker:
+    """Background thread that drains due marks every RESCORING_POLL_INTERVAL seconds"""
+    
+    _thread: Optional[threading.Thread] = None
+    _stop = threading.Event()
+    
+    @classmethod
+    def start(cls):
+        """Start the worker thread (no-op if disabled or already running)"""
+        if not settings.RESCORING_ENABLED or cls.is_running():
+            return
+        
+        cls._stop.clear()
+        cls._thread = threading.Thread(target=cls._run, name="rescoring-worker", daemon=True)
+        cls._thread.start()
+        logger.info("Rescoring worker started")
+    
+    @classmethod
+    def stop(cls, timeout: float = 5.0):
+        """Stop the worker thread"""
+        cls._stop.set()
+        if cls._thread is not None:
+            cls._thread.join(timeout)
+        cls._thread = None
+    
+    @classmethod
+    def is_running(cls) -> bool:
+        """Whether the worker thread is alive"""
+        return cls._thread is not None and cls._thread.is_alive()
+    
+    @classmethod
+    def _run(cls):
+        while not cls._stop.wait(settings.RESCORING_POLL_INTERVAL):
+            db = SessionLocal()
+            try:
+                # Keep draining while full batches come back
+                while not cls._stop.is_set():
+                    result = RescoringService.process_due(db)
+                    if result["leads"] + result["customers"] < settings.RESCORING_BATCH_SIZE:
+                        break
+            except Exception as e:
+                logger.error(f"Rescoring worker run failed: {str(e)}")
+                db.rollback()
+            finally:
+                db.close()
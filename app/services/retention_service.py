@@ -0,0 +1,242 @@
+"""
+Retention Service
+Archival and chunked deletion of expired system logs and audit trail entries
+
+- Policy (retention days, archive on/off per table) comes from
+  DataGovernanceService, the same source as the data retention report.
+- Expired rows are deleted in batches of RETENTION_BATCH_SIZE by primary
+  key range, each batch in its own short transaction, pausing
+  RETENTION_BATCH_PAUSE_MS between batches so API writers are never
+  locked out for long (SQLite holds one write lock per transaction).
+- Before a batch is deleted its rows are archived to an append-only,
+  gzip-compressed JSONL segment file, partitioned by month:
+  ARCHIVE_DIR/<table>/<YYYY-MM>/<first id>-<last id>.jsonl.gz. Segments are
+  written to a temporary name, synced and renamed, so a crash never leaves
+  rows deleted but not archived.
+- Archived months past ARCHIVE_RETENTION_MONTHS are dropped as whole
+  directories.
+- Deleting logs keeps the hourly log rollup exact: the counts of each
+  deleted batch are subtracted in the same transaction.
+"""
+
+import gzip
+import json
+import logging
+import os
+import shutil
+import time
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from typing import Any, Dict, List, Optional
+from sqlalchemy import Table, select
+from app.config import settings
+from app.models.audit_trail import AuditTrail
+from app.models.log import Log
+from app.models.log_hourly_rollup import LogHourlyRollup
+
+logger = logging.getLogger(__name__)
+
+
+# Tables under retention (policy key -> table)
+RETENTION_TABLES: Dict[str, Table] = {
+    "logs": Log.__table__,
+    "audit_trails": AuditTrail.__table__,
+}
+
+
+def _json_default(value: Any):
+    """JSON form of datetimes and decimals in archived rows"""
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    return str(value)
+
+
+class RetentionService:
+    """Retention engine for append-only system tables"""
+    
+    @staticmethod
+    def run(now: Optional[datetime] = None) -> Dict[str, Dict]:
+        """
+        Apply the retention policy of every table
+        
+        Args:
+            now: Reference time (default: current UTC time)
+            
+        Returns:
+            Per-table purge statistics
+        """
+        from app.services.data_governance_service import DataGovernanceService
+        
+        now = now or datetime.utcnow()
+        results = {}
+        for name, policy in DataGovernanceService.get_system_retention_policies().items():
+            if name not in RETENTION_TABLES or not policy.get("retention_days"):
+                continue
+            results[name] = RetentionService.purge(
+                name,
+                now - timedelta(days=policy["retention_days"]),
+                archive=policy.get("archive", True)
+            )
+        
+        results["archive_months_dropped"] = RetentionService.drop_expired_archives(now)
+        return results
+    
+    @staticmethod
+    def purge(
+        name: str,
+        cutoff: datetime,
+        archive: bool = True,
+        batch_size: Optional[int] = None,
+        max_batches: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """
+        Archive and delete the rows of a table older than cutoff, batch by batch
+        
+        Args:
+            name: Table name (key of RETENTION_TABLES)
+            cutoff: Rows with an earlier timestamp are expired
+            archive: Write expired rows to archive segments before deleting
+            batch_size: Rows per batch (default RETENTION_BATCH_SIZE)
+            max_batches: Stop after this many batches (None = until done)
+            
+        Returns:
+            Dictionary with purge statistics
+        """
+        from app.database import engine
+        
+        table = RETENTION_TABLES[name]
+        batch_size = batch_size or settings.RETENTION_BATCH_SIZE
+        pause = settings.RETENTION_BATCH_PAUSE_MS / 1000
+        
+        stats = {"deleted": 0, "archived": 0, "batches": 0, "segments": 0, "cutoff": cutoff.isoformat()}
+        last_id = 0
+        start = time.monotonic()
+        
+        while max_batches is None or stats["batches"] < max_batches:
+            with engine.begin() as connection:
+                rows = [
+                    dict(row._mapping)
+                    for row in connection.execute(
+                        select(table)
+                        .where(table.c.id > last_id, table.c.timestamp < cutoff)
+                        .order_by(table.c.id)
+                        .limit(batch_size)
+                    )
+                ]
+                if not rows:
+                    break
+                
+                first_id, last_id = rows[0]["id"], rows[-1]["id"]
+                if archive:
+                    stats["segments"] += RetentionService._archive(name, rows)
+                    stats["archived"] += len(rows)
+                
+                # Every expired row in [first_id, last_id] is in this batch
+                deleted = connection.execute(table.delete().where(
+                    table.c.id >= first_id,
+                    table.c.id <= last_id,
+                    table.c.timestamp < cutoff
+                )).rowcount
+                if table is Log.__table__:
+                    from app.services.log_service import roll_up_logs
+                    roll_up_logs(connection, rows, sign=-1)
+            
+            stats["deleted"] += deleted
+            stats["batches"] += 1
+            if len(rows) < batch_size:
+                break
+            # Let waiting writers take the write lock
+            time.sleep(pause)
+        
+        if table is Log.__table__:
+            with engine.begin() as connection:
+                rollup = LogHourlyRollup.__table__
+                connection.execute(rollup.delete().where(rollup.c.hour < cutoff, rollup.c.log_count <= 0))
+        
+        stats["duration_seconds"] = round(time.monotonic() - start, 3)
+        if stats["deleted"]:
+            logger.info(f"Retention: {stats['deleted']} {name} rows older than {cutoff} deleted in {stats['batches']} batches")
+        return stats
+    
+    @staticmethod
+    def _archive(name: str, rows: List[Dict[str, Any]]) -> int:
+        """
+        Write rows to compressed JSONL segments, one per month of their timestamps
+        
+        Returns:
+            Number of segments written
+        """
+        months: Dict[str, List[Dict[str, Any]]] = {}
+        for row in rows:
+            months.setdefault(row["timestamp"].strftime("%Y-%m"), []).append(row)
+        
+        for month, month_rows in months.items():
+            directory = os.path.join(settings.ARCHIVE_DIR, name, month)
+            os.makedirs(directory, exist_ok=True)
+            path = os.path.join(directory, f"{month_rows[0]['id']:012d}-{month_rows[-1]['id']:012d}.jsonl.gz")
+            temp_path = path + ".tmp"
+            
+            with open(temp_path, "wb") as raw:
+                with gzip.GzipFile(fileobj=raw, mode="wb") as segment:
+                    for row in month_rows:
+                        segment.write(json.dumps(row, default=_json_default).encode("utf-8") + b"\n")
+                raw.flush()
+                os.fsync(raw.fileno())
+            os.replace(temp_path, path)
+        
+        return len(months)
+    
+    @staticmethod
+    def drop_expired_archives(now: Optional[datetime] = None) -> int:
+        """
+        Remove archived months older than ARCHIVE_RETENTION_MONTHS (0 = keep forever)
+        
+        Returns:
+            Number of month directories removed
+        """
+        if settings.ARCHIVE_RETENTION_MONTHS <= 0:
+            return 0
+        
+        now = now or datetime.utcnow()
+        month_index = now.year * 12 + now.month - 1 - settings.ARCHIVE_RETENTION_MONTHS
+        oldest_kept = f"{month_index // 12:04d}-{month_index % 12 + 1:02d}"
+        
+        dropped = 0
+        for name in RETENTION_TABLES:
+            for month in RetentionService.archived_months(name):
+                if month < oldest_kept:
+                    shutil.rmtree(os.path.join(settings.ARCHIVE_DIR, name, month))
+                    dropped += 1
+        return dropped
+    
+    @staticmethod
+    def archived_months(name: str) -> List[str]:
+        """Archived months (YYYY-MM) of a table, oldest first"""
+        directory = os.path.join(settings.ARCHIVE_DIR, name)
+        if not os.path.isdir(directory):
+            return []
+        return sorted(month for month in os.listdir(directory) if os.path.isdir(os.path.join(directory, month)))
+    
+    @staticmethod
+    def read_archive(name: str, month: str):
+        """
+        Archived rows of a table for one month, in ID order
+        
+        Args:
+            name: Table name
+            month: Month (YYYY-MM)
+            
+        Yields:
+            Row dictionaries (timestamps as ISO strings)
+        """
+        directory = os.path.join(settings.ARCHIVE_DIR, name, month)
+        if not os.path.isdir(directory):
+            return
+        for segment in sorted(os.listdir(directory)):
+            if not segment.endswith(".jsonl.gz"):
+                continue
+            with gzip.open(os.path.join(directory, segment), "rt", encoding="utf-8") as lines:
+                for line in lines:
+                    yield json.loads(line)
@@ -1,14 +1,25 @@
 """
 Risk Scoring Service
 Calculates and manages lead risk scores based on BANT criteria and other factors
+
+Bulk operations (batch update, high-risk list, analytics) score lead
+feature frames column by column, chunk by chunk: no Lead objects and no
+per-lead queries.
 """
 
 from datetime import datetime, timedelta
 from sqlalchemy.orm import Session
-from sqlalchemy import func, and_
-from typing import Optional, Dict, List
+from typing import Optional, Dict, Iterator, List, Tuple
 from app.models.lead import Lead
-from app.models.activity import Activity
+from app.utils.lead_features import LeadFeatureFrame
+
+
+# Lead columns read by the risk rules (bulk scoring loads only these)
+RISK_FEATURE_COLUMNS = (
+    "id", "lead_name", "email", "phone", "company_name", "first_name", "last_name",
+    "budget_range", "authority_level", "interest_product", "timeline",
+    "created_at", "updated_at",
+)
 
 
 class RiskScoringService:
@@ -44,113 +55,175 @@ class RiskScoringService:
         Returns:
             Risk assessment dictionary
         """
-        scores = {
-            "bant_completion": 0,
-            "engagement": 0,
-            "data_quality": 0,
-            "time_factors": 0
-        }
-        risk_factors = []
-        
-        # 1. BANT Completion Score (40 points)
-        bant_items = 0
-        if lead.budget_range and lead.budget_range.lower() not in ["not disclosed", "unknown", ""]:
-            bant_items += 1
-        else:
-            risk_factors.append("Missing budget information")
-        
-        if lead.authority_level:
-            bant_items += 1
-            if "decision" in lead.authority_level.lower() or "maker" in lead.authority_level.lower():
-                scores["bant_completion"] += 5  # Bonus for decision maker
-        else:
-            risk_factors.append("Authority level not identified")
+        now = datetime.utcnow()
+        recent_activities = LeadFeatureFrame.recent_activity_counts(
+            [lead.id], now - timedelta(days=30), db
+        )
+        frame = LeadFeatureFrame.from_leads([lead], RISK_FEATURE_COLUMNS, recent_activities)
         
-        if lead.interest_product and lead.interest_product.strip():
-            bant_items += 1
-        else:
-            risk_factors.append("No specific need/product interest")
+        return RiskScoringService._assessment(RiskScoringService.score_frame(frame, now), 0)
+    
+    @staticmethod
+    def score_frame(frame: LeadFeatureFrame, now: datetime) -> Dict[str, list]:
+        """
+        Score every lead of a feature frame, column by column
         
-        if lead.timeline:
-            bant_items += 1
-        else:
-            risk_factors.append("No timeline specified")
+        Risk Factors:
+        1. BANT Completion (40 points)
+        2. Engagement Level (25 points)
+        3. Data Quality (20 points)
+        4. Time Factors (15 points)
         
-        scores["bant_completion"] += (bant_items / 4) * 35  # Up to 35 + 5 bonus = 40
+        Args:
+            frame: Lead features (RISK_FEATURE_COLUMNS + recent_activities)
+            now: Reference time (UTC)
+            
+        Returns:
+            Score columns: the four breakdown scores, total_score, risk_level,
+            the check flags behind the risk factors and days_since_update
+        """
+        # 1. BANT Completion Score (40 points)
+        has_budget = [
+            bool(budget) and budget.lower() not in ["not disclosed", "unknown", ""]
+            for budget in frame["budget_range"]
+        ]
+        has_authority = [bool(authority) for authority in frame["authority_level"]]
+        decision_bonus = [
+            5 if authority and ("decision" in authority.lower() or "maker" in authority.lower()) else 0
+            for authority in frame["authority_level"]
+        ]
+        has_need = [bool(product and product.strip()) for product in frame["interest_product"]]
+        has_timeline = [bool(timeline) for timeline in frame["timeline"]]
+        
+        # Up to 35 + 5 bonus for decision maker = 40
+        bant_completion = [
+            bonus + ((budget + authority + need + timeline) / 4) * 35
+            for bonus, budget, authority, need, timeline
+            in zip(decision_bonus, has_budget, has_authority, has_need, has_timeline)
+        ]
         
         # 2. Engagement Level (25 points)
-        recent_activities = db.query(func.count(Activity.id)).filter(
-            Activity.lead_id == lead.id,
-            Activity.activity_date >= datetime.utcnow() - timedelta(days=30)
-        ).scalar() or 0
-        
-        if recent_activities >= 5:
-            scores["engagement"] = 25
-        elif recent_activities >= 3:
-            scores["engagement"] = 20
-        elif recent_activities >= 1:
-            scores["engagement"] = 15
-        else:
-            scores["engagement"] = 5
-            risk_factors.append("Low engagement in last 30 days")
+        engagement = [
+            25 if count >= 5 else 20 if count >= 3 else 15 if count >= 1 else 5
+            for count in frame["recent_activities"]
+        ]
         
         # 3. Data Quality (20 points)
-        data_points = 0
-        if lead.email and "@" in lead.email:
-            data_points += 1
-        else:
-            risk_factors.append("Missing or invalid email")
-        
-        if lead.phone and len(lead.phone) >= 10:
-            data_points += 1
-        else:
-            risk_factors.append("Missing or invalid phone")
+        valid_email = [bool(email and "@" in email) for email in frame["email"]]
+        valid_phone = [bool(phone and len(phone) >= 10) for phone in frame["phone"]]
+        has_name = [
+            bool(first_name and last_name)
+            for first_name, last_name in zip(frame["first_name"], frame["last_name"])
+        ]
+        data_quality = [
+            ((email + phone + bool(company_name) + name) / 4) * 20
+            for email, phone, company_name, name
+            in zip(valid_email, valid_phone, frame["company_name"], has_name)
+        ]
+        
+        # 4. Time Factors (15 points): newer leads with recent activity are lower risk
+        days_since_creation = [(now - created).days if created else 0 for created in frame["created_at"]]
+        days_since_update = [
+            (now - updated).days if updated else created_days
+            for updated, created_days in zip(frame["updated_at"], days_since_creation)
+        ]
+        time_factors = [
+            15 if days <= 7 else 12 if days <= 14 else 8 if days <= 30 else 3
+            for days in days_since_update
+        ]
+        
+        total_score = [
+            bant + engaged + quality + timing
+            for bant, engaged, quality, timing in zip(bant_completion, engagement, data_quality, time_factors)
+        ]
         
-        if lead.company_name:
-            data_points += 1
-        
-        if lead.first_name and lead.last_name:
-            data_points += 1
-        
-        scores["data_quality"] = (data_points / 4) * 20
-        
-        # 4. Time Factors (15 points)
-        days_since_creation = (datetime.utcnow() - lead.created_at).days if lead.created_at else 0
-        days_since_update = (datetime.utcnow() - lead.updated_at).days if lead.updated_at else days_since_creation
-        
-        # Newer leads with recent activity are lower risk
-        if days_since_update <= 7:
-            scores["time_factors"] = 15
-        elif days_since_update <= 14:
-            scores["time_factors"] = 12
-        elif days_since_update <= 30:
-            scores["time_factors"] = 8
-        else:
-            scores["time_factors"] = 3
-            risk_factors.append(f"No activity in {days_since_update} days")
-        
-        # Calculate total score
-        total_score = sum(scores.values())
-        
-        # Determine risk level
+        return {
+            "bant_completion": bant_completion,
+            "engagement": engagement,
+            "data_quality": data_quality,
+            "time_factors": time_factors,
+            "total_score": total_score,
+            "risk_level": [RiskScoringService.get_risk_level(score) for score in total_score],
+            "has_budget": has_budget,
+            "has_authority": has_authority,
+            "has_need": has_need,
+            "has_timeline": has_timeline,
+            "valid_email": valid_email,
+            "valid_phone": valid_phone,
+            "days_since_update": days_since_update,
+        }
+    
+    @staticmethod
+    def get_risk_level(total_score: float) -> str:
+        """Risk level of a total risk score"""
         if total_score >= RiskScoringService.LOW_RISK_THRESHOLD:
-            risk_level = RiskScoringService.LOW_RISK
+            return RiskScoringService.LOW_RISK
         elif total_score >= RiskScoringService.MEDIUM_RISK_THRESHOLD:
-            risk_level = RiskScoringService.MEDIUM_RISK
+            return RiskScoringService.MEDIUM_RISK
         elif total_score >= RiskScoringService.HIGH_RISK_THRESHOLD:
-            risk_level = RiskScoringService.HIGH_RISK
+            return RiskScoringService.HIGH_RISK
         else:
-            risk_level = RiskScoringService.CRITICAL_RISK
+            return RiskScoringService.CRITICAL_RISK
+    
+    @staticmethod
+    def _risk_factors(scored: Dict[str, list], index: int) -> List[str]:
+        """Risk factors of one scored lead"""
+        risk_factors = []
+        
+        if not scored["has_budget"][index]:
+            risk_factors.append("Missing budget information")
+        if not scored["has_authority"][index]:
+            risk_factors.append("Authority level not identified")
+        if not scored["has_need"][index]:
+            risk_factors.append("No specific need/product interest")
+        if not scored["has_timeline"][index]:
+            risk_factors.append("No timeline specified")
+        if scored["engagement"][index] == 5:
+            risk_factors.append("Low engagement in last 30 days")
+        if not scored["valid_email"][index]:
+            risk_factors.append("Missing or invalid email")
+        if not scored["valid_phone"][index]:
+            risk_factors.append("Missing or invalid phone")
+        if scored["time_factors"][index] == 3:
+            risk_factors.append(f"No activity in {scored['days_since_update'][index]} days")
+        
+        return risk_factors
+        
+    @staticmethod
+    def _assessment(scored: Dict[str, list], index: int) -> Dict:
+        """Risk assessment dictionary of one scored lead"""
+        risk_level = scored["risk_level"][index]
+        risk_factors = RiskScoringService._risk_factors(scored, index)
+        breakdown = ("bant_completion", "engagement", "data_quality", "time_factors")
         
         return {
-            "total_score": round(total_score, 2),
+            "total_score": round(scored["total_score"][index], 2),
             "max_score": 100,
             "risk_level": risk_level,
-            "breakdown": {k: round(v, 2) for k, v in scores.items()},
+            "breakdown": {k: round(scored[k][index], 2) for k in breakdown},
             "risk_factors": risk_factors,
             "recommendations": RiskScoringService._get_recommendations(risk_level, risk_factors)
         }
     
+    @staticmethod
+    def _iter_scored(
+        company_id: int,
+        db: Session,
+        lead_ids: Optional[List[int]] = None
+    ) -> Iterator[Tuple[LeadFeatureFrame, Dict[str, list]]]:
+        """Score the company's open leads chunk by chunk: (frame, score columns)"""
+        now = datetime.utcnow()
+        frames = LeadFeatureFrame.iter_frames(
+            company_id,
+            db,
+            RISK_FEATURE_COLUMNS,
+            activity_since=now - timedelta(days=30),
+            lead_ids=lead_ids,
+            exclude_statuses=["converted", "disqualified"]
+        )
+        for frame in frames:
+            yield frame, RiskScoringService.score_frame(frame, now)
+    
     @staticmethod
     def _get_recommendations(risk_level: str, risk_factors: List[str]) -> List[str]:
         """Get recommendations based on risk level and factors"""
@@ -224,19 +297,16 @@ class RiskScoringService:
         Returns:
             List of high risk leads
         """
-        leads = db.query(Lead).filter(
-            Lead.company_id == company_id,
-            Lead.status.notin_(["converted", "disqualified"])
-        ).all()
-        
         high_risk_leads = []
-        for lead in leads:
-            risk_result = RiskScoringService.calculate_risk_score(lead, db)
-            if risk_result["risk_level"] in [RiskScoringService.HIGH_RISK, RiskScoringService.CRITICAL_RISK]:
+        for frame, scored in RiskScoringService._iter_scored(company_id, db):
+            for index, risk_level in enumerate(scored["risk_level"]):
+                if risk_level not in [RiskScoringService.HIGH_RISK, RiskScoringService.CRITICAL_RISK]:
+                    continue
+                risk_result = RiskScoringService._assessment(scored, index)
                 high_risk_leads.append({
-                    "lead_id": lead.id,
-                    "lead_name": lead.lead_name,
-                    "email": lead.email,
+                    "lead_id": frame["id"][index],
+                    "lead_name": frame["lead_name"][index],
+                    "email": frame["email"][index],
                     "risk_score": risk_result["total_score"],
                     "risk_level": risk_result["risk_level"],
                     "risk_factors": risk_result["risk_factors"],
@@ -260,11 +330,6 @@ class RiskScoringService:
         Returns:
             Risk analytics
         """
-        leads = db.query(Lead).filter(
-            Lead.company_id == company_id,
-            Lead.status.notin_(["converted", "disqualified"])
-        ).all()
-        
         risk_distribution = {
             RiskScoringService.LOW_RISK: 0,
             RiskScoringService.MEDIUM_RISK: 0,
@@ -272,13 +337,14 @@ class RiskScoringService:
             RiskScoringService.CRITICAL_RISK: 0
         }
         
+        total_leads = 0
         total_score = 0
-        for lead in leads:
-            risk_result = RiskScoringService.calculate_risk_score(lead, db)
-            risk_distribution[risk_result["risk_level"]] += 1
-            total_score += risk_result["total_score"]
+        for frame, scored in RiskScoringService._iter_scored(company_id, db):
+            total_leads += len(frame)
+            for risk_level in scored["risk_level"]:
+                risk_distribution[risk_level] += 1
+            total_score += sum(round(score, 2) for score in scored["total_score"])
         
-        total_leads = len(leads)
         avg_score = round(total_score / total_leads, 2) if total_leads > 0 else 0
         
         return {
@@ -309,18 +375,8 @@ class RiskScoringService:
         Returns:
             Batch update results
         """
-        query = db.query(Lead).filter(
-            Lead.company_id == company_id,
-            Lead.status.notin_(["converted", "disqualified"])
-        )
-        
-        if lead_ids:
-            query = query.filter(Lead.id.in_(lead_ids))
-        
-        leads = query.all()
-        
         results = {
-            "total": len(leads),
+            "total": 0,
             "by_risk_level": {
                 RiskScoringService.LOW_RISK: 0,
                 RiskScoringService.MEDIUM_RISK: 0,
@@ -329,8 +385,9 @@ class RiskScoringService:
             }
         }
         
-        for lead in leads:
-            risk_result = RiskScoringService.calculate_risk_score(lead, db)
-            results["by_risk_level"][risk_result["risk_level"]] += 1
+        for frame, scored in RiskScoringService._iter_scored(company_id, db, lead_ids):
+            results["total"] += len(frame)
+            for risk_level in scored["risk_level"]:
+                results["by_risk_level"][risk_level] += 1
         
         return results
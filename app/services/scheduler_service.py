@@ -0,0 +1,522 @@
+"""
+Scheduler Service
+Periodic maintenance jobs with cron-style schedules
+
+- Jobs are registered with @scheduled_job (ID, cron schedule, function).
+  Their schedule and run history (last_run, next_run, duration, status)
+  live in the scheduled_jobs table, shared by every process.
+- Every API process runs a Scheduler thread, but only the holder of the
+  scheduler_leases row fires jobs: the lease is taken and renewed with a
+  conditional UPDATE and expires SCHEDULER_LEASE_SECONDS after its holder
+  stops renewing it, so another process takes over. A due job is also
+  claimed with a conditional UPDATE of its next_run_at, so a job never
+  fires twice even while leadership changes hands.
+- Firing a job only enqueues a "scheduled_job" job on the durable job
+  queue (app/utils/job_queue.py): the work itself runs on a job worker,
+  off the request path and off the scheduler thread. A job whose previous
+  run is still queued or running is not fired again.
+- Missed runs (all processes down) fire once on the next tick.
+"""
+
+import logging
+import os
+import socket
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional
+from sqlalchemy import case, or_
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from app.config import settings
+from app.database import SessionLocal
+from app.models.job import Job
+from app.models.scheduled_job import ScheduledJob, SchedulerLease
+from app.utils.cron import CronSchedule
+from app.utils.job_queue import JobQueue, job_handler
+
+logger = logging.getLogger(__name__)
+
+
+LEADER_LEASE = "scheduler"
+JOB_NAME = "scheduled_job"
+
+# Registered periodic jobs (ID -> definition)
+SCHEDULED_JOBS: Dict[str, Dict[str, Any]] = {}
+
+
+def scheduled_job(job_id: str, name: str, schedule: str, description: str = "", enabled: bool = True):
+    """
+    Register a function as a periodic job
+    
+    The function is called with a database session and returns a small
+    JSON-serializable summary; a summary with a "skipped" key records the
+    run as skipped.
+    """
+    CronSchedule(schedule)  # Fail at import on an invalid expression
+    
+    def decorator(func: Callable) -> Callable:
+        SCHEDULED_JOBS[job_id] = {
+            "id": job_id,
+            "name": name,
+            "description": description,
+            "schedule": schedule,
+            "enabled": enabled,
+            "func": func,
+        }
+        return func
+    return decorator
+
+
+class SchedulerService:
+    """Scheduled job state, leader lease and firing"""
+    
+    @staticmethod
+    def acquire_lease(db: Session, holder: str, now: Optional[datetime] = None) -> bool:
+        """
+        Take or renew the leader lease
+        
+        Args:
+            db: Database session
+            holder: ID of the calling scheduler
+            now: Reference time (default: current UTC time)
+            
+        Returns:
+            True if holder is the leader until the lease expires
+        """
+        now = now or datetime.utcnow()
+        expires_at = now + timedelta(seconds=settings.SCHEDULER_LEASE_SECONDS)
+        
+        taken = db.query(SchedulerLease).filter(
+            SchedulerLease.name == LEADER_LEASE,
+            or_(SchedulerLease.holder == holder, SchedulerLease.expires_at < now)
+        ).update({
+            SchedulerLease.acquired_at: case((SchedulerLease.holder == holder, SchedulerLease.acquired_at), else_=now),
+            SchedulerLease.holder: holder,
+            SchedulerLease.expires_at: expires_at,
+        }, synchronize_session=False)
+        db.commit()
+        if taken:
+            return True
+        
+        if db.query(SchedulerLease.name).filter(SchedulerLease.name == LEADER_LEASE).first():
+            return False
+        
+        try:
+            db.add(SchedulerLease(name=LEADER_LEASE, holder=holder, acquired_at=now, expires_at=expires_at))
+            db.commit()
+            return True
+        except IntegrityError:
+            # Another process created the lease first
+            db.rollback()
+            return False
+    
+    @staticmethod
+    def release_lease(db: Session, holder: str):
+        """Give up the leader lease (on shutdown) so another process takes over at once"""
+        db.query(SchedulerLease).filter(
+            SchedulerLease.name == LEADER_LEASE,
+            SchedulerLease.holder == holder
+        ).update({SchedulerLease.expires_at: datetime.utcnow() - timedelta(seconds=1)}, synchronize_session=False)
+        db.commit()
+    
+    @staticmethod
+    def sync(db: Session, now: Optional[datetime] = None):
+        """Create or update the scheduled_jobs rows of the registered jobs"""
+        now = now or datetime.utcnow()
+        rows = {row.id: row for row in db.query(ScheduledJob).filter(ScheduledJob.id.in_(list(SCHEDULED_JOBS))).all()}
+        
+        for job_id, definition in SCHEDULED_JOBS.items():
+            row = rows.get(job_id)
+            if row is None:
+                db.add(ScheduledJob(
+                    id=job_id,
+                    schedule=definition["schedule"],
+                    enabled=definition["enabled"],
+                    next_run_at=CronSchedule(definition["schedule"]).next_after(now),
+                    run_count=0,
+                    failure_count=0
+                ))
+                continue
+            
+            if row.schedule != definition["schedule"] or row.next_run_at is None:
+                row.schedule = definition["schedule"]
+                row.next_run_at = CronSchedule(definition["schedule"]).next_after(now)
+            row.enabled = definition["enabled"]
+        
+        try:
+            db.commit()
+        except IntegrityError:
+            db.rollback()
+    
+    @staticmethod
+    def fire_due(db: Session, now: Optional[datetime] = None) -> List[str]:
+        """
+        Enqueue every enabled job whose next run is due (leader only)
+        
+        Args:
+            db: Database session
+            now: Reference time (default: current UTC time)
+            
+        Returns:
+            IDs of the jobs fired
+        """
+        now = now or datetime.utcnow()
+        due = db.query(ScheduledJob).filter(
+            ScheduledJob.id.in_(list(SCHEDULED_JOBS)),
+            ScheduledJob.enabled == True,
+            ScheduledJob.next_run_at <= now
+        ).all()
+        
+        fired = []
+        for row in due:
+            next_run_at = CronSchedule(row.schedule).next_after(now)
+            
+            # Claim this firing: only one scheduler moves next_run_at forward
+            claimed = db.query(ScheduledJob).filter(
+                ScheduledJob.id == row.id,
+                ScheduledJob.next_run_at == row.next_run_at
+            ).update({ScheduledJob.next_run_at: next_run_at}, synchronize_session=False)
+            if not claimed:
+                db.rollback()
+                continue
+            
+            if SchedulerService._in_progress(db, row.last_job_id):
+                logger.warning(f"Scheduled job {row.id} skipped: previous run still in progress")
+                db.commit()
+                continue
+            
+            SchedulerService._enqueue(db, row.id)
+            db.commit()
+            fired.append(row.id)
+        
+        return fired
+    
+    @staticmethod
+    def trigger(db: Session, job_id: str) -> int:
+        """
+        Run a registered job now (outside its schedule)
+        
+        Args:
+            db: Database session
+            job_id: Scheduled job ID
+            
+        Returns:
+            Job queue ID of the run
+        """
+        if db.query(ScheduledJob.id).filter(ScheduledJob.id == job_id).first() is None:
+            SchedulerService.sync(db)
+        queue_id = SchedulerService._enqueue(db, job_id, priority=10)
+        db.commit()
+        return queue_id
+    
+    @staticmethod
+    def _in_progress(db: Session, queue_id: Optional[int]) -> bool:
+        """Whether a job queue run is still queued or running"""
+        if queue_id is None:
+            return False
+        return db.query(Job.id).filter(Job.id == queue_id, Job.status.in_(["queued", "running"])).first() is not None
+    
+    @staticmethod
+    def _enqueue(db: Session, job_id: str, priority: int = 0) -> int:
+        """Queue a run of a scheduled job in the caller's transaction"""
+        queue_id = JobQueue.enqueue(
+            JOB_NAME,
+            {"job_id": job_id},
+            priority=priority,
+            max_attempts=1,
+            db=db
+        )
+        db.query(ScheduledJob).filter(ScheduledJob.id == job_id).update({
+            ScheduledJob.last_status: "queued",
+            ScheduledJob.last_job_id: queue_id,
+        }, synchronize_session=False)
+        return queue_id
+    
+    @staticmethod
+    def run(job_id: str) -> Any:
+        """
+        Execute a scheduled job and record its run (called by a job worker)
+        
+        Args:
+            job_id: Scheduled job ID
+            
+        Returns:
+            The job function's summary
+        """
+        definition = SCHEDULED_JOBS.get(job_id)
+        if definition is None:
+            raise ValueError(f"Unknown scheduled job '{job_id}'")
+        
+        started_at = datetime.utcnow()
+        SchedulerService._record(job_id, {
+            ScheduledJob.last_run_at: started_at,
+            ScheduledJob.last_status: "running",
+            ScheduledJob.last_error: None,
+        })
+        
+        start = time.monotonic()
+        db = SessionLocal()
+        try:
+            result = definition["func"](db)
+        except Exception as e:
+            db.rollback()
+            SchedulerService._record(job_id, {
+                ScheduledJob.last_finished_at: datetime.utcnow(),
+                ScheduledJob.last_duration_ms: int((time.monotonic() - start) * 1000),
+                ScheduledJob.last_status: "failed",
+                ScheduledJob.last_error: str(e),
+                ScheduledJob.run_count: ScheduledJob.run_count + 1,
+                ScheduledJob.failure_count: ScheduledJob.failure_count + 1,
+            })
+            raise
+        finally:
+            db.close()
+        
+        skipped = isinstance(result, dict) and "skipped" in result
+        SchedulerService._record(job_id, {
+            ScheduledJob.last_finished_at: datetime.utcnow(),
+            ScheduledJob.last_duration_ms: int((time.monotonic() - start) * 1000),
+            ScheduledJob.last_status: "skipped" if skipped else "succeeded",
+            ScheduledJob.last_result: str(result)[:1000] if result is not None else None,
+            ScheduledJob.run_count: ScheduledJob.run_count + 1,
+        })
+        logger.info(f"Scheduled job {job_id} finished: {result}")
+        return result
+    
+    @staticmethod
+    def _record(job_id: str, values: Dict):
+        """Update a job's run history in its own transaction"""
+        db = SessionLocal()
+        try:
+            db.query(ScheduledJob).filter(ScheduledJob.id == job_id).update(values, synchronize_session=False)
+            db.commit()
+        finally:
+            db.close()
+    
+    @staticmethod
+    def list_jobs(db: Session) -> List[Dict[str, Any]]:
+        """
+        Registered jobs with their schedule and latest run
+        
+        Args:
+            db: Database session
+            
+        Returns:
+            One dictionary per job, in registration order
+        """
+        rows = {row.id: row for row in db.query(ScheduledJob).filter(ScheduledJob.id.in_(list(SCHEDULED_JOBS))).all()}
+        now = datetime.utcnow()
+        
+        jobs = []
+        for job_id, definition in SCHEDULED_JOBS.items():
+            row = rows.get(job_id)
+            if not definition["enabled"]:
+                job_status = "disabled"
+            elif row is not None and row.last_status in ("queued", "running"):
+                job_status = row.last_status
+            else:
+                job_status = "scheduled"
+            
+            next_run = row.next_run_at if row is not None else CronSchedule(definition["schedule"]).next_after(now)
+            jobs.append({
+                "id": job_id,
+                "name": definition["name"],
+                "description": definition["description"],
+                "status": job_status,
+                "schedule": definition["schedule"],
+                "last_run": row.last_run_at if row is not None else None,
+                "next_run": next_run if definition["enabled"] else None,
+                "last_status": row.last_status if row is not None else None,
+                "last_duration_ms": row.last_duration_ms if row is not None else None,
+                "last_error": row.last_error if row is not None else None,
+                "last_result": row.last_result if row is not None else None,
+                "run_count": row.run_count if row is not None else 0,
+                "failure_count": row.failure_count if row is not None else 0,
+            })
+        return jobs
+    
+    @staticmethod
+    def get_leader(db: Session) -> Optional[Dict[str, Any]]:
+        """Current holder of an unexpired leader lease"""
+        lease = db.query(SchedulerLease).filter(
+            SchedulerLease.name == LEADER_LEASE,
+            SchedulerLease.expires_at >= datetime.utcnow()
+        ).first()
+        if lease is None:
+            return None
+        return {"holder": lease.holder, "since": lease.acquired_at, "expires_at": lease.expires_at}
+
+
+@job_handler(JOB_NAME)
+def run_scheduled_job(job_id: str):
+    """Job queue handler of scheduled job runs"""
+    return SchedulerService.run(job_id)
+
+
+class Scheduler:
+    """Per-process scheduler thread; fires jobs only while it holds the leader lease"""
+    
+    _thread: Optional[threading.Thread] = None
+    _stop = threading.Event()
+    holder = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+    is_leader = False
+    
+    @classmethod
+    def start(cls):
+        """Start the scheduler thread (no-op if disabled or already running)"""
+        if not settings.SCHEDULER_ENABLED or cls.is_running():
+            return
+        
+        cls._stop.clear()
+        cls._thread = threading.Thread(target=cls._run, name="scheduler", daemon=True)
+        cls._thread.start()
+        logger.info(f"Scheduler {cls.holder} started")
+    
+    @classmethod
+    def stop(cls, timeout: float = 5.0):
+        """Stop the scheduler thread and release the lease if held"""
+        cls._stop.set()
+        if cls._thread is not None:
+            cls._thread.join(timeout)
+        cls._thread = None
+        
+        if cls.is_leader:
+            db = SessionLocal()
+            try:
+                SchedulerService.release_lease(db, cls.holder)
+            except Exception as e:
+                logger.error(f"Scheduler lease release failed: {str(e)}")
+            finally:
+                db.close()
+            cls.is_leader = False
+    
+    @classmethod
+    def is_running(cls) -> bool:
+        """Whether the scheduler thread is alive"""
+        return cls._thread is not None and cls._thread.is_alive()
+    
+    @classmethod
+    def tick(cls):
+        """Renew or take the lease and, as leader, fire due jobs"""
+        db = SessionLocal()
+        try:
+            leader = SchedulerService.acquire_lease(db, cls.holder)
+            if leader and not cls.is_leader:
+                logger.info(f"Scheduler {cls.holder} is now the leader")
+                SchedulerService.sync(db)
+            cls.is_leader = leader
+            
+            if leader:
+                fired = SchedulerService.fire_due(db)
+                if fired:
+                    logger.info(f"Scheduler fired: {', '.join(fired)}")
+        except Exception as e:
+            db.rollback()
+            cls.is_leader = False
+            logger.error(f"Scheduler tick failed: {str(e)}")
+        finally:
+            db.close()
+    
+    @classmethod
+    def _run(cls):
+        cls.tick()
+        while not cls._stop.wait(settings.SCHEDULER_TICK_SECONDS):
+            cls.tick()
+
+
+# ============================================
+# Periodic Jobs
+# ============================================
+
+@scheduled_job(
+    "email_reminder",
+    "Email Reminders",
+    settings.SCHEDULE_EMAIL_REMINDER,
+    "Send email sequence emails whose scheduled send date has passed"
+)
+def send_due_emails(db: Session) -> Dict:
+    from app.utils.email_sequences import EmailSequenceAutomation
+    return EmailSequenceAutomation.send_due_emails(db)
+
+
+@scheduled_job(
+    "log_cleanup",
+    "Log Cleanup",
+    settings.SCHEDULE_LOG_CLEANUP,
+    "Archive and delete logs and audit trail entries past their retention period"
+)
+def cleanup_logs(db: Session) -> Dict:
+    from app.services.retention_service import RetentionService
+    return RetentionService.run()
+
+
+@scheduled_job(
+    "lead_score_recalculation",
+    "Lead Score Recalculation",
+    settings.SCHEDULE_LEAD_SCORES,
+    "Recalculate the scores of every company's leads"
+)
+def recalculate_lead_scores(db: Session) -> Dict:
+    from app.models.company import Company
+    from app.utils.lead_scoring import LeadScoringAlgorithm
+    
+    totals = {"companies": 0, "total": 0, "updated": 0}
+    for (company_id,) in db.query(Company.id).order_by(Company.id).all():
+        stats = LeadScoringAlgorithm.batch_update_lead_scores(company_id, db)
+        totals["companies"] += 1
+        totals["total"] += stats["total"]
+        totals["updated"] += stats["updated"]
+    return totals
+
+
+@scheduled_job(
+    "health_score_recalculation",
+    "Health Score Recalculation",
+    settings.SCHEDULE_HEALTH_SCORES,
+    "Recalculate the health scores of every company's customers"
+)
+def recalculate_health_scores(db: Session) -> Dict:
+    from app.models.company import Company
+    from app.utils.health_score import HealthScoreCalculator
+    
+    totals = {"companies": 0, "total": 0, "updated": 0}
+    for (company_id,) in db.query(Company.id).order_by(Company.id).all():
+        stats = HealthScoreCalculator.batch_update_health_scores(company_id, db)
+        totals["companies"] += 1
+        totals["total"] += stats["total"]
+        totals["updated"] += stats["updated"]
+    return totals
+
+
+@scheduled_job(
+    "data_backup",
+    "Data Backup",
+    settings.SCHEDULE_DATA_BACKUP,
+    f"Copy the SQLite database to {settings.BACKUP_DIR}, keeping the latest {settings.BACKUP_KEEP}",
+    enabled=settings.BACKUP_ENABLED and settings.DATABASE_URL.startswith("sqlite")
+)
+def backup_database(db: Session) -> Dict:
+    import sqlite3
+    
+    if db.get_bind().dialect.name != "sqlite":
+        return {"skipped": "Backups are only built in for SQLite"}
+    
+    os.makedirs(settings.BACKUP_DIR, exist_ok=True)
+    path = os.path.join(settings.BACKUP_DIR, f"crm-{datetime.utcnow().strftime('%Y%m%d-%H%M%S')}.db")
+    
+    # Online backup API: consistent copy while other connections keep writing
+    source = db.connection().connection.driver_connection
+    target = sqlite3.connect(path)
+    try:
+        source.backup(target)
+    finally:
+        target.close()
+    
+    backups = sorted(name for name in os.listdir(settings.BACKUP_DIR) if name.startswith("crm-") and name.endswith(".db"))
+    removed = backups[:-settings.BACKUP_KEEP] if settings.BACKUP_KEEP > 0 else []
+    for name in removed:
+        os.remove(os.path.join(settings.BACKUP_DIR, name))
+    
+    return {"path": path, "size_bytes": os.path.getsize(path), "removed": len(removed)}
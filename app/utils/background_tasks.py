@@ -1,161 +1,50 @@
 """
-Background Tasks Manager
-Handles async background task execution for the CRM application
+Background Tasks
+Common background job handlers for the CRM application
+
+Jobs are queued with JobQueue.enqueue(name, payload) and run by the job
+workers (see app/utils/job_queue.py).
 """
 
-from fastapi import BackgroundTasks
-from typing import Callable, Any, Dict, List, Optional
+from typing import Optional
 from datetime import datetime
-import asyncio
 import logging
 from app.config import settings
+from app.utils.job_queue import job_handler
 
 logger = logging.getLogger(__name__)
 
 
-class BackgroundTaskManager:
-    """
-    Manages background tasks with retry logic and task tracking
-    """
-    
-    def __init__(self):
-        self.task_queue: List[Dict] = []
-        self.completed_tasks: List[Dict] = []
-        self.failed_tasks: List[Dict] = []
-        self.max_queue_size = settings.TASK_QUEUE_SIZE
-        self.retry_count = settings.TASK_RETRY_COUNT
-        self.retry_delay = settings.TASK_RETRY_DELAY
-    
-    def add_task(
-        self,
-        background_tasks: BackgroundTasks,
-        func: Callable,
-        *args,
-        task_name: str = None,
-        **kwargs
-    ):
-        """Add a task to the background queue"""
-        if not settings.BACKGROUND_TASK_ENABLED:
-            logger.warning("Background tasks are disabled")
-            return
-        
-        task_info = {
-            "name": task_name or func.__name__,
-            "created_at": datetime.utcnow().isoformat(),
-            "status": "queued",
-            "args": str(args),
-            "kwargs": str(kwargs)
-        }
-        
-        if len(self.task_queue) >= self.max_queue_size:
-            logger.warning(f"Task queue full ({self.max_queue_size}), dropping oldest task")
-            self.task_queue.pop(0)
-        
-        self.task_queue.append(task_info)
-        background_tasks.add_task(self._execute_task, func, task_info, *args, **kwargs)
-        logger.info(f"Task '{task_info['name']}' added to queue")
-    
-    async def _execute_task(
-        self,
-        func: Callable,
-        task_info: Dict,
-        *args,
-        **kwargs
-    ):
-        """Execute task with retry logic"""
-        task_info["status"] = "running"
-        task_info["started_at"] = datetime.utcnow().isoformat()
-        
-        for attempt in range(self.retry_count):
-            try:
-                if asyncio.iscoroutinefunction(func):
-                    result = await func(*args, **kwargs)
-                else:
-                    result = func(*args, **kwargs)
-                
-                task_info["status"] = "completed"
-                task_info["completed_at"] = datetime.utcnow().isoformat()
-                task_info["result"] = str(result)[:200] if result else None
-                
-                self.task_queue.remove(task_info)
-                self.completed_tasks.append(task_info)
-                
-                # Keep only last 100 completed tasks
-                if len(self.completed_tasks) > 100:
-                    self.completed_tasks = self.completed_tasks[-100:]
-                
-                logger.info(f"Task '{task_info['name']}' completed successfully")
-                return result
-                
-            except Exception as e:
-                logger.error(f"Task '{task_info['name']}' failed (attempt {attempt + 1}): {str(e)}")
-                
-                if attempt < self.retry_count - 1:
-                    await asyncio.sleep(self.retry_delay)
-                else:
-                    task_info["status"] = "failed"
-                    task_info["error"] = str(e)
-                    task_info["failed_at"] = datetime.utcnow().isoformat()
-                    
-                    if task_info in self.task_queue:
-                        self.task_queue.remove(task_info)
-                    self.failed_tasks.append(task_info)
-                    
-                    # Keep only last 50 failed tasks
-                    if len(self.failed_tasks) > 50:
-                        self.failed_tasks = self.failed_tasks[-50:]
-    
-    def get_status(self) -> Dict:
-        """Get current task queue status"""
-        return {
-            "enabled": settings.BACKGROUND_TASK_ENABLED,
-            "queued": len(self.task_queue),
-            "completed": len(self.completed_tasks),
-            "failed": len(self.failed_tasks),
-            "max_queue_size": self.max_queue_size,
-            "recent_tasks": self.task_queue[-10:] if self.task_queue else []
-        }
-
-
-# Global task manager instance
-task_manager = BackgroundTaskManager()
-
-
 # ============================================
 # Common Background Task Functions
 # ============================================
 
-async def send_email_task(
+def deliver_email(
     to_email: str,
     subject: str,
     body: str,
     html_body: Optional[str] = None
 ):
-    """Background task to send email"""
-    import smtplib
-    from email.mime.text import MIMEText
-    from email.mime.multipart import MIMEMultipart
+    """Send one email over a pooled SMTP connection (raises on failure)"""
+    from app.services.email_delivery_service import EmailDeliveryService
     
+    EmailDeliveryService.send(to_email, subject, body, html_body)
+
+
+@job_handler("send_email")
+def send_email_task(
+    to_email: str,
+    subject: str,
+    body: str,
+    html_body: Optional[str] = None
+):
+    """Background task to send email (runs on a job worker thread)"""
     if not settings.SMTP_HOST:
         logger.warning("SMTP not configured, email not sent")
         return {"status": "skipped", "reason": "SMTP not configured"}
     
     try:
-        msg = MIMEMultipart("alternative")
-        msg["Subject"] = subject
-        msg["From"] = settings.SMTP_FROM_EMAIL
-        msg["To"] = to_email
-        
-        msg.attach(MIMEText(body, "plain"))
-        if html_body:
-            msg.attach(MIMEText(html_body, "html"))
-        
-        with smtplib.SMTP(settings.SMTP_HOST, settings.SMTP_PORT) as server:
-            server.starttls()
-            if settings.SMTP_USER and settings.SMTP_PASSWORD:
-                server.login(settings.SMTP_USER, settings.SMTP_PASSWORD)
-            server.sendmail(settings.SMTP_FROM_EMAIL, to_email, msg.as_string())
-        
+        deliver_email(to_email, subject, body, html_body)
         logger.info(f"Email sent to {to_email}")
         return {"status": "sent", "to": to_email}
     except Exception as e:
@@ -163,6 +52,7 @@ async def send_email_task(
         raise
 
 
+@job_handler("log_activity")
 async def log_activity_task(
     company_id: int,
     activity_type: str,
@@ -207,6 +97,7 @@ async def log_activity_task(
         raise
 
 
+@job_handler("update_lead_score")
 async def update_lead_score_task(lead_id: int, company_id: int):
     """Background task to recalculate lead score"""
     from app.database import SessionLocal
@@ -214,8 +105,7 @@ async def update_lead_score_task(lead_id: int, company_id: int):
     
     try:
         db = SessionLocal()
-        scorer = LeadScoringAlgorithm(db)
-        new_score = scorer.calculate_score(lead_id)
+        new_score = LeadScoringAlgorithm.update_lead_score(lead_id, company_id, db)
         db.close()
         
         logger.info(f"Lead {lead_id} score updated to {new_score}")
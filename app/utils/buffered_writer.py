@@ -0,0 +1,229 @@
+"""
+Buffered Writer
+Group-commit sink for append-only tables (system logs, audit trail)
+
+Request handlers append rows to a bounded in-memory ring buffer and return
+at once; a background thread writes the buffer with one executemany INSERT
+per batch, every LOG_FLUSH_INTERVAL_MS milliseconds or as soon as
+LOG_FLUSH_BATCH_SIZE rows are waiting. Rows are written on the writer's own
+connection, never through the caller's session, so logging neither commits
+the caller's transaction nor adds an fsync to the request.
+
+- Bounded: beyond LOG_BUFFER_CAPACITY rows the oldest buffered row is
+  dropped (and counted), so a stalled database cannot exhaust memory
+- Synchronous path: security-critical rows (sync=True), and every row while
+  the writer thread is not running (scripts, workers without startup
+  events), are inserted immediately in their own transaction
+- A failed batch is retried row by row and rows that cannot be written are
+  dropped; if the database is unavailable the batch goes back to the head
+  of the buffer for the next flush
+- on_write: optional callback run with the connection and the written
+  rows inside each insert transaction (e.g. to maintain a rollup table)
+- stats(): buffered, written, dropped and sync counts, flush count, errors
+  and latency
+"""
+
+import logging
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from typing import Any, Callable, Deque, Dict, List, Optional
+from sqlalchemy import Table
+from sqlalchemy.engine import Connection
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class BufferedWriter:
+    """Ring buffer of rows for one table, flushed by a background thread"""
+    
+    def __init__(
+        self,
+        table: Table,
+        name: Optional[str] = None,
+        on_write: Optional[Callable[[Connection, List[Dict[str, Any]]], None]] = None
+    ):
+        self.table = table
+        self.name = name or table.name
+        self.on_write = on_write
+        self._buffer: Deque[Dict[str, Any]] = deque()
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._stats = {
+            "enqueued": 0,
+            "written": 0,
+            "dropped": 0,
+            "sync_writes": 0,
+            "flushes": 0,
+            "flush_errors": 0,
+            "last_flush_rows": 0,
+            "last_flush_ms": None,
+            "max_flush_ms": None,
+            "last_flush_at": None,
+            "last_error": None,
+        }
+    
+    def write(self, row: Dict[str, Any], sync: bool = False):
+        """
+        Queue a row for the next flush, or insert it now
+        
+        Args:
+            row: Column values
+            sync: Insert before returning (security-critical rows)
+        """
+        if sync or not self.is_running():
+            self._insert_now(row)
+            return
+        
+        with self._lock:
+            if len(self._buffer) >= settings.LOG_BUFFER_CAPACITY:
+                self._buffer.popleft()
+                self._stats["dropped"] += 1
+            self._buffer.append(row)
+            self._stats["enqueued"] += 1
+            pending = len(self._buffer)
+        
+        if pending >= settings.LOG_FLUSH_BATCH_SIZE:
+            self._wake.set()
+    
+    def _insert(self, connection: Connection, rows: List[Dict[str, Any]]):
+        """Insert rows (one executemany) and run on_write in the same transaction"""
+        connection.execute(self.table.insert(), rows)
+        if self.on_write is not None:
+            self.on_write(connection, rows)
+    
+    def _insert_now(self, row: Dict[str, Any]):
+        from app.database import engine
+        
+        with engine.begin() as connection:
+            self._insert(connection, [row])
+        with self._lock:
+            self._stats["sync_writes"] += 1
+            self._stats["written"] += 1
+    
+    def flush(self) -> int:
+        """
+        Write every buffered row, batch by batch
+        
+        Returns:
+            Number of rows written
+        """
+        from app.database import engine
+        
+        written = 0
+        with self._flush_lock:
+            while True:
+                with self._lock:
+                    count = min(len(self._buffer), settings.LOG_FLUSH_BATCH_SIZE)
+                    batch: List[Dict[str, Any]] = [self._buffer.popleft() for _ in range(count)]
+                if not batch:
+                    return written
+                
+                start = time.monotonic()
+                try:
+                    with engine.begin() as connection:
+                        self._insert(connection, batch)
+                    count = len(batch)
+                except Exception as e:
+                    with self._lock:
+                        self._stats["flush_errors"] += 1
+                        self._stats["last_error"] = str(e)
+                    logger.error(f"Flushing {len(batch)} {self.name} rows failed: {str(e)}")
+                    count = self._write_rows(batch)
+                    if count is None:
+                        return written
+                
+                elapsed_ms = round((time.monotonic() - start) * 1000, 3)
+                written += count
+                with self._lock:
+                    stats = self._stats
+                    stats["written"] += count
+                    stats["flushes"] += 1
+                    stats["last_flush_rows"] = len(batch)
+                    stats["last_flush_ms"] = elapsed_ms
+                    stats["max_flush_ms"] = max(stats["max_flush_ms"] or 0, elapsed_ms)
+                    stats["last_flush_at"] = datetime.utcnow().isoformat()
+    
+    def _write_rows(self, batch: List[Dict[str, Any]]) -> Optional[int]:
+        """
+        Write a failed batch row by row, so one bad row does not block the buffer
+        
+        Returns:
+            Rows written (failing rows are dropped), or None if no row could
+            be written (database unavailable): the batch is then requeued
+        """
+        from app.database import engine
+        
+        count = 0
+        errors = []
+        for row in batch:
+            try:
+                with engine.begin() as connection:
+                    self._insert(connection, [row])
+                count += 1
+            except Exception as e:
+                errors.append(str(e))
+        
+        if not count:
+            self._requeue(batch)
+            return None
+        
+        if errors:
+            with self._lock:
+                self._stats["dropped"] += len(errors)
+            logger.error(f"Dropped {len(errors)} {self.name} rows that cannot be written: {errors[0]}")
+        return count
+    
+    def _requeue(self, batch: List[Dict[str, Any]]):
+        """Put a failed batch back at the head of the buffer, dropping what no longer fits"""
+        with self._lock:
+            room = settings.LOG_BUFFER_CAPACITY - len(self._buffer)
+            kept = batch[:max(room, 0)]
+            self._stats["dropped"] += len(batch) - len(kept)
+            self._buffer.extendleft(reversed(kept))
+    
+    def start(self):
+        """Start the flush thread (no-op if disabled or already running)"""
+        if not settings.LOG_BUFFER_ENABLED or self.is_running():
+            return
+        
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name=f"{self.name}-writer", daemon=True)
+        self._thread.start()
+    
+    def stop(self, timeout: float = 5.0):
+        """Stop the flush thread and write what is still buffered"""
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        self._thread = None
+        self.flush()
+    
+    def is_running(self) -> bool:
+        """Whether the flush thread is alive"""
+        return self._thread is not None and self._thread.is_alive()
+    
+    def _run(self):
+        while not self._stop.is_set():
+            self._wake.wait(settings.LOG_FLUSH_INTERVAL_MS / 1000)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error(f"{self.name} writer failed: {str(e)}")
+    
+    def stats(self) -> Dict[str, Any]:
+        """Buffer depth and write/drop/flush counters (this process)"""
+        with self._lock:
+            return {
+                "running": self.is_running(),
+                "buffered": len(self._buffer),
+                "capacity": settings.LOG_BUFFER_CAPACITY,
+                **self._stats
+            }
@@ -0,0 +1,116 @@
+"""
+Cron Schedules
+Minimal five-field cron expressions for the periodic job scheduler
+
+    minute hour day-of-month month day-of-week
+
+Each field accepts "*", numbers, ranges ("1-5"), lists ("1,15") and steps
+("*/15", "0-30/10"). Day of week is 0-6 with 0 = Sunday (7 is accepted as
+Sunday too). As in standard cron, when both day-of-month and day-of-week
+are restricted a day matching either one fires. The shortcuts @hourly,
+@daily, @weekly and @monthly are also accepted. Times are UTC.
+"""
+
+from datetime import datetime, timedelta
+from typing import Set, Tuple
+
+
+SHORTCUTS = {
+    "@hourly": "0 * * * *",
+    "@daily": "0 0 * * *",
+    "@midnight": "0 0 * * *",
+    "@weekly": "0 0 * * 0",
+    "@monthly": "0 0 1 * *",
+}
+
+# (minimum, maximum) of each field
+FIELD_RANGES = ((0, 59), (0, 23), (1, 31), (1, 12), (0, 7))
+
+# Upper bound of the search for the next matching minute (covers Feb 29)
+MAX_SEARCH_DAYS = 366 * 5
+
+
+def _parse_field(field: str, minimum: int, maximum: int) -> Set[int]:
+    """Values matched by one cron field"""
+    values = set()
+    for part in field.split(","):
+        step = 1
+        if "/" in part:
+            part, step_text = part.split("/", 1)
+            step = int(step_text)
+            if step < 1:
+                raise ValueError(f"Invalid step in cron field '{field}'")
+        
+        if part == "*":
+            start, end = minimum, maximum
+        elif "-" in part:
+            start_text, end_text = part.split("-", 1)
+            start, end = int(start_text), int(end_text)
+        else:
+            start = int(part)
+            end = maximum if step > 1 else start
+        
+        if start < minimum or end > maximum or start > end:
+            raise ValueError(f"Cron field '{field}' out of range {minimum}-{maximum}")
+        values.update(range(start, end + 1, step))
+    return values
+
+
+class CronSchedule:
+    """A parsed cron expression"""
+    
+    def __init__(self, expression: str):
+        self.expression = expression.strip()
+        fields = SHORTCUTS.get(self.expression.lower(), self.expression).split()
+        if len(fields) != 5:
+            raise ValueError(f"Cron expression '{expression}' must have 5 fields")
+        
+        try:
+            parsed: Tuple[Set[int], ...] = tuple(
+                _parse_field(field, minimum, maximum)
+                for field, (minimum, maximum) in zip(fields, FIELD_RANGES)
+            )
+        except ValueError as e:
+            raise ValueError(f"Invalid cron expression '{expression}': {str(e)}")
+        
+        self.minutes, self.hours, self.days, self.months, weekdays = parsed
+        self.weekdays = {day % 7 for day in weekdays}
+        self.any_day = fields[2] == "*"
+        self.any_weekday = fields[4] == "*"
+    
+    def _day_matches(self, moment: datetime) -> bool:
+        # Python: Monday = 0; cron: Sunday = 0
+        weekday = (moment.weekday() + 1) % 7
+        if self.any_day or self.any_weekday:
+            return moment.day in self.days and weekday in self.weekdays
+        return moment.day in self.days or weekday in self.weekdays
+    
+    def next_after(self, moment: datetime) -> datetime:
+        """
+        First matching minute strictly after moment
+        
+        Args:
+            moment: Reference time (naive UTC)
+            
+        Returns:
+            Next fire time
+        """
+        candidate = moment.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        limit = candidate + timedelta(days=MAX_SEARCH_DAYS)
+        
+        while candidate < limit:
+            if candidate.month not in self.months or not self._day_matches(candidate):
+                candidate = (candidate + timedelta(days=1)).replace(hour=0, minute=0)
+                continue
+            if candidate.hour not in self.hours:
+                candidate = (candidate + timedelta(hours=1)).replace(minute=0)
+                continue
+            if candidate.minute not in self.minutes:
+                candidate += timedelta(minutes=1)
+                continue
+            return candidate
+        
+        raise ValueError(f"Cron expression '{self.expression}' never fires")
+    
+    def __repr__(self):
+        return f"<CronSchedule {self.expression}>"
@@ -0,0 +1,144 @@
+"""
+Data Versions
+Per-table, per-company change counters for validating cached query results
+
+Every transaction that writes a tracked table increments the row of the
+table and the written company in data_versions, in the same transaction as
+the write. A result computed from a company's tables at versions
+{table: n} is therefore still exact as long as those versions are
+unchanged, whichever process did the writing; writes of other companies
+leave it valid.
+
+- ORM writes are tracked automatically: flushes (inserts, updates, deletes
+  of mapped objects) and ORM-enabled UPDATE/DELETE/INSERT statements run
+  through a Session. An ORM statement counts for every company unless it
+  is executed with the company_id execution option.
+- Core writes through a Session (bulk imports, executemany) must call
+  mark_written() themselves; Core writes on a plain Connection must call
+  bump_versions()
+- Writes are collected in session.info and the versions are bumped once,
+  just before the commit, in (table, company) order: writers hold the
+  version rows only for the end of their transaction and always lock them
+  in the same order, so they cannot deadlock on them.
+
+Versions must be read before the data they validate, so a concurrent write
+can only make a cached entry miss, never be served stale.
+"""
+
+from itertools import chain
+from typing import Dict, Iterable, Optional, Tuple
+from sqlalchemy import event, inspect
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+from app.models.activity import Activity
+from app.models.customer import Customer
+from app.models.data_version import ALL_COMPANIES, DataVersion
+from app.models.deal import Deal
+from app.models.lead import Lead
+from app.utils.rollup import increment_row
+
+
+# Tables whose writes are counted (the tables reports read)
+TRACKED_TABLES = frozenset(
+    model.__tablename__ for model in (Activity, Customer, Deal, Lead)
+)
+
+# session.info key of the (table, company) pairs written in the transaction
+WRITTEN_KEY = "data_versions_written"
+
+
+def mark_written(session: Session, table_name: str, company_id: Optional[int] = None):
+    """
+    Record a write to be counted when the session commits
+    
+    Args:
+        session: Session of the writing transaction
+        table_name: Name of the written table (untracked names are ignored)
+        company_id: Company whose rows were written (None: any company)
+    """
+    if table_name in TRACKED_TABLES:
+        company_id = ALL_COMPANIES if company_id is None else company_id
+        session.info.setdefault(WRITTEN_KEY, set()).add((table_name, company_id))
+
+
+def bump_versions(connection: Connection, written: Iterable[Tuple[str, int]]):
+    """
+    Increment the versions of (table, company) pairs written in the connection's transaction
+    
+    Args:
+        connection: Connection of the writing transaction
+        written: (table name, company ID or ALL_COMPANIES) pairs; untracked tables are ignored
+    """
+    for table_name, company_id in sorted(set(written)):
+        if table_name in TRACKED_TABLES:
+            key = {"table_name": table_name, "company_id": company_id}
+            increment_row(connection, DataVersion.__table__, key, {"version": 1})
+
+
+def get_versions(connection, tables: Iterable[str], company_id: int) -> Dict[str, int]:
+    """
+    Current versions of a company's tables (0 for tables never written)
+    
+    A table's version is the sum of the company's counter and the
+    every-company counter, so it changes when either is bumped.
+    
+    Args:
+        connection: Database connection or session
+        tables: Table names
+        company_id: Company ID
+    
+    Returns:
+        Dictionary table name -> version
+    """
+    names = sorted(set(tables))
+    table = DataVersion.__table__
+    rows = connection.execute(
+        table.select().with_only_columns(table.c.table_name, table.c.version)
+        .where(table.c.table_name.in_(names), table.c.company_id.in_([company_id, ALL_COMPANIES]))
+    )
+    versions = {name: 0 for name in names}
+    for row in rows:
+        versions[row.table_name] += row.version
+    return versions
+
+
+@event.listens_for(Session, "after_flush")
+def _flushed(session, flush_context):
+    modified = [
+        instance for instance in session.dirty
+        if session.is_modified(instance, include_collections=False)
+    ]
+    for instance in chain(session.new, session.deleted, modified):
+        table_name = instance.__table__.name
+        if table_name not in TRACKED_TABLES:
+            continue
+        # Old and new company of the row, without loading it (unloaded: any company)
+        companies = [value for value in inspect(instance).attrs.company_id.history.sum() if value is not None]
+        for company_id in companies or [None]:
+            mark_written(session, table_name, company_id)
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _orm_statement(orm_execute_state):
+    if not (orm_execute_state.is_update or orm_execute_state.is_delete or orm_execute_state.is_insert):
+        return
+    mapper = orm_execute_state.bind_mapper
+    if mapper is not None:
+        company_id = orm_execute_state.execution_options.get("company_id")
+        mark_written(orm_execute_state.session, mapper.local_table.name, company_id)
+
+
+@event.listens_for(Session, "before_commit")
+def _committing(session):
+    # commit() flushes after this event: flush first so those writes are counted
+    session.flush()
+    written = session.info.pop(WRITTEN_KEY, None)
+    if written:
+        bump_versions(session.connection(), written)
+
+
+@event.listens_for(Session, "after_transaction_end")
+def _transaction_ended(session, transaction):
+    # Writes of a rolled back transaction are not counted
+    if transaction.parent is None:
+        session.info.pop(WRITTEN_KEY, None)
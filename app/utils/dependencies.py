@@ -7,7 +7,8 @@ from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.orm import Session
 from app.database import get_db
 from app.models.user import User
-from app.utils.security import decode_token
+from app.utils.security import token_version
+from app.utils.user_cache import UserCache
 from typing import Optional
 
 # HTTP Bearer authentication
@@ -37,8 +38,8 @@ async def get_current_user(
         headers={"WWW-Authenticate": "Bearer"},
     )
     
-    # Decode token
-    payload = decode_token(credentials.credentials)
+    # Decode token (payloads of tokens seen before are cached)
+    payload = UserCache.decode(credentials.credentials)
     if payload is None:
         raise credentials_exception
     
@@ -47,11 +48,24 @@ async def get_current_user(
     if user_id is None:
         raise credentials_exception
     
-    # Get user from database
+    # Token version: tokens issued before a password change are rejected.
+    # Tokens without the claim (issued before it existed) are still accepted.
+    version: Optional[str] = payload.get("tv")
+    
+    # Get user from cache, falling back to the database
+    user = UserCache.get_user(user_id, version, db)
+    if user is not None:
+        return user
+    
     user = db.query(User).filter(User.id == user_id).first()
     if user is None:
         raise credentials_exception
     
+    if version is not None and version != token_version(user.password_hash):
+        raise credentials_exception
+    
+    UserCache.set_user(user, version)
+    
     return user
 
 
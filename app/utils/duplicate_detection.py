@@ -4,10 +4,12 @@ Real-time duplicate detection for leads using Email + Phone + Company (fuzzy mat
 """
 
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_, func
-from typing import Optional, List, Dict
+from sqlalchemy import and_, or_, func, select, union, insert
+from typing import Optional, List, Dict, Tuple
 from difflib import SequenceMatcher
+from functools import lru_cache
 from app.models.lead import Lead
+from app.models.lead_duplicate_key import LeadDuplicateKey
 
 
 class DuplicateDetectionEngine:
@@ -81,6 +83,104 @@ class DuplicateDetectionEngine:
         
         return SequenceMatcher(None, str1, str2).ratio()
     
+    @staticmethod
+    def normalized_fields(
+        email: Optional[str],
+        phone: Optional[str],
+        company_name: Optional[str]
+    ) -> Tuple[bool, str, bool, str, bool, str]:
+        """
+        Presence flags and normalized values of an existing lead's match fields
+        
+        Args:
+            email: Lead email
+            phone: Lead phone
+            company_name: Lead company name
+            
+        Returns:
+            (has_email, email_norm, has_phone, phone_norm, has_company, company_norm)
+        """
+        return (
+            bool(email), DuplicateDetectionEngine.normalize_email(email),
+            bool(phone), DuplicateDetectionEngine.normalize_phone(phone),
+            bool(company_name), DuplicateDetectionEngine.normalize_string(company_name)
+        )
+    
+    @staticmethod
+    def match_normalized(
+        email_norm: str,
+        phone_norm: str,
+        company_norm: str,
+        existing: Tuple[bool, str, bool, str, bool, str]
+    ) -> Optional[Tuple[str, str]]:
+        """
+        Compare normalized input against one existing lead
+        
+        Args:
+            email_norm: Normalized email of the lead being checked
+            phone_norm: Normalized phone of the lead being checked
+            company_norm: Normalized company name of the lead being checked
+            existing: normalized_fields() of the candidate lead
+            
+        Returns:
+            (match_reason, confidence) if the lead is a duplicate, None otherwise
+        """
+        (has_email, existing_email_norm, has_phone, existing_phone_norm,
+         has_company, existing_company_norm) = existing
+        
+        match_reason_parts = []
+        confidence = "low"
+        phone_similarity = None
+        company_similarity = None
+        
+        # Check email match (exact)
+        if email_norm and has_email:
+            if email_norm == existing_email_norm:
+                match_reason_parts.append("email")
+                confidence = "high"
+        
+        # Check phone match (similarity)
+        if phone_norm and has_phone:
+            phone_similarity = DuplicateDetectionEngine.calculate_similarity(
+                phone_norm, existing_phone_norm
+            )
+            if len(existing_phone_norm) >= 10:  # Valid phone
+                if phone_similarity >= DuplicateDetectionEngine.PHONE_SIMILARITY_THRESHOLD:
+                    match_reason_parts.append("phone")
+                    if confidence == "low":
+                        confidence = "medium"
+        
+        # Check company name match (fuzzy)
+        if company_norm and has_company:
+            company_similarity = DuplicateDetectionEngine.calculate_similarity(
+                company_norm, existing_company_norm
+            )
+            if company_similarity >= DuplicateDetectionEngine.COMPANY_SIMILARITY_THRESHOLD:
+                match_reason_parts.append("company")
+                if confidence == "low":
+                    confidence = "medium"
+        
+        # Determine if duplicate (need at least 2 matches or email + one other)
+        phone_match = (
+            phone_similarity is not None and
+            phone_similarity >= DuplicateDetectionEngine.PHONE_SIMILARITY_THRESHOLD
+        )
+        company_match = (
+            company_similarity is not None and
+            company_similarity >= DuplicateDetectionEngine.COMPANY_SIMILARITY_THRESHOLD
+        )
+        
+        if email_norm and has_email:
+            # High confidence: Email + Phone or Email + Company
+            is_match = phone_match or company_match
+        else:
+            # Medium confidence: Phone + Company (both similar)
+            is_match = phone_match and company_match
+        
+        if is_match:
+            return (" + ".join(match_reason_parts) if match_reason_parts else "multiple fields", confidence)
+        return None
+    
     @staticmethod
     def check_duplicate(
         company_id: int,
@@ -119,107 +219,42 @@ class DuplicateDetectionEngine:
         phone_norm = DuplicateDetectionEngine.normalize_phone(phone)
         company_norm = DuplicateDetectionEngine.normalize_string(company_name)
         
-        # Build query
-        query = db.query(Lead).filter(
-            and_(
-                Lead.company_id == company_id,
-                Lead.is_duplicate == False  # Don't check already marked duplicates
-            )
+        # Only leads sharing a blocking key can match, so skip the company scan
+        candidate_ids = DuplicateCandidateIndex.candidate_ids_query(
+            company_id, email_norm, phone_norm, company_norm
         )
+        if candidate_ids is None:
+            candidates = []
+        else:
+            query = db.query(Lead).filter(
+                and_(
+                    Lead.company_id == company_id,
+                    Lead.is_duplicate == False,  # Don't check already marked duplicates
+                    Lead.id.in_(candidate_ids)
+                )
+            )
         
-        # Exclude current lead if updating
-        if exclude_lead_id:
-            query = query.filter(Lead.id != exclude_lead_id)
+            # Exclude current lead if updating
+            if exclude_lead_id:
+                query = query.filter(Lead.id != exclude_lead_id)
         
-        all_leads = query.all()
+            candidates = query.order_by(Lead.id).all()
         
         duplicate_leads = []
         match_reasons = []
         confidence_levels = []
         
-        for existing_lead in all_leads:
-            match_score = 0
-            match_reason_parts = []
-            confidence = "low"
-            
-            # Check email match (exact)
-            if email_norm and existing_lead.email:
-                existing_email_norm = DuplicateDetectionEngine.normalize_email(existing_lead.email)
-                if email_norm == existing_email_norm:
-                    match_score += 3
-                    match_reason_parts.append("email")
-                    confidence = "high"
-            
-            # Check phone match (similarity)
-            if phone_norm and existing_lead.phone:
-                existing_phone_norm = DuplicateDetectionEngine.normalize_phone(existing_lead.phone)
-                if existing_phone_norm and len(existing_phone_norm) >= 10:  # Valid phone
-                    phone_similarity = DuplicateDetectionEngine.calculate_similarity(
-                        phone_norm, existing_phone_norm
-                    )
-                    if phone_similarity >= DuplicateDetectionEngine.PHONE_SIMILARITY_THRESHOLD:
-                        match_score += 2
-                        match_reason_parts.append("phone")
-                        if confidence == "low":
-                            confidence = "medium"
-            
-            # Check company name match (fuzzy)
-            if company_norm and existing_lead.company_name:
-                existing_company_norm = DuplicateDetectionEngine.normalize_string(existing_lead.company_name)
-                if existing_company_norm:
-                    company_similarity = DuplicateDetectionEngine.calculate_similarity(
-                        company_norm, existing_company_norm
-                    )
-                    if company_similarity >= DuplicateDetectionEngine.COMPANY_SIMILARITY_THRESHOLD:
-                        match_score += 2
-                        match_reason_parts.append("company")
-                        if confidence == "low":
-                            confidence = "medium"
-            
-            # Check name match (first + last name)
-            if email_norm or phone_norm:  # Only if we have email or phone
-                existing_first = DuplicateDetectionEngine.normalize_string(existing_lead.first_name)
-                existing_last = DuplicateDetectionEngine.normalize_string(existing_lead.last_name)
-                # This is a bonus check, not primary
-                if existing_first and existing_last:
-                    # Could add name matching here if needed
-                    pass
-            
-            # Determine if duplicate (need at least 2 matches or email + one other)
-            is_match = False
-            
-            # High confidence: Email + Phone or Email + Company
-            if email_norm and existing_lead.email:
-                if (phone_norm and existing_lead.phone and 
-                    DuplicateDetectionEngine.calculate_similarity(
-                        phone_norm, 
-                        DuplicateDetectionEngine.normalize_phone(existing_lead.phone)
-                    ) >= DuplicateDetectionEngine.PHONE_SIMILARITY_THRESHOLD):
-                    is_match = True
-                elif (company_norm and existing_lead.company_name and
-                      DuplicateDetectionEngine.calculate_similarity(
-                          company_norm,
-                          DuplicateDetectionEngine.normalize_string(existing_lead.company_name)
-                      ) >= DuplicateDetectionEngine.COMPANY_SIMILARITY_THRESHOLD):
-                    is_match = True
-            
-            # Medium confidence: Phone + Company (both similar)
-            elif phone_norm and company_norm and existing_lead.phone and existing_lead.company_name:
-                phone_sim = DuplicateDetectionEngine.calculate_similarity(
-                    phone_norm,
-                    DuplicateDetectionEngine.normalize_phone(existing_lead.phone)
-                )
-                company_sim = DuplicateDetectionEngine.calculate_similarity(
-                    company_norm,
-                    DuplicateDetectionEngine.normalize_string(existing_lead.company_name)
+        for existing_lead in candidates:
+            match = DuplicateDetectionEngine.match_normalized(
+                email_norm, phone_norm, company_norm,
+                DuplicateDetectionEngine.normalized_fields(
+                    existing_lead.email, existing_lead.phone, existing_lead.company_name
                 )
-                if (phone_sim >= DuplicateDetectionEngine.PHONE_SIMILARITY_THRESHOLD and
-                    company_sim >= DuplicateDetectionEngine.COMPANY_SIMILARITY_THRESHOLD):
-                    is_match = True
-            
-            if is_match:
+            )
+            if match:
+                match_reason, confidence = match
                 duplicate_leads.append(existing_lead)
-                match_reasons.append(" + ".join(match_reason_parts) if match_reason_parts else "multiple fields")
+                match_reasons.append(match_reason)
                 confidence_levels.append(confidence)
         
         # Determine overall confidence
@@ -281,6 +316,10 @@ class DuplicateDetectionEngine:
         """
         Scan all leads and detect/mark duplicates
         
+        Runs the bulk scan engine (blocking + sorted-neighborhood candidate
+        pairs, union-find groups); each group is reported once with its
+        oldest lead as primary.
+        
         Args:
             company_id: Company ID
             db: Database session
@@ -289,63 +328,9 @@ class DuplicateDetectionEngine:
         Returns:
             Dictionary with detection results
         """
-        leads = db.query(Lead).filter(
-            and_(
-                Lead.company_id == company_id,
-                Lead.is_duplicate == False  # Only check non-duplicates
-            )
-        ).all()
-        
-        duplicates_found = 0
-        duplicates_marked = 0
-        duplicate_groups = []
-        
-        processed_lead_ids = set()
-        
-        for lead in leads:
-            if lead.id in processed_lead_ids:
-                continue
-            
-            # Check for duplicates
-            result = DuplicateDetectionEngine.check_duplicate(
-                company_id=company_id,
-                email=lead.email,
-                phone=lead.phone,
-                company_name=lead.company_name,
-                db=db,
-                exclude_lead_id=lead.id
-            )
-            
-            if result["is_duplicate"]:
-                duplicates_found += 1
-                duplicate_group = {
-                    "primary_lead_id": lead.id,
-                    "primary_lead_name": lead.full_name,
-                    "duplicate_lead_ids": [d.id for d in result["duplicate_leads"]],
-                    "duplicate_lead_names": [d.full_name for d in result["duplicate_leads"]],
-                    "match_reason": result["match_reason"],
-                    "confidence": result["confidence"]
-                }
-                duplicate_groups.append(duplicate_group)
-                
-                # Mark duplicates if auto_mark is True
-                if auto_mark:
-                    # Mark the duplicate leads (not the primary)
-                    for dup_lead in result["duplicate_leads"]:
-                        if not dup_lead.is_duplicate:
-                            dup_lead.is_duplicate = True
-                            duplicates_marked += 1
-                            processed_lead_ids.add(dup_lead.id)
-        
-        if auto_mark:
-            db.commit()
+        from app.utils.duplicate_scan import DuplicateScanEngine
         
-        return {
-            "total_leads_checked": len(leads),
-            "duplicate_groups_found": duplicates_found,
-            "duplicates_marked": duplicates_marked,
-            "duplicate_groups": duplicate_groups
-        }
+        return DuplicateScanEngine.scan(company_id, db, auto_mark=auto_mark)
     
     @staticmethod
     def merge_duplicates(
@@ -416,8 +401,258 @@ class DuplicateDetectionEngine:
             dup_lead.status = "disqualified"
             # Could add a merged_into_lead_id field if needed
         
+        # Filled-in email/phone/company change the primary lead's keys
+        DuplicateCandidateIndex.index_lead(primary_lead, db)
+        
         db.commit()
         
         return True
 
 
+
+
+class DuplicateCandidateIndex:
+    """
+    Blocking-key index over leads (table ``lead_duplicate_keys``)
+    
+    Every lead is stored under its normalized email, its phone digits and the
+    trigrams of its normalized company name. ``check_duplicate`` only compares
+    leads sharing enough keys with the input, which is guaranteed to include
+    every lead the full comparison would match:
+    
+    - Phone similarity >= 0.98 implies identical digit strings unless both
+      numbers have 25+ digits; those rare numbers share one "phone_long" bucket.
+    - Company similarity >= 0.85 implies a minimum number of shared trigrams
+      (q-gram count filter). Short names where that bound drops to zero are
+      bucketed by length instead.
+    """
+    
+    GRAM_SIZE = 3
+    LONG_PHONE_DIGITS = 25
+    
+    @staticmethod
+    def company_grams(company_norm: str) -> List[str]:
+        """
+        Trigrams of a normalized company name, numbered per occurrence
+        ("abc#1", "abc#2", ...) so shared keys count the multiset overlap
+        
+        Args:
+            company_norm: Normalized company name
+            
+        Returns:
+            List of trigram keys
+        """
+        size = DuplicateCandidateIndex.GRAM_SIZE
+        seen: Dict[str, int] = {}
+        grams = []
+        for i in range(len(company_norm) - size + 1):
+            gram = company_norm[i:i + size]
+            seen[gram] = seen.get(gram, 0) + 1
+            grams.append(f"{gram}#{seen[gram]}")
+        return grams
+    
+    @staticmethod
+    @lru_cache(maxsize=512)
+    def gram_thresholds(length: int) -> Tuple[Optional[int], Tuple[int, ...]]:
+        """
+        Shared-trigram threshold for a company name of the given length
+        
+        For a pair of lengths (la, lb) with ratio >= 0.85 there are at least
+        M = ceil(0.85 * (la + lb) / 2) matched characters in at most
+        (la + lb - 2M + 1) blocks, so at least M - (q - 1) * blocks trigrams
+        are shared.
+        
+        Args:
+            length: Length of the normalized company name
+            
+        Returns:
+            (lowest positive threshold over all compatible lengths or None,
+             compatible lengths whose threshold is <= 0 and need the length bucket)
+        """
+        size = DuplicateCandidateIndex.GRAM_SIZE
+        threshold = DuplicateDetectionEngine.COMPANY_SIMILARITY_THRESHOLD
+        min_positive = None
+        bucket_lengths = []
+        
+        # ratio <= 2 * min / (la + lb), so lb can't exceed la * (2 / 0.85 - 1)
+        for other in range(1, int(length * (2 / threshold - 1)) + 2):
+            total = length + other
+            min_matched = -(-int(round(threshold * 100)) * total // 200)
+            if min_matched > min(length, other):
+                continue
+            shared = min_matched - (size - 1) * (total - 2 * min_matched + 1)
+            if shared <= 0:
+                bucket_lengths.append(other)
+            elif min_positive is None or shared < min_positive:
+                min_positive = shared
+        
+        return min_positive, tuple(bucket_lengths)
+    
+    @staticmethod
+    def build_keys(
+        email: Optional[str],
+        phone: Optional[str],
+        company_name: Optional[str]
+    ) -> List[Tuple[str, str]]:
+        """
+        Blocking keys for a lead's email, phone and company name
+        
+        Args:
+            email: Lead email
+            phone: Lead phone
+            company_name: Lead company name
+            
+        Returns:
+            List of (key_type, key_value) tuples
+        """
+        keys = []
+        
+        email_norm = DuplicateDetectionEngine.normalize_email(email)
+        if email_norm:
+            keys.append(("email", email_norm))
+        
+        phone_norm = DuplicateDetectionEngine.normalize_phone(phone)
+        if phone_norm:
+            keys.append(("phone", phone_norm))
+            if len(phone_norm) >= DuplicateCandidateIndex.LONG_PHONE_DIGITS:
+                keys.append(("phone_long", ""))
+        
+        company_norm = DuplicateDetectionEngine.normalize_string(company_name)
+        if company_norm:
+            keys.extend(("company_gram", gram) for gram in DuplicateCandidateIndex.company_grams(company_norm))
+            if DuplicateCandidateIndex.gram_thresholds(len(company_norm))[1]:
+                keys.append(("company_len", str(len(company_norm))))
+        
+        return keys
+    
+    @staticmethod
+    def index_lead(lead: Lead, db: Session):
+        """
+        Replace the stored keys of a lead (caller commits)
+        
+        Args:
+            lead: Lead with an assigned ID
+            db: Database session
+        """
+        DuplicateCandidateIndex.remove_lead(lead.id, db)
+        db.add_all([
+            LeadDuplicateKey(
+                company_id=lead.company_id,
+                lead_id=lead.id,
+                key_type=key_type,
+                key_value=key_value
+            )
+            for key_type, key_value in DuplicateCandidateIndex.build_keys(
+                lead.email, lead.phone, lead.company_name
+            )
+        ])
+    
+    @staticmethod
+    def remove_lead(lead_id: int, db: Session):
+        """
+        Delete the stored keys of a lead (caller commits)
+        
+        Args:
+            lead_id: Lead ID
+            db: Database session
+        """
+        db.query(LeadDuplicateKey).filter(
+            LeadDuplicateKey.lead_id == lead_id
+        ).delete(synchronize_session=False)
+    
+    @staticmethod
+    def rebuild(company_id: int, db: Session, batch_size: int = 5000) -> int:
+        """
+        Rebuild the index for every lead of a company
+        
+        Args:
+            company_id: Company ID
+            db: Database session
+            batch_size: Rows fetched and inserted per round trip
+            
+        Returns:
+            Number of keys written
+        """
+        db.query(LeadDuplicateKey).filter(
+            LeadDuplicateKey.company_id == company_id
+        ).delete(synchronize_session=False)
+        
+        rows = db.query(Lead.id, Lead.email, Lead.phone, Lead.company_name).filter(
+            Lead.company_id == company_id
+        ).yield_per(batch_size)
+        
+        written = 0
+        pending = []
+        for lead_id, email, phone, company_name in rows:
+            for key_type, key_value in DuplicateCandidateIndex.build_keys(email, phone, company_name):
+                pending.append({
+                    "company_id": company_id,
+                    "lead_id": lead_id,
+                    "key_type": key_type,
+                    "key_value": key_value
+                })
+            if len(pending) >= batch_size:
+                db.execute(insert(LeadDuplicateKey), pending)
+                written += len(pending)
+                pending = []
+        
+        if pending:
+            db.execute(insert(LeadDuplicateKey), pending)
+            written += len(pending)
+        
+        db.commit()
+        return written
+    
+    @staticmethod
+    def candidate_ids_query(
+        company_id: int,
+        email_norm: str,
+        phone_norm: str,
+        company_norm: str
+    ):
+        """
+        Build a query selecting the IDs of leads that may match the input
+        
+        Args:
+            company_id: Company ID
+            email_norm: Normalized email
+            phone_norm: Normalized phone
+            company_norm: Normalized company name
+            
+        Returns:
+            Selectable of candidate lead IDs, or None if nothing can match
+        """
+        def keys_matching(key_type, values):
+            return select(LeadDuplicateKey.lead_id).where(
+                LeadDuplicateKey.company_id == company_id,
+                LeadDuplicateKey.key_type == key_type,
+                LeadDuplicateKey.key_value.in_(values)
+            )
+        
+        selects = []
+        
+        if email_norm:
+            selects.append(keys_matching("email", [email_norm]))
+        
+        if phone_norm:
+            selects.append(keys_matching("phone", [phone_norm]))
+            if len(phone_norm) >= DuplicateCandidateIndex.LONG_PHONE_DIGITS:
+                selects.append(keys_matching("phone_long", [""]))
+        
+        # A company-only match counts just when both leads have an email
+        if email_norm and company_norm:
+            min_shared, bucket_lengths = DuplicateCandidateIndex.gram_thresholds(len(company_norm))
+            grams = DuplicateCandidateIndex.company_grams(company_norm)
+            if min_shared is not None and grams:
+                selects.append(
+                    keys_matching("company_gram", grams)
+                    .group_by(LeadDuplicateKey.lead_id)
+                    .having(func.count() >= min_shared)
+                )
+            if bucket_lengths:
+                selects.append(keys_matching("company_len", [str(length) for length in bucket_lengths]))
+        
+        if not selects:
+            return None
+        
+        return union(*selects)
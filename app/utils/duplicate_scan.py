@@ -0,0 +1,461 @@
+"""
+Bulk Duplicate Scan Engine
+Company-wide duplicate detection for leads:
+normalize once -> blocking / sorted-neighborhood candidate pairs ->
+parallel pair scoring -> union-find duplicate groups
+"""
+
+from sqlalchemy.orm import Session
+from sqlalchemy import and_, update
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+import multiprocessing
+import logging
+import os
+from app.config import settings
+from app.models.job import Job
+from app.models.lead import Lead
+from app.utils.duplicate_detection import DuplicateDetectionEngine, DuplicateCandidateIndex
+from app.utils.job_queue import JobContext, JobQueue, job_handler
+
+logger = logging.getLogger(__name__)
+
+CONFIDENCE_RANK = {"low": 0, "medium": 1, "high": 2}
+
+# Normalized lead fields, set once per scoring process by _init_worker
+_worker_fields: List[Tuple] = []
+
+
+def _init_worker(fields: List[Tuple]):
+    """Process pool initializer: receive the normalized lead arrays once"""
+    global _worker_fields
+    _worker_fields = fields
+
+
+def _score_pairs_in_worker(pairs: List[Tuple[int, int]]) -> List[Tuple[int, int, str, str]]:
+    """Process pool task: score a chunk of candidate pairs"""
+    return score_pairs(_worker_fields, pairs)
+
+
+def score_pairs(fields: List[Tuple], pairs: List[Tuple[int, int]]) -> List[Tuple[int, int, str, str]]:
+    """
+    Score candidate pairs with the same rules as check_duplicate
+    
+    The lower index plays the lead being checked, the higher one the existing lead.
+    
+    Args:
+        fields: normalized_fields() per lead
+        pairs: (i, j) index pairs with i < j
+        
+    Returns:
+        List of (i, j, match_reason, confidence) for matching pairs
+    """
+    matches = []
+    for i, j in pairs:
+        source = fields[i]
+        match = DuplicateDetectionEngine.match_normalized(source[1], source[3], source[5], fields[j])
+        if match:
+            matches.append((i, j, match[0], match[1]))
+    return matches
+
+
+class UnionFind:
+    """Disjoint-set forest with path halving and union by size"""
+    
+    def __init__(self, size: int):
+        self.parent = list(range(size))
+        self.size = [1] * size
+    
+    def find(self, item: int) -> int:
+        parent = self.parent
+        while parent[item] != item:
+            parent[item] = parent[parent[item]]
+            item = parent[item]
+        return item
+    
+    def union(self, a: int, b: int) -> int:
+        root_a, root_b = self.find(a), self.find(b)
+        if root_a == root_b:
+            return root_a
+        if self.size[root_a] < self.size[root_b]:
+            root_a, root_b = root_b, root_a
+        self.parent[root_b] = root_a
+        self.size[root_a] += self.size[root_b]
+        return root_a
+
+
+class DuplicateScanEngine:
+    """Scan all leads of a company for duplicates in roughly linear time"""
+    
+    @staticmethod
+    def load_fields(company_id: int, db: Session) -> Tuple[List[int], List[Tuple]]:
+        """
+        Load and normalize the match fields of every non-duplicate lead
+        
+        Args:
+            company_id: Company ID
+            db: Database session
+            
+        Returns:
+            (lead IDs ordered by ID, normalized_fields() per lead)
+        """
+        rows = db.query(Lead.id, Lead.email, Lead.phone, Lead.company_name).filter(
+            and_(
+                Lead.company_id == company_id,
+                Lead.is_duplicate == False  # Only check non-duplicates
+            )
+        ).order_by(Lead.id).yield_per(settings.DEDUP_SCAN_CHUNK_SIZE)
+        
+        lead_ids = []
+        fields = []
+        for lead_id, email, phone, company_name in rows:
+            lead_ids.append(lead_id)
+            fields.append(DuplicateDetectionEngine.normalized_fields(email, phone, company_name))
+        
+        return lead_ids, fields
+    
+    @staticmethod
+    def build_neighborhoods(fields: List[Tuple]) -> List[List[int]]:
+        """
+        Build the sorted lead-index lists whose windows yield candidate pairs
+        
+        - One list per shared email, phone digits or long-phone bucket, sorted by
+          company name so oversized blocks still compare the closest names
+        - All leads with email and company, sorted by company name and by the
+          reversed company name (catches names differing in their first letters)
+            
+        Args:
+            fields: normalized_fields() per lead
+            
+        Returns:
+            List of index lists
+        """
+        blocks: Dict[Tuple[str, str], List[int]] = {}
+        with_company = []
+        
+        for index, (has_email, email_norm, has_phone, phone_norm, has_company, company_norm) in enumerate(fields):
+            if email_norm:
+                blocks.setdefault(("email", email_norm), []).append(index)
+            if phone_norm:
+                blocks.setdefault(("phone", phone_norm), []).append(index)
+                if len(phone_norm) >= DuplicateCandidateIndex.LONG_PHONE_DIGITS:
+                    blocks.setdefault(("phone_long", ""), []).append(index)
+            # Company similarity alone only counts when both leads have an email
+            if has_email and email_norm and company_norm:
+                with_company.append(index)
+        
+        neighborhoods = [
+            sorted(members, key=lambda index: fields[index][5])
+            for members in blocks.values()
+            if len(members) > 1
+        ]
+        neighborhoods.append(sorted(with_company, key=lambda index: fields[index][5]))
+        neighborhoods.append(sorted(with_company, key=lambda index: fields[index][5][::-1]))
+        
+        return neighborhoods
+    
+    @staticmethod
+    def count_pairs(neighborhoods: List[List[int]], window: int) -> int:
+        """Number of pairs candidate_pairs() will yield"""
+        total = 0
+        for members in neighborhoods:
+            size = len(members)
+            if size <= window + 1:
+                total += size * (size - 1) // 2
+            else:
+                # Full windows, then the shrinking tail
+                total += (size - window) * window + window * (window - 1) // 2
+        return total
+    
+    @staticmethod
+    def candidate_pairs(neighborhoods: List[List[int]], window: int) -> Iterator[Tuple[int, int]]:
+        """
+        Yield (i, j) pairs, i < j, of leads within `window` positions of each other
+        
+        Args:
+            neighborhoods: Sorted index lists from build_neighborhoods()
+            window: Sorted-neighborhood window size
+        """
+        for members in neighborhoods:
+            size = len(members)
+            for position in range(size - 1):
+                a = members[position]
+                for b in members[position + 1:position + 1 + window]:
+                    yield (a, b) if a < b else (b, a)
+    
+    @staticmethod
+    def _chunks(pairs: Iterator[Tuple[int, int]], chunk_size: int) -> Iterator[List[Tuple[int, int]]]:
+        chunk = []
+        for pair in pairs:
+            chunk.append(pair)
+            if len(chunk) >= chunk_size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+    
+    @staticmethod
+    def score_candidates(
+        fields: List[Tuple],
+        neighborhoods: List[List[int]],
+        on_progress: Optional[Callable[[int], None]] = None
+    ) -> Iterator[Tuple[int, int, str, str]]:
+        """
+        Score all candidate pairs, in a process pool for large tenants
+        
+        Args:
+            fields: normalized_fields() per lead
+            neighborhoods: Sorted index lists from build_neighborhoods()
+            on_progress: Called with the number of pairs scored so far
+            
+        Yields:
+            (i, j, match_reason, confidence) for matching pairs
+        """
+        chunk_size = settings.DEDUP_SCAN_CHUNK_SIZE
+        chunks = DuplicateScanEngine._chunks(
+            DuplicateScanEngine.candidate_pairs(neighborhoods, settings.DEDUP_SCAN_WINDOW),
+            chunk_size
+        )
+        workers = settings.DEDUP_SCAN_WORKERS or os.cpu_count() or 1
+        scored = 0
+        
+        if workers <= 1 or len(fields) < settings.DEDUP_SCAN_PARALLEL_MIN_LEADS:
+            for chunk in chunks:
+                yield from score_pairs(fields, chunk)
+                scored += len(chunk)
+                if on_progress:
+                    on_progress(scored)
+            return
+        
+        # Spawned workers don't inherit the web server's threads and locks
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(fields,)
+        ) as pool:
+            in_flight = {}
+            for chunk in chunks:
+                in_flight[pool.submit(_score_pairs_in_worker, chunk)] = len(chunk)
+                # Bound memory: keep only a few chunks queued per worker
+                if len(in_flight) >= workers * 2:
+                    done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        scored += in_flight.pop(future)
+                        yield from future.result()
+                    if on_progress:
+                        on_progress(scored)
+            for future in list(in_flight):
+                scored += in_flight.pop(future)
+                yield from future.result()
+            if on_progress:
+                on_progress(scored)
+    
+    @staticmethod
+    def scan(
+        company_id: int,
+        db: Session,
+        auto_mark: bool = False,
+        progress: Optional[Callable[[str, int, int], None]] = None
+    ) -> Dict:
+        """
+        Detect duplicate groups across all leads of a company
+        
+        Args:
+            company_id: Company ID
+            db: Database session
+            auto_mark: If True, mark every group member except the oldest lead
+            progress: Called with (phase, done, total)
+            
+        Returns:
+            Dictionary with detection results (same shape as detect_and_mark_duplicates)
+        """
+        def report(phase: str, done: int = 0, total: int = 0):
+            if progress:
+                progress(phase, done, total)
+        
+        report("loading")
+        lead_ids, fields = DuplicateScanEngine.load_fields(company_id, db)
+        
+        report("blocking")
+        neighborhoods = DuplicateScanEngine.build_neighborhoods(fields)
+        total_pairs = DuplicateScanEngine.count_pairs(neighborhoods, settings.DEDUP_SCAN_WINDOW)
+        
+        report("scoring", 0, total_pairs)
+        groups = UnionFind(len(fields))
+        edges = []
+        for i, j, match_reason, confidence in DuplicateScanEngine.score_candidates(
+            fields, neighborhoods, lambda done: report("scoring", done, total_pairs)
+        ):
+            groups.union(i, j)
+            edges.append((i, match_reason, confidence))
+        
+        report("grouping")
+        group_reasons: Dict[int, set] = {}
+        group_confidence: Dict[int, str] = {}
+        for i, match_reason, confidence in edges:
+            root = groups.find(i)
+            group_reasons.setdefault(root, set()).add(match_reason)
+            if CONFIDENCE_RANK[confidence] > CONFIDENCE_RANK[group_confidence.get(root, "low")]:
+                group_confidence[root] = confidence
+        
+        members: Dict[int, List[int]] = {}
+        for root in group_reasons:
+            members[root] = []
+        for index in range(len(fields)):
+            root = groups.find(index)
+            if root in members:
+                members[root].append(lead_ids[index])
+        
+        # Indexes follow lead ID order, so the first member is the oldest lead
+        grouped_ids = [lead_id for ids in members.values() for lead_id in ids]
+        names = DuplicateScanEngine._load_names(grouped_ids, db)
+        
+        duplicate_groups = []
+        duplicate_ids = []
+        for root, ids in members.items():
+            primary_id, others = ids[0], ids[1:]
+            duplicate_ids.extend(others)
+            duplicate_groups.append({
+                "primary_lead_id": primary_id,
+                "primary_lead_name": names.get(primary_id, ""),
+                "duplicate_lead_ids": others,
+                "duplicate_lead_names": [names.get(lead_id, "") for lead_id in others],
+                "match_reason": ", ".join(sorted(group_reasons[root])),
+                "confidence": group_confidence.get(root, "low")
+            })
+        duplicate_groups.sort(key=lambda group: group["primary_lead_id"])
+        
+        duplicates_marked = 0
+        if auto_mark and duplicate_ids:
+            report("marking", 0, len(duplicate_ids))
+            chunk_size = settings.DEDUP_SCAN_CHUNK_SIZE
+            for start in range(0, len(duplicate_ids), chunk_size):
+                chunk = duplicate_ids[start:start + chunk_size]
+                db.execute(
+                    update(Lead)
+                    .where(Lead.company_id == company_id, Lead.id.in_(chunk))
+                    .values(is_duplicate=True)
+                    .execution_options(synchronize_session=False, company_id=company_id)
+                )
+                duplicates_marked += len(chunk)
+                report("marking", duplicates_marked, len(duplicate_ids))
+            db.commit()
+        
+        report("completed", total_pairs, total_pairs)
+        
+        return {
+            "total_leads_checked": len(lead_ids),
+            "candidate_pairs_scored": total_pairs,
+            "duplicate_groups_found": len(duplicate_groups),
+            "duplicates_marked": duplicates_marked,
+            "duplicate_groups": duplicate_groups
+        }
+    
+    @staticmethod
+    def _load_names(lead_ids: List[int], db: Session) -> Dict[int, str]:
+        """Full names of the given leads, fetched in chunks"""
+        names = {}
+        chunk_size = settings.DEDUP_SCAN_CHUNK_SIZE
+        for start in range(0, len(lead_ids), chunk_size):
+            rows = db.query(Lead.id, Lead.first_name, Lead.last_name, Lead.lead_name).filter(
+                Lead.id.in_(lead_ids[start:start + chunk_size])
+            )
+            for lead_id, first_name, last_name, lead_name in rows:
+                if first_name and last_name:
+                    names[lead_id] = f"{first_name} {last_name}"
+                else:
+                    names[lead_id] = lead_name or ""
+        return names
+
+
+# ============================================
+# Background Scan Jobs
+# ============================================
+
+class DuplicateScanJobs:
+    """Background duplicate scans, run as durable "duplicate_scan" jobs"""
+    
+    JOB_NAME = "duplicate_scan"
+    
+    # Job states as reported by the duplicate detection endpoints
+    STATUS = {"queued": "queued", "running": "running", "completed": "completed", "dead": "failed"}
+    
+    def create(self, company_id: int, auto_mark: bool) -> Dict:
+        """Queue a scan job"""
+        job_id = JobQueue.enqueue(
+            self.JOB_NAME,
+            {"company_id": company_id, "auto_mark": auto_mark},
+            company_id=company_id,
+            # Not retried: a retry would repeat the whole scan
+            max_attempts=1
+        )
+        return self.get(str(job_id), company_id)
+    
+    def get(self, job_id: str, company_id: int) -> Optional[Dict]:
+        """Get a job of the given company"""
+        from app.database import SessionLocal
+        
+        if not str(job_id).isdigit():
+            return None
+        
+        db = SessionLocal()
+        try:
+            job = db.query(Job).filter(
+                Job.id == int(job_id),
+                Job.name == self.JOB_NAME,
+                Job.company_id == company_id
+            ).first()
+            if not job:
+                return None
+            
+            progress = job.progress or {}
+            job_status = self.STATUS.get(job.status, job.status)
+            return {
+                "job_id": str(job.id),
+                "company_id": job.company_id,
+                "auto_mark": (job.payload or {}).get("auto_mark", False),
+                "status": job_status,
+                "phase": progress.get("phase"),
+                "progress": progress.get("progress", 0),
+                "pairs_scored": progress.get("pairs_scored", 0),
+                "total_pairs": progress.get("total_pairs", 0),
+                "created_at": job.created_at.isoformat() if job.created_at else None,
+                "started_at": job.started_at.isoformat() if job.started_at else None,
+                "completed_at": job.completed_at.isoformat() if job.completed_at else None,
+                "result": job.result,
+                "error": job.last_error if job_status == "failed" else None
+            }
+        finally:
+            db.close()
+
+
+scan_jobs = DuplicateScanJobs()
+
+
+@job_handler(DuplicateScanJobs.JOB_NAME)
+def run_duplicate_scan_task(company_id: int, auto_mark: bool, context: JobContext):
+    """Job handler: run a duplicate scan, reporting progress on the job"""
+    from app.database import SessionLocal
+
+    state = {"phase": None, "progress": 0, "pairs_scored": 0, "total_pairs": 0}
+    
+    def on_progress(phase: str, done: int, total: int):
+        previous = (state["phase"], state["progress"])
+        state["phase"] = phase
+        if phase == "scoring":
+            state["pairs_scored"] = done
+            state["total_pairs"] = total
+            # Scoring dominates the run time
+            state["progress"] = 5 + int(90 * done / total) if total else 95
+        elif phase == "completed":
+            state["progress"] = 100
+        # Write only when the phase or the percentage changes
+        if (state["phase"], state["progress"]) != previous:
+            context.update_progress(dict(state))
+    
+    db = SessionLocal()
+    try:
+        return DuplicateScanEngine.scan(company_id, db, auto_mark=auto_mark, progress=on_progress)
+    finally:
+        db.close()
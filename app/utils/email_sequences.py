@@ -348,6 +348,30 @@ class EmailSequenceAutomation:
         
         return pending
     
+    @staticmethod
+    def send_due_emails(
+        db: Session,
+        limit: int = 500
+    ) -> Dict:
+        """
+        Send pending sequence emails whose scheduled send date has passed
+        
+        Emails of every company are sent in scheduled order by the email
+        dispatcher (pooled SMTP connections, per-domain and per-provider
+        rate limits; see app/services/email_delivery_service.py). Without
+        SMTP configuration nothing is sent and the emails stay pending.
+        
+        Args:
+            db: Database session
+            limit: Maximum number of due emails examined in this run
+            
+        Returns:
+            Dictionary with send statistics
+        """
+        from app.services.email_delivery_service import EmailDeliveryService
+        
+        return EmailDeliveryService.dispatch(db, limit)
+    
     @staticmethod
     def get_sequence_status(
         lead_id: int,
@@ -5,8 +5,8 @@ Automatically calculates health score based on engagement, activities, and deals
 
 from datetime import datetime, timedelta
 from sqlalchemy.orm import Session
-from sqlalchemy import func, and_, or_
-from typing import Optional
+from sqlalchemy import Float, func, and_, or_, case, select, type_coerce, union_all, update
+from typing import Dict, Optional, Tuple
 from app.models.customer import Customer
 from app.models.activity import Activity
 from app.models.deal import Deal
@@ -68,6 +68,19 @@ class HealthScoreCalculator:
         score += status_score
         
         # Determine health score category
+        return HealthScoreCalculator.get_category(score)
+    
+    @staticmethod
+    def get_category(score: int) -> str:
+        """
+        Health score category of a numeric score
+        
+        Args:
+            score: Health score points (0-100)
+            
+        Returns:
+            Health score: 'green', 'yellow', 'red', or 'black'
+        """
         if score >= HealthScoreCalculator.GREEN_THRESHOLD:
             return "green"
         elif score >= HealthScoreCalculator.YELLOW_THRESHOLD:
@@ -194,7 +207,15 @@ class HealthScoreCalculator:
         if not last_activity:
             return 0
         
-        days_ago = (datetime.now() - last_activity.activity_date).days
+        return HealthScoreCalculator._recency_points(last_activity.activity_date, datetime.now())
+    
+    @staticmethod
+    def _recency_points(last_activity_date: Optional[datetime], now: datetime) -> int:
+        """Recency score of the last interaction date (see _calculate_recency_score)"""
+        if last_activity_date is None:
+            return 0
+        
+        days_ago = (now - last_activity_date).days
         
         if days_ago <= 7:
             return 20
@@ -274,6 +295,12 @@ class HealthScoreCalculator:
         """
         Batch update health scores for multiple customers
         
+        Set-based: activity window counts, last interaction dates and
+        open/won deal aggregates of all customers are read in grouped
+        queries, categories are computed in bulk with the same rules as
+        calculate_health_score, and only customers whose category changed
+        are written back.
+        
         Args:
             company_id: Company ID
             db: Database session
@@ -282,31 +309,154 @@ class HealthScoreCalculator:
         Returns:
             Dictionary with update statistics
         """
-        query = db.query(Customer).filter(Customer.company_id == company_id)
+        now = datetime.now()
+        
+        query = db.query(Customer.id, Customer.status, Customer.health_score).filter(
+            Customer.company_id == company_id
+        )
         
         if customer_ids:
             query = query.filter(Customer.id.in_(customer_ids))
         
         customers = query.all()
         
-        updated = 0
-        unchanged = 0
+        activity = HealthScoreCalculator._batch_activity_aggregates(company_id, db, now, customer_ids)
+        deals = HealthScoreCalculator._batch_deal_aggregates(company_id, db, now, customer_ids)
         
+        changes = []
         for customer in customers:
-            old_score = customer.health_score
-            new_score = HealthScoreCalculator.calculate_health_score(customer, db)
+            activity_score, last_activity_date = activity.get(customer.id, (0, None))
+            score = (
+                activity_score
+                + deals.get(customer.id, 0)
+                + HealthScoreCalculator._recency_points(last_activity_date, now)
+                + HealthScoreCalculator._calculate_status_score(customer)
+            )
+            new_score = HealthScoreCalculator.get_category(score)
             
-            if old_score != new_score:
-                customer.health_score = new_score
-                updated += 1
-            else:
-                unchanged += 1
+            if customer.health_score != new_score:
+                changes.append({"id": customer.id, "health_score": new_score})
         
+        # Only customers whose category changed are written, in one executemany UPDATE
+        if changes:
+            db.execute(update(Customer), changes, execution_options={"company_id": company_id})
         db.commit()
         
         return {
             "total": len(customers),
-            "updated": updated,
-            "unchanged": unchanged
+            "updated": len(changes),
+            "unchanged": len(customers) - len(changes)
         }
 
+    @staticmethod
+    def _batch_activity_aggregates(
+        company_id: int,
+        db: Session,
+        now: datetime,
+        customer_ids: Optional[list] = None,
+        days_lookback: int = 90
+    ) -> Dict[int, Tuple[int, Optional[datetime]]]:
+        """
+        Activity score and last interaction of many customers in one GROUP BY query
+
+        Applies the rules of _calculate_activity_score to per-customer counts
+        of activities in the 30/60/90 day windows and positive outcomes.
+        
+        Args:
+            company_id: Company ID
+            db: Database session
+            now: Reference time of the batch
+            customer_ids: Optional list of customer IDs (None = all)
+            days_lookback: Number of days to look back for activities
+            
+        Returns:
+            {customer_id: (activity score, last activity date)} for customers with activities
+        """
+        def count_if(condition):
+            return func.coalesce(func.sum(case((condition, 1), else_=0)), 0)
+        
+        in_window = Activity.activity_date >= now - timedelta(days=days_lookback)
+        
+        # days_ago <= N  <=>  activity_date > now - (N + 1) days
+        query = db.query(
+            Activity.customer_id,
+            count_if(in_window & (Activity.activity_date > now - timedelta(days=31))),
+            count_if(in_window & (Activity.activity_date <= now - timedelta(days=31))
+                     & (Activity.activity_date > now - timedelta(days=61))),
+            count_if(in_window & (Activity.activity_date <= now - timedelta(days=61))
+                     & (Activity.activity_date > now - timedelta(days=91))),
+            count_if(in_window & (Activity.outcome == "positive")),
+            func.max(Activity.activity_date),
+        ).filter(
+            Activity.company_id == company_id,
+            Activity.customer_id.isnot(None)
+        )
+        
+        if customer_ids:
+            query = query.filter(Activity.customer_id.in_(customer_ids))
+        
+        aggregates = {}
+        for customer_id, last_30, last_60, last_90, positive, last_date in query.group_by(Activity.customer_id):
+            score = min(last_30 * 5 + last_60 * 3 + last_90 * 2 + positive * 2, 40)  # Cap at 40 points
+            aggregates[customer_id] = (int(score), last_date)
+        
+        return aggregates
+    
+    @staticmethod
+    def _batch_deal_aggregates(
+        company_id: int,
+        db: Session,
+        now: datetime,
+        customer_ids: Optional[list] = None
+    ) -> Dict[int, int]:
+        """
+        Deal score of many customers in one GROUP BY query
+        
+        A deal belongs to its customer and to its account (counted once when
+        both are the same customer), as in _calculate_deal_score.
+        
+        Args:
+            company_id: Company ID
+            db: Database session
+            now: Reference time of the batch
+            customer_ids: Optional list of customer IDs (None = all)
+            
+        Returns:
+            {customer_id: deal score} for customers with deals
+        """
+        cutoff_date = (now - timedelta(days=90)).date()
+        
+        def deal_links(customer_column, condition):
+            return select(
+                customer_column.label("customer_id"),
+                Deal.status.label("status"),
+                Deal.deal_value.label("deal_value"),
+                Deal.actual_close_date.label("actual_close_date"),
+            ).where(Deal.company_id == company_id, condition)
+        
+        links = union_all(
+            deal_links(Deal.customer_id, Deal.customer_id.isnot(None)),
+            deal_links(Deal.account_id, Deal.account_id.isnot(None) & (Deal.account_id != Deal.customer_id)),
+        ).subquery()
+        
+        is_open = links.c.status == "open"
+        is_recent_win = (links.c.status == "won") & (links.c.actual_close_date >= cutoff_date)
+        
+        query = db.query(
+            links.c.customer_id,
+            func.coalesce(func.sum(case((is_open, 1), else_=0)), 0),
+            func.coalesce(func.sum(case((is_recent_win, 1), else_=0)), 0),
+            type_coerce(func.coalesce(func.sum(case((is_open | is_recent_win, links.c.deal_value), else_=0)), 0), Float),
+        )
+        
+        if customer_ids:
+            query = query.filter(links.c.customer_id.in_(customer_ids))
+        
+        scores = {}
+        for customer_id, open_count, won_count, total_deal_value in query.group_by(links.c.customer_id):
+            score = min(open_count * 5, 15) + min(won_count * 10, 10)
+            # Convert to lakhs (divide by 100000) and cap at 5
+            score += min(int(float(total_deal_value or 0) / 100000), 5)
+            scores[customer_id] = min(int(score), 30)  # Cap at 30 points
+        
+        return scores
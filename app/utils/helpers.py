@@ -2,9 +2,13 @@
 Helper Functions
 """
 
+import base64
+import json
 from datetime import datetime
-from typing import Any, Optional
+from typing import Any, Dict, List, Optional, Tuple, Union
 from math import ceil
+from fastapi import HTTPException, status
+from sqlalchemy import String, and_, cast, literal, or_
 
 
 def success_response(data: Any, message: str = "Success") -> dict:
@@ -49,29 +53,91 @@ def error_response(error: str, details: Optional[dict] = None) -> dict:
     return response
 
 
-def paginate(query, page: int = 1, per_page: int = 10):
+def parse_sort(sort: Optional[str], sort_fields: Dict[str, Any]) -> List[Any]:
     """
-    Paginate database query
+    Parse a sort parameter into ORDER BY clauses
+    
+    Args:
+        sort: Comma-separated field names, "-" prefix for descending
+              (e.g. "-created_at,status")
+        sort_fields: Allowed field names mapped to their (indexed) columns
+        
+    Returns:
+        List of ORDER BY clauses, ending with "id" as tiebreaker when allowed
+        
+    Raises:
+        HTTPException: If a field is not sortable
+    """
+    clauses = []
+    used = set()
+    descending = False
+    
+    for part in sort.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        descending = part.startswith("-")
+        name = part.lstrip("+-")
+        
+        if name not in sort_fields or name in used:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Invalid sort field '{name}'. Allowed: {', '.join(sorted(sort_fields))}"
+            )
+        
+        used.add(name)
+        column = sort_fields[name]
+        clauses.append(column.desc() if descending else column.asc())
+    
+    # Stable order so rows don't repeat or vanish between pages
+    if "id" in sort_fields and "id" not in used:
+        clauses.append(sort_fields["id"].desc() if descending else sort_fields["id"].asc())
+    
+    return clauses
+
+
+def paginate(
+    query,
+    page: int = 1,
+    per_page: int = 10,
+    sort: Optional[str] = None,
+    sort_fields: Optional[Dict[str, Any]] = None,
+    default_sort: Optional[List[Any]] = None,
+    max_per_page: int = 100
+):
+    """
+    Paginate database query in SQL (COUNT + ORDER BY/LIMIT/OFFSET)
     
     Args:
         query: SQLAlchemy query object
         page: Page number (starts from 1)
         per_page: Items per page
+        sort: Optional sort parameter validated against sort_fields
+        sort_fields: Allowed sort field names mapped to columns
+        default_sort: ORDER BY clauses used when no sort is given
+        max_per_page: Upper bound for per_page
         
     Returns:
         Tuple of (items, pagination_meta)
     """
     # Ensure valid values
     page = max(1, page)
-    per_page = min(max(1, per_page), 100)  # Max 100 items per page
+    per_page = min(max(1, per_page), max_per_page)
     
-    # Get total count
-    total = query.count()
+    # Get total count (ordering is irrelevant for COUNT)
+    total = query.order_by(None).count()
     
     # Calculate pagination
-    pages = ceil(total / per_page) if total > 0 else 1
+    pages = ceil(total / per_page)
     offset = (page - 1) * per_page
     
+    # Apply ordering (an explicit sort replaces any query ordering such as
+    # search relevance; the default sort only breaks its ties)
+    if sort:
+        query = query.order_by(None).order_by(*parse_sort(sort, sort_fields or {}))
+    elif default_sort:
+        query = query.order_by(*default_sort)
+    
     # Get items
     items = query.offset(offset).limit(per_page).all()
     
@@ -86,6 +152,116 @@ def paginate(query, page: int = 1, per_page: int = 10):
     return items, pagination
 
 
+def encode_cursor(sort_value: Union[datetime, str], row_id: int) -> str:
+    """
+    Encode an opaque keyset cursor from (sort value, id)
+    
+    Args:
+        sort_value: Timestamp of the last row on the page (or its stored text on SQLite)
+        row_id: ID of the last row on the page
+        
+    Returns:
+        URL-safe cursor string
+    """
+    if isinstance(sort_value, datetime):
+        sort_value = sort_value.isoformat()
+    payload = json.dumps([sort_value, row_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """
+    Decode a keyset cursor created by encode_cursor
+    
+    Raises:
+        HTTPException: If the cursor is malformed
+    """
+    sort_value, row_id = _cursor_payload(cursor)
+    return datetime.fromisoformat(sort_value), row_id
+
+
+def _cursor_payload(cursor: str) -> Tuple[str, int]:
+    """(timestamp text, id) of a cursor, checked to be a valid timestamp"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        sort_value, row_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        datetime.fromisoformat(sort_value)
+        return sort_value, int(row_id)
+    except (ValueError, TypeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
+
+
+def keyset_paginate(
+    query,
+    sort_column,
+    id_column,
+    cursor: Optional[str] = None,
+    per_page: int = 10,
+    max_per_page: int = 100
+):
+    """
+    Paginate database query by seeking past a cursor (newest first)
+    
+    Unlike OFFSET pagination the cost of a page does not grow with its depth:
+    rows are located with WHERE (sort_column, id) < (cursor) on an indexed
+    column, and no COUNT is run.
+    
+    Args:
+        query: SQLAlchemy query object (unordered)
+        sort_column: Timestamp column to order by (descending)
+        id_column: Primary key column used as tiebreaker
+        cursor: Cursor from a previous page, empty/None for the first page
+        per_page: Items per page
+        max_per_page: Upper bound for per_page
+        
+    Returns:
+        Tuple of (items, pagination_meta) with next_cursor None on the last page
+    """
+    per_page = min(max(1, per_page), max_per_page)
+    
+    # SQLite stores timestamps as text, with microseconds when written by
+    # Python and without when written by func.now(), so a bound datetime
+    # ("...:05.000000") never equals a server-written value ("...:05").
+    # There the cursor carries the row's stored text and is compared as text.
+    sqlite = query.session.get_bind().dialect.name == "sqlite"
+    
+    if cursor:
+        sort_text, row_id = _cursor_payload(cursor)
+        sort_value = literal(sort_text, String) if sqlite else datetime.fromisoformat(sort_text)
+        query = query.filter(
+            or_(
+                sort_column < sort_value,
+                and_(sort_column == sort_value, id_column < row_id)
+            )
+        )
+    
+    # Fetch one extra row to know whether another page exists
+    rows = query.order_by(None).order_by(sort_column.desc(), id_column.desc()).limit(per_page + 1).all()
+    has_more = len(rows) > per_page
+    items = rows[:per_page]
+    
+    next_cursor = None
+    if has_more:
+        last = items[-1]
+        last_id = getattr(last, id_column.key)
+        if sqlite:
+            sort_value = query.session.query(cast(sort_column, String)).filter(id_column == last_id).scalar()
+        else:
+            sort_value = getattr(last, sort_column.key)
+        next_cursor = encode_cursor(sort_value, last_id)
+    
+    pagination = {
+        "per_page": per_page,
+        "next_cursor": next_cursor,
+        "has_more": has_more
+    }
+    
+    return items, pagination
+
+
 def generate_customer_code(company_id: int, customer_id: int) -> str:
     """
     Generate customer code
@@ -0,0 +1,572 @@
+"""
+Durable Job Queue
+Database-backed background jobs shared by every API and worker process
+
+- enqueue(): a job is a row in the jobs table (handler name + JSON payload),
+  optionally written in the caller's transaction, so it survives restarts
+  and is visible to every process
+- Workers claim ready jobs by priority with a lease: candidates are read
+  with SELECT ... FOR UPDATE SKIP LOCKED (PostgreSQL) and taken with a
+  conditional UPDATE, so concurrent workers never run the same job. A
+  running job whose lease expired (worker died) is claimed again; live
+  workers extend the leases of their jobs with a heartbeat
+- Per-tenant concurrency cap: at most JOB_TENANT_CONCURRENCY running jobs
+  per company, across all workers (checked inside the claiming UPDATE)
+- Failures are retried with exponential backoff (TASK_RETRY_DELAY doubled
+  per attempt, capped at JOB_BACKOFF_MAX_SECONDS); after max_attempts the
+  job is dead-lettered (status "dead") with its last error
+- stats(): cluster-wide depth, queue latency and throughput from the table
+
+Workers run in a dedicated process (python -m app.worker) and, unless
+JOB_WORKER_EMBEDDED is off, as a thread pool inside each API process.
+"""
+
+import asyncio
+import importlib
+import inspect
+import logging
+import os
+import socket
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional
+from sqlalchemy import and_, func, or_, select, text
+from sqlalchemy.orm import Session
+from app.config import settings
+from app.database import SessionLocal
+from app.models.job import Job
+
+logger = logging.getLogger(__name__)
+
+
+# pg_advisory_xact_lock namespace of per-tenant claim locks
+TENANT_LOCK_NAMESPACE = 7301
+
+# Registered handlers (name -> callable)
+HANDLERS: Dict[str, Callable] = {}
+
+# Modules whose import registers handlers (imported by workers)
+HANDLER_MODULES = (
+    "app.utils.background_tasks",
+    "app.utils.duplicate_scan",
+    "app.services.scheduler_service",
+    "app.services.report_execution_service",
+    "app.services.lead_import_service",
+)
+
+
+def job_handler(name: str):
+    """
+    Register a function as the handler of a job name
+    
+    The handler is called with the job payload as keyword arguments, plus
+    context=JobContext if it declares a context parameter. Coroutine
+    functions are run to completion on the worker thread.
+    """
+    def decorator(func: Callable) -> Callable:
+        HANDLERS[name] = func
+        return func
+    return decorator
+
+
+def load_handlers():
+    """Import every handler module"""
+    for module in HANDLER_MODULES:
+        importlib.import_module(module)
+
+
+class JobContext:
+    """Running job as seen by its handler"""
+    
+    def __init__(self, job_id: int, attempt: int, worker_id: str):
+        self.job_id = job_id
+        self.attempt = attempt
+        self.worker_id = worker_id
+    
+    def update_progress(self, progress: Dict[str, Any]):
+        """Store handler progress on the job row (readable from any process)"""
+        db = SessionLocal()
+        try:
+            db.query(Job).filter(
+                Job.id == self.job_id,
+                Job.locked_by == self.worker_id
+            ).update({Job.progress: progress}, synchronize_session=False)
+            db.commit()
+        finally:
+            db.close()
+
+
+class JobQueue:
+    """Durable job queue operations"""
+    
+    @staticmethod
+    def enqueue(
+        name: str,
+        payload: Optional[Dict[str, Any]] = None,
+        company_id: Optional[int] = None,
+        priority: int = 0,
+        queue: str = "default",
+        max_attempts: Optional[int] = None,
+        delay: float = 0,
+        db: Optional[Session] = None
+    ) -> int:
+        """
+        Add a job to the queue
+        
+        Args:
+            name: Registered handler name
+            payload: Handler keyword arguments (JSON-serializable)
+            company_id: Tenant of the job (per-tenant concurrency cap)
+            priority: Higher runs first
+            queue: Queue name (workers can be restricted to queues)
+            max_attempts: Attempts before dead-lettering (default TASK_RETRY_COUNT)
+            delay: Seconds before the job may run
+            db: Session to enqueue in (committed by the caller); None = commit now
+            
+        Returns:
+            Job ID
+        """
+        now = datetime.utcnow()
+        job = Job(
+            queue=queue,
+            name=name,
+            payload=payload or {},
+            company_id=company_id,
+            priority=priority,
+            status="queued",
+            attempts=0,
+            max_attempts=max_attempts or settings.TASK_RETRY_COUNT,
+            run_at=now + timedelta(seconds=delay),
+            created_at=now
+        )
+        
+        if db is not None:
+            db.add(job)
+            db.flush()
+            return job.id
+        
+        session = SessionLocal()
+        try:
+            session.add(job)
+            session.commit()
+            return job.id
+        finally:
+            session.close()
+    
+    @staticmethod
+    def _claimable(now: datetime):
+        """Queued jobs that are due, or running jobs whose lease expired"""
+        return or_(
+            and_(Job.status == "queued", Job.run_at <= now),
+            and_(Job.status == "running", Job.locked_until < now)
+        )
+    
+    @staticmethod
+    def claim(
+        db: Session,
+        worker_id: str,
+        limit: int,
+        queues: Optional[List[str]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Lease up to limit ready jobs for a worker
+        
+        Args:
+            db: Database session
+            worker_id: Claiming worker
+            limit: Maximum number of jobs
+            queues: Only claim from these queues (None = all)
+            
+        Returns:
+            Claimed jobs (id, name, payload, company_id, attempts, max_attempts)
+        """
+        now = datetime.utcnow()
+        claimable = JobQueue._claimable(now)
+        
+        query = db.query(Job.id, Job.company_id).filter(claimable)
+        if queues:
+            query = query.filter(Job.queue.in_(queues))
+        # Over-fetch so jobs of capped tenants can be skipped
+        candidates = query.order_by(
+            Job.priority.desc(), Job.run_at, Job.id
+        ).limit(limit * 10).with_for_update(skip_locked=True).all()
+        
+        cap = settings.JOB_TENANT_CONCURRENCY
+        running = {}
+        if cap:
+            running = dict(db.query(Job.company_id, func.count(Job.id)).filter(
+                Job.status == "running",
+                Job.locked_until >= now,
+                Job.company_id.isnot(None)
+            ).group_by(Job.company_id).all())
+        
+        claimed_ids = []
+        for job_id, company_id in candidates:
+            if len(claimed_ids) >= limit:
+                break
+            if cap and company_id is not None and running.get(company_id, 0) >= cap:
+                continue
+            
+            # Conditional UPDATE: only one worker can move the job to running
+            conditions = [Job.id == job_id, claimable]
+            if cap and company_id is not None:
+                conditions.append(JobQueue._tenant_has_capacity(db, company_id, now, cap))
+            taken = db.query(Job).filter(*conditions).update({
+                Job.status: "running",
+                Job.locked_by: worker_id,
+                Job.locked_until: now + timedelta(seconds=settings.JOB_LEASE_SECONDS),
+                Job.attempts: Job.attempts + 1,
+                Job.started_at: now,
+            }, synchronize_session=False)
+            if taken:
+                claimed_ids.append(job_id)
+                if company_id is not None:
+                    running[company_id] = running.get(company_id, 0) + 1
+        db.commit()
+        
+        if not claimed_ids:
+            return []
+        
+        rows = db.query(Job.id, Job.name, Job.payload, Job.company_id, Job.attempts, Job.max_attempts).filter(
+            Job.id.in_(claimed_ids)
+        ).all()
+        return [row._asdict() for row in rows]
+    
+    @staticmethod
+    def _tenant_has_capacity(db: Session, company_id: int, now: datetime, cap: int):
+        """
+        Claim condition: fewer than cap live running jobs of the company
+        
+        Evaluated inside the claiming UPDATE, which SQLite runs under its
+        write lock; on PostgreSQL concurrent claims for one company are
+        serialized with a transaction-level advisory lock first.
+        """
+        if db.get_bind().dialect.name == "postgresql":
+            db.execute(
+                text("SELECT pg_advisory_xact_lock(:namespace, :company_id)"),
+                {"namespace": TENANT_LOCK_NAMESPACE, "company_id": company_id}
+            )
+        
+        running = select(func.count(Job.id)).where(
+            Job.company_id == company_id,
+            Job.status == "running",
+            Job.locked_until >= now
+        ).scalar_subquery()
+        return running < cap
+    
+    @staticmethod
+    def complete(db: Session, job_id: int, worker_id: str, result: Any = None):
+        """Mark a leased job completed"""
+        db.query(Job).filter(Job.id == job_id, Job.locked_by == worker_id).update({
+            Job.status: "completed",
+            Job.result: result,
+            Job.completed_at: datetime.utcnow(),
+            Job.locked_by: None,
+            Job.locked_until: None,
+        }, synchronize_session=False)
+        db.commit()
+    
+    @staticmethod
+    def fail(db: Session, job_id: int, worker_id: str, error: str, retry: bool = True):
+        """
+        Record a failed attempt of a leased job
+        
+        The job is queued again after an exponential backoff, or
+        dead-lettered once it has used max_attempts (or if retry is False).
+        """
+        job = db.query(Job).filter(Job.id == job_id, Job.locked_by == worker_id).first()
+        if not job:
+            return  # Lease lost: another worker owns the job now
+        
+        now = datetime.utcnow()
+        job.last_error = error[:4000]
+        job.locked_by = None
+        job.locked_until = None
+        
+        if retry and job.attempts < job.max_attempts:
+            job.status = "queued"
+            job.run_at = now + timedelta(seconds=JobQueue.backoff_seconds(job.attempts))
+        else:
+            job.status = "dead"
+            job.completed_at = now
+            logger.error(f"Job {job.id} ({job.name}) dead-lettered after {job.attempts} attempts: {error}")
+        db.commit()
+    
+    @staticmethod
+    def backoff_seconds(attempts: int) -> float:
+        """Delay before the next attempt after attempts failures"""
+        delay = settings.TASK_RETRY_DELAY * (2 ** max(attempts - 1, 0))
+        return min(delay, settings.JOB_BACKOFF_MAX_SECONDS)
+    
+    @staticmethod
+    def extend_leases(db: Session, worker_id: str, job_ids: List[int]):
+        """Heartbeat: extend the leases of a worker's running jobs"""
+        if not job_ids:
+            return
+        db.query(Job).filter(
+            Job.id.in_(job_ids),
+            Job.locked_by == worker_id,
+            Job.status == "running"
+        ).update({
+            Job.locked_until: datetime.utcnow() + timedelta(seconds=settings.JOB_LEASE_SECONDS)
+        }, synchronize_session=False)
+        db.commit()
+    
+    @staticmethod
+    def requeue(db: Session, job_id: int) -> bool:
+        """Move a dead-lettered job back to the queue with fresh attempts"""
+        updated = db.query(Job).filter(Job.id == job_id, Job.status == "dead").update({
+            Job.status: "queued",
+            Job.attempts: 0,
+            Job.run_at: datetime.utcnow(),
+            Job.completed_at: None,
+        }, synchronize_session=False)
+        db.commit()
+        return bool(updated)
+    
+    @staticmethod
+    def prune(db: Session) -> int:
+        """Delete completed jobs past JOB_RETENTION_HOURS and dead jobs past JOB_DEAD_RETENTION_DAYS"""
+        now = datetime.utcnow()
+        deleted = db.query(Job).filter(
+            Job.status == "completed",
+            Job.completed_at < now - timedelta(hours=settings.JOB_RETENTION_HOURS)
+        ).delete(synchronize_session=False)
+        deleted += db.query(Job).filter(
+            Job.status == "dead",
+            Job.completed_at < now - timedelta(days=settings.JOB_DEAD_RETENTION_DAYS)
+        ).delete(synchronize_session=False)
+        db.commit()
+        return deleted
+    
+    @staticmethod
+    def stats(db: Session) -> Dict[str, Any]:
+        """
+        Cluster-wide queue statistics
+        
+        Returns:
+            Depth by state and queue, age of the oldest ready job, queue wait
+            and run time of recently completed jobs, and throughput
+        """
+        now = datetime.utcnow()
+        
+        counts = dict(db.query(Job.status, func.count(Job.id)).group_by(Job.status).all())
+        scheduled = db.query(func.count(Job.id)).filter(
+            Job.status == "queued", Job.run_at > now
+        ).scalar() or 0
+        depth = {
+            "ready": counts.get("queued", 0) - scheduled,
+            "scheduled": scheduled,
+            "running": counts.get("running", 0),
+            "completed": counts.get("completed", 0),
+            "dead": counts.get("dead", 0),
+        }
+        
+        by_queue = dict(db.query(Job.queue, func.count(Job.id)).filter(
+            Job.status == "queued", Job.run_at <= now
+        ).group_by(Job.queue).all())
+        
+        oldest_ready = db.query(func.min(Job.run_at)).filter(
+            Job.status == "queued", Job.run_at <= now
+        ).scalar()
+        
+        # Latency of the most recent completions in the last hour
+        recent = db.query(Job.run_at, Job.started_at, Job.completed_at).filter(
+            Job.status == "completed",
+            Job.completed_at >= now - timedelta(hours=1)
+        ).order_by(Job.completed_at.desc()).limit(1000).all()
+        waits = sorted(max((started - run_at).total_seconds(), 0) for run_at, started, _ in recent if started)
+        runs = sorted(max((done - started).total_seconds(), 0) for _, started, done in recent if started and done)
+        
+        def summary(values: List[float]) -> Dict[str, Optional[float]]:
+            if not values:
+                return {"avg": None, "p95": None, "max": None}
+            return {
+                "avg": round(sum(values) / len(values), 3),
+                "p95": round(values[min(len(values) - 1, int(len(values) * 0.95))], 3),
+                "max": round(values[-1], 3),
+            }
+        
+        def finished_since(job_status: str, minutes: int) -> int:
+            return db.query(func.count(Job.id)).filter(
+                Job.status == job_status,
+                Job.completed_at >= now - timedelta(minutes=minutes)
+            ).scalar() or 0
+        
+        workers = [row[0] for row in db.query(Job.locked_by).filter(
+            Job.status == "running", Job.locked_until >= now
+        ).distinct().all()]
+        
+        return {
+            "enabled": settings.BACKGROUND_TASK_ENABLED,
+            "depth": depth,
+            "ready_by_queue": by_queue,
+            "oldest_ready_age_seconds": round((now - oldest_ready).total_seconds(), 3) if oldest_ready else 0,
+            "queue_wait_seconds": summary(waits),
+            "run_seconds": summary(runs),
+            "throughput": {
+                "completed_last_minute": finished_since("completed", 1),
+                "completed_last_5_minutes": finished_since("completed", 5),
+                "completed_last_hour": finished_since("completed", 60),
+                "dead_last_hour": finished_since("dead", 60),
+            },
+            "active_workers": workers,
+            "embedded_worker_running": embedded_worker is not None and embedded_worker.is_running(),
+        }
+
+
+class JobWorker:
+    """
+    Pool of threads executing claimed jobs
+    
+    One poller thread claims as many jobs as there are free slots, every
+    JOB_POLL_INTERVAL seconds (immediately again while jobs keep coming), and
+    heartbeats the leases of running jobs.
+    """
+    
+    def __init__(self, concurrency: Optional[int] = None, queues: Optional[List[str]] = None):
+        self.concurrency = concurrency or settings.JOB_WORKER_CONCURRENCY
+        self.queues = queues
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self._active: Dict[int, Any] = {}
+        self._lock = threading.Lock()
+    
+    def start(self):
+        """Run the worker in a background thread"""
+        if self.is_running():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self.run, name="job-worker", daemon=True)
+        self._thread.start()
+    
+    def stop(self, timeout: float = 10.0):
+        """Stop claiming jobs and wait for running ones"""
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout)
+        self._thread = None
+    
+    def is_running(self) -> bool:
+        """Whether the poller is alive"""
+        return self._thread is not None and self._thread.is_alive()
+    
+    def run(self):
+        """Poll, claim and execute jobs until stopped (blocking)"""
+        load_handlers()
+        logger.info(f"Job worker {self.worker_id} started ({self.concurrency} threads)")
+        self._executor = ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="job")
+        last_heartbeat = last_prune = datetime.utcnow()
+        
+        try:
+            while not self._stop.is_set():
+                claimed = self._poll()
+                
+                now = datetime.utcnow()
+                if (now - last_heartbeat).total_seconds() >= settings.JOB_LEASE_SECONDS / 3:
+                    self._heartbeat()
+                    last_heartbeat = now
+                if (now - last_prune).total_seconds() >= 3600:
+                    self._with_session(JobQueue.prune)
+                    last_prune = now
+                
+                if not claimed:
+                    self._wake.wait(settings.JOB_POLL_INTERVAL)
+                    self._wake.clear()
+        finally:
+            self._executor.shutdown(wait=True)
+            logger.info(f"Job worker {self.worker_id} stopped")
+    
+    def _with_session(self, operation: Callable, *args):
+        db = SessionLocal()
+        try:
+            return operation(db, *args)
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Job worker {self.worker_id}: {operation.__name__} failed: {str(e)}")
+        finally:
+            db.close()
+    
+    def _poll(self) -> int:
+        """Claim jobs for the free slots; returns the number claimed"""
+        with self._lock:
+            free = self.concurrency - len(self._active)
+        if free <= 0 or not settings.BACKGROUND_TASK_ENABLED:
+            return 0
+        
+        jobs = self._with_session(JobQueue.claim, self.worker_id, free, self.queues) or []
+        for job in jobs:
+            with self._lock:
+                self._active[job["id"]] = job
+            self._executor.submit(self._execute, job)
+        return len(jobs)
+    
+    def _heartbeat(self):
+        with self._lock:
+            job_ids = list(self._active)
+        self._with_session(JobQueue.extend_leases, self.worker_id, job_ids)
+    
+    def _execute(self, job: Dict[str, Any]):
+        """Run one claimed job and record its outcome"""
+        try:
+            handler = HANDLERS.get(job["name"])
+            if handler is None:
+                self._with_session(JobQueue.fail, job["id"], self.worker_id, f"No handler registered for '{job['name']}'", False)
+                return
+            
+            if job["attempts"] > job["max_attempts"]:
+                # Reclaimed after its lease expired on every attempt (e.g. it kills its worker)
+                self._with_session(JobQueue.fail, job["id"], self.worker_id, "Lease expired on every attempt", False)
+                return
+            
+            kwargs = dict(job["payload"] or {})
+            if "context" in inspect.signature(handler).parameters:
+                kwargs["context"] = JobContext(job["id"], job["attempts"], self.worker_id)
+            
+            try:
+                result = handler(**kwargs)
+                if inspect.iscoroutine(result):
+                    result = asyncio.run(result)
+            except Exception as e:
+                logger.error(f"Job {job['id']} ({job['name']}) failed (attempt {job['attempts']}): {str(e)}")
+                self._with_session(JobQueue.fail, job["id"], self.worker_id, str(e))
+                return
+            
+            self._with_session(JobQueue.complete, job["id"], self.worker_id, _jsonable(result))
+        finally:
+            with self._lock:
+                self._active.pop(job["id"], None)
+            self._wake.set()
+
+
+def _jsonable(value: Any) -> Any:
+    """Job result as stored (non-JSON values are kept as their string form)"""
+    if value is None or isinstance(value, (str, int, float, bool, list, dict)):
+        return value
+    return str(value)
+
+
+# Worker pool of this API process (see start_embedded_worker)
+embedded_worker: Optional[JobWorker] = None
+
+
+def start_embedded_worker():
+    """Start a worker pool inside the API process (if JOB_WORKER_EMBEDDED)"""
+    global embedded_worker
+    if not settings.JOB_WORKER_EMBEDDED or not settings.BACKGROUND_TASK_ENABLED:
+        return
+    if embedded_worker is None:
+        embedded_worker = JobWorker()
+    embedded_worker.start()
+
+
+def stop_embedded_worker():
+    """Stop the worker pool of the API process"""
+    if embedded_worker is not None:
+        embedded_worker.stop()
@@ -0,0 +1,131 @@
+"""
+Lead Feature Frames
+Column-oriented lead features for bulk scoring and analytics
+
+A LeadFeatureFrame holds, for a chunk of leads, only the lead columns a
+scorer reads plus per-lead activity aggregates, one list per column.
+iter_frames() walks a company's leads in primary key order with keyset
+pagination, so memory is bounded by the chunk size whatever the number of
+leads: two queries per chunk (lead columns, activity counts), no ORM
+objects and no per-lead queries.
+"""
+
+from datetime import datetime
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from app.config import settings
+from app.models.activity import Activity
+from app.models.lead import Lead
+
+
+class LeadFeatureFrame:
+    """Lead features of one chunk, one list per column"""
+    
+    def __init__(self, columns: Dict[str, list]):
+        self.columns = columns
+    
+    def __len__(self) -> int:
+        return len(self.columns["id"])
+    
+    def __getitem__(self, name: str) -> list:
+        return self.columns[name]
+    
+    @classmethod
+    def from_leads(
+        cls,
+        leads: Iterable,
+        columns: Sequence[str],
+        recent_activities: Optional[Dict[int, int]] = None
+    ) -> "LeadFeatureFrame":
+        """
+        Build a frame from Lead objects or rows with the same attribute names
+        
+        Args:
+            leads: Lead objects or query rows
+            columns: Lead columns to keep ("id" is always kept)
+            recent_activities: Activity count per lead ID (missing = 0)
+            
+        Returns:
+            LeadFeatureFrame
+        """
+        leads = list(leads)
+        names = ["id"] + [column for column in columns if column != "id"]
+        data = {name: [getattr(lead, name) for lead in leads] for name in names}
+        counts = recent_activities or {}
+        data["recent_activities"] = [counts.get(lead_id, 0) for lead_id in data["id"]]
+        return cls(data)
+    
+    @staticmethod
+    def recent_activity_counts(lead_ids: List[int], since: datetime, db: Session) -> Dict[int, int]:
+        """
+        Number of activities on or after since, per lead, in one GROUP BY query
+        
+        Args:
+            lead_ids: Lead IDs
+            since: Start of the activity window
+            db: Database session
+            
+        Returns:
+            {lead_id: count} for leads with activities in the window
+        """
+        if not lead_ids:
+            return {}
+        
+        rows = db.query(Activity.lead_id, func.count(Activity.id)).filter(
+            Activity.lead_id.in_(lead_ids),
+            Activity.activity_date >= since
+        ).group_by(Activity.lead_id).all()
+        
+        return {lead_id: count for lead_id, count in rows}
+    
+    @classmethod
+    def iter_frames(
+        cls,
+        company_id: int,
+        db: Session,
+        columns: Sequence[str],
+        activity_since: datetime,
+        lead_ids: Optional[List[int]] = None,
+        exclude_statuses: Optional[List[str]] = None,
+        chunk_size: Optional[int] = None
+    ) -> Iterator["LeadFeatureFrame"]:
+        """
+        Feature frames of a company's leads, chunk by chunk in ID order
+        
+        Args:
+            company_id: Company ID
+            db: Database session
+            columns: Lead columns to load
+            activity_since: Start of the recent activity window
+            lead_ids: Optional list of lead IDs (None = all)
+            exclude_statuses: Lead statuses to skip
+            chunk_size: Leads per frame (default LEAD_FEATURE_CHUNK_SIZE)
+            
+        Yields:
+            LeadFeatureFrame per chunk
+        """
+        chunk_size = chunk_size or settings.LEAD_FEATURE_CHUNK_SIZE
+        names = ["id"] + [column for column in columns if column != "id"]
+        
+        query = db.query(*(getattr(Lead, name) for name in names)).filter(Lead.company_id == company_id)
+        if exclude_statuses:
+            query = query.filter(Lead.status.notin_(exclude_statuses))
+        if lead_ids:
+            query = query.filter(Lead.id.in_(lead_ids))
+        
+        last_id = None
+        while True:
+            chunk = query
+            if last_id is not None:
+                chunk = chunk.filter(Lead.id > last_id)
+            rows = chunk.order_by(Lead.id).limit(chunk_size).all()
+            if not rows:
+                return
+            
+            last_id = rows[-1].id
+            counts = cls.recent_activity_counts([row.id for row in rows], activity_since, db)
+            yield cls.from_leads(rows, names, counts)
+            
+            if len(rows) < chunk_size:
+                return
@@ -5,8 +5,8 @@ ML-based lead scoring (0-100) with automatic score calculation and increment
 
 from datetime import datetime, timedelta
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, func
-from typing import Optional
+from sqlalchemy import and_, case, func, update
+from typing import Dict, Optional
 from app.models.lead import Lead
 from app.models.activity import Activity
 
@@ -23,6 +23,15 @@ class LeadScoringAlgorithm:
     MEDIUM_SCORE_THRESHOLD = 40  # Medium priority leads
     LOW_SCORE_THRESHOLD = 20  # Low priority leads
     
+    # Lead columns read by the scoring rules (batch scoring loads only these)
+    FEATURE_COLUMNS = (
+        "id", "lead_score", "source", "campaign", "medium", "budget_range",
+        "authority_level", "timeline", "interest_product", "priority",
+        "email", "phone", "company_name", "first_name", "last_name",
+    )
+    # Lead fields whose changes require rescoring
+    SCORE_INPUT_FIELDS = FEATURE_COLUMNS[2:]
+    
     @staticmethod
     def calculate_lead_score(
         lead: Lead,
@@ -401,6 +410,11 @@ class LeadScoringAlgorithm:
         """
         Batch update lead scores for multiple leads
         
+        Set-based: lead features and a per-lead activity aggregate are read
+        in two queries, scores are computed column-wise with the same rules
+        as calculate_lead_score, and changed scores are written back with a
+        single bulk UPDATE (no per-lead queries or ORM objects).
+        
         Args:
             company_id: Company ID
             db: Database session
@@ -409,34 +423,106 @@ class LeadScoringAlgorithm:
         Returns:
             Dictionary with update statistics
         """
-        query = db.query(Lead).filter(Lead.company_id == company_id)
+        now = datetime.now()
+        
+        # Query 1: scoring features of every lead (plain rows, no ORM objects)
+        query = db.query(
+            *(getattr(Lead, column) for column in LeadScoringAlgorithm.FEATURE_COLUMNS)
+        ).filter(Lead.company_id == company_id)
         
         if lead_ids:
             query = query.filter(Lead.id.in_(lead_ids))
         
         leads = query.all()
         
-        updated = 0
-        unchanged = 0
-        
-        for lead in leads:
-            old_score = lead.lead_score
-            new_score = LeadScoringAlgorithm.calculate_lead_score(lead, db)
+        # Query 2: engagement points of every lead from one activity aggregate
+        engagement = LeadScoringAlgorithm._batch_engagement_scores(company_id, db, now, lead_ids)
+        
+        # Score columns: the same per-factor rules as calculate_lead_score,
+        # applied to the feature rows
+        static_scores = [
+            LeadScoringAlgorithm._calculate_source_score(lead)
+            + LeadScoringAlgorithm._calculate_bant_score(lead)
+            + LeadScoringAlgorithm._calculate_completeness_score(lead)
+            + LeadScoringAlgorithm._calculate_authority_score(lead)
+            for lead in leads
+        ]
+        engagement_scores = [engagement.get(lead.id, 0) for lead in leads]
+        new_scores = [
+            max(LeadScoringAlgorithm.MIN_SCORE, min(static + engaged, LeadScoringAlgorithm.MAX_SCORE))
+            for static, engaged in zip(static_scores, engagement_scores)
+        ]
             
-            if old_score != new_score:
-                lead.lead_score = new_score
-                updated += 1
-            else:
-                unchanged += 1
-        
+        changes = [
+            {"id": lead.id, "lead_score": new_score}
+            for lead, new_score in zip(leads, new_scores)
+            if lead.lead_score != new_score
+        ]
+        
+        # Query 3: one executemany UPDATE of the changed leads
+        if changes:
+            db.execute(update(Lead), changes, execution_options={"company_id": company_id})
         db.commit()
         
         return {
             "total": len(leads),
-            "updated": updated,
-            "unchanged": unchanged
+            "updated": len(changes),
+            "unchanged": len(leads) - len(changes)
         }
     
+    @staticmethod
+    def _batch_engagement_scores(
+        company_id: int,
+        db: Session,
+        now: datetime,
+        lead_ids: Optional[list] = None
+    ) -> Dict[int, int]:
+        """
+        Engagement score of many leads from one GROUP BY lead_id query
+        
+        Applies the rules of _calculate_engagement_score to per-lead counts:
+        activities in the last 7 days (days_ago <= 7, i.e. newer than 8 days)
+        and in the last 8-30 days, positive outcomes, and email activities
+        whose description mentions "opened" / "clicked".
+        
+        Args:
+            company_id: Company ID
+            db: Database session
+            now: Reference time of the batch
+            lead_ids: Optional list of lead IDs (None = all)
+            
+        Returns:
+            Engagement score (0-30) per lead ID, for leads with activities
+        """
+        def count_if(condition):
+            return func.coalesce(func.sum(case((condition, 1), else_=0)), 0)
+        
+        description = func.lower(func.coalesce(Activity.description, ""))
+        is_email = Activity.activity_type == "email"
+        
+        query = db.query(
+            Activity.lead_id,
+            count_if(Activity.activity_date > now - timedelta(days=8)),
+            count_if(Activity.activity_date <= now - timedelta(days=8)),
+            count_if(Activity.outcome == "positive"),
+            count_if(is_email & description.contains("opened", autoescape=True)),
+            count_if(is_email & description.contains("clicked", autoescape=True)),
+        ).filter(
+            Activity.company_id == company_id,
+            Activity.lead_id.isnot(None),
+            Activity.activity_date >= now - timedelta(days=30)
+        )
+        
+        if lead_ids:
+            query = query.filter(Activity.lead_id.in_(lead_ids))
+        
+        scores = {}
+        for lead_id, recent, older, positive, opened, clicked in query.group_by(Activity.lead_id):
+            score = recent * 10 + older * 5 + positive * 3 + opened * 5 + clicked * 10
+            scores[lead_id] = min(int(score), 30)  # Cap at 30 points
+        
+        return scores
+    
     @staticmethod
     def get_score_category(score: int) -> str:
         """
@@ -0,0 +1,154 @@
+"""
+Permission Cache
+In-process cache of compiled permission data used by has_permission
+
+Three layers, so that steady-state permission checks run no SQL:
+- Permission catalog: (resource, action) pairs defined in the permissions table
+- Grant matrix: granted (resource, action) pairs per (role, company_id)
+- Company membership: user's role per (user_id, company_id)
+
+Entries expire after PERMISSION_CACHE_TTL seconds (which also bounds how
+long other worker processes can see stale data) and are dropped explicitly
+when roles, grants or memberships are changed through the API. A
+request-local memo (kept on the request's database session) answers
+repeated checks within one request without touching the shared cache.
+"""
+
+import threading
+import time
+from typing import Any, Callable, Dict, FrozenSet, Hashable, Optional, Tuple
+from sqlalchemy.orm import Session
+from app.config import settings
+from app.models.permission import Permission, RolePermission
+from app.models.user_company import UserCompany
+
+
+# Session.info key of the request-local memo
+REQUEST_MEMO_KEY = "permission_memo"
+
+
+class PermissionCache:
+    """Process-wide TTL cache for permission lookups"""
+    
+    _lock = threading.Lock()
+    _entries: Dict[Hashable, Tuple[float, Any]] = {}
+    
+    # Counters for monitoring cache effectiveness
+    hits = 0
+    misses = 0
+    
+    @classmethod
+    def _get_or_load(cls, key: Hashable, loader: Callable[[], Any]) -> Any:
+        """Return cached value for key, loading it when missing or expired"""
+        now = time.monotonic()
+        
+        with cls._lock:
+            entry = cls._entries.get(key)
+            if entry is not None and entry[0] > now:
+                cls.hits += 1
+                return entry[1]
+        
+        # Load outside the lock; concurrent loaders just store the same value
+        value = loader()
+        
+        with cls._lock:
+            cls.misses += 1
+            cls._entries[key] = (now + settings.PERMISSION_CACHE_TTL, value)
+        
+        return value
+    
+    @classmethod
+    def permission_catalog(cls, db: Session) -> FrozenSet[Tuple[str, str]]:
+        """All (resource, action) pairs defined in the permissions table"""
+        def load():
+            rows = db.query(Permission.resource, Permission.action).all()
+            return frozenset((resource, action) for resource, action in rows)
+        
+        return cls._get_or_load(("catalog",), load)
+    
+    @classmethod
+    def granted(cls, role: str, company_id: Optional[int], db: Session) -> FrozenSet[Tuple[str, str]]:
+        """
+        Compiled grant matrix of a role
+        
+        Args:
+            role: Role name
+            company_id: Company for company-specific grants, None for global grants
+            db: Database session
+            
+        Returns:
+            Set of granted (resource, action) pairs
+        """
+        def load():
+            query = db.query(Permission.resource, Permission.action).join(
+                RolePermission, RolePermission.permission_id == Permission.id
+            ).filter(
+                RolePermission.role == role,
+                RolePermission.granted == True
+            )
+            
+            if company_id is None:
+                query = query.filter(RolePermission.company_id.is_(None))
+            else:
+                query = query.filter(RolePermission.company_id == company_id)
+            
+            return frozenset((resource, action) for resource, action in query.all())
+        
+        return cls._get_or_load(("grants", role, company_id), load)
+    
+    @classmethod
+    def company_role(cls, user_id: int, company_id: int, db: Session) -> Optional[str]:
+        """User's role in a company, or None if not a member"""
+        def load():
+            row = db.query(UserCompany.role).filter(
+                UserCompany.user_id == user_id,
+                UserCompany.company_id == company_id
+            ).first()
+            return row[0] if row else None
+        
+        return cls._get_or_load(("membership", user_id, company_id), load)
+    
+    @classmethod
+    def invalidate(cls):
+        """Drop everything (permission definitions or grants changed)"""
+        with cls._lock:
+            cls._entries.clear()
+    
+    @classmethod
+    def invalidate_membership(cls, user_id: Optional[int] = None, company_id: Optional[int] = None):
+        """Drop cached company roles of a user and/or company (None matches all)"""
+        with cls._lock:
+            for key in list(cls._entries):
+                if key[0] != "membership":
+                    continue
+                if user_id is not None and key[1] != user_id:
+                    continue
+                if company_id is not None and key[2] != company_id:
+                    continue
+                del cls._entries[key]
+    
+    @classmethod
+    def stats(cls) -> Dict[str, Any]:
+        """Cache statistics"""
+        with cls._lock:
+            total = cls.hits + cls.misses
+            return {
+                "entries": len(cls._entries),
+                "hits": cls.hits,
+                "misses": cls.misses,
+                "hit_rate": round(cls.hits / total, 4) if total else 0.0,
+                "ttl_seconds": settings.PERMISSION_CACHE_TTL
+            }
+
+
+def request_memo_get(db: Optional[Session], key: Hashable) -> Optional[bool]:
+    """Look up a permission decision memoized for the current request (None if absent)"""
+    if db is None:
+        return None
+    return db.info.get(REQUEST_MEMO_KEY, {}).get(key)
+
+
+def request_memo_set(db: Optional[Session], key: Hashable, value: bool):
+    """Memoize a permission decision for the rest of the request"""
+    if db is not None:
+        db.info.setdefault(REQUEST_MEMO_KEY, {})[key] = value
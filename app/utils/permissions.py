@@ -8,9 +8,9 @@ from sqlalchemy.orm import Session
 from typing import Optional
 from app.models.user import User
 from app.models.user_company import UserCompany
-from app.models.permission import Permission, RolePermission
 from app.database import get_db
 from app.utils.dependencies import get_current_active_user
+from app.utils.permission_cache import PermissionCache, request_memo_get, request_memo_set
 
 
 def require_admin(current_user: User = Depends(get_current_active_user)) -> User:
@@ -125,6 +125,9 @@ def has_permission(
     2. Check database role_permissions table (global or company-specific)
     3. Fallback to hardcoded role-based logic if no database permissions found
     
+    Lookups go through PermissionCache and decisions are memoized for the
+    request (on the db session), so steady-state checks run no SQL.
+    
     Args:
         user: User object
         resource: Resource name (e.g., "customer", "lead", "deal")
@@ -139,58 +142,53 @@ def has_permission(
     if user.role == "super_admin":
         return True
     
+    # Repeated checks within one request are answered from the request memo
+    memo_key = (user.id, user.role, resource, action, company_id)
+    decision = request_memo_get(db, memo_key)
+    if decision is not None:
+        return decision
+    
+    decision = _evaluate_permission(user, resource, action, company_id, db)
+    request_memo_set(db, memo_key, decision)
+    return decision
+
+
+def _evaluate_permission(
+    user: User,
+    resource: str,
+    action: str,
+    company_id: Optional[int] = None,
+    db: Optional[Session] = None
+) -> bool:
+    """
+    Evaluate a permission from the cached permission catalog, grant matrix
+    and company membership (see has_permission for the rules)
+    """
+    # Company role (cached), looked up once
+    company_role = None
+    if company_id and db:
+        company_role = PermissionCache.company_role(user.id, company_id, db)
+    
     # Admin role has all permissions (check company admin if company_id provided)
     if user.role == "admin":
         if company_id and db:
-            return check_company_admin(user.id, company_id, db)
+            return company_role == "admin"
         return True
     
     # Check company-specific admin before database check
-    if company_id and db:
-        company_role = get_company_role(user.id, company_id, db)
-        if company_role == "admin":
-            return True
+    if company_role == "admin":
+        return True
     
     # If database session is provided, check database permissions
     if db is not None:
-        # Try to find permission in database
-        permission = db.query(Permission).filter(
-            Permission.resource == resource,
-            Permission.action == action
-        ).first()
+        # Permission defined in database?
+        if (resource, action) in PermissionCache.permission_catalog(db):
+            # Get user's role(s) to check: global role, then company role
+            if user.role and (resource, action) in PermissionCache.granted(user.role, None, db):
+                return True
         
-        if permission:
-            # Get user's role(s) to check
-            roles_to_check = []
-            
-            # Add global role
-            if user.role:
-                roles_to_check.append(("global", user.role))
-            
-            # Add company-specific role if company_id provided
-            if company_id:
-                company_role = get_company_role(user.id, company_id, db)
-                if company_role:
-                    roles_to_check.append(("company", company_role))
-            
-            # Check role_permissions table
-            for scope, role in roles_to_check:
-                role_perm = db.query(RolePermission).filter(
-                    RolePermission.permission_id == permission.id,
-                    RolePermission.role == role,
-                    RolePermission.granted == True
-                )
-                
-                # Filter by scope (global vs company-specific)
-                if scope == "company":
-                    role_perm = role_perm.filter(RolePermission.company_id == company_id)
-                else:
-                    role_perm = role_perm.filter(RolePermission.company_id.is_(None))
-                
-                role_perm = role_perm.first()
-                
-                if role_perm:
-                    return True
+            if company_role and (resource, action) in PermissionCache.granted(company_role, company_id, db):
+                return True
             
             # If permission exists in database but no role_permission found,
             # deny access (explicit permission required)
@@ -235,7 +233,7 @@ def _has_permission_fallback(
     
     # Check company-specific admin
     if company_id and db:
-        if check_company_admin(user.id, company_id, db):
+        if PermissionCache.company_role(user.id, company_id, db) == "admin":
             return True
     
     # Manager role - most permissions, restricted deletes
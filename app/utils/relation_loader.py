@@ -0,0 +1,127 @@
+"""
+Relation Loader
+Loads the relations that to_dict(include_relations=True) serializes without
+one lazy SELECT per row
+
+- Record relations (customer, account, lead, deal) are eager-loaded with
+  joinedload on the list/detail query (many-to-one: no row multiplication)
+- User relations (owner, assignee, creator, ...) are resolved from a
+  per-request user map: the users referenced by all rows of a page are
+  loaded in one query and kept on the request's session, so the lazy
+  many-to-one loads find them in the identity map instead of querying
+"""
+
+from typing import Dict, Iterable, List
+from sqlalchemy.orm import Session, joinedload, load_only
+from app.models.activity import Activity
+from app.models.contact import Contact
+from app.models.customer import Customer
+from app.models.deal import Deal
+from app.models.lead import Lead
+from app.models.task import Task
+from app.models.user import User
+
+
+# Session.info key of the per-request user map (id -> User)
+USER_MAP_KEY = "user_summaries"
+
+# Relations serialized by each model's to_dict(include_relations=True):
+# "joined" relations are eager-loaded, "users" are foreign keys to users
+RELATION_PLANS: Dict[type, Dict[str, tuple]] = {
+    Lead: {
+        "joined": (),
+        "users": ("lead_owner_id", "assigned_to", "created_by"),
+    },
+    Deal: {
+        "joined": ("customer",),
+        "users": ("assigned_to", "created_by"),
+    },
+    Contact: {
+        "joined": ("account",),
+        "users": ("created_by",),
+    },
+    Customer: {
+        "joined": (),
+        "users": ("created_by", "assigned_to"),
+    },
+    Activity: {
+        "joined": ("customer", "lead", "deal"),
+        "users": ("user_id",),
+    },
+    Task: {
+        "joined": ("customer",),
+        "users": ("assigned_to", "created_by"),
+    },
+}
+
+
+class RelationLoader:
+    """Relation-loading planner for list and detail endpoints"""
+    
+    @staticmethod
+    def options(model: type) -> List:
+        """Eager-loading options for a model's serialized record relations"""
+        plan = RELATION_PLANS.get(model, {})
+        return [joinedload(getattr(model, name)) for name in plan.get("joined", ())]
+    
+    @staticmethod
+    def apply(query):
+        """Add eager-loading options for the query's model (e.g. a list query)"""
+        model = query.column_descriptions[0]["entity"]
+        options = RelationLoader.options(model)
+        return query.options(*options) if options else query
+    
+    @staticmethod
+    def user_map(db: Session) -> Dict[int, User]:
+        """Users loaded for the current request (id -> User)"""
+        return db.info.setdefault(USER_MAP_KEY, {})
+    
+    @staticmethod
+    def preload_users(items: Iterable, db: Session) -> Dict[int, User]:
+        """
+        Load every user referenced by items in one query
+        
+        Users already in the request's map are not queried again. The map
+        keeps strong references, so the users stay in the session's
+        identity map and relationship access on each row runs no SQL.
+        
+        Args:
+            items: Model instances of one type (e.g. a page of leads)
+            db: Database session
+            
+        Returns:
+            Per-request user map
+        """
+        items = [item for item in items if item is not None]
+        users = RelationLoader.user_map(db)
+        if not items:
+            return users
+        
+        columns = RELATION_PLANS.get(type(items[0]), {}).get("users", ())
+        wanted = {
+            getattr(item, column)
+            for item in items
+            for column in columns
+        }
+        missing = [user_id for user_id in wanted if user_id is not None and user_id not in users]
+        
+        if missing:
+            rows = db.query(User).options(
+                load_only(User.id, User.email, User.first_name, User.last_name)
+            ).filter(User.id.in_(missing)).all()
+            for user in rows:
+                users[user.id] = user
+        
+        return users
+    
+    @staticmethod
+    def serialize(items: Iterable, db: Session) -> List[dict]:
+        """to_dict(include_relations=True) for each item, with users preloaded"""
+        items = list(items)
+        RelationLoader.preload_users(items, db)
+        return [item.to_dict(include_relations=True) for item in items]
+    
+    @staticmethod
+    def serialize_one(item, db: Session) -> dict:
+        """to_dict(include_relations=True) of a single item (detail endpoints)"""
+        return RelationLoader.serialize([item], db)[0]
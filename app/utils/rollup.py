@@ -0,0 +1,64 @@
+"""
+Rollup Tables
+Incremental counters for materialized summary tables
+"""
+
+from datetime import datetime
+from typing import Any, Dict, Iterable
+from sqlalchemy import Table, event
+from sqlalchemy.engine import Connection
+
+
+def increment_row(connection: Connection, table: Table, key: Dict[str, Any], deltas: Dict[str, Any]):
+    """
+    Add deltas to the counters of one rollup row, creating the row if needed
+    
+    Args:
+        connection: Database connection (e.g. the flush connection of a mapper event)
+        table: Rollup table whose primary key is exactly the key columns
+        key: Primary key values
+        deltas: Counter column -> amount to add
+    """
+    now = datetime.utcnow()
+    increments = {column: table.c[column] + amount for column, amount in deltas.items()}
+    increments["updated_at"] = now
+    values = {**key, **deltas, "updated_at": now}
+    
+    dialect = connection.dialect.name
+    if dialect in ("sqlite", "postgresql"):
+        # Atomic upsert, safe against concurrent first inserts of a key
+        if dialect == "sqlite":
+            from sqlalchemy.dialects.sqlite import insert
+        else:
+            from sqlalchemy.dialects.postgresql import insert
+        
+        statement = insert(table).values(**values).on_conflict_do_update(
+            index_elements=[table.c[column] for column in key],
+            set_=increments
+        )
+        connection.execute(statement)
+        return
+    
+    condition = [table.c[column] == value for column, value in key.items()]
+    if not connection.execute(table.update().where(*condition).values(**increments)).rowcount:
+        connection.execute(table.insert().values(**values))
+
+
+def track_previous_values(model, names: Iterable[str]):
+    """
+    Load the stored value of mapped attributes before they are assigned
+    
+    Mapper events that move a row's contribution read the old values from
+    attribute history, which is empty when an expired attribute (e.g. after
+    a commit) is assigned without being read first.
+    
+    Args:
+        model: Mapped class
+        names: Attribute names read by the mapper events
+    """
+    for name in names:
+        event.listen(getattr(model, name), "set", _ignore_set, active_history=True)
+
+
+def _ignore_set(target, value, oldvalue, initiator):
+    """No-op "set" listener; registering it with active_history=True is the point"""
@@ -0,0 +1,267 @@
+"""
+Full-Text Search Index
+Prefix-matching, relevance-ranked search for leads, contacts and customers
+
+SQLite: an FTS5 table per entity (``leads_fts`` etc.) kept in sync with the
+base table by triggers, queried with ``MATCH`` and ranked by bm25.
+PostgreSQL: GIN indexes on a tsvector expression (prefix tsquery + ts_rank)
+and a pg_trgm index on the same document (substring ILIKE).
+Any other backend, or SQLite without FTS5, falls back to LIKE filters.
+"""
+
+import logging
+import re
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy import Float, Integer, literal_column, or_, text, func
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import OperationalError, ProgrammingError
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger(__name__)
+
+
+def _digits_sql(column: str) -> str:
+    """SQL expression stripping common phone separators from a column"""
+    expr = column
+    for char in (" ", "-", "+", "(", ")", "."):
+        expr = f"replace({expr}, '{char}', '')"
+    return expr
+
+
+# Indexed entities: base table -> searchable columns with bm25 weights.
+# An extra "phone_digits" column indexes the phone number without separators
+# so "919876543210" finds "+91 98765-43210".
+SEARCH_ENTITIES: Dict[str, Dict] = {
+    "leads": {
+        "columns": [
+            ("lead_name", 10.0),
+            ("first_name", 8.0),
+            ("last_name", 8.0),
+            ("company_name", 5.0),
+            ("email", 6.0),
+            ("phone", 3.0),
+        ],
+    },
+    "contacts": {
+        "columns": [
+            ("name", 10.0),
+            ("email", 6.0),
+            ("phone", 3.0),
+            ("job_title", 2.0),
+        ],
+    },
+    "customers": {
+        "columns": [
+            ("name", 10.0),
+            ("email", 6.0),
+            ("phone", 3.0),
+        ],
+    },
+}
+
+PHONE_DIGITS_WEIGHT = 3.0
+
+# Same token boundaries as the FTS5 unicode61 tokenizer ("_" is a separator)
+TOKEN_PATTERN = re.compile(r"[^\W_]+", re.UNICODE)
+
+
+class SearchIndex:
+    """Database-native full-text search over CRM entities"""
+    
+    FTS_SUFFIX = "_fts"
+    
+    # Backend per database URL: "fts5", "postgres" or None (LIKE fallback)
+    _backends: Dict[str, Optional[str]] = {}
+    
+    @staticmethod
+    def _fts_columns(table: str) -> List[Tuple[str, float]]:
+        """FTS columns (name, weight) for an entity, including phone digits"""
+        columns = list(SEARCH_ENTITIES[table]["columns"])
+        columns.append(("phone_digits", PHONE_DIGITS_WEIGHT))
+        return columns
+    
+    @staticmethod
+    def _row_values(table: str, alias: str) -> str:
+        """SQL values list for one base row (alias: new, old or the table name)"""
+        values = [f"coalesce({alias}.{column}, '')" for column, _ in SEARCH_ENTITIES[table]["columns"]]
+        values.append(f"coalesce({_digits_sql(f'{alias}.phone')}, '')")
+        return ", ".join(values)
+    
+    @staticmethod
+    def _document_sql(table: str) -> str:
+        """Concatenated text document for the PostgreSQL expression indexes"""
+        parts = [f"coalesce({table}.{column}, '')" for column, _ in SEARCH_ENTITIES[table]["columns"]]
+        parts.append(f"coalesce({_digits_sql(f'{table}.phone')}, '')")
+        return " || ' ' || ".join(parts)
+    
+    @staticmethod
+    def setup(engine: Engine):
+        """
+        Create search structures (idempotent) and backfill new FTS tables
+        
+        Called on application startup after create_all().
+        """
+        dialect = engine.dialect.name
+        backend = None
+        
+        try:
+            if dialect == "sqlite":
+                SearchIndex._setup_sqlite(engine)
+                backend = "fts5"
+            elif dialect == "postgresql":
+                SearchIndex._setup_postgres(engine)
+                backend = "postgres"
+        except (OperationalError, ProgrammingError) as e:
+            logger.warning(f"Full-text search unavailable, using LIKE search: {e}")
+            backend = None
+        
+        SearchIndex._backends[str(engine.url)] = backend
+    
+    @staticmethod
+    def _setup_sqlite(engine: Engine):
+        """Create FTS5 tables and sync triggers"""
+        with engine.begin() as conn:
+            for table in SEARCH_ENTITIES:
+                fts = table + SearchIndex.FTS_SUFFIX
+                columns = [column for column, _ in SearchIndex._fts_columns(table)]
+                watched = ", ".join(column for column, _ in SEARCH_ENTITIES[table]["columns"])
+                
+                exists = conn.execute(
+                    text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+                    {"name": fts}
+                ).first()
+                
+                if not exists:
+                    conn.execute(text(
+                        f"CREATE VIRTUAL TABLE {fts} USING fts5("
+                        f"{', '.join(columns)}, "
+                        f"prefix='2 3', tokenize='unicode61 remove_diacritics 2')"
+                    ))
+                    # Backfill rows that existed before the index
+                    conn.execute(text(
+                        f"INSERT INTO {fts}(rowid, {', '.join(columns)}) "
+                        f"SELECT id, {SearchIndex._row_values(table, table)} FROM {table}"
+                    ))
+                
+                conn.execute(text(
+                    f"CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {table} BEGIN "
+                    f"INSERT INTO {fts}(rowid, {', '.join(columns)}) "
+                    f"VALUES (new.id, {SearchIndex._row_values(table, 'new')}); END"
+                ))
+                conn.execute(text(
+                    f"CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {table} BEGIN "
+                    f"DELETE FROM {fts} WHERE rowid = old.id; END"
+                ))
+                conn.execute(text(
+                    f"CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE OF {watched} ON {table} BEGIN "
+                    f"DELETE FROM {fts} WHERE rowid = old.id; "
+                    f"INSERT INTO {fts}(rowid, {', '.join(columns)}) "
+                    f"VALUES (new.id, {SearchIndex._row_values(table, 'new')}); END"
+                ))
+    
+    @staticmethod
+    def _setup_postgres(engine: Engine):
+        """Create tsvector and trigram GIN expression indexes"""
+        with engine.begin() as conn:
+            conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+            for table in SEARCH_ENTITIES:
+                document = SearchIndex._document_sql(table)
+                conn.execute(text(
+                    f"CREATE INDEX IF NOT EXISTS ix_{table}_search_tsv ON {table} "
+                    f"USING GIN (to_tsvector('simple', {document}))"
+                ))
+                conn.execute(text(
+                    f"CREATE INDEX IF NOT EXISTS ix_{table}_search_trgm ON {table} "
+                    f"USING GIN (({document}) gin_trgm_ops)"
+                ))
+    
+    @staticmethod
+    def rebuild(engine: Engine):
+        """Repopulate SQLite FTS tables from the base tables"""
+        if engine.dialect.name != "sqlite":
+            return
+        
+        with engine.begin() as conn:
+            for table in SEARCH_ENTITIES:
+                fts = table + SearchIndex.FTS_SUFFIX
+                columns = [column for column, _ in SearchIndex._fts_columns(table)]
+                conn.execute(text(f"DELETE FROM {fts}"))
+                conn.execute(text(
+                    f"INSERT INTO {fts}(rowid, {', '.join(columns)}) "
+                    f"SELECT id, {SearchIndex._row_values(table, table)} FROM {table}"
+                ))
+    
+    @staticmethod
+    def backend(db: Session) -> Optional[str]:
+        """Search backend for the session's database (detected once per URL)"""
+        bind = db.get_bind()
+        key = str(bind.url)
+        
+        if key not in SearchIndex._backends:
+            backend = None
+            if bind.dialect.name == "postgresql":
+                backend = "postgres"
+            elif bind.dialect.name == "sqlite":
+                found = db.execute(
+                    text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+                    {"name": "leads" + SearchIndex.FTS_SUFFIX}
+                ).first()
+                backend = "fts5" if found else None
+            SearchIndex._backends[key] = backend
+        
+        return SearchIndex._backends[key]
+    
+    @staticmethod
+    def tokens(search: str) -> List[str]:
+        """Split a search string into index tokens"""
+        return [token.lower() for token in TOKEN_PATTERN.findall(search)]
+    
+    @staticmethod
+    def apply(query, model, search: str, db: Session, like_columns: List):
+        """
+        Filter a query to rows matching search, ordered by relevance
+        
+        Every token must match as a word prefix ("jo sm" finds "John Smith").
+        The relevance order is applied first, so an explicit sort passed to
+        paginate() replaces it while the default sort becomes a tiebreaker.
+        
+        Args:
+            query: SQLAlchemy query over model
+            model: Lead, Contact or Customer
+            search: Raw search string
+            db: Database session
+            like_columns: Columns for the LIKE fallback
+            
+        Returns:
+            Filtered (and relevance-ordered) query
+        """
+        table = model.__tablename__
+        tokens = SearchIndex.tokens(search)
+        backend = SearchIndex.backend(db) if tokens else None
+        
+        if backend == "fts5":
+            fts = table + SearchIndex.FTS_SUFFIX
+            weights = ", ".join(str(weight) for _, weight in SearchIndex._fts_columns(table))
+            match = " ".join(f'"{token}"*' for token in tokens)
+            
+            # LIMIT -1 keeps SQLite from flattening the subquery: the matches are
+            # materialized once and joined by rowid, instead of re-running MATCH
+            # for every row of the company
+            ranked = text(
+                f"SELECT rowid AS id, bm25({fts}, {weights}) AS rank "
+                f"FROM {fts} WHERE {fts} MATCH :match LIMIT -1"
+            ).bindparams(match=match).columns(id=Integer, rank=Float).subquery("search_rank")
+            
+            return query.join(ranked, ranked.c.id == model.id).order_by(ranked.c.rank.asc())
+        
+        if backend == "postgres":
+            document = literal_column(SearchIndex._document_sql(table))
+            vector = func.to_tsvector("simple", document)
+            ts_query = func.to_tsquery("simple", " & ".join(f"{token}:*" for token in tokens))
+            
+            return query.filter(
+                or_(vector.op("@@")(ts_query), document.ilike(f"%{search}%"))
+            ).order_by(func.ts_rank(vector, ts_query).desc())
+        
+        # LIKE fallback
+        return query.filter(or_(*[column.contains(search) for column in like_columns]))
@@ -4,6 +4,8 @@ Password hashing and JWT token management
 """
 
 import bcrypt
+import hashlib
+import hmac
 from jose import JWTError, jwt
 from datetime import datetime, timedelta
 from typing import Optional
@@ -100,3 +102,20 @@ def decode_token(token: str) -> Optional[dict]:
     except JWTError:
         return None
 
+
+
+def token_version(password_hash: str) -> str:
+    """
+    Token version ("tv" claim) of a user's credentials
+    
+    A keyed fingerprint of the password hash: it changes whenever the
+    password is changed or reset, which revokes tokens issued before.
+    
+    Args:
+        password_hash: User's current password hash
+        
+    Returns:
+        Short version string
+    """
+    digest = hmac.new(settings.SECRET_KEY.encode("utf-8"), password_hash.encode("utf-8"), hashlib.sha256)
+    return digest.hexdigest()[:16]
@@ -1,12 +1,18 @@
 """
 Unique ID Generator Utility
 Generates unique IDs in format: PREFIX-C{company_id}-{DD-MM-YYYY}-{sequence}
+Sequences come from the id_sequences counter table (one row per prefix/company)
 """
 
+import threading
 from datetime import datetime
+from sqlalchemy import insert, select, text, update
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
-from app.database import get_db
-from typing import Dict, Optional
+from app.config import settings
+from app.database import SessionLocal
+from app.models.id_sequence import IdSequence
+from typing import Dict, List, Optional, Tuple
 
 
 # Module prefixes configuration
@@ -21,45 +27,144 @@ MODULE_PREFIXES = {
 }
 
 
+# Tables holding each module's unique IDs (used to seed a new counter)
+MODULE_TABLES = {
+    'customer': 'customers',
+    'contact': 'contacts',
+    'lead': 'leads',
+    'deal': 'deals',
+    'task': 'tasks',
+    'activity': 'activities',
+    'report': 'reports',
+}
+
+# Per-worker reserved blocks: (prefix, company_id) -> [next value, last value]
+_sequence_blocks: Dict[Tuple[str, int], List[int]] = {}
+_sequence_blocks_lock = threading.Lock()
+
+
+def _seed_sequence_value(db: Session, prefix: str, company_id: int) -> int:
+    """
+    Highest sequence already used by existing records of a prefix/company
+    Only runs once, when the counter row is created
+    """
+    table = MODULE_TABLES[get_module_from_prefix(prefix)]
+    
+    if db.get_bind().dialect.name == "sqlite":
+        tail = "SUBSTR(unique_id, -5)"
+    else:
+        tail = "RIGHT(unique_id, 5)"
+    
+    result = db.execute(
+        text(f"SELECT MAX(CAST({tail} AS INTEGER)) FROM {table} WHERE unique_id LIKE :pattern"),
+        {"pattern": f"{prefix}-C{company_id}-%"}
+    ).scalar()
+    
+    return result or 0
+
+
+def allocate_sequence(db: Session, prefix: str, company_id: int, count: int = 1) -> int:
+    """
+    Atomically reserve `count` consecutive sequence numbers
+    
+    The counter row is incremented with a single UPDATE inside the caller's
+    transaction, so concurrent writers serialize on that row and a rollback
+    releases the numbers again.
+    
+    Returns:
+        First reserved sequence number
+    """
+    condition = (IdSequence.prefix == prefix) & (IdSequence.company_id == company_id)
+    
+    for _ in range(2):
+        result = db.execute(
+            update(IdSequence)
+            .where(condition)
+            .values(last_value=IdSequence.last_value + count)
+            .execution_options(synchronize_session=False)
+        )
+        
+        if result.rowcount:
+            last_value = db.execute(select(IdSequence.last_value).where(condition)).scalar()
+            return last_value - count + 1
+        
+        # First ID for this prefix/company: create the counter from existing data
+        try:
+            with db.begin_nested():
+                db.execute(
+                    insert(IdSequence).values(
+                        prefix=prefix,
+                        company_id=company_id,
+                        last_value=_seed_sequence_value(db, prefix, company_id)
+                    )
+                )
+        except IntegrityError:
+            # Created concurrently by another writer; retry the increment
+            pass
+    
+    raise RuntimeError(f"Could not allocate sequence for {prefix}-C{company_id}")
+
+
+def _next_from_block(prefix: str, company_id: int, block_size: int) -> int:
+    """
+    Hand out the next number from this worker's reserved block
+    
+    Blocks are reserved in their own committed transaction so that a rolled
+    back insert can never release numbers another worker might reuse;
+    unused numbers of a block are skipped when the process exits.
+    """
+    key = (prefix, company_id)
+    
+    with _sequence_blocks_lock:
+        block = _sequence_blocks.get(key)
+        
+        if not block or block[0] > block[1]:
+            block_db = SessionLocal()
+            try:
+                first = allocate_sequence(block_db, prefix, company_id, block_size)
+                block_db.commit()
+            except Exception:
+                block_db.rollback()
+                raise
+            finally:
+                block_db.close()
+            
+            block = [first, first + block_size - 1]
+            _sequence_blocks[key] = block
+        
+        sequence = block[0]
+        block[0] += 1
+        return sequence
+
+
 def get_next_sequence(db: Session, prefix: str, company_id: int, date_str: str) -> int:
     """
     Get next sequence number for a module, company, and date
     Sequence is continuous (no daily reset)
+    
+    O(1) counter lookup in id_sequences. With ID_SEQUENCE_BLOCK_SIZE > 1
+    each worker reserves numbers in blocks (not on SQLite, where the block
+    transaction would wait on the caller's own write lock).
     """
-    # Query to get the highest sequence for this module and company
-    query = f"""
-        SELECT MAX(CAST(SUBSTR(unique_id, -5) AS INTEGER)) as max_seq
-        FROM (
-            SELECT unique_id 
-            FROM customers WHERE unique_id LIKE '{prefix}-C{company_id}-%'
-            UNION ALL
-            SELECT unique_id 
-            FROM contacts WHERE unique_id LIKE '{prefix}-C{company_id}-%'
-            UNION ALL
-            SELECT unique_id 
-            FROM leads WHERE unique_id LIKE '{prefix}-C{company_id}-%'
-            UNION ALL
-            SELECT unique_id 
-            FROM deals WHERE unique_id LIKE '{prefix}-C{company_id}-%'
-            UNION ALL
-            SELECT unique_id 
-            FROM tasks WHERE unique_id LIKE '{prefix}-C{company_id}-%'
-            UNION ALL
-            SELECT unique_id 
-            FROM activities WHERE unique_id LIKE '{prefix}-C{company_id}-%'
-            UNION ALL
-            SELECT unique_id 
-            FROM reports WHERE unique_id LIKE '{prefix}-C{company_id}-%'
-        )
-    """
+    block_size = settings.ID_SEQUENCE_BLOCK_SIZE
     
-    try:
-        result = db.execute(query).fetchone()
-        max_seq = result[0] if result and result[0] else 0
-        return max_seq + 1
-    except Exception:
-        # If tables don't exist yet or no records, start from 1
-        return 1
+    if block_size > 1 and db.get_bind().dialect.name != "sqlite":
+        return _next_from_block(prefix, company_id, block_size)
+    
+    return allocate_sequence(db, prefix, company_id)
+
+
+def _format_unique_id(prefix: str, company_id: int, date_str: str, sequence: int) -> str:
+    """Format PREFIX-C{company_id}-{DD-MM-YYYY}-{sequence}"""
+    # Format sequence with leading zeros (5 digits)
+    return f"{prefix}-C{company_id}-{date_str}-{sequence:05d}"
+
+
+def _module_prefix(module: str) -> str:
+    """Validate module and return its prefix"""
+    if module not in MODULE_PREFIXES:
+        raise ValueError(f"Unknown module: {module}. Available modules: {list(MODULE_PREFIXES.keys())}")
+    return MODULE_PREFIXES[module]
 
 
 def generate_unique_id(
@@ -75,7 +180,7 @@ def generate_unique_id(
         module: Module name ('customer', 'contact', 'lead', etc.)
         company_id: Company ID
         created_date: Creation date (defaults to current date)
-        db: Database session (required for sequence tracking)
+        db: Database session (the sequence is allocated in its transaction)
     
     Returns:
         Unique ID string in format: PREFIX-C{company_id}-{DD-MM-YYYY}-{sequence}
@@ -84,12 +189,8 @@ def generate_unique_id(
         generate_unique_id('lead', 1) -> "LEAD-C1-03-01-2026-00001"
     """
     
-    # Validate module
-    if module not in MODULE_PREFIXES:
-        raise ValueError(f"Unknown module: {module}. Available modules: {list(MODULE_PREFIXES.keys())}")
-    
-    # Get prefix
-    prefix = MODULE_PREFIXES[module]
+    # Validate module and get prefix
+    prefix = _module_prefix(module)
     
     # Use current date if not provided
     if created_date is None:
@@ -98,20 +199,53 @@ def generate_unique_id(
     # Format date as DD-MM-YYYY
     date_str = created_date.strftime("%d-%m-%Y")
     
-    # Get database session if not provided
+    # Without a caller transaction, allocate in (and commit) our own
     if db is None:
-        db = next(get_db())
+        own_db = SessionLocal()
+        try:
+            sequence = get_next_sequence(own_db, prefix, company_id, date_str)
+            own_db.commit()
+        finally:
+            own_db.close()
+    else:
+        sequence = get_next_sequence(db, prefix, company_id, date_str)
     
-    # Get next sequence number
-    sequence = get_next_sequence(db, prefix, company_id, date_str)
+    return _format_unique_id(prefix, company_id, date_str, sequence)
     
-    # Format sequence with leading zeros (5 digits)
-    sequence_str = f"{sequence:05d}"
     
-    # Generate unique ID
-    unique_id = f"{prefix}-C{company_id}-{date_str}-{sequence_str}"
+def generate_unique_ids(
+    module: str,
+    company_id: int,
+    count: int,
+    created_date: Optional[datetime] = None,
+    db: Optional[Session] = None
+) -> List[str]:
+    """
+    Generate `count` unique IDs with one counter update (bulk inserts/imports)
+    
+    The block is reserved in the caller's transaction, so the IDs are only
+    consumed if the records are committed with them.
+    """
+    prefix = _module_prefix(module)
+    
+    if count <= 0:
+        return []
+    
+    if created_date is None:
+        created_date = datetime.now()
+    date_str = created_date.strftime("%d-%m-%Y")
+    
+    if db is None:
+        own_db = SessionLocal()
+        try:
+            first = allocate_sequence(own_db, prefix, company_id, count)
+            own_db.commit()
+        finally:
+            own_db.close()
+    else:
+        first = allocate_sequence(db, prefix, company_id, count)
     
-    return unique_id
+    return [_format_unique_id(prefix, company_id, date_str, first + i) for i in range(count)]
 
 
 def parse_unique_id(unique_id: str) -> Dict[str, str]:
@@ -0,0 +1,169 @@
+"""
+User Cache
+In-process caches used by get_current_user so that authenticating a request
+runs no SQL in the steady state
+
+- Decoded tokens: JWT payload per token (keyed by the token's SHA-256), so
+  the signature is verified once per token rather than once per request
+- Users: identity fields of a user, keyed by (user_id, token version)
+
+Both are LRU caches bounded by USER_CACHE_SIZE whose entries expire after
+USER_CACHE_TTL seconds (which also bounds how long other worker processes
+can see stale data). Users are dropped explicitly when they are updated,
+deactivated, deleted or change their password.
+"""
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+from sqlalchemy.orm import Session, make_transient_to_detached
+from app.config import settings
+from app.models.user import User
+from app.utils.security import decode_token
+
+
+# User columns kept in the cache: what authentication and permission checks
+# read. Other attributes are loaded on first access.
+CACHED_USER_FIELDS = ("id", "email", "first_name", "last_name", "role", "is_active", "is_verified")
+
+
+class _LRUCache:
+    """Thread-safe LRU cache with per-entry expiry"""
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+    
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Cached value for key, or None when missing or expired"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= time.time():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+    
+    def set(self, key: Hashable, value: Any, expires_at: float):
+        """Store value until expires_at (epoch seconds), evicting the least recently used"""
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > settings.USER_CACHE_SIZE:
+                self._entries.popitem(last=False)
+    
+    def discard(self, predicate):
+        """Drop every entry whose key matches predicate"""
+        with self._lock:
+            for key in [key for key in self._entries if predicate(key)]:
+                del self._entries[key]
+    
+    def clear(self):
+        """Drop everything"""
+        with self._lock:
+            self._entries.clear()
+    
+    def stats(self) -> Dict[str, Any]:
+        """Cache statistics"""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / total, 4) if total else 0.0
+            }
+
+
+class UserCache:
+    """Process-wide caches for authenticated users"""
+    
+    _tokens = _LRUCache()
+    _users = _LRUCache()
+    
+    @classmethod
+    def decode(cls, token: str) -> Optional[dict]:
+        """
+        Decode a JWT, reusing the payload of tokens seen before
+        
+        Args:
+            token: JWT token string
+            
+        Returns:
+            Decoded token data or None if invalid or expired
+        """
+        key = hashlib.sha256(token.encode("utf-8")).hexdigest()
+        payload = cls._tokens.get(key)
+        if payload is not None:
+            return payload
+        
+        payload = decode_token(token)
+        if payload is None:
+            return None
+        
+        # Never keep a payload past the token's own expiry
+        expires_at = time.time() + settings.USER_CACHE_TTL
+        if payload.get("exp"):
+            expires_at = min(expires_at, float(payload["exp"]))
+        cls._tokens.set(key, payload, expires_at)
+        
+        return payload
+    
+    @classmethod
+    def get_user(cls, user_id: int, version: Optional[str], db: Session) -> Optional[User]:
+        """
+        Cached user attached to the session, without querying the database
+        
+        Args:
+            user_id: User ID
+            version: Token version claim ("tv") of the request's token
+            db: Database session
+            
+        Returns:
+            User object or None if not cached
+        """
+        fields = cls._users.get((user_id, version))
+        if fields is None:
+            return None
+        
+        # Rebuild a persistent User from the cached columns; merge(load=False)
+        # attaches it to this session without a SELECT, and columns that were
+        # not cached are loaded lazily if something reads them
+        user = User(**fields)
+        make_transient_to_detached(user)
+        return db.merge(user, load=False)
+    
+    @classmethod
+    def set_user(cls, user: User, version: Optional[str]):
+        """Cache a user loaded from the database"""
+        fields = {field: getattr(user, field) for field in CACHED_USER_FIELDS}
+        cls._users.set((user.id, version), fields, time.time() + settings.USER_CACHE_TTL)
+    
+    @classmethod
+    def invalidate_user(cls, user_id: int):
+        """Drop cached entries of a user (updated, deactivated or deleted)"""
+        cls._users.discard(lambda key: key[0] == user_id)
+    
+    @classmethod
+    def invalidate(cls):
+        """Drop everything"""
+        cls._tokens.clear()
+        cls._users.clear()
+    
+    @classmethod
+    def stats(cls) -> Dict[str, Any]:
+        """Cache statistics"""
+        return {
+            "tokens": cls._tokens.stats(),
+            "users": cls._users.stats(),
+            "max_entries": settings.USER_CACHE_SIZE,
+            "ttl_seconds": settings.USER_CACHE_TTL
+        }
@@ -0,0 +1,49 @@
+"""
+Job Worker Process
+Dedicated worker pool for the durable job queue
+
+Usage:
+    python -m app.worker [--concurrency N] [--queue NAME ...]
+
+Run any number of these next to the API processes (set
+JOB_WORKER_EMBEDDED=false on the API to leave all jobs to them); workers
+coordinate through the jobs table only.
+"""
+
+import argparse
+import logging
+import signal
+from app.config import settings
+from app.database import engine, Base
+from app.utils.job_queue import JobWorker
+
+logging.basicConfig(
+    level=getattr(logging, settings.LOG_LEVEL),
+    format=settings.LOG_FORMAT
+)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a job worker pool")
+    parser.add_argument("--concurrency", type=int, default=settings.JOB_WORKER_CONCURRENCY, help="Jobs run in parallel")
+    parser.add_argument("--queue", action="append", dest="queues", help="Only run jobs of this queue (repeatable)")
+    args = parser.parse_args()
+    
+    # Make sure the jobs table exists before the API has been started once
+    import app.models  # noqa: F401 (register every table)
+    Base.metadata.create_all(bind=engine)
+    
+    worker = JobWorker(concurrency=args.concurrency, queues=args.queues)
+    
+    def shutdown(signum, frame):
+        worker.stop()
+    
+    signal.signal(signal.SIGTERM, shutdown)
+    signal.signal(signal.SIGINT, shutdown)
+    
+    # Blocks until a signal stops it; running jobs are finished first
+    worker.run()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+Test configuration
+
+Tests run against a throwaway SQLite database: DATABASE_URL is set before
+the application is imported, and every test gets its own company. Test
+data helpers shared by several test modules are defined here as well
+(from conftest import ...).
+"""
+
+import os
+import sys
+import tempfile
+import uuid
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import func
+
+_DB_DIR = tempfile.mkdtemp(prefix="vega-crm-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_DB_DIR, 'test.db')}"
+os.environ["ALLOWED_HOSTS"] = '["testserver","localhost"]'
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.main import app  # noqa: E402  (creates the tables)
+from app.database import SessionLocal  # noqa: E402
+from app.models import Activity, Company, Log, User, UserCompany  # noqa: E402
+from app.services.log_service import LOG_STATISTICS  # noqa: E402
+
+# Whole days plus an hour, away from the window boundaries of the scoring rules
+ACTIVITY_DAYS_AGO = [1, 3, 5, 12, 20, 28, 40, 45, 70, 85, 120]
+
+
+def make_activity(company, admin, days_ago, **fields):
+    """Unsaved activity of the company, days_ago days and an hour in the past"""
+    return Activity(
+        company_id=company.id,
+        user_id=admin.id,
+        title="Touchpoint",
+        activity_date=datetime.now() - timedelta(days=days_ago, hours=1),
+        **fields
+    )
+
+
+def direct_log_statistics(db, days):
+    """get_log_statistics() counted from the logs table"""
+    start_date = datetime.utcnow() - timedelta(days=days)
+    return {
+        name: db.query(func.count(Log.id)).filter(
+            Log.timestamp >= start_date,
+            *(getattr(Log, column) == value for column, value in filters.items())
+        ).scalar()
+        for name, filters in LOG_STATISTICS.items()
+    }
+
+
+@pytest.fixture
+def db():
+    """Database session"""
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+@pytest.fixture
+def admin(db):
+    """Super admin user"""
+    user = User(
+        email=f"admin-{uuid.uuid4().hex[:8]}@example.com",
+        first_name="Ad",
+        last_name="Min",
+        password_hash="x",
+        role="super_admin"
+    )
+    db.add(user)
+    db.commit()
+    return user
+
+
+@pytest.fixture
+def company(db, admin):
+    """Company the admin belongs to"""
+    company = Company(name="Acme", email=f"acme-{uuid.uuid4().hex[:8]}@example.com")
+    db.add(company)
+    db.flush()
+    db.add(UserCompany(user_id=admin.id, company_id=company.id, role="admin", is_primary=True))
+    db.commit()
+    return company
+
+
+@pytest.fixture
+def client():
+    """API test client (background workers are not started)"""
+    from fastapi.testclient import TestClient
+    return TestClient(app)
+
+
+@pytest.fixture
+def auth_headers(admin):
+    """Bearer token headers of the admin"""
+    from app.utils.security import create_access_token
+    return {"Authorization": "Bearer " + create_access_token({"user_id": admin.id, "sub": admin.email})}
@@ -0,0 +1,112 @@
+"""
+Buffered writer: interval, batch size and shutdown flushes, bounded buffer
+"""
+
+import time
+import uuid
+
+import pytest
+from sqlalchemy import Column, Integer, MetaData, String, Table, select
+
+from app.config import settings
+from app.database import engine
+from app.utils.buffered_writer import BufferedWriter
+
+rows_table = Table(
+    "buffered_writer_test_rows",
+    MetaData(),
+    Column("id", Integer, primary_key=True),
+    Column("tag", String(32), nullable=False),
+    Column("n", Integer, nullable=False)
+)
+
+
+@pytest.fixture
+def writer(monkeypatch):
+    """Writer of a scratch table; long interval and large batches unless a test lowers them"""
+    rows_table.create(engine, checkfirst=True)
+    monkeypatch.setattr(settings, "LOG_BUFFER_ENABLED", True)
+    monkeypatch.setattr(settings, "LOG_FLUSH_INTERVAL_MS", 60000)
+    monkeypatch.setattr(settings, "LOG_FLUSH_BATCH_SIZE", 1000)
+    writer = BufferedWriter(rows_table)
+    writer.tag = uuid.uuid4().hex
+    yield writer
+    writer.stop()
+
+
+def _write(writer, *numbers):
+    for n in numbers:
+        writer.write({"tag": writer.tag, "n": n})
+
+
+def _written(writer):
+    with engine.connect() as connection:
+        return connection.execute(
+            select(rows_table.c.n).where(rows_table.c.tag == writer.tag).order_by(rows_table.c.n)
+        ).scalars().all()
+
+
+def _wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.01)
+
+
+def test_flushes_on_the_interval(writer, monkeypatch):
+    monkeypatch.setattr(settings, "LOG_FLUSH_INTERVAL_MS", 50)
+    writer.start()
+    _write(writer, 0, 1, 2)
+    
+    _wait_for(lambda: _written(writer) == [0, 1, 2])
+    stats = writer.stats()
+    assert (stats["buffered"], stats["written"], stats["sync_writes"]) == (0, 3, 0)
+    assert stats["flushes"] >= 1
+
+
+def test_flushes_when_a_batch_is_full(writer, monkeypatch):
+    monkeypatch.setattr(settings, "LOG_FLUSH_BATCH_SIZE", 5)
+    writer.start()
+    _write(writer, 0, 1, 2, 3)
+    
+    # Below the batch size, well within the interval: nothing is written yet
+    time.sleep(0.2)
+    assert _written(writer) == []
+    assert writer.stats()["buffered"] == 4
+    
+    _write(writer, 4)
+    _wait_for(lambda: _written(writer) == [0, 1, 2, 3, 4])
+    assert writer.stats()["last_flush_rows"] == 5
+
+
+def test_stop_writes_what_is_buffered(writer):
+    writer.start()
+    _write(writer, 0, 1, 2)
+    assert _written(writer) == []
+    
+    writer.stop()
+    assert not writer.is_running()
+    assert _written(writer) == [0, 1, 2]
+    assert writer.stats()["buffered"] == 0
+
+
+def test_overflow_drops_the_oldest_rows(writer, monkeypatch):
+    monkeypatch.setattr(settings, "LOG_BUFFER_CAPACITY", 3)
+    writer.start()
+    _write(writer, 0, 1, 2, 3, 4)
+    
+    stats = writer.stats()
+    assert (stats["buffered"], stats["enqueued"], stats["dropped"]) == (3, 5, 2)
+    writer.stop()
+    assert _written(writer) == [2, 3, 4]
+
+
+def test_rows_are_written_at_once_without_the_thread(writer):
+    _write(writer, 0)
+    assert _written(writer) == [0]
+    
+    # sync=True bypasses the buffer of a running writer
+    writer.start()
+    writer.write({"tag": writer.tag, "n": 1}, sync=True)
+    assert _written(writer) == [0, 1]
+    assert writer.stats()["sync_writes"] == 2
@@ -0,0 +1,112 @@
+"""
+Materialized deal aggregates against a direct GROUP BY over deals
+"""
+
+from datetime import date
+
+from app.controllers.company_controller import CompanyController
+from app.controllers.customer_controller import CustomerController
+from app.database import engine
+from app.models import Customer, Deal, DealMonthlyRollup, DealPipelineSummary, UserCompany
+from app.services.deal_analytics_service import DealAnalyticsService
+from app.services.pipeline_service import PipelineService
+
+# (table, key columns, rebuild) of every aggregate kept by mapper events
+AGGREGATES = [
+    (DealPipelineSummary.__table__, ("stage", "status"), PipelineService.rebuild),
+    (DealMonthlyRollup.__table__, ("month", "kind", "category"), DealAnalyticsService.rebuild),
+]
+
+
+def _rows(connection, table, key_columns, company_id):
+    """Non-empty aggregate rows of a company: key -> (count, value, weighted value)"""
+    rows = connection.execute(table.select().where(table.c.company_id == company_id))
+    return {
+        tuple(row._mapping[column] for column in key_columns): (
+            row.deal_count, round(float(row.total_value), 2), round(float(row.weighted_value), 2)
+        )
+        for row in rows
+        if row.deal_count
+    }
+
+
+def _assert_aggregates_match_deals(company_id):
+    for table, key_columns, rebuild in AGGREGATES:
+        with engine.connect() as connection:
+            transaction = connection.begin()
+            maintained = _rows(connection, table, key_columns, company_id)
+            rebuild(connection, company_id)
+            assert maintained == _rows(connection, table, key_columns, company_id), table.name
+            transaction.rollback()
+
+
+def test_aggregates_follow_deal_and_customer_changes(db, company, admin):
+    customers = [Customer(company_id=company.id, name=f"Customer {i}") for i in range(3)]
+    db.add_all(customers)
+    db.flush()
+    first, second, account = customers
+    
+    deals = [
+        Deal(
+            company_id=company.id,
+            customer_id=customer.id,
+            account_id=account_id,
+            deal_name=f"Deal {i}",
+            deal_value=value,
+            probability=probability,
+            stage=stage,
+            forecast_category=category,
+            expected_close_date=date(2026, 1 + i % 3, 15)
+        )
+        for i, (customer, account_id, value, probability, stage, category) in enumerate([
+            (first, None, 1000, 10, "prospect", None),
+            (first, account.id, 2500.5, 50, "proposal", "commit"),
+            (second, None, 400, 20, "qualified", "best_case"),
+            (second, account.id, 9000, 80, "negotiation", "commit"),
+            (second, second.id, 150, 0, "prospect", None),
+            (account, None, 700, 30, "qualified", "most_likely"),
+        ])
+    ]
+    db.add_all(deals)
+    db.commit()
+    _assert_aggregates_match_deals(company.id)
+    
+    # Stage move
+    deals[0].stage = "qualified"
+    deals[0].probability = 25
+    db.commit()
+    _assert_aggregates_match_deals(company.id)
+    
+    # Status changes
+    deals[2].status, deals[2].stage, deals[2].actual_close_date = "won", "closed_won", date(2026, 2, 1)
+    deals[4].status, deals[4].stage, deals[4].actual_close_date = "lost", "closed_lost", date(2026, 3, 9)
+    deals[5].deal_value = 1200
+    deals[5].expected_close_date = date(2026, 6, 30)
+    deals[5].forecast_category = "best_case"
+    db.commit()
+    _assert_aggregates_match_deals(company.id)
+    
+    # Forecast-only change of an expired deal
+    deals[3].expected_close_date = date(2026, 9, 1)
+    db.commit()
+    _assert_aggregates_match_deals(company.id)
+    
+    # Deal delete
+    db.delete(deals[1])
+    db.commit()
+    _assert_aggregates_match_deals(company.id)
+    
+    # Customer delete: its deals as customer and as account go with it
+    account_id = account.id
+    CustomerController.delete_customer(account_id, company.id, admin, db)
+    assert db.query(Deal).filter((Deal.customer_id == account_id) | (Deal.account_id == account_id)).count() == 0
+    _assert_aggregates_match_deals(company.id)
+    
+    # Company delete: every deal of the company goes with its customers
+    # (memberships first: Company.users does not cascade)
+    company_id = company.id
+    db.query(UserCompany).filter(UserCompany.company_id == company_id).delete()
+    db.commit()
+    CompanyController.delete_company(company_id, admin, db)
+    assert db.query(Deal).filter(Deal.company_id == company_id).count() == 0
+    _assert_aggregates_match_deals(company_id)
@@ -0,0 +1,73 @@
+"""
+Duplicate detection through the candidate index
+"""
+
+import random
+
+from app.models import Lead
+from app.utils.duplicate_detection import DuplicateCandidateIndex, DuplicateDetectionEngine
+
+EMAILS = [None, "", "john@acme.com", "JOHN@acme.com ", "jane@globex.com", "sales@initech.io", "info@umbrella.org"]
+PHONES = [None, "", "555-1234", "+1 (212) 555-0199", "2125550199", "2125550198", "9876543210", "98765 43211", "+44 20 7946 0958"]
+COMPANIES = [
+    None, "", "Acme", "Acme Corp", "ACME Corp.", "Acme Corporation", "Globex", "Globex Inc",
+    "Globex Incorporated", "Initech", "Initech Ltd", "Umbrella", "Umbrella Pvt Ltd", "Hooli",
+]
+
+
+def _scan_duplicates(db, company_id, email, phone, company_name, exclude_lead_id=None):
+    """IDs matched by comparing against every lead of the company (pre-index behaviour)"""
+    email_norm = DuplicateDetectionEngine.normalize_email(email)
+    phone_norm = DuplicateDetectionEngine.normalize_phone(phone)
+    company_norm = DuplicateDetectionEngine.normalize_string(company_name)
+    
+    query = db.query(Lead).filter(Lead.company_id == company_id, Lead.is_duplicate == False)
+    if exclude_lead_id:
+        query = query.filter(Lead.id != exclude_lead_id)
+    
+    return [
+        lead.id
+        for lead in query.order_by(Lead.id).all()
+        if DuplicateDetectionEngine.match_normalized(
+            email_norm, phone_norm, company_norm,
+            DuplicateDetectionEngine.normalized_fields(lead.email, lead.phone, lead.company_name)
+        )
+    ]
+
+
+def test_index_finds_the_same_duplicates_as_a_full_scan(db, company):
+    rng = random.Random(1)
+    leads = [
+        Lead(
+            company_id=company.id,
+            first_name=f"Lead {i}",
+            status="new",
+            email=rng.choice(EMAILS),
+            phone=rng.choice(PHONES),
+            company_name=rng.choice(COMPANIES),
+            is_duplicate=rng.random() < 0.1
+        )
+        for i in range(150)
+    ]
+    db.add_all(leads)
+    db.commit()
+    DuplicateCandidateIndex.rebuild(company.id, db)
+    
+    probes = [(lead.email, lead.phone, lead.company_name, lead.id) for lead in leads]
+    probes += [
+        (email, phone, company_name, None)
+        for email in EMAILS for phone in PHONES[::2] for company_name in COMPANIES[::3]
+    ]
+    
+    matched = 0
+    for email, phone, company_name, exclude_lead_id in probes:
+        result = DuplicateDetectionEngine.check_duplicate(
+            company.id, email, phone, company_name, db, exclude_lead_id=exclude_lead_id
+        )
+        expected = _scan_duplicates(db, company.id, email, phone, company_name, exclude_lead_id)
+        assert [lead.id for lead in result["duplicate_leads"]] == expected, (email, phone, company_name)
+        assert result["is_duplicate"] == bool(expected)
+        matched += bool(expected)
+    
+    # The fixture must actually exercise matches, not only misses
+    assert matched > len(probes) // 4
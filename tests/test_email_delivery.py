@@ -0,0 +1,180 @@
+"""
+Email delivery against a local SMTP server (aiosmtpd)
+"""
+
+import socket
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.config import settings
+from app.models import Lead
+from app.models.email_sequence import EmailSequenceEmail
+from app.services.email_delivery_service import EmailDeliveryService
+from app.utils.email_sequences import EmailSequenceAutomation
+
+aiosmtpd_controller = pytest.importorskip("aiosmtpd.controller")
+
+
+class RecordingHandler:
+    """Accepts every message except for recipients starting with "bounce" (550) or "busy" (450)"""
+    
+    def __init__(self):
+        self.messages = []
+        self.sessions = set()
+    
+    async def handle_RCPT(self, server, session, envelope, address, rcpt_options):
+        if address.startswith("bounce"):
+            return "550 No such user"
+        if address.startswith("busy"):
+            return "450 Mailbox busy"
+        envelope.rcpt_tos.append(address)
+        return "250 OK"
+    
+    async def handle_DATA(self, server, session, envelope):
+        self.messages.append(envelope.rcpt_tos[0])
+        self.sessions.add(id(session))
+        return "250 OK"
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@pytest.fixture
+def smtp_server(db, monkeypatch):
+    """Local SMTP server the delivery settings point to; no other emails are due"""
+    handler = RecordingHandler()
+    port = _free_port()
+    controller = aiosmtpd_controller.Controller(handler, hostname="127.0.0.1", port=port)
+    controller.start()
+    monkeypatch.setattr(settings, "SMTP_HOST", "127.0.0.1")
+    monkeypatch.setattr(settings, "SMTP_PORT", port)
+    monkeypatch.setattr(settings, "SMTP_USE_TLS", False)
+    monkeypatch.setattr(settings, "SMTP_USER", None)
+    monkeypatch.setattr(settings, "EMAIL_POOL_SIZE", 2)
+    monkeypatch.setattr(settings, "EMAIL_DOMAIN_RATE_PER_MINUTE", 0)
+    monkeypatch.setattr(settings, "EMAIL_PROVIDER_RATE_PER_MINUTE", 0)
+    db.query(EmailSequenceEmail).filter(EmailSequenceEmail.status == "pending").update({"status": "sent"})
+    db.commit()
+    EmailDeliveryService.limiter.reset()
+    try:
+        yield handler
+    finally:
+        EmailDeliveryService.close()
+        EmailDeliveryService.limiter.reset()
+        controller.stop()
+
+
+def _queue_emails(db, company, addresses):
+    """One due sequence email per address; returns their IDs"""
+    sequence = EmailSequenceAutomation.get_default_sequence(company.id, db)
+    scheduled = datetime.utcnow() - timedelta(minutes=5)
+    emails = []
+    for index, address in enumerate(addresses):
+        lead = Lead(company_id=company.id, first_name=f"Lead {index}", email=address, status="new")
+        db.add(lead)
+        db.flush()
+        email = EmailSequenceEmail(
+            sequence_id=sequence.id,
+            lead_id=lead.id,
+            email_number=1,
+            subject="Hello",
+            body_text="Hello there.",
+            scheduled_send_date=scheduled + timedelta(seconds=index),
+            status="pending"
+        )
+        db.add(email)
+        emails.append(email)
+    db.commit()
+    return [email.id for email in emails]
+
+
+def _statuses(db, ids):
+    db.expire_all()
+    rows = db.query(EmailSequenceEmail.id, EmailSequenceEmail.status).filter(EmailSequenceEmail.id.in_(ids))
+    return dict(rows)
+
+
+def test_connections_are_reused(db, company, smtp_server):
+    ids = _queue_emails(db, company, [f"user{i}@example.com" for i in range(9)])
+    
+    result = EmailDeliveryService.dispatch(db)
+    
+    assert result["sent"] == 9
+    assert len(smtp_server.messages) == 9
+    assert len(smtp_server.sessions) < len(smtp_server.messages)
+    assert EmailDeliveryService.stats()["connections_opened"] <= settings.EMAIL_POOL_SIZE
+    assert set(_statuses(db, ids).values()) == {"sent"}
+
+
+def test_domain_rate_limit_defers_emails(db, company, smtp_server, monkeypatch):
+    monkeypatch.setattr(settings, "EMAIL_DOMAIN_RATE_PER_MINUTE", 5)
+    ids = _queue_emails(db, company, [f"user{i}@limited.example" for i in range(8)])
+    
+    result = EmailDeliveryService.dispatch(db)
+    
+    assert result["sent"] == 5
+    assert result["deferred"] == 3
+    statuses = _statuses(db, ids)
+    assert [statuses[email_id] for email_id in ids] == ["sent"] * 5 + ["pending"] * 3
+    assert len(smtp_server.messages) == 5
+
+
+def test_permanent_rejection_marks_email_bounced(db, company, smtp_server):
+    ids = _queue_emails(db, company, ["bounce@example.com", "ok@example.com"])
+    
+    result = EmailDeliveryService.dispatch(db)
+    
+    assert result["bounced"] == 1
+    assert result["sent"] == 1
+    statuses = _statuses(db, ids)
+    assert statuses[ids[0]] == "bounced"
+    assert statuses[ids[1]] == "sent"
+    assert smtp_server.messages == ["ok@example.com"]
+
+
+def test_stale_claims_are_released_after_the_timeout(db, company, smtp_server, monkeypatch):
+    monkeypatch.setattr(settings, "EMAIL_CLAIM_TIMEOUT_SECONDS", 600)
+    fresh, stale = _queue_emails(db, company, ["fresh@example.com", "stale@example.com"])
+    assert EmailDeliveryService._claim(db, [fresh, stale]) == [fresh, stale]
+    
+    # The claim time is UTC, whatever the database server's clock
+    claimed_at = db.query(EmailSequenceEmail.updated_at).filter(EmailSequenceEmail.id.in_([fresh, stale]))
+    assert all(abs(datetime.utcnow() - value) < timedelta(minutes=1) for (value,) in claimed_at)
+    
+    db.query(EmailSequenceEmail).filter(EmailSequenceEmail.id == stale).update(
+        {EmailSequenceEmail.updated_at: datetime.utcnow() - timedelta(seconds=601)}
+    )
+    db.commit()
+    
+    assert EmailDeliveryService.release_stale_claims(db) == 1
+    assert _statuses(db, [fresh, stale]) == {fresh: "sending", stale: "pending"}
+
+
+def test_deferred_email_backs_off_then_fails(db, company, smtp_server, monkeypatch):
+    monkeypatch.setattr(settings, "EMAIL_MAX_SEND_ATTEMPTS", 3)
+    monkeypatch.setattr(settings, "EMAIL_RETRY_DELAY_SECONDS", 60)
+    (email_id,) = _queue_emails(db, company, ["busy@example.com"])
+    
+    for attempt, delay in ((1, 60), (2, 120)):
+        result = EmailDeliveryService.dispatch(db)
+        assert (result["retry"], result["failed"]) == (1, 0)
+        email = db.query(EmailSequenceEmail).filter(EmailSequenceEmail.id == email_id).one()
+        db.refresh(email)
+        assert (email.status, email.send_attempts) == ("pending", attempt)
+        assert abs(email.scheduled_send_date - datetime.utcnow() - timedelta(seconds=delay)) < timedelta(seconds=10)
+        
+        # Not due again before its backoff has passed
+        assert EmailDeliveryService.dispatch(db)["due"] == 0
+        email.scheduled_send_date = datetime.utcnow() - timedelta(seconds=1)
+        db.commit()
+    
+    result = EmailDeliveryService.dispatch(db)
+    assert (result["retry"], result["failed"]) == (0, 1)
+    email = db.query(EmailSequenceEmail).filter(EmailSequenceEmail.id == email_id).one()
+    db.refresh(email)
+    assert (email.status, email.send_attempts) == ("failed", 3)
+    assert smtp_server.messages == []
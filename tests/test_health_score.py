@@ -0,0 +1,68 @@
+"""
+Batch (set-based) health scoring against per-customer scoring
+"""
+
+import random
+from datetime import datetime, timedelta
+
+from app.models import Customer, Deal
+from app.utils.health_score import HealthScoreCalculator
+from conftest import ACTIVITY_DAYS_AGO, make_activity
+
+
+def test_batch_health_scores_match_per_customer_scores(db, company, admin):
+    rng = random.Random(14)
+    customers = [
+        Customer(
+            company_id=company.id,
+            name=f"Customer {i}",
+            status=rng.choice(["active", "prospect", "inactive", "lost"]),
+            health_score=None
+        )
+        for i in range(40)
+    ]
+    db.add_all(customers)
+    db.flush()
+    
+    today = datetime.now().date()
+    for customer in customers:
+        # Customers without activities and/or deals are part of the set
+        if customer.id % 4 != 0:
+            for _ in range(rng.randint(1, 6)):
+                db.add(make_activity(
+                    company, admin, rng.choice(ACTIVITY_DAYS_AGO),
+                    customer_id=customer.id,
+                    activity_type="call",
+                    outcome=rng.choice([None, "positive"])
+                ))
+        if customer.id % 5 != 0:
+            for _ in range(rng.randint(1, 4)):
+                db.add(Deal(
+                    company_id=company.id,
+                    customer_id=customer.id,
+                    # Account of the deal: none, the customer itself, or another customer
+                    account_id=rng.choice([None, customer.id, rng.choice(customers).id]),
+                    deal_name="Deal",
+                    deal_value=rng.choice([0, 25000, 150000, 400000]),
+                    status=rng.choice(["open", "won", "lost"]),
+                    actual_close_date=today - timedelta(days=rng.choice([10, 60, 200]))
+                ))
+    db.commit()
+    
+    result = HealthScoreCalculator.batch_update_health_scores(company.id, db)
+    assert result["total"] == len(customers)
+    
+    now = datetime.now()
+    activity = HealthScoreCalculator._batch_activity_aggregates(company.id, db, now)
+    deals = HealthScoreCalculator._batch_deal_aggregates(company.id, db, now)
+    
+    db.expire_all()
+    for customer in customers:
+        activity_score, last_activity_date = activity.get(customer.id, (0, None))
+        assert activity_score == HealthScoreCalculator._calculate_activity_score(customer, db, 90), customer.id
+        assert deals.get(customer.id, 0) == HealthScoreCalculator._calculate_deal_score(customer, db), customer.id
+        assert (
+            HealthScoreCalculator._recency_points(last_activity_date, now)
+            == HealthScoreCalculator._calculate_recency_score(customer, db)
+        ), customer.id
+        assert customer.health_score == HealthScoreCalculator.calculate_health_score(customer, db), customer.id
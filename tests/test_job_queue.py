@@ -0,0 +1,148 @@
+"""
+Durable job queue: claiming, leases, retries and the per-tenant cap
+"""
+
+import threading
+import uuid
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.config import settings
+from app.database import SessionLocal
+from app.models import Company, Job
+from app.utils.job_queue import HANDLERS, JobQueue, JobWorker
+
+
+@pytest.fixture
+def queue():
+    """Queue name of this test only (other tests leave jobs in the shared table)"""
+    return f"test-{uuid.uuid4().hex[:8]}"
+
+
+def _job(db, job_id):
+    db.expire_all()
+    return db.query(Job).filter(Job.id == job_id).one()
+
+
+def _make_due(db, job_id):
+    db.query(Job).filter(Job.id == job_id).update({Job.run_at: datetime.utcnow() - timedelta(seconds=1)})
+    db.commit()
+
+
+def test_concurrent_workers_claim_each_job_once(queue):
+    job_ids = {JobQueue.enqueue("noop", {"n": i}, queue=queue) for i in range(40)}
+    claimed = {"a": [], "b": []}
+    start = threading.Barrier(2)
+    
+    def work(worker_id):
+        db = SessionLocal()
+        try:
+            start.wait()
+            while True:
+                jobs = JobQueue.claim(db, worker_id, 3, queues=[queue])
+                if not jobs:
+                    return
+                claimed[worker_id].extend(job["id"] for job in jobs)
+        finally:
+            db.close()
+    
+    threads = [threading.Thread(target=work, args=(worker_id,)) for worker_id in claimed]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    
+    assert sorted(claimed["a"] + claimed["b"]) == sorted(job_ids)
+    assert not set(claimed["a"]) & set(claimed["b"])
+
+
+def test_expired_lease_is_claimed_again(db, queue):
+    job_id = JobQueue.enqueue("noop", queue=queue)
+    assert [job["id"] for job in JobQueue.claim(db, "a", 5, queues=[queue])] == [job_id]
+    
+    # A live lease keeps the job from other workers
+    assert JobQueue.claim(db, "b", 5, queues=[queue]) == []
+    
+    db.query(Job).filter(Job.id == job_id).update({Job.locked_until: datetime.utcnow() - timedelta(seconds=1)})
+    db.commit()
+    (job,) = JobQueue.claim(db, "b", 5, queues=[queue])
+    assert (job["id"], job["attempts"]) == (job_id, 2)
+    
+    # The worker that lost the lease can no longer record an outcome
+    JobQueue.fail(db, job_id, "a", "too late")
+    JobQueue.complete(db, job_id, "a")
+    job = _job(db, job_id)
+    assert (job.status, job.locked_by, job.last_error) == ("running", "b", None)
+    
+    JobQueue.complete(db, job_id, "b", {"ok": True})
+    assert _job(db, job_id).status == "completed"
+
+
+def test_failures_back_off_then_dead_letter(db, queue, monkeypatch):
+    monkeypatch.setattr(settings, "TASK_RETRY_DELAY", 10)
+    monkeypatch.setattr(settings, "JOB_BACKOFF_MAX_SECONDS", 15)
+    job_id = JobQueue.enqueue("noop", queue=queue, max_attempts=3)
+    
+    for attempt, delay in ((1, 10), (2, 15)):
+        (job,) = JobQueue.claim(db, "a", 5, queues=[queue])
+        assert job["attempts"] == attempt
+        JobQueue.fail(db, job_id, "a", f"error {attempt}")
+        
+        job = _job(db, job_id)
+        assert (job.status, job.locked_by, job.last_error) == ("queued", None, f"error {attempt}")
+        assert abs((job.run_at - datetime.utcnow()).total_seconds() - delay) < 5
+        
+        # Not claimable before the backoff has passed
+        assert JobQueue.claim(db, "a", 5, queues=[queue]) == []
+        _make_due(db, job_id)
+    
+    JobQueue.claim(db, "a", 5, queues=[queue])
+    JobQueue.fail(db, job_id, "a", "error 3")
+    job = _job(db, job_id)
+    assert (job.status, job.attempts, job.last_error) == ("dead", 3, "error 3")
+    assert job.completed_at is not None
+    assert JobQueue.claim(db, "a", 5, queues=[queue]) == []
+
+
+def test_tenant_concurrency_cap(db, company, queue, monkeypatch):
+    monkeypatch.setattr(settings, "JOB_TENANT_CONCURRENCY", 2)
+    other = Company(name="Other", email=f"other-{uuid.uuid4().hex[:8]}@example.com")
+    db.add(other)
+    db.commit()
+    capped = [JobQueue.enqueue("noop", {"n": i}, company_id=company.id, queue=queue) for i in range(3)]
+    free = JobQueue.enqueue("noop", company_id=other.id, queue=queue)
+    
+    # The third job of the company waits, the other company's job does not
+    first = {job["id"] for job in JobQueue.claim(db, "a", 10, queues=[queue])}
+    assert first == {capped[0], capped[1], free}
+    
+    # The cap holds across workers
+    assert JobQueue.claim(db, "b", 10, queues=[queue]) == []
+    
+    JobQueue.complete(db, capped[0], "a")
+    assert [job["id"] for job in JobQueue.claim(db, "b", 10, queues=[queue])] == [capped[2]]
+
+
+def test_worker_runs_async_handlers(db, queue, monkeypatch):
+    calls = []
+    
+    async def handler(value, context=None):
+        calls.append((value, context.job_id, context.attempt))
+        if value == "fail":
+            raise ValueError("async failure")
+        return {"doubled": value * 2}
+    
+    monkeypatch.setitem(HANDLERS, "test_async", handler)
+    ok = JobQueue.enqueue("test_async", {"value": 21}, queue=queue)
+    failing = JobQueue.enqueue("test_async", {"value": "fail"}, queue=queue)
+    worker = JobWorker(concurrency=1, queues=[queue])
+    
+    for job in JobQueue.claim(db, worker.worker_id, 5, queues=[queue]):
+        worker._execute(job)
+    
+    assert sorted(calls, key=str) == sorted([(21, ok, 1), ("fail", failing, 1)], key=str)
+    job = _job(db, ok)
+    assert (job.status, job.result) == ("completed", {"doubled": 42})
+    job = _job(db, failing)
+    assert (job.status, job.last_error) == ("queued", "async failure")
@@ -0,0 +1,111 @@
+"""
+In-memory duplicate index of the lead importer
+"""
+
+import io
+import random
+
+from app.config import settings
+from app.models import Job, Lead
+from app.services.lead_import_service import LeadDedupIndex, LeadImportService
+from app.utils.duplicate_detection import DuplicateDetectionEngine
+
+LETTERS = "abcdefghij"
+
+
+def _mutate(rng, name):
+    """Name with up to three random substitutions, insertions or deletions"""
+    name = list(name)
+    for _ in range(rng.randint(0, 3)):
+        op, i = rng.random(), rng.randrange(len(name) + 1)
+        if op < 0.4 and name:
+            name[min(i, len(name) - 1)] = rng.choice(LETTERS + " ")
+        elif op < 0.7:
+            name.insert(i, rng.choice(LETTERS + " "))
+        elif name:
+            del name[min(i, len(name) - 1)]
+    return "".join(name)
+
+
+def test_index_finds_the_same_match_as_brute_force():
+    rng = random.Random(24)
+    # Few letters and shared suffixes make many near-identical company names
+    names = ["".join(rng.choice(LETTERS) for _ in range(rng.randint(3, 12))) for _ in range(40)]
+    index = LeadDedupIndex()
+    accepted = []
+    duplicates = 0
+    
+    for row in range(1000):
+        email = f"user{row % 300}@example.com" if rng.random() < 0.9 else None
+        phone = f"98{rng.randint(0, 2000):08d}" if rng.random() < 0.7 else None
+        company_name = _mutate(rng, rng.choice(names)) + rng.choice(["", " ltd", " pvt ltd"])
+        
+        email_norm, phone_norm, company_norm = (
+            DuplicateDetectionEngine.normalize_email(email),
+            DuplicateDetectionEngine.normalize_phone(phone),
+            DuplicateDetectionEngine.normalize_string(company_name),
+        )
+        expected = next(
+            (
+                entry for entry in accepted
+                if DuplicateDetectionEngine.match_normalized(email_norm, phone_norm, company_norm, entry[2])
+            ),
+            None
+        )
+        found = index.find(email, phone, company_name)
+        
+        assert (found[0] if found else None) is expected, (row, email, phone, company_name)
+        if expected is None:
+            accepted.append(index.add(email, phone, company_name, row=row))
+        else:
+            duplicates += 1
+    
+    # Both outcomes must be well represented for the comparison to mean anything
+    assert 100 < duplicates < 900
+
+
+def _create_import(db, company, admin, tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "IMPORT_DIR", str(tmp_path))
+    rows = "first_name,email\n" + "".join(f"Lead {i},import{i}@{company.id}.example.com\n" for i in range(3))
+    return LeadImportService.create(db, company.id, admin.id, io.BytesIO(rows.encode()), "leads.csv")
+
+
+def test_only_the_current_job_runs_an_import(db, company, admin, tmp_path, monkeypatch):
+    lead_import = _create_import(db, company, admin, tmp_path, monkeypatch)
+    
+    # A job the import is no longer assigned to
+    assert "skipped" in LeadImportService.run(lead_import.id, job_id=lead_import.job_id + 1000)
+    
+    # A direct run while a job is running it
+    lead_import.status = "running"
+    db.commit()
+    assert "skipped" in LeadImportService.run(lead_import.id)
+    assert db.query(Lead).filter(Lead.company_id == company.id).count() == 0
+    
+    # The import's own job, reclaimed while the import is "running"
+    assert LeadImportService.run(lead_import.id, job_id=lead_import.job_id)["imported"] == 3
+    assert "skipped" in LeadImportService.run(lead_import.id, job_id=lead_import.job_id)
+    assert db.query(Lead).filter(Lead.company_id == company.id).count() == 3
+
+
+def test_resume_waits_for_the_job_queue_retries(client, db, company, admin, auth_headers, tmp_path, monkeypatch):
+    lead_import = _create_import(db, company, admin, tmp_path, monkeypatch)
+    job_id = lead_import.job_id
+    lead_import.status = "failed"
+    db.commit()
+    url = f"/api/companies/{company.id}/data-ingestion/lead-imports/{lead_import.id}/resume"
+    
+    # The failed attempt is still queued for a retry
+    assert client.post(url, headers=auth_headers).status_code == 409
+    
+    db.query(Job).filter(Job.id == job_id).update({Job.status: "dead", Job.attempts: 3})
+    db.commit()
+    response = client.post(url, headers=auth_headers)
+    assert response.status_code == 200, response.text
+    
+    # The same job is queued again, no second job is created
+    assert response.json()["data"]["job_id"] == job_id
+    job = db.query(Job).filter(Job.id == job_id).one()
+    db.refresh(job)
+    assert (job.status, job.attempts) == ("queued", 0)
+    assert db.query(Job).filter(Job.name == "lead_import", Job.payload["import_id"].as_integer() == lead_import.id).count() == 1
@@ -0,0 +1,56 @@
+"""
+Batch (set-based) lead scoring against per-lead scoring
+"""
+
+import random
+
+from app.models import Lead
+from app.utils.lead_scoring import LeadScoringAlgorithm
+from conftest import ACTIVITY_DAYS_AGO, make_activity
+
+
+def test_batch_lead_scores_match_per_lead_scores(db, company, admin):
+    rng = random.Random(13)
+    leads = [
+        Lead(
+            company_id=company.id,
+            first_name=rng.choice([None, "Asha"]),
+            last_name=rng.choice([None, "Rao"]),
+            email=rng.choice([None, f"lead{i}@example.com"]),
+            phone=rng.choice([None, "9876543210"]),
+            company_name=rng.choice([None, "Globex"]),
+            source=rng.choice([None, "Website", "Referral", "Google Ads", "Cold Call"]),
+            campaign=rng.choice([None, "Spring"]),
+            budget_range=rng.choice([None, "10L+", "1-5L"]),
+            authority_level=rng.choice([None, "decision_maker", "influencer"]),
+            timeline=rng.choice([None, "Immediate", "3-6 Months"]),
+            interest_product=rng.choice([None, "CRM"]),
+            priority=rng.choice(["low", "medium", "high"]),
+            status="new",
+            lead_score=-1
+        )
+        for i in range(40)
+    ]
+    db.add_all(leads)
+    db.flush()
+    
+    # Every third lead has no activities at all
+    for lead in leads:
+        if lead.id % 3 == 0:
+            continue
+        for _ in range(rng.randint(1, 5)):
+            db.add(make_activity(
+                company, admin, rng.choice(ACTIVITY_DAYS_AGO),
+                lead_id=lead.id,
+                activity_type=rng.choice(["call", "email", "meeting"]),
+                outcome=rng.choice([None, "positive", "negative"]),
+                description=rng.choice([None, "Email Opened", "opened and clicked", "sent"])
+            ))
+    db.commit()
+    
+    result = LeadScoringAlgorithm.batch_update_lead_scores(company.id, db)
+    assert result["total"] == len(leads)
+    
+    db.expire_all()
+    for lead in leads:
+        assert lead.lead_score == LeadScoringAlgorithm.calculate_lead_score(lead, db), lead.id
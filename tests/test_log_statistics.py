@@ -0,0 +1,37 @@
+"""
+Log statistics from the hourly rollup
+"""
+
+import random
+from datetime import datetime, timedelta
+
+from app.services.log_service import get_log_statistics, log_writer
+from conftest import direct_log_statistics
+
+LEVELS = ["INFO", "WARNING", "ERROR"]
+ACTIONS = [("Auth", "Login Success"), ("Auth", "Login Failed"), ("Email", "Email Sent"), ("System", "Startup")]
+
+
+def _write_logs(count, seed):
+    """Logs spread over the last 10 days, written through log_writer (which maintains the rollup)"""
+    rng = random.Random(seed)
+    now = datetime.utcnow()
+    for i in range(count):
+        category, action = rng.choice(ACTIONS)
+        log_writer.write({
+            "level": rng.choice(LEVELS),
+            "category": category,
+            "action": action,
+            "message": f"Log {i}",
+            "status": rng.choice(["Success", "Failed"]),
+            "timestamp": now - timedelta(minutes=rng.randint(5, 10 * 24 * 60))
+        }, sync=True)
+
+
+def test_rollup_statistics_match_log_counts(db):
+    _write_logs(400, seed=20)
+    
+    for days in (1, 2, 7, 30):
+        stats = get_log_statistics(db, days=days)
+        assert stats.pop("period_days") == days
+        assert stats == direct_log_statistics(db, days), days
@@ -0,0 +1,86 @@
+"""
+Page (offset) and keyset (cursor) pagination
+"""
+
+from datetime import datetime
+
+from sqlalchemy import text
+
+from app.models import Lead
+
+
+def _fetch_all_pages(client, company_id, headers, per_page=10):
+    ids, cursor, pages = [], "", 0
+    while cursor is not None:
+        response = client.get(
+            f"/api/companies/{company_id}/leads",
+            params={"cursor": cursor, "per_page": per_page},
+            headers=headers
+        )
+        assert response.status_code == 200, response.text
+        body = response.json()
+        ids.extend(lead["id"] for lead in body["data"])
+        cursor = body["pagination"]["next_cursor"]
+        pages += 1
+        assert pages <= 10, "cursor does not advance"
+    return ids
+
+
+def test_cursor_pages_through_rows_created_in_the_same_second(client, db, company, auth_headers):
+    leads = [Lead(company_id=company.id, first_name=f"Lead {i}", status="new") for i in range(25)]
+    db.add_all(leads)
+    db.commit()
+    lead_ids = [lead.id for lead in leads]
+    
+    # Server default format (no fractional seconds), all within one second
+    db.execute(
+        text("UPDATE leads SET created_at = '2026-01-01 10:00:00' WHERE company_id = :company_id"),
+        {"company_id": company.id}
+    )
+    db.commit()
+    
+    ids = _fetch_all_pages(client, company.id, auth_headers)
+    
+    assert sorted(ids) == sorted(lead_ids)
+    assert len(ids) == len(set(ids))
+    assert ids == sorted(lead_ids, reverse=True)
+
+
+def test_cursor_orders_mixed_timestamp_formats(client, db, company, auth_headers):
+    leads = [Lead(company_id=company.id, first_name=f"Lead {i}", status="new") for i in range(23)]
+    db.add_all(leads)
+    db.commit()
+    
+    # Same second: some rows written by the server, others by Python (with microseconds)
+    db.execute(
+        text("UPDATE leads SET created_at = '2026-01-01 10:00:00' WHERE company_id = :company_id"),
+        {"company_id": company.id}
+    )
+    for index, lead in enumerate(leads[::2]):
+        lead.created_at = datetime(2026, 1, 1, 10, 0, 0, 1000 * (index + 1))
+    db.commit()
+    
+    ids = _fetch_all_pages(client, company.id, auth_headers, per_page=4)
+    
+    assert len(ids) == len(set(ids)) == len(leads)
+    expected = sorted(leads, key=lambda lead: (lead.created_at, lead.id), reverse=True)
+    assert ids == [lead.id for lead in expected]
+
+
+def test_page_count_of_an_empty_list_is_zero(client, db, company, auth_headers):
+    def page_count():
+        response = client.get(
+            f"/api/companies/{company.id}/leads",
+            params={"page": 1, "per_page": 10},
+            headers=auth_headers
+        )
+        assert response.status_code == 200, response.text
+        pagination = response.json()["pagination"]
+        return pagination["total"], pagination["pages"]
+    
+    assert page_count() == (0, 0)
+    
+    db.add_all([Lead(company_id=company.id, first_name=f"Lead {i}", status="new") for i in range(21)])
+    db.commit()
+    
+    assert page_count() == (21, 3)
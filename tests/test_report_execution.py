@@ -0,0 +1,91 @@
+"""
+Report execution: result cache validated by data versions, asynchronous runs
+"""
+
+import io
+import uuid
+
+from app.config import settings
+from app.models import Company, Lead
+from app.models.report import Report
+from app.models.report_run import ReportRunPage
+from app.services.lead_import_service import LeadImportService
+from app.services.report_execution_service import ReportExecutionService
+
+
+def _leads_report(db, company, admin, count):
+    db.add_all([Lead(company_id=company.id, first_name=f"Lead {i}", status="new") for i in range(count)])
+    report = Report(name="Leads", report_type="leads", company_id=company.id, created_by=admin.id)
+    db.add(report)
+    db.commit()
+    return report
+
+
+def _names(rows):
+    return sorted(row["name"] for row in rows)
+
+
+def test_cache_hits_until_the_company_writes(db, company, admin, tmp_path, monkeypatch):
+    report = _leads_report(db, company, admin, 3)
+    
+    first = ReportExecutionService.execute(report, db)
+    assert not first["cached"]
+    assert _names(first["rows"]) == ["Lead 0", "Lead 1", "Lead 2"]
+    second = ReportExecutionService.execute(report, db)
+    assert second["cached"]
+    assert second["rows"] == first["rows"]
+    
+    # Writes of another company leave the entry valid
+    other = Company(name="Other", email=f"other-{uuid.uuid4().hex[:8]}@example.com")
+    db.add(other)
+    db.flush()
+    db.add(Lead(company_id=other.id, first_name="Elsewhere", status="new"))
+    db.commit()
+    assert ReportExecutionService.execute(report, db)["cached"]
+    
+    # ORM write
+    lead = db.query(Lead).filter(Lead.company_id == company.id, Lead.first_name == "Lead 1").one()
+    lead.first_name = "Renamed"
+    db.commit()
+    result = ReportExecutionService.execute(report, db)
+    assert not result["cached"]
+    assert _names(result["rows"]) == ["Lead 0", "Lead 2", "Renamed"]
+    assert ReportExecutionService.execute(report, db)["cached"]
+    
+    # Core insert of the lead importer
+    monkeypatch.setattr(settings, "IMPORT_DIR", str(tmp_path))
+    rows = "first_name,email\nImported,imported@example.com\n"
+    lead_import = LeadImportService.create(db, company.id, admin.id, io.BytesIO(rows.encode()), "leads.csv")
+    assert LeadImportService.run(lead_import.id, job_id=lead_import.job_id)["imported"] == 1
+    result = ReportExecutionService.execute(report, db)
+    assert not result["cached"]
+    assert _names(result["rows"]) == ["Imported", "Lead 0", "Lead 2", "Renamed"]
+
+
+def test_async_run_pages_and_reuse(db, company, admin, monkeypatch):
+    monkeypatch.setattr(settings, "REPORT_RUN_PAGE_SIZE", 4)
+    report = _leads_report(db, company, admin, 10)
+    
+    run = ReportExecutionService.submit(report, db, user_id=admin.id)
+    assert (run.status, run.cached) == ("queued", False)
+    assert ReportExecutionService.run(run.id) == {"run_id": run.id, "rows": 10, "pages": 3}
+    
+    db.refresh(run)
+    assert (run.status, run.row_count, run.page_count) == ("succeeded", 10, 3)
+    pages = [ReportExecutionService.get_page(db, run, page) for page in (1, 2, 3)]
+    assert [len(page) for page in pages] == [4, 4, 2]
+    assert [row["name"] for page in pages for row in page] == [f"Lead {i}" for i in range(10)]
+    assert ReportExecutionService.get_page(db, run, 4) is None
+    
+    # Unchanged data: the new run reuses the stored pages
+    reused = ReportExecutionService.submit(report, db, user_id=admin.id)
+    assert (reused.status, reused.cached, reused.source_run_id) == ("succeeded", True, run.id)
+    assert (reused.row_count, reused.page_count) == (10, 3)
+    assert db.query(ReportRunPage).filter(ReportRunPage.run_id == reused.id).count() == 0
+    assert ReportExecutionService.get_page(db, reused, 3) == pages[2]
+    
+    # Changed data: a new run is queued
+    db.add(Lead(company_id=company.id, first_name="Lead 10", status="new"))
+    db.commit()
+    fresh = ReportExecutionService.submit(report, db, user_id=admin.id)
+    assert (fresh.status, fresh.cached) == ("queued", False)
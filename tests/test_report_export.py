@@ -0,0 +1,114 @@
+"""
+Report exports: streamed CSV and NDJSON, export files and download tokens
+"""
+
+import csv
+import io
+import json
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from app.config import settings
+from app.models import Lead
+from app.models.report import Report
+from app.services import report_export_service
+
+STATUSES = ["new", "contacted", "qualified"]
+
+
+@pytest.fixture
+def leads_report(db, company, admin, monkeypatch):
+    """Leads report over 50 leads; small fetch and chunk sizes so exports take many round trips"""
+    monkeypatch.setattr(settings, "REPORT_EXPORT_CHUNK_SIZE", 7)
+    monkeypatch.setattr(report_export_service, "CHUNK_BYTES", 256)
+    db.add_all([
+        Lead(
+            company_id=company.id,
+            first_name=f'Lead "{i}"',
+            last_name="Smith, Jr." if i % 2 else None,
+            status=STATUSES[i % 3],
+            source="web" if i % 4 else None
+        )
+        for i in range(50)
+    ])
+    report = Report(name="Leads / export", report_type="leads", company_id=company.id, created_by=admin.id)
+    db.add(report)
+    db.commit()
+    return report
+
+
+def _expected_rows(db, company, status=None):
+    query = db.query(Lead).filter(Lead.company_id == company.id).order_by(Lead.id)
+    if status:
+        query = query.filter(Lead.status == status)
+    return [
+        {
+            "id": lead.id,
+            "name": " ".join(part for part in (lead.first_name, lead.last_name) if part),
+            "status": lead.status,
+            "source": lead.source,
+        }
+        for lead in query
+    ]
+
+
+def _run(client, auth_headers, report, **request):
+    return client.post(f"/api/reports/{report.id}/run", json=request, headers=auth_headers)
+
+
+def test_csv_export_is_streamed(client, db, company, auth_headers, leads_report):
+    response = _run(client, auth_headers, leads_report, format="csv")
+    
+    assert response.status_code == 200, response.text
+    assert response.headers["content-type"].startswith("text/csv")
+    assert response.headers["content-disposition"].startswith('attachment; filename="Leads___export-')
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    expected = [
+        {key: "" if value is None else str(value) for key, value in row.items()}
+        for row in _expected_rows(db, company)
+    ]
+    assert rows == expected
+
+
+def test_ndjson_export_applies_filters(client, db, company, auth_headers, leads_report):
+    response = _run(client, auth_headers, leads_report, format="ndjson", filters={"status": "qualified"})
+    
+    assert response.status_code == 200, response.text
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert rows == _expected_rows(db, company, status="qualified")
+    assert len(rows) == 16
+
+
+def test_unknown_format_is_rejected(client, auth_headers, leads_report):
+    response = _run(client, auth_headers, leads_report, format="pdf")
+    assert response.status_code == 400
+
+
+def test_file_delivery_download_token(client, db, company, auth_headers, leads_report, tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "REPORT_EXPORT_DIR", str(tmp_path))
+    monkeypatch.setattr(settings, "REPORT_DOWNLOAD_TTL_SECONDS", 60)
+    streamed = _run(client, auth_headers, leads_report, format="csv").content
+    
+    response = _run(client, auth_headers, leads_report, format="csv", delivery="file")
+    assert response.status_code == 200, response.text
+    download_url = response.json()["download_url"]
+    token = download_url.rsplit("/", 1)[1]
+    
+    # The token is the credential: no auth headers needed
+    download = client.get(download_url)
+    assert download.status_code == 200
+    assert download.headers["content-type"].startswith("text/csv")
+    assert download.content == streamed
+    
+    assert client.get("/api/reports/downloads/unknown-token").status_code == 404
+    assert client.get("/api/reports/downloads/..%2F" + token).status_code == 404
+    
+    # Past its TTL the token no longer resolves, and the files are purged
+    later = time.time() + 61
+    monkeypatch.setattr(report_export_service, "time", SimpleNamespace(time=lambda: later))
+    assert client.get(download_url).status_code == 404
+    assert report_export_service.ReportExportService.purge_expired() == 1
+    assert list(tmp_path.iterdir()) == []
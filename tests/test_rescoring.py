@@ -0,0 +1,110 @@
+"""
+Incremental rescoring: writes mark records dirty, a worker pass rescores them
+"""
+
+from datetime import datetime, timedelta
+
+from app.config import settings
+from app.models import Customer, Lead
+from app.models.score_dirty_mark import ScoreDirtyMark
+from app.services.rescoring_service import CUSTOMER, LEAD, RescoringService
+from app.utils.health_score import HealthScoreCalculator
+from app.utils.lead_scoring import LeadScoringAlgorithm
+from conftest import make_activity
+
+
+def _log_activity(client, auth_headers, company, days_ago, **links):
+    response = client.post(f"/api/companies/{company.id}/activities", json={
+        "activity_type": "meeting",
+        "title": "Follow-up",
+        "outcome": "positive",
+        "activity_date": (datetime.now() - timedelta(days=days_ago, hours=1)).isoformat(),
+        **links
+    }, headers=auth_headers)
+    assert response.status_code == 201, response.text
+
+
+def _marks(db, company):
+    db.expire_all()
+    return sorted(
+        (mark.entity_type, mark.entity_id)
+        for mark in db.query(ScoreDirtyMark).filter(ScoreDirtyMark.company_id == company.id)
+    )
+
+
+def _after_debounce():
+    return datetime.utcnow() + timedelta(seconds=settings.RESCORING_DEBOUNCE_SECONDS + 1)
+
+
+def test_worker_pass_rescores_dirty_records(client, db, company, admin, auth_headers):
+    leads = [
+        Lead(company_id=company.id, first_name=f"Lead {i}", email=f"lead{i}@example.com",
+             source="Referral", status="new", lead_score=-1)
+        for i in range(3)
+    ]
+    customers = [
+        Customer(company_id=company.id, name=f"Customer {i}", status="active", health_score=None)
+        for i in range(2)
+    ]
+    db.add_all(leads + customers)
+    db.flush()
+    
+    # Existing history, written without marks
+    for days_ago in (3, 20, 45):
+        for lead in leads:
+            db.add(make_activity(company, admin, days_ago, lead_id=lead.id, activity_type="call"))
+        for customer in customers:
+            db.add(make_activity(company, admin, days_ago, customer_id=customer.id, activity_type="call"))
+    db.commit()
+    assert _marks(db, company) == []
+    
+    # Repeated writes to a record coalesce into one mark
+    _log_activity(client, auth_headers, company, 1, lead_id=leads[0].id)
+    _log_activity(client, auth_headers, company, 5, lead_id=leads[0].id, customer_id=customers[0].id)
+    _log_activity(client, auth_headers, company, 2, lead_id=leads[1].id)
+    dirty = [(CUSTOMER, customers[0].id), (LEAD, leads[0].id), (LEAD, leads[1].id)]
+    assert _marks(db, company) == dirty
+    
+    # Within the quiet period nothing is taken
+    RescoringService.process_due(db)
+    assert _marks(db, company) == dirty
+    
+    RescoringService.process_due(db, now=_after_debounce())
+    assert _marks(db, company) == []
+    
+    db.expire_all()
+    for lead in leads[:2]:
+        assert lead.lead_score == LeadScoringAlgorithm.calculate_lead_score(lead, db), lead.id
+    assert customers[0].health_score == HealthScoreCalculator.calculate_health_score(customers[0], db)
+    
+    # Records that were not marked keep their stale scores
+    assert leads[2].lead_score == -1
+    assert customers[1].health_score is None
+    
+    # The batch scorers agree with the rescored values
+    assert LeadScoringAlgorithm.batch_update_lead_scores(company.id, db, [leads[0].id, leads[1].id])["updated"] == 0
+    assert HealthScoreCalculator.batch_update_health_scores(company.id, db, [customers[0].id])["updated"] == 0
+
+
+def test_mark_during_rescoring_is_kept(db, company, monkeypatch):
+    lead = Lead(company_id=company.id, first_name="Racing", status="new", lead_score=-1)
+    db.add(lead)
+    db.commit()
+    RescoringService.mark_leads(db, company.id, [lead.id])
+    db.commit()
+    
+    batch_update_lead_scores = LeadScoringAlgorithm.batch_update_lead_scores
+    
+    def write_while_scoring(company_id, session, lead_ids=None):
+        stats = batch_update_lead_scores(company_id, session, lead_ids)
+        RescoringService.mark_leads(session, company_id, [lead.id])
+        return stats
+    
+    monkeypatch.setattr(LeadScoringAlgorithm, "batch_update_lead_scores", staticmethod(write_while_scoring))
+    RescoringService.process_due(db, now=_after_debounce())
+    assert _marks(db, company) == [(LEAD, lead.id)]
+    
+    # The next pass picks it up
+    monkeypatch.undo()
+    RescoringService.process_due(db, now=_after_debounce())
+    assert _marks(db, company) == []
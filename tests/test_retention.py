@@ -0,0 +1,76 @@
+"""
+Retention: archival and chunked deletion of expired logs
+"""
+
+from datetime import datetime, timedelta
+
+from sqlalchemy import func
+
+from app.config import settings
+from app.models import Log
+from app.services.log_service import get_log_statistics, log_writer
+from app.services.retention_service import RetentionService
+from conftest import direct_log_statistics
+
+WINDOWS = (1, 3, 5, 7, 30)
+
+
+def _assert_statistics_match(db):
+    for days in WINDOWS:
+        stats = get_log_statistics(db, days=days)
+        stats.pop("period_days")
+        assert stats == direct_log_statistics(db, days), days
+
+
+def test_purge_archives_expired_logs_and_keeps_statistics_exact(db, tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "ARCHIVE_DIR", str(tmp_path))
+    monkeypatch.setattr(settings, "RETENTION_BATCH_PAUSE_MS", 0)
+    
+    # Cutoff in the middle of an hour, four days ago: that hour keeps some
+    # of its logs and loses the others
+    cutoff = (datetime.utcnow() - timedelta(days=4)).replace(minute=30, second=0, microsecond=0)
+    rows = []
+    for i in range(60):
+        row = {
+            "level": ["INFO", "WARNING", "ERROR"][i % 3],
+            "category": ["Auth", "Email", "System"][i % 3],
+            "action": "Login Failed" if i % 4 == 0 else "Other",
+            "message": f"Retention log {i}",
+            "status": "Failed" if i % 5 == 0 else "Success",
+            "details": {"n": i},
+            # Minutes 5..55 of the cutoff hour, then hours before and after it
+            "timestamp": cutoff + timedelta(minutes=(i % 11) * 5 - 25, hours=(i // 11) * 17 - 34)
+        }
+        log_writer.write(row, sync=True)
+        rows.append(row)
+    
+    expired = sorted(row["message"] for row in rows if row["timestamp"] < cutoff)
+    assert 0 < len(expired) < len(rows)
+    # Logs written by other tests may be expired too
+    expired_ids = [log_id for (log_id,) in db.query(Log.id).filter(Log.timestamp < cutoff).order_by(Log.id)]
+    _assert_statistics_match(db)
+    
+    stats = RetentionService.purge("logs", cutoff, archive=True, batch_size=7)
+    
+    assert stats["deleted"] == stats["archived"] == len(expired_ids)
+    assert stats["batches"] > 1
+    assert db.query(func.count(Log.id)).filter(Log.timestamp < cutoff).scalar() == 0
+    assert db.query(func.count(Log.id)).filter(Log.message.like("Retention log %")).scalar() == len(rows) - len(expired)
+    _assert_statistics_match(db)
+    
+    archived = []
+    for month in RetentionService.archived_months("logs"):
+        month_rows = list(RetentionService.read_archive("logs", month))
+        assert [row["id"] for row in month_rows] == sorted(row["id"] for row in month_rows)
+        assert all(datetime.fromisoformat(row["timestamp"]).strftime("%Y-%m") == month for row in month_rows)
+        archived.extend(month_rows)
+    
+    assert sorted(row["id"] for row in archived) == expired_ids
+    assert all(datetime.fromisoformat(row["timestamp"]) < cutoff for row in archived)
+    assert sorted(row["message"] for row in archived if row["message"].startswith("Retention log ")) == expired
+    by_message = {row["message"]: row for row in rows}
+    for row in archived:
+        if row["message"] not in by_message:
+            continue
+        original = by_message[row["message"]]
+        assert (row["level"], row["category"], row["details"]) == (original["level"], original["category"], original["details"])
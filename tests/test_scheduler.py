@@ -0,0 +1,122 @@
+"""
+Cron schedules and the scheduler's leader election
+"""
+
+import threading
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.config import settings
+from app.database import SessionLocal
+from app.models import Job
+from app.models.scheduled_job import ScheduledJob
+from app.services import scheduler_service
+from app.services.scheduler_service import SchedulerService
+from app.utils.cron import CronSchedule
+
+
+@pytest.mark.parametrize("expression, moment, expected", [
+    # Steps
+    ("*/15 * * * *", "2026-10-16 10:07", "2026-10-16 10:15"),
+    ("*/15 * * * *", "2026-10-16 23:45", "2026-10-17 00:00"),
+    ("0-30/10 9 * * *", "2026-10-16 09:25", "2026-10-16 09:30"),
+    ("0-30/10 9 * * *", "2026-10-16 09:30", "2026-10-17 09:00"),
+    ("5/20 * * * *", "2026-10-16 10:26", "2026-10-16 10:45"),
+    # Ranges and lists (weekdays 9-17, Friday evening -> Monday morning)
+    ("0 9-17 * * 1-5", "2026-10-16 17:00", "2026-10-19 09:00"),
+    ("0 9-17 * * 1-5", "2026-10-16 12:30", "2026-10-16 13:00"),
+    ("0 0 1,15 * *", "2026-10-02 00:00", "2026-10-15 00:00"),
+    # Feb 29 only exists in leap years
+    ("0 0 29 2 *", "2026-03-01 00:00", "2028-02-29 00:00"),
+    # Day of month OR day of week when both are restricted (the 13th or a Friday)
+    ("0 12 13 * 5", "2026-10-01 00:00", "2026-10-02 12:00"),
+    ("0 12 13 * 5", "2026-10-09 12:00", "2026-10-13 12:00"),
+    ("0 12 13 * 5", "2026-10-13 12:00", "2026-10-16 12:00"),
+    # Only day of week restricted: Fridays only, the 13th does not count
+    ("0 12 * * 5", "2026-10-09 12:00", "2026-10-16 12:00"),
+    # 7 is Sunday too; shortcuts
+    ("0 0 * * 7", "2026-10-16 00:00", "2026-10-18 00:00"),
+    ("@monthly", "2026-10-16 08:00", "2026-11-01 00:00"),
+])
+def test_cron_next_after(expression, moment, expected):
+    moment = datetime.strptime(moment, "%Y-%m-%d %H:%M")
+    assert CronSchedule(expression).next_after(moment) == datetime.strptime(expected, "%Y-%m-%d %H:%M")
+
+
+@pytest.mark.parametrize("expression", ["* * * *", "60 * * * *", "* * * * 8", "5-1 * * * *", "*/0 * * * *"])
+def test_cron_rejects_invalid_expressions(expression):
+    with pytest.raises(ValueError):
+        CronSchedule(expression)
+
+
+def test_cron_that_never_fires():
+    with pytest.raises(ValueError):
+        CronSchedule("0 0 31 2 *").next_after(datetime(2026, 1, 1))
+
+
+def test_lease_is_taken_over_after_expiry(db):
+    # Far from any lease other tests may hold
+    now = datetime.utcnow() + timedelta(days=30)
+    lease = timedelta(seconds=settings.SCHEDULER_LEASE_SECONDS)
+    assert SchedulerService.acquire_lease(db, "a", now=now)
+    
+    # Renewed by its holder, refused to others until it expires
+    assert not SchedulerService.acquire_lease(db, "b", now=now + lease / 2)
+    assert SchedulerService.acquire_lease(db, "a", now=now + lease / 2)
+    assert not SchedulerService.acquire_lease(db, "b", now=now + lease)
+    
+    takeover = now + lease / 2 + lease + timedelta(seconds=1)
+    assert SchedulerService.acquire_lease(db, "b", now=takeover)
+    assert not SchedulerService.acquire_lease(db, "a", now=takeover)
+    
+    db.expire_all()
+    row = db.query(scheduler_service.SchedulerLease).filter_by(name=scheduler_service.LEADER_LEASE).one()
+    assert (row.holder, row.acquired_at, row.expires_at) == ("b", takeover, takeover + lease)
+    
+    # Released on shutdown: taken over at once
+    SchedulerService.release_lease(db, "b")
+    assert SchedulerService.acquire_lease(db, "a", now=datetime.utcnow())
+    SchedulerService.release_lease(db, "a")
+
+
+def test_due_job_fires_once_when_two_schedulers_race(db, monkeypatch):
+    job_id = f"test_race_{datetime.utcnow().timestamp()}"
+    monkeypatch.setattr(scheduler_service, "SCHEDULED_JOBS", {
+        job_id: {"id": job_id, "name": "Race", "description": "", "schedule": "*/5 * * * *", "enabled": True, "func": None}
+    })
+    now = datetime.utcnow()
+    SchedulerService.sync(db, now=now - timedelta(minutes=10))
+    assert db.query(ScheduledJob).filter(ScheduledJob.id == job_id).one().next_run_at <= now
+    
+    # Both schedulers read the due job before either claims it
+    both_read = threading.Barrier(2, timeout=10)
+    next_after = CronSchedule.next_after
+    
+    def next_after_in_step(self, moment):
+        both_read.wait()
+        return next_after(self, moment)
+    
+    monkeypatch.setattr(CronSchedule, "next_after", next_after_in_step)
+    fired = {}
+    
+    def tick(holder):
+        session = SessionLocal()
+        try:
+            fired[holder] = SchedulerService.fire_due(session, now=now)
+        finally:
+            session.close()
+    
+    threads = [threading.Thread(target=tick, args=(holder,)) for holder in ("a", "b")]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    
+    assert sorted(fired.values()) == [[], [job_id]]
+    runs = db.query(Job).filter(Job.name == scheduler_service.JOB_NAME, Job.payload["job_id"].as_string() == job_id)
+    assert runs.count() == 1
+    db.expire_all()
+    row = db.query(ScheduledJob).filter(ScheduledJob.id == job_id).one()
+    assert row.next_run_at > now
+    assert row.last_job_id == runs.one().id
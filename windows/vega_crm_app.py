@@ -106,4 +106,7 @@ def main():
 
 
 if __name__ == "__main__":
+    # Process pools (bulk duplicate scan) re-launch this EXE as workers
+    import multiprocessing
+    multiprocessing.freeze_support()
     main()